@@ -39,6 +39,12 @@ __all__ = (
     'SUPPORTED_SONG_FORMATS',
     'SUPPORTED_LYRICS_FORMATS',
     'CONFIG',
+    'SEEK_INDEX_FILE',
+    'PROFILE_FILE',
+    'LIBRARY_FILE',
+    'WAVEFORM_DIR',
+    'DOWNLOAD_QUEUE_FILE',
+    'DOWNLOAD_STAGING_DIR',
     'logger',
     'config',
     'get_song_list',
@@ -102,6 +108,12 @@ LYRICS_ICON: str = os.path.join(BASE_DIR, 'player', 'images', 'song-lyrics.png')
 LOGO: str = os.path.join(BASE_DIR, 'player', 'images', 'applogo.png')
 PLAYERUI: str = os.path.join(BASE_DIR, 'player', 'window', 'player.ui')
 CONFIG_FILE = os.path.join(BASE_DIR, '.config.json')
+SEEK_INDEX_FILE: str = os.path.join(BASE_DIR, '.seekindex.json')
+PROFILE_FILE: str = os.path.join(BASE_DIR, '.tick_profile.txt')
+LIBRARY_FILE: str = os.path.join(BASE_DIR, '.library.db')
+WAVEFORM_DIR: str = os.path.join(BASE_DIR, '.waveforms')
+DOWNLOAD_QUEUE_FILE: str = os.path.join(BASE_DIR, '.downloads.json')
+DOWNLOAD_STAGING_DIR: str = os.path.join(BASE_DIR, '.downloading')
 ACTIONS_DIR: str = get_actions_dir(BASE_DIR)
 LYRICS_DIR: str = lyrics_dir(BASE_DIR)
 THEMECLR: str = 'rgb(0,206,209)'
@@ -147,6 +159,17 @@ CONFIG: Dict[Any, Any] = {
     'volume': 100,
     'is_muted': False,
     'last_song': {},
+    'catch_up_actions': True,
+    'stream_buffer_mb': 4,
+    'pcm_cache_mb': 128,
+    'normalize_loudness': True,
+    'reference_loudness': -18,
+    'download_workers': 3,
+    'download_retries': 3,
+    'download_connections': 4,
+    'transcode': True,
+    'transcode_codec': 'libmp3lame',
+    'transcode_bitrate': '192k',
 }
 
 SUPPORTED_SONG_FORMATS: Tuple[str, ...] = (
@@ -168,6 +191,17 @@ SUPPORTED_LYRICS_FORMATS: Tuple[str, ...] = (
 #          "song": "12 Stones - Anthem for the Underdog.mp3",
 #          "timestamp": 8.11
 #      },
+#      "catch_up_actions": true,
+#      "stream_buffer_mb": 4, (Memory ceiling of a playing song)
+#      "pcm_cache_mb": 128, (Memory for the songs played last, 0 turns it off)
+#      "normalize_loudness": true, (Bring every song to the same loudness)
+#      "reference_loudness": -18, (In LUFS)
+#      "download_workers": 3, (Downloads that run at once)
+#      "download_retries": 3, (Attempts after a download failed on the connection)
+#      "download_connections": 4, (Connections of a big file, 1 downloads it in order)
+#      "transcode": true, (Encode downloads with ffmpeg, off keeps them as they are)
+#      "transcode_codec": "libmp3lame", (libmp3lame, aac, libopus, libvorbis or flac)
+#      "transcode_bitrate": "192k",
 #
 #      -- DELAYS --
 #      "songs/12 Stones - Anthem for the Underdog.mp3.delay": 1.0
@@ -175,7 +209,7 @@ SUPPORTED_LYRICS_FORMATS: Tuple[str, ...] = (
 
 
 logger = Logger(1, LOG_DIR)
-config = Handler(CONFIG_FILE, CONFIG)
+config = Handler(CONFIG_FILE, CONFIG, cached=True)
 if not os.path.exists(CONFIG_FILE):
     config.init()
 
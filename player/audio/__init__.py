@@ -0,0 +1,7 @@
+from .resources import *  # noqa
+from .pcmcache import *  # noqa
+from .stream import *  # noqa
+from .samples import *  # noqa
+from .prefetch import *  # noqa
+from .gapless import *  # noqa
+from .engine import *  # noqa
@@ -0,0 +1,212 @@
+from __future__ import annotations
+from pyglet.media import (
+    Player,
+    load,
+)
+from pyglet.media.codecs import (
+    StreamingSource,
+    Source,
+)
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+)
+from .resources import (
+    ResourceCounter,
+    ResourceStats,
+)
+from .prefetch import (
+    Prefetcher,
+    open_source,
+)
+from .gapless import TrackGroup
+from .stream import (
+    BUFFER_SIZE,
+    Reopen,
+)
+from .pcmcache import PCMCache
+
+
+__all__ = (
+    'PlaybackEngine',
+)
+
+
+class PlaybackEngine:
+    """A `PlaybackEngine` plays the songs on a single player for as long as it lives.
+
+    Changing the song swaps the source of that player and releases the previous
+    one right away, nothing is left for the garbage collector. The song that follows
+    is prefetched and queued behind the current one (see `PlaybackEngine.prepare`).
+    Every song is streamed, the memory it takes doesn't grow with its length.
+    What the engine holds is counted in `PlaybackEngine.resources`
+    """
+    def __init__(self, loader: Callable[[str], Source] = load,
+                 prefetcher: Optional[Prefetcher] = None,
+                 player: Optional[Player] = None,
+                 buffer_size: int = BUFFER_SIZE,
+                 cache: Optional[PCMCache] = None,
+                 reopen: Optional[Reopen] = None) -> None:
+        """
+        :param loader: What opens the songs, defaults to `pyglet.media.load`
+        :type loader: Callable[[str], Source], optional
+        :param prefetcher: What opens the next songs in the background,
+        defaults to a `Prefetcher` with the same loader, buffer size, cache and reopen
+        :type prefetcher: Optional[Prefetcher], optional
+        :param player: The player to use, defaults to a new one
+        :type player: Optional[Player], optional
+        :param buffer_size: The memory ceiling of a song in bytes, the songs are
+        streamed through ring buffers of that size, defaults to `BUFFER_SIZE`
+        :type buffer_size: int, optional
+        :param cache: Where the songs that were played are kept decoded, so playing
+        them again doesn't decode them again, defaults to None
+        :type cache: Optional[PCMCache], optional
+        :param reopen: What seeks a song by opening a new decoder right at the time,
+        from a seek index of the file, instead of seeking the decoder, defaults to None
+        :type reopen: Optional[Reopen], optional
+        """
+        self._loader = loader
+        self.prefetcher = prefetcher or Prefetcher(loader, buffer_size=buffer_size, cache=cache,
+                                                   reopen=reopen)
+        self.resources: ResourceCounter = self.prefetcher.resources
+        self._player = player or Player()
+        self.resources.add(players=1)
+        self._group = TrackGroup()
+        # A song that can't follow the current one gaplessly (another audio format)
+        self._refused: Optional[str] = None
+        self._closed = False
+
+    @property
+    def player(self) -> Player:
+        return self._player
+
+    @property
+    def current(self) -> Optional[str]:
+        return self._group.current
+
+    @property
+    def upcoming(self) -> Tuple[str, ...]:
+        return self._group.upcoming
+
+    @property
+    def length(self) -> float:
+        """
+        :return: The seconds of the current song by its source, exact once it was
+        read to its end, 0 if nothing plays
+        :rtype: float
+        """
+        return self._group.length()
+
+    @property
+    def time(self) -> float:
+        """
+        :return: The seconds played of the current song
+        :rtype: float
+        """
+        return self._group.position(self._player.time)
+
+    @property
+    def volume(self) -> float:
+        return self._player.volume
+
+    @volume.setter
+    def volume(self, volume: float) -> None:
+        self._player.volume = volume
+
+    @property
+    def stats(self) -> ResourceStats:
+        return self.resources.snapshot()
+
+    def play(self) -> None:
+        self._player.play()
+
+    def pause(self) -> None:
+        self._player.pause()
+
+    def seek(self, seconds: float) -> None:
+        """
+        :param seconds: Where to go in the current song
+        :type seconds: float
+        """
+        self._player.seek(self._group.start + max(0, seconds))
+
+    def open(self, path: str) -> str:
+        """Play a song from its start instead of the current one
+
+        :param path: The path of the song
+        :type path: str
+        :return: Where the source came from: `queued` (it was next), `prefetched` or `loaded`
+        :rtype: str
+        """
+        if self._group.upcoming[:1] == (path,) and self._group.skip() == path:
+            self.seek(0)
+            return 'queued'
+
+        prefetched = self.prefetcher.path == path
+        # A prefetch that is still running is closer to the end than a new load
+        source = self.prefetcher.take(path, timeout=None)
+        if source is None:
+            source = open_source(path, self._loader, 0, self.resources,
+                                 self.prefetcher.buffer_size, self.prefetcher.cache,
+                                 self.prefetcher.reopen)
+        group = TrackGroup()
+        if not group.append(path, source) and isinstance(source, StreamingSource):
+            # Nothing to play in it
+            source.delete()
+        self._swap(group)
+        self._refused = None
+        return 'prefetched' if prefetched else 'loaded'
+
+    def _swap(self, group: TrackGroup) -> None:
+        old = self._group
+        self._group = group
+        had_source = self._player.source is not None
+        self._player.queue(group)
+        if had_source:
+            # Leave the old group for the new one right away, the clock starts over
+            self._player.next_source()
+        old.close()
+
+    def follow(self) -> Tuple[str, ...]:
+        """Move on to the song the player went on to by itself
+
+        :return: The songs that ended
+        :rtype: Tuple[str, ...]
+        """
+        return self._group.advance(self._player.time)
+
+    def prepare(self, path: str) -> None:
+        """Make a song the one that follows the current one. It's prefetched first and
+        queued once it's ready, call it again until `PlaybackEngine.upcoming` has it
+
+        :param path: The path of the song
+        :type path: str
+        """
+        upcoming = self._group.upcoming
+        if upcoming[:1] == (path,) or path == self._refused:
+            return
+        if upcoming and self._group.drop_upcoming():
+            # The player already buffered the song that was next before
+            self._player.seek(self._player.time)
+        if self.prefetcher.path != path:
+            self.prefetcher.prefetch(path)
+        elif self.prefetcher.ready:
+            source = self.prefetcher.take(path)
+            if source is not None and not self._group.append(path, source):
+                # It gets a player source of its own once it's its turn
+                self._refused = path
+                if isinstance(source, StreamingSource):
+                    source.delete()
+                self.prefetcher.prefetch(path)
+
+    def close(self) -> None:
+        """Stop the playback and release everything
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.prefetcher.shutdown()
+        self._group.close()
+        self._player.delete()
+        self.resources.add(players=-1)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+import threading
+from pyglet.media.codecs import (
+    StreamingSource,
+    SourceGroup,
+    AudioData,
+    Source,
+)
+from typing import (
+    Optional,
+    Tuple,
+    List,
+)
+
+
+__all__ = (
+    'TrackGroup',
+)
+
+
+# Seconds a track may run over its estimated length before it's taken as
+# over anyway, when the player did not read it to the end (no audio device)
+OVERRUN = 1.0
+
+
+class _Track:
+    __slots__ = ('key', 'source', 'length', 'read', 'exact')
+
+    def __init__(self, key: str, source: Source) -> None:
+        self.key = key
+        self.source = source
+        self.length = source.duration or 0.0
+        # Bytes handed to the player so far
+        self.read = 0
+        # Once the source ran out, `length` is what it really played
+        self.exact = False
+
+
+class TrackGroup(SourceGroup):
+    """A `TrackGroup` is the one source a player plays, made of tracks that
+    are played back to back. The data of the next track follows the data of
+    the previous one in the same buffer, so there's no gap and no click between them.
+
+    The player's clock runs across the tracks. The group knows where every track
+    starts on it, `TrackGroup.position` gives the time in the current track and
+    `TrackGroup.advance` tells when the player is in the next one.
+
+    The player's audio thread reads the data while the owner queues and drops tracks,
+    so every access goes through a lock. All the tracks must have the same audio
+    format (`TrackGroup.append` refuses the others)
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        # The first track is the one that plays
+        self._tracks: List[_Track] = []
+        # The track the player reads from, it's ahead of the one
+        # that is heard by the size of the audio buffers
+        self._reading = 0
+        # Where the first track starts on the player's clock
+        self._start = 0.0
+        self.is_player_source = False
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    @property
+    def current(self) -> Optional[str]:
+        """
+        :return: The key of the track that plays
+        :rtype: Optional[str]
+        """
+        return self._tracks[0].key if self._tracks else None
+
+    @property
+    def upcoming(self) -> Tuple[str, ...]:
+        """
+        :return: The keys of the tracks queued after the current one
+        :rtype: Tuple[str, ...]
+        """
+        return tuple(track.key for track in self._tracks[1:])
+
+    @property
+    def start(self) -> float:
+        """
+        :return: Where the current track starts on the player's clock
+        :rtype: float
+        """
+        return self._start
+
+    def length(self) -> float:
+        """
+        :return: The length of the current track in seconds,
+        estimated until it's read to the end
+        :rtype: float
+        """
+        return self._tracks[0].length if self._tracks else 0.0
+
+    def position(self, time: float) -> float:
+        """
+        :param time: The time of the player's clock
+        :type time: float
+        :return: The time in the current track
+        :rtype: float
+        """
+        return max(0.0, time - self._start)
+
+    def append(self, key: str, source: Source) -> bool:
+        """Queue a track after the others
+
+        :param key: What the track is known by, usually its path
+        :type key: str
+        :param source: The source of the track
+        :type source: Source
+        :return: `False` if the track has another audio format than the group, it's not added
+        :rtype: bool
+        """
+        if source.audio_format is None:
+            return False
+        with self._lock:
+            if self.audio_format is None:
+                self.audio_format = source.audio_format
+            elif source.audio_format != self.audio_format:
+                return False
+            self._tracks.append(_Track(key, source.get_queue_source()))
+            self.duration = self._end(len(self._tracks) - 1)
+        return True
+
+    def _end(self, index: int) -> float:
+        return self._start + sum(track.length for track in self._tracks[:index + 1])
+
+    def drop_upcoming(self) -> bool:
+        """Forget the tracks queued after the current one
+
+        :return: `True` if the player already read data of them, the player
+        must then seek to where it is to throw that data away
+        :rtype: bool
+        """
+        with self._lock:
+            read = self._reading > 0
+            for track in self._tracks[1:]:
+                self._release(track)
+            del self._tracks[1:]
+            if read:
+                self._reading = 0
+            self.duration = self._end(0) if self._tracks else self._start
+        return read
+
+    def advance(self, time: float) -> Tuple[str, ...]:
+        """Move to the track that plays at `time`. The tracks that ended are released
+
+        :param time: The time of the player's clock
+        :type time: float
+        :return: The keys of the tracks that ended
+        :rtype: Tuple[str, ...]
+        """
+        ended: List[str] = []
+        with self._lock:
+            # The last track stays, even when it's over, it's still the current one
+            while len(self._tracks) > 1:
+                track = self._tracks[0]
+                end = self._start + track.length
+                if time < end or not (track.exact or time >= end + OVERRUN):
+                    break
+                del self._tracks[0]
+                self._release(track)
+                self._start = end
+                self._reading = max(0, self._reading - 1)
+                ended.append(track.key)
+        return tuple(ended)
+
+    def skip(self) -> Optional[str]:
+        """Drop the current track right away, the next one becomes the current one.
+        The player must then seek to `TrackGroup.start` to throw away what it buffered
+
+        :return: The key of the new current track, `None` if there's no next track
+        :rtype: Optional[str]
+        """
+        with self._lock:
+            if len(self._tracks) < 2:
+                return None
+            track = self._tracks.pop(0)
+            self._release(track)
+            self._start += track.length
+            self._reading = max(0, self._reading - 1)
+            return self._tracks[0].key
+
+    def close(self) -> None:
+        """Release every track. The group must not be played anymore
+        """
+        with self._lock:
+            for track in self._tracks:
+                self._release(track)
+            self._tracks.clear()
+            self._reading = 0
+
+    @staticmethod
+    def _release(track: _Track) -> None:
+        if isinstance(track.source, StreamingSource):
+            track.source.delete()
+
+    def seek(self, time: float) -> None:
+        """Called by the player with the time it seeks to on its clock,
+        it's always in the current track
+        """
+        with self._lock:
+            if not self._tracks:
+                return
+            offset = self.position(time)
+            first = self._tracks[0]
+            first.source.seek(offset)
+            if self.audio_format is not None:
+                first.read = int(offset * self.audio_format.bytes_per_second)
+            for track in self._tracks[1:self._reading + 1]:
+                track.source.seek(0)
+                track.read = 0
+            self._reading = 0
+
+    def get_audio_data(self, num_bytes: int,
+                       compensation_time: float = 0.0) -> Optional[AudioData]:
+        if self.audio_format is None:
+            return None
+        bytes_per_second = self.audio_format.bytes_per_second
+        with self._lock:
+            chunks: List[bytes] = []
+            size = 0
+            timestamp: Optional[float] = None
+            while size < num_bytes and self._reading < len(self._tracks):
+                track = self._tracks[self._reading]
+                data = track.source.get_audio_data(num_bytes - size)
+                if data is None or not data.length:
+                    # The track is over, now its real length is known
+                    if not track.exact:
+                        track.length = track.read / bytes_per_second
+                        track.exact = True
+                    self._reading += 1
+                    continue
+                if timestamp is None:
+                    timestamp = self._end(self._reading - 1) + track.read / bytes_per_second
+                chunks.append(data.data[:data.length])
+                size += data.length
+                track.read += data.length
+            if timestamp is None:
+                return None
+            self.duration = self._end(len(self._tracks) - 1)
+        return AudioData(b''.join(chunks), size, timestamp, size / bytes_per_second, [])
@@ -0,0 +1,236 @@
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from pyglet.media.codecs import (
+    StreamingSource,
+    AudioFormat,
+    AudioData,
+)
+from typing import (
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from .resources import ResourceCounter
+
+
+__all__ = (
+    'CachedPCM',
+    'CacheStats',
+    'PCMCache',
+    'MemorySource',
+    'track_key',
+    'CACHE_SIZE',
+)
+
+
+# Default memory budget, a few songs of CD audio
+CACHE_SIZE = 128 * 2 ** 20
+
+# Path, size and modification time, a file that changed is another track
+TrackKey = Tuple[str, int, int]
+
+
+def track_key(path: str) -> Optional[TrackKey]:
+    """
+    :param path: The path of a track
+    :type path: str
+    :return: What the track is cached as, None if it can't be read
+    :rtype: Optional[TrackKey]
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+class CachedPCM(NamedTuple):
+    audio_format: AudioFormat
+    # The whole track, decoded
+    data: bytes
+
+    @property
+    def duration(self) -> float:
+        return len(self.data) / self.audio_format.bytes_per_second
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    # Tracks that were dropped to make room for others
+    evictions: int
+    tracks: int
+    size: int
+    budget: int
+    # Held for the tracks that are being recorded
+    reserved: int
+
+    def report(self) -> str:
+        """
+        :return: A line for every count
+        :rtype: str
+        """
+        return '\n'.join((
+            f"{'cache hits':<16}{self.hits:>12}",
+            f"{'cache misses':<16}{self.misses:>12}",
+            f"{'cache evictions':<16}{self.evictions:>12}",
+            f"{'cached tracks':<16}{self.tracks:>12}",
+            f"{'cached (MB)':<16}{self.size / 2 ** 20:>12.2f}",
+            f"{'recording (MB)':<16}{self.reserved / 2 ** 20:>12.2f}",
+        ))
+
+
+class PCMCache:
+    """A `PCMCache` keeps the decoded audio of the tracks that were played last, under a
+    memory budget. The track that was used the longest time ago is dropped first.
+
+    A track is put in the cache by the `BufferedSource` that decoded it, once it went
+    through the whole track, and played back from memory by a `MemorySource`. While
+    it's recorded, the source holds its part of the budget with `PCMCache.reserve`,
+    the tracks being recorded and the cached ones are all within the budget.
+    Replaying a song, going back to the previous one or looping over a part of
+    it doesn't touch the file or the decoder again
+    """
+    def __init__(self, budget: int = CACHE_SIZE) -> None:
+        """
+        :param budget: The most bytes of audio it holds, defaults to `CACHE_SIZE`
+        :type budget: int, optional
+        """
+        self.budget = budget
+        self._tracks: OrderedDict[TrackKey, CachedPCM] = OrderedDict()
+        self._size = 0
+        self._reserved = 0
+        self._hits = self._misses = self._evictions = 0
+        # Sources are opened and decoded in background threads
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def __contains__(self, __o: object) -> bool:
+        return __o in self._tracks
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions,
+                              len(self._tracks), self._size, self.budget, self._reserved)
+
+    def get(self, key: TrackKey) -> Optional[CachedPCM]:
+        """
+        :param key: The key of the track (see `track_key`)
+        :type key: TrackKey
+        :return: Its audio, None if it's not cached
+        :rtype: Optional[CachedPCM]
+        """
+        with self._lock:
+            pcm = self._tracks.get(key)
+            if pcm is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._tracks.move_to_end(key)
+            return pcm
+
+    def put(self, key: TrackKey, pcm: CachedPCM) -> bool:
+        """Cache a track, dropping the least recently used ones to make room for it
+
+        :param key: The key of the track (see `track_key`)
+        :type key: TrackKey
+        :param pcm: Its audio
+        :type pcm: CachedPCM
+        :return: `False` if the track is over what the recordings leave of the budget
+        :rtype: bool
+        """
+        size = len(pcm.data)
+        with self._lock:
+            if size + self._reserved > self.budget:
+                return False
+            old = self._tracks.pop(key, None)
+            if old is not None:
+                self._size -= len(old.data)
+            self._evict(size)
+            self._tracks[key] = pcm
+            self._size += size
+        return True
+
+    def reserve(self, size: int) -> bool:
+        """Hold part of the budget for a track that is being recorded, dropping the
+        least recently used tracks to make room for it
+
+        :param size: The bytes to hold
+        :type size: int
+        :return: `False` if the recordings already hold the budget
+        :rtype: bool
+        """
+        with self._lock:
+            if self._reserved + size > self.budget:
+                return False
+            self._reserved += size
+            self._evict(0)
+        return True
+
+    def release(self, size: int) -> None:
+        """Give back what `PCMCache.reserve` held
+
+        :param size: The bytes that were held
+        :type size: int
+        """
+        with self._lock:
+            self._reserved = max(0, self._reserved - size)
+
+    def _evict(self, size: int) -> None:
+        # Runs with the lock
+        while self._tracks and self._size + size + self._reserved > self.budget:
+            _, dropped = self._tracks.popitem(last=False)
+            self._size -= len(dropped.data)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tracks.clear()
+            self._size = 0
+
+
+class MemorySource(StreamingSource):
+    """A `MemorySource` plays a cached track. Reads and seeks are slices of the
+    cached bytes, there's no decoder and no thread behind it
+    """
+    def __init__(self, pcm: CachedPCM, resources: Optional[ResourceCounter] = None) -> None:
+        self._pcm = pcm
+        self._resources = resources or ResourceCounter()
+        self.audio_format: Optional[AudioFormat] = pcm.audio_format
+        self.video_format = None
+        self._position = 0
+        self._deleted = False
+        self._resources.add(sources=1)
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self._pcm.duration
+
+    def get_audio_data(self, num_bytes: int,
+                       compensation_time: float = 0.0) -> Optional[AudioData]:
+        fmt = self._pcm.audio_format
+        size = min(num_bytes, len(self._pcm.data) - self._position)
+        size -= size % fmt.bytes_per_sample
+        if size <= 0 or self._deleted:
+            return None
+        # The track may be the recording itself, a slice of it is copied once
+        data = bytes(memoryview(self._pcm.data)[self._position:self._position + size])
+        timestamp = self._position / fmt.bytes_per_second
+        self._position += size
+        return AudioData(data, size, timestamp, size / fmt.bytes_per_second, [])
+
+    def seek(self, timestamp: float) -> None:
+        fmt = self._pcm.audio_format
+        position = round(max(0.0, timestamp) * fmt.bytes_per_second)
+        position -= position % fmt.bytes_per_sample
+        self._position = min(position, len(self._pcm.data))
+
+    def delete(self) -> None:
+        if not self._deleted:
+            self._deleted = True
+            self._resources.add(sources=-1)
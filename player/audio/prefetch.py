@@ -0,0 +1,200 @@
+from __future__ import annotations
+import functools
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    TimeoutError,
+    Executor,
+    Future,
+)
+from pyglet.media import load
+from pyglet.media.codecs import (
+    StreamingSource,
+    Source,
+)
+from typing import (
+    Callable,
+    Optional,
+)
+from .resources import ResourceCounter
+from .stream import (
+    BufferedSource,
+    BUFFER_SIZE,
+    Reopen,
+)
+from .pcmcache import (
+    MemorySource,
+    CachedPCM,
+    PCMCache,
+    track_key,
+)
+
+
+__all__ = (
+    'Prefetcher',
+    'open_source',
+)
+
+
+# Seconds of audio decoded ahead by the prefetch, enough to
+# hide the decoder start up behind the end of the previous track
+HEAD_SECONDS = 2.0
+
+
+def open_source(path: str, loader: Callable[[str], Source] = load,
+                head_seconds: float = HEAD_SECONDS,
+                resources: Optional[ResourceCounter] = None,
+                buffer_size: int = BUFFER_SIZE,
+                cache: Optional[PCMCache] = None,
+                reopen: Optional[Reopen] = None) -> Source:
+    """Open a track as a `BufferedSource` and wait for its start to be decoded.
+    A track that is in the cache is played from memory instead.
+    This is what runs in the background
+
+    :param path: The path of the track
+    :type path: str
+    :param loader: What opens the track, defaults to `pyglet.media.load`
+    :type loader: Callable[[str], Source], optional
+    :param head_seconds: How much to decode right away, defaults to `HEAD_SECONDS`
+    :type head_seconds: float, optional
+    :param resources: What keeps count of the source, defaults to None
+    :type resources: Optional[ResourceCounter], optional
+    :param buffer_size: The memory ceiling of the source, defaults to `BUFFER_SIZE`
+    :type buffer_size: int, optional
+    :param cache: Where the decoded tracks are kept, defaults to None
+    :type cache: Optional[PCMCache], optional
+    :param reopen: What seeks the track by opening a new decoder, defaults to None
+    :type reopen: Optional[Reopen], optional
+    :return: The source, ready to be queued
+    :rtype: Source
+    """
+    record: Optional[Callable[[CachedPCM], bool]] = None
+    key = track_key(path) if cache is not None else None
+    if cache is not None and key is not None:
+        pcm = cache.get(key)
+        if pcm is not None:
+            return MemorySource(pcm, resources)
+        record = functools.partial(cache.put, key)
+    source = loader(path)
+    if not isinstance(source, StreamingSource):
+        # Already decoded
+        return source
+    buffered = BufferedSource(source, buffer_size, resources, record, cache,
+                              functools.partial(reopen, path) if reopen is not None else None)
+    if buffered.audio_format is not None and head_seconds > 0:
+        buffered.wait(int(head_seconds * buffered.audio_format.bytes_per_second))
+    return buffered
+
+
+class Prefetcher:
+    """A `Prefetcher` opens the track that comes next in a background thread,
+    while the current one is still playing, so the track change doesn't wait for
+    the file to be opened and decoded.
+
+    Only one track is prefetched at a time, asking for another one drops it
+    """
+    def __init__(self, loader: Callable[[str], Source] = load,
+                 executor: Optional[Executor] = None,
+                 resources: Optional[ResourceCounter] = None,
+                 buffer_size: int = BUFFER_SIZE,
+                 cache: Optional[PCMCache] = None,
+                 reopen: Optional[Reopen] = None) -> None:
+        """
+        :param loader: What opens the tracks, defaults to `pyglet.media.load`
+        :type loader: Callable[[str], Source], optional
+        :param executor: Open the tracks on this executor instead
+        of a thread of its own, defaults to None
+        :type executor: Optional[Executor], optional
+        :param resources: What keeps count of the sources, defaults to None
+        :type resources: Optional[ResourceCounter], optional
+        :param buffer_size: The memory ceiling of every source, defaults to `BUFFER_SIZE`
+        :type buffer_size: int, optional
+        :param cache: Where the decoded tracks are kept, defaults to None
+        :type cache: Optional[PCMCache], optional
+        :param reopen: What seeks the tracks by opening new decoders, defaults to None
+        :type reopen: Optional[Reopen], optional
+        """
+        self._loader = loader
+        self.resources = resources or ResourceCounter()
+        self.buffer_size = buffer_size
+        self.cache = cache
+        self.reopen = reopen
+        self._executor = executor or ThreadPoolExecutor(1, thread_name_prefix='prefetch')
+        self._path: Optional[str] = None
+        self._future: Optional[Future[Source]] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path
+
+    @property
+    def ready(self) -> bool:
+        """
+        :return: `True` if the prefetched track is opened (or failed to)
+        :rtype: bool
+        """
+        return self._future is not None and self._future.done()
+
+    def prefetch(self, path: str) -> None:
+        """Start opening a track, unless it's already the one that is prefetched
+
+        :param path: The path of the track
+        :type path: str
+        """
+        if path == self._path:
+            return
+        self.drop()
+        self._path = path
+        self._future = self._executor.submit(open_source, path, self._loader,
+                                             HEAD_SECONDS, self.resources, self.buffer_size,
+                                             self.cache, self.reopen)
+
+    def take(self, path: str, timeout: Optional[float] = 0) -> Optional[Source]:
+        """Take the prefetched source of a track. It's not prefetched anymore after that
+
+        :param path: The path of the track
+        :type path: str
+        :param timeout: Seconds to wait for it if it's still being opened,
+        `None` to wait as long as it takes, defaults to 0
+        :type timeout: Optional[float], optional
+        :return: The source, `None` if `path` is not prefetched, it's not
+        ready in time or it could not be opened
+        :rtype: Optional[Source]
+        """
+        future = self._future
+        if future is None or path != self._path:
+            self.misses += 1
+            return None
+        try:
+            source = future.result(timeout)
+        except TimeoutError:
+            self.misses += 1
+            return None
+        except Exception:
+            source = None
+        self._path = self._future = None
+        if source is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return source
+
+    def drop(self) -> None:
+        """Forget the prefetched track, its source is released once it's opened
+        """
+        future = self._future
+        self._path = self._future = None
+        if future is not None and not future.cancel():
+            future.add_done_callback(_release)
+
+    def shutdown(self) -> None:
+        self.drop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _release(future: Future[Source]) -> None:
+    if not future.cancelled() and future.exception() is None:
+        source = future.result()
+        if isinstance(source, StreamingSource):
+            source.delete()
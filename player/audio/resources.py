@@ -0,0 +1,58 @@
+import threading
+from typing import (
+    NamedTuple,
+    Dict,
+)
+
+
+__all__ = (
+    'ResourceStats',
+    'ResourceCounter',
+)
+
+
+class ResourceStats(NamedTuple):
+    # Players that were created and not deleted
+    players: int
+    # Decoder sources that were opened and not released
+    sources: int
+    # Bytes of audio decoded since the start
+    decoded_bytes: int
+    # Decoded bytes held in memory, not played yet
+    buffered_bytes: int
+
+    def report(self) -> str:
+        """
+        :return: A line for every count
+        :rtype: str
+        """
+        return '\n'.join((
+            f"{'players':<16}{self.players:>12}",
+            f"{'sources':<16}{self.sources:>12}",
+            f"{'decoded (MB)':<16}{self.decoded_bytes / 2 ** 20:>12.2f}",
+            f"{'buffered (MB)':<16}{self.buffered_bytes / 2 ** 20:>12.2f}",
+        ))
+
+
+class ResourceCounter:
+    """A `ResourceCounter` keeps count of what the playback holds, so a leak
+    shows up as a number that grows. Sources are opened and decoded in background
+    threads too, every count goes through a lock
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = dict.fromkeys(ResourceStats._fields, 0)
+
+    def add(self, players: int = 0, sources: int = 0,
+            decoded_bytes: int = 0, buffered_bytes: int = 0) -> None:
+        """Add to the counts, negative numbers for what was released
+        """
+        with self._lock:
+            self._counts['players'] += players
+            self._counts['sources'] += sources
+            self._counts['decoded_bytes'] += decoded_bytes
+            self._counts['buffered_bytes'] += buffered_bytes
+
+    def snapshot(self) -> ResourceStats:
+        with self._lock:
+            return ResourceStats(**self._counts)
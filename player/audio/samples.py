@@ -0,0 +1,44 @@
+from __future__ import annotations
+import numpy as np
+from pyglet.media.codecs import Source
+from typing import (
+    Iterator,
+    Any,
+)
+
+
+__all__ = (
+    'iter_samples',
+)
+
+
+# Bytes decoded at once
+CHUNK_SIZE = 2 ** 16
+
+
+def iter_samples(source: Source, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Decode a source to its end, a chunk at a time, for the analyses that go
+    over a whole song. Only one chunk is in memory at once
+
+    :param source: The source, it's read from where it is
+    :type source: Source
+    :param chunk_size: The bytes of a chunk, defaults to `CHUNK_SIZE`
+    :type chunk_size: int, optional
+    :return: Float arrays of (frames, channels), from -1 to 1
+    :rtype: Iterator[Any]
+    """
+    fmt = source.audio_format
+    if fmt is None:
+        return
+    # pyglet decodes to 8 bit unsigned or 16 bit signed samples.
+    # Its bytes_per_sample are the bytes of all the channels
+    dtype: Any = np.uint8 if fmt.sample_size == 8 else np.dtype('<i2')
+    zero, scale = (128, 128) if fmt.sample_size == 8 else (0, 32768)
+    frame_size = fmt.bytes_per_sample
+    while True:
+        data = source.get_audio_data(chunk_size)
+        if data is None:
+            return
+        frames = data.length // frame_size
+        samples = np.frombuffer(data.data, dtype, frames * fmt.channels)
+        yield (samples.reshape(frames, fmt.channels).astype(np.float32) - zero) / scale
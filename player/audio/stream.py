@@ -0,0 +1,439 @@
+from __future__ import annotations
+import threading
+from pyglet.media.codecs import (
+    StreamingSource,
+    AudioFormat,
+    AudioData,
+)
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+)
+from .resources import ResourceCounter
+from .pcmcache import (
+    CachedPCM,
+    PCMCache,
+)
+
+
+__all__ = (
+    'RingBuffer',
+    'BufferedSource',
+    'Reopen',
+)
+
+
+# Default memory ceiling of a source, about 24 seconds of CD audio
+BUFFER_SIZE = 4 * 2 ** 20
+# Bytes asked from the decoder at once
+PACKET_SIZE = 4096
+# The budget of a recording is held by this much at a time
+RECORD_STEP = 2 ** 20
+# Opens a new decoder of a track right at a time, with the seconds of
+# its audio to drop before it. None to leave the seek to the decoder
+Reopen = Callable[[str, float], Optional[Tuple[StreamingSource, float]]]
+# Part of the ring kept for the audio that was just played, a seek
+# back into it doesn't touch the decoder
+HISTORY = 0.25
+
+
+class RingBuffer:
+    """A `RingBuffer` is a byte queue of a fixed capacity, its memory is allocated once.
+
+    What was read stays in the buffer until new data overwrites it,
+    `RingBuffer.rewind` reads it again
+    """
+    def __init__(self, capacity: int) -> None:
+        """
+        :param capacity: The size of the buffer in bytes
+        :type capacity: int
+        """
+        self._data = bytearray(capacity)
+        self._read = 0
+        self._size = 0
+        self._behind = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    @property
+    def behind(self) -> int:
+        """
+        :return: The bytes that were read and can be rewound to
+        :rtype: int
+        """
+        return self._behind
+
+    def write(self, data: bytes) -> int:
+        """Append data, as much as there's room for
+
+        :param data: The bytes to append
+        :type data: bytes
+        :return: How many bytes were written
+        :rtype: int
+        """
+        size = min(len(data), self.free)
+        start = (self._read + self._size) % self.capacity
+        first = min(size, self.capacity - start)
+        self._data[start:start + first] = data[:first]
+        self._data[:size - first] = data[first:size]
+        self._size += size
+        self._behind = min(self._behind, self.free)
+        return size
+
+    def read(self, size: int) -> bytes:
+        """
+        :param size: The most bytes to read
+        :type size: int
+        :return: The oldest bytes that were not read yet
+        :rtype: bytes
+        """
+        size = min(size, self._size)
+        first = min(size, self.capacity - self._read)
+        data = bytes(self._data[self._read:self._read + first]) + bytes(self._data[:size - first])
+        self.skip(size)
+        return data
+
+    def skip(self, size: int) -> None:
+        """Move forward without reading, up to the end of the data
+        """
+        size = min(size, self._size)
+        self._read = (self._read + size) % self.capacity
+        self._size -= size
+        self._behind = min(self._behind + size, self.free)
+
+    def rewind(self, size: int) -> None:
+        """Move back on what was read, up to `RingBuffer.behind`
+        """
+        size = min(size, self._behind)
+        self._read = (self._read - size) % self.capacity
+        self._size += size
+        self._behind -= size
+
+    def clear(self) -> None:
+        self._read = self._size = self._behind = 0
+
+
+class BufferedSource(StreamingSource):
+    """A `BufferedSource` decodes a streaming source ahead in a thread of its own
+    into a `RingBuffer`, so whatever the length of the file, a source never holds
+    more than `buffer_size` bytes of audio.
+
+    The ring is also the seek index of the source: it knows the time of every byte
+    it holds, a seek into what was just played or what is decoded ahead is served
+    from it. Any other seek is left to the decoder, which goes to the time straight
+    away (pyglet's decoders seek by timestamp) instead of decoding from the start,
+    or to `reopen`, which opens a new decoder right where the time is, from a
+    seek index of the file.
+
+    The source and the bytes it decodes and holds are counted by
+    `resources` until `BufferedSource.delete`.
+
+    A source can also record what it decodes, from the start of the track, for a
+    `PCMCache`. Then a seek back into what was recorded is replayed from the
+    recording and the decoder goes on where it stopped once it's caught up. The
+    recording is handed to `record` once the whole track is decoded, a source that is
+    deleted before goes on decoding the rest of it in its thread first. It's over
+    the ring's ceiling and held against the budget of a `PCMCache`, shared with the
+    other sources that record. It's dropped once the budget is full or by a seek
+    of the decoder
+    """
+    def __init__(self, source: StreamingSource, buffer_size: int = BUFFER_SIZE,
+                 resources: Optional[ResourceCounter] = None,
+                 record: Optional[Callable[[CachedPCM], object]] = None,
+                 budget: Optional[PCMCache] = None,
+                 reopen: Optional[Callable[[float], Optional[Tuple[StreamingSource, float]]]]
+                 = None) -> None:
+        """
+        :param source: A freshly opened streaming source
+        :type source: StreamingSource
+        :param buffer_size: The memory ceiling in bytes, defaults to `BUFFER_SIZE`
+        :type buffer_size: int, optional
+        :param resources: What keeps count, defaults to None
+        :type resources: Optional[ResourceCounter], optional
+        :param record: What gets the whole decoded track, defaults to None
+        :type record: Optional[Callable[[CachedPCM], object]], optional
+        :param budget: What the recording is held against, defaults to None (no recording)
+        :type budget: Optional[PCMCache], optional
+        :param reopen: What seeks the decoder by opening a new one, defaults to None
+        :type reopen: Optional[Callable[[float], Optional[Tuple[StreamingSource, float]]]],
+        optional
+        """
+        self._source = source
+        self._resources = resources or ResourceCounter()
+        self.audio_format: Optional[AudioFormat] = source.audio_format
+        self.video_format = None
+        self._duration = source.duration
+        self._ring = RingBuffer(max(buffer_size, 4 * PACKET_SIZE))
+        # The decoder fills the ring up to here, the rest keeps what was played
+        self._limit = int(self._ring.capacity * (1 - HISTORY))
+        # Decoded bytes that did not fit in the ring yet
+        self._spill = b''
+        # Where the next byte that is read from the ring is in the audio
+        self._position = 0
+        self._eof = self.audio_format is None
+        self._deleted = False
+        # Counts the decoder seeks, what was decoded before one is thrown away
+        self._generation = 0
+        self._cond = threading.Condition()
+        # The decoder is used by the thread that fills the ring and by the seeks.
+        # The recording is only touched with it too
+        self._decoder_lock = threading.Lock()
+        self._record = record
+        self._budget = budget
+        recorded = None not in (record, budget, self.audio_format)
+        self._recording: Optional[bytearray] = bytearray() if recorded else None
+        # What the recording holds of the budget
+        self._reserved = 0
+        self._recorded = False
+        # Where the ring is filled from the recording instead of the decoder
+        self._replay: Optional[int] = None
+        self._reopen = reopen
+        # Bytes of a reopened decoder that come before the time it was opened at
+        self._lead = 0
+        self._resources.add(sources=1)
+        self._thread = threading.Thread(target=self._fill, name='stream', daemon=True)
+        self._thread.start()
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self._duration
+
+    @property
+    def buffer_size(self) -> int:
+        return self._ring.capacity
+
+    @property
+    def buffered(self) -> int:
+        """
+        :return: The bytes that are decoded and not played yet
+        :rtype: int
+        """
+        return len(self._ring) + len(self._spill)
+
+    def wait(self, size: int, timeout: Optional[float] = None) -> bool:
+        """Wait until `size` bytes are decoded ahead, or the decoder is at the end
+
+        :param size: The bytes to wait for, it's less if the ring fills up before
+        :type size: int
+        :param timeout: The most seconds to wait, defaults to None
+        :type timeout: Optional[float], optional
+        :return: `False` on timeout
+        :rtype: bool
+        """
+        def done() -> bool:
+            return self._eof or self._deleted or len(self._ring) >= size or not self._room()
+
+        with self._cond:
+            return self._cond.wait_for(done, timeout)
+
+    def _room(self) -> bool:
+        return not self._spill and len(self._ring) + PACKET_SIZE <= self._limit
+
+    def _fill(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._deleted or (not self._eof and self._room()))
+                if self._deleted:
+                    break
+            with self._decoder_lock:
+                with self._cond:
+                    generation = self._generation
+                    replay = self._replay
+                if replay is not None:
+                    assert self._recording is not None
+                    decoded: Optional[bytes] = bytes(
+                        self._recording[replay:replay + PACKET_SIZE]
+                    )
+                    if not decoded:
+                        # Caught up with the decoder
+                        with self._cond:
+                            if generation == self._generation:
+                                self._replay = None
+                        continue
+                else:
+                    decoded = self._decode()
+                    if decoded == b'':
+                        continue
+                    self._record_packet(decoded)
+            with self._cond:
+                if generation != self._generation or self._deleted:
+                    continue
+                if decoded is None:
+                    self._eof = True
+                else:
+                    written = self._ring.write(decoded)
+                    self._spill = decoded[written:]
+                    if replay is None:
+                        self._resources.add(decoded_bytes=len(decoded))
+                    else:
+                        self._replay = replay + len(decoded)
+                    self._resources.add(buffered_bytes=len(decoded))
+                self._cond.notify_all()
+        self._finish()
+
+    def _decode(self) -> Optional[bytes]:
+        # Runs with the decoder lock. Empty if the packet was all lead, None at the end
+        try:
+            data = self._source.get_audio_data(PACKET_SIZE)
+        except Exception:
+            data = None
+        decoded = data.data[:data.length] if data is not None and data.length else None
+        if decoded is not None and self._lead:
+            dropped = min(self._lead, len(decoded))
+            self._lead -= dropped
+            decoded = decoded[dropped:]
+        return decoded
+
+    def _finish(self) -> None:
+        # Runs in the thread of the source once it's deleted. A track that is being
+        # recorded is decoded to its end for the cache, a track that was only played
+        # in part is played from memory the next time too
+        with self._decoder_lock:
+            while self._recording is not None and not self._recorded:
+                decoded = self._decode()
+                if decoded:
+                    self._resources.add(decoded_bytes=len(decoded))
+                if decoded != b'':
+                    self._record_packet(decoded)
+            self._drop_recording()
+            self._source.delete()
+
+    def _record_packet(self, decoded: Optional[bytes]) -> None:
+        # Runs with the decoder lock
+        if self._recording is None or self._recorded:
+            return
+        if decoded is not None:
+            assert self._budget is not None
+            self._recording += decoded
+            if len(self._recording) > self._reserved:
+                step = max(RECORD_STEP, len(self._recording) - self._reserved)
+                if not self._budget.reserve(step):
+                    self._drop_recording()
+                    return
+                self._reserved += step
+            return
+        # The whole track is decoded, the recording can't change any more
+        assert self.audio_format is not None and self._record is not None
+        # Handed over as it is, it's only read from now on
+        self._recorded = True
+        # The cache takes the track in place of what was held for it
+        self._release()
+        self._record(CachedPCM(self.audio_format, self._recording))
+
+    def _drop_recording(self) -> None:
+        self._recording = None
+        self._release()
+
+    def _release(self) -> None:
+        if self._budget is not None and self._reserved:
+            self._budget.release(self._reserved)
+        self._reserved = 0
+
+    def _align(self, size: int) -> int:
+        assert self.audio_format is not None
+        # The bytes of a frame, every channel included
+        sample = self.audio_format.bytes_per_sample
+        return size // sample * sample
+
+    def get_audio_data(self, num_bytes: int,
+                       compensation_time: float = 0.0) -> Optional[AudioData]:
+        if self.audio_format is None:
+            return None
+        with self._cond:
+            # The audio thread waits only when the decoder is behind it
+            self._cond.wait_for(lambda: self._eof or self._deleted or len(self._ring) > 0)
+            size = self._align(min(num_bytes, len(self._ring)))
+            if not size:
+                return None
+            data = self._ring.read(size)
+            if self._spill:
+                written = self._ring.write(self._spill)
+                self._spill = self._spill[written:]
+            bytes_per_second = self.audio_format.bytes_per_second
+            timestamp = self._position / bytes_per_second
+            self._position += size
+            self._resources.add(buffered_bytes=-size)
+            self._cond.notify_all()
+        return AudioData(data, size, timestamp, size / bytes_per_second, [])
+
+    def seek(self, timestamp: float) -> None:
+        if self.audio_format is None:
+            return
+        timestamp = max(0.0, timestamp)
+        position = self._align(round(timestamp * self.audio_format.bytes_per_second))
+        with self._cond:
+            if self._deleted:
+                return
+            offset = position - self._position
+            if -self._ring.behind <= offset <= len(self._ring):
+                if offset < 0:
+                    self._ring.rewind(-offset)
+                else:
+                    self._ring.skip(offset)
+                self._position = position
+                self._resources.add(buffered_bytes=-offset)
+                self._cond.notify_all()
+                return
+        with self._decoder_lock:
+            with self._cond:
+                self._generation += 1
+                self._clear()
+                self._position = position
+                self._eof = False
+                if self._recording is not None and position <= len(self._recording):
+                    # The decoder stays where it is, ahead
+                    self._replay = position
+                else:
+                    self._replay = None
+                    self._drop_recording()
+            if self._replay is None:
+                self._seek_decoder(timestamp)
+            with self._cond:
+                self._cond.notify_all()
+
+    def _seek_decoder(self, timestamp: float) -> None:
+        # Runs with the decoder lock
+        assert self.audio_format is not None
+        self._lead = 0
+        reopened = None
+        if self._reopen is not None:
+            try:
+                reopened = self._reopen(timestamp)
+            except Exception:
+                reopened = None
+        if reopened is None:
+            self._source.seek(timestamp)
+            return
+        source, lead = reopened
+        if source.audio_format != self.audio_format:
+            source.delete()
+            self._source.seek(timestamp)
+            return
+        self._source.delete()
+        self._source = source
+        self._lead = self._align(round(lead * self.audio_format.bytes_per_second))
+
+    def _clear(self) -> None:
+        self._resources.add(buffered_bytes=-self.buffered)
+        self._ring.clear()
+        self._spill = b''
+
+    def delete(self) -> None:
+        with self._cond:
+            if self._deleted:
+                return
+            self._deleted = True
+            self._clear()
+            self._cond.notify_all()
+        # The decoder is closed by the thread of the source (see `_finish`)
+        self._resources.add(sources=-1)
@@ -0,0 +1,579 @@
+import os
+import time
+import shutil
+import wave
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from pyglet.media import load
+from pyglet.media.codecs import (
+    StreamingSource,
+    SourceGroup,
+    Source,
+)
+from typing import (
+    Callable,
+    Optional,
+    Union,
+    Tuple,
+    List,
+)
+from pyglet.media.codecs import AudioFormat
+from .resources import ResourceCounter
+from .pcmcache import (
+    MemorySource,
+    CachedPCM,
+    PCMCache,
+    track_key,
+)
+from .stream import (
+    BufferedSource,
+    RingBuffer,
+    RECORD_STEP,
+)
+from .prefetch import (
+    Prefetcher,
+    open_source,
+)
+from .gapless import TrackGroup
+from .engine import PlaybackEngine
+
+
+BASE_DIR = Path(__file__).parent
+RATE = 8000
+# 16 bit mono
+BYTES_PER_SECOND = RATE * 2
+
+
+def write_wav(path: str, data: bytes, channels: int = 1) -> None:
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(data)
+
+
+def read_all(source: Union[Source, SourceGroup], packet: int = 1000) -> bytes:
+    chunks: List[bytes] = []
+    while True:
+        data = source.get_audio_data(packet)
+        if data is None:
+            return b''.join(chunks)
+        chunks.append(data.data[:data.length])
+
+
+class AudioTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = str(Path(BASE_DIR, 'testaudio'))
+        os.makedirs(self.dir, exist_ok=True)
+        # Half a second of 0x01 and one second of 0x02, the edge is easy to find
+        self.first = os.path.join(self.dir, 'first.wav')
+        self.second = os.path.join(self.dir, 'second.wav')
+        write_wav(self.first, b'\x01' * (BYTES_PER_SECOND // 2))
+        write_wav(self.second, b'\x02' * BYTES_PER_SECOND)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+        return super().tearDown()
+
+
+class TestTrackGroup(AudioTestCase):
+    def group(self) -> TrackGroup:
+        group = TrackGroup()
+        self.assertTrue(group.append(self.first, load(self.first)))
+        self.assertTrue(group.append(self.second, load(self.second)))
+        return group
+
+    def test_gapless(self) -> None:
+        group = self.group()
+        timestamps: List[float] = []
+        chunks = []
+        while True:
+            data = group.get_audio_data(3000)
+            if data is None:
+                break
+            timestamps.append(data.timestamp)
+            chunks.append(data.data)
+        # The second track follows the first one sample for sample
+        expected = b'\x01' * (BYTES_PER_SECOND // 2) + b'\x02' * BYTES_PER_SECOND
+        self.assertEqual(b''.join(chunks), expected)
+        self.assertEqual(timestamps, [i * 3000 / BYTES_PER_SECOND for i in range(len(chunks))])
+        self.assertAlmostEqual(group.duration, 1.5)
+
+    def test_advance(self) -> None:
+        group = self.group()
+        self.assertEqual(group.current, self.first)
+        self.assertEqual(group.upcoming, (self.second,))
+        self.assertEqual(group.advance(0.4), ())
+        # Read past the first track, its real length is known
+        group.get_audio_data(BYTES_PER_SECOND)
+        self.assertEqual(group.advance(0.5), (self.first,))
+        self.assertEqual(group.current, self.second)
+        self.assertEqual(group.start, 0.5)
+        self.assertAlmostEqual(group.position(0.75), 0.25)
+        # The last track stays
+        self.assertEqual(group.advance(10), ())
+        self.assertEqual(group.current, self.second)
+
+    def test_advance_unread(self) -> None:
+        group = self.group()
+        # Never read (no audio device), the estimated length is trusted a bit later
+        self.assertEqual(group.advance(0.6), ())
+        self.assertEqual(group.advance(1.6), (self.first,))
+        self.assertEqual(group.start, 0.5)
+
+    def test_seek(self) -> None:
+        group = self.group()
+        group.get_audio_data(BYTES_PER_SECOND)
+        group.seek(0.25)
+        data = group.get_audio_data(BYTES_PER_SECOND)
+        assert data is not None
+        self.assertEqual(data.timestamp, 0.25)
+        quarter = BYTES_PER_SECOND // 4
+        self.assertEqual(data.data, b'\x01' * quarter + b'\x02' * 3 * quarter)
+
+    def test_drop_upcoming(self) -> None:
+        group = self.group()
+        self.assertFalse(group.drop_upcoming())
+        self.assertEqual(group.upcoming, ())
+        group = self.group()
+        group.get_audio_data(BYTES_PER_SECOND)
+        # Data of the second track was read, the player must throw it away
+        self.assertTrue(group.drop_upcoming())
+        self.assertEqual(len(group), 1)
+
+    def test_skip(self) -> None:
+        group = self.group()
+        self.assertEqual(group.skip(), self.second)
+        self.assertEqual(group.start, 0.5)
+        self.assertIsNone(group.skip())
+        group.seek(group.start)
+        self.assertEqual(read_all(group), b'\x02' * BYTES_PER_SECOND)
+
+    def test_other_format(self) -> None:
+        stereo = os.path.join(self.dir, 'stereo.wav')
+        write_wav(stereo, b'\x00' * 4000, channels=2)
+        group = self.group()
+        self.assertFalse(group.append(stereo, load(stereo)))
+        self.assertEqual(group.upcoming, (self.second,))
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_wrap(self) -> None:
+        ring = RingBuffer(8)
+        self.assertEqual(ring.write(b'abcdef'), 6)
+        self.assertEqual(ring.read(4), b'abcd')
+        # Only the room left is written, across the end of the memory
+        self.assertEqual(ring.write(b'ghijklmn'), 6)
+        self.assertEqual((len(ring), ring.free, ring.behind), (8, 0, 0))
+        self.assertEqual(ring.read(10), b'efghijkl')
+
+    def test_rewind(self) -> None:
+        ring = RingBuffer(8)
+        ring.write(b'abcdef')
+        ring.skip(4)
+        self.assertEqual(ring.behind, 4)
+        ring.rewind(2)
+        self.assertEqual(ring.read(3), b'cde')
+        # New data takes the place of what was read
+        ring.write(b'ghijk')
+        self.assertEqual(ring.behind, 2)
+        ring.rewind(8)
+        self.assertEqual(ring.read(8), b'defghijk')
+
+
+class TestBufferedSource(AudioTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        # Ten seconds through a ring of about a second
+        self.long = os.path.join(self.dir, 'long.wav')
+        self.data = bytes(range(256)) * (BYTES_PER_SECOND * 10 // 256)
+        write_wav(self.long, self.data)
+        self.resources = ResourceCounter()
+        source = load(self.long)
+        assert isinstance(source, StreamingSource)
+        self.source = BufferedSource(source, BYTES_PER_SECOND, self.resources)
+
+    def tearDown(self) -> None:
+        self.source.delete()
+        self.assertEqual(self.resources.snapshot().sources, 0)
+        self.assertEqual(self.resources.snapshot().buffered_bytes, 0)
+        return super().tearDown()
+
+    def test_memory_ceiling(self) -> None:
+        chunks: List[bytes] = []
+        while True:
+            self.source.wait(BYTES_PER_SECOND)
+            self.assertLessEqual(self.source.buffered, BYTES_PER_SECOND)
+            self.assertEqual(self.resources.snapshot().buffered_bytes, self.source.buffered)
+            data = self.source.get_audio_data(3000)
+            if data is None:
+                break
+            chunks.append(data.data)
+        self.assertEqual(b''.join(chunks), self.data)
+        self.assertEqual(self.resources.snapshot().decoded_bytes, len(self.data))
+
+    def test_seek_in_buffer(self) -> None:
+        self.source.wait(BYTES_PER_SECOND)
+        self.source.get_audio_data(BYTES_PER_SECOND // 2)
+        decoded = self.resources.snapshot().decoded_bytes
+        # Back into what was played and ahead into what was decoded
+        for timestamp in (0.25, 0.6):
+            self.source.seek(timestamp)
+            data = self.source.get_audio_data(100)
+            assert data is not None
+            self.assertEqual(data.timestamp, timestamp)
+            offset = int(timestamp * BYTES_PER_SECOND)
+            self.assertEqual(data.data, self.data[offset:offset + 100])
+        self.assertLessEqual(self.resources.snapshot().decoded_bytes - decoded, BYTES_PER_SECOND)
+
+    def test_seek_far(self) -> None:
+        self.source.seek(8)
+        data = self.source.get_audio_data(100)
+        assert data is not None
+        self.assertEqual(data.timestamp, 8)
+        self.assertEqual(data.data, self.data[8 * BYTES_PER_SECOND:8 * BYTES_PER_SECOND + 100])
+        # What was before the seek was never decoded
+        self.assertLess(self.resources.snapshot().decoded_bytes, 3 * BYTES_PER_SECOND)
+
+    def test_stereo_frames(self) -> None:
+        # Three frames of 16 bit stereo, the last one is read too
+        stereo = os.path.join(self.dir, 'stereo.wav')
+        data = bytes(range(12))
+        write_wav(stereo, data, channels=2)
+        source = load(stereo)
+        assert isinstance(source, StreamingSource)
+        buffered = BufferedSource(source, BYTES_PER_SECOND, self.resources)
+        self.assertEqual(read_all(buffered, 1000), data)
+        buffered.seek(1 / RATE)
+        self.assertEqual(read_all(buffered), data[4:])
+        buffered.delete()
+
+    def test_seek_reopen(self) -> None:
+        stereo = os.path.join(self.dir, 'stereo.wav')
+        write_wav(stereo, b'\x00' * BYTES_PER_SECOND, channels=2)
+        opened: List[float] = []
+
+        def reopen(timestamp: float) -> Optional[Tuple[StreamingSource, float]]:
+            # A new decoder from the whole second before, like from a frame
+            opened.append(timestamp)
+            if timestamp > 9:
+                return None
+            source = load(stereo if timestamp > 8 else self.long)
+            assert isinstance(source, StreamingSource)
+            source.seek(int(timestamp))
+            return source, timestamp - int(timestamp)
+
+        self.source.delete()
+        source = load(self.long)
+        assert isinstance(source, StreamingSource)
+        self.source = BufferedSource(source, BYTES_PER_SECOND, self.resources, reopen=reopen)
+        # Nothing to reopen and another format, both left to the decoder, then reopened
+        for timestamp in (9.5, 8.25, 6.5):
+            self.source.seek(timestamp)
+            offset = int(timestamp * BYTES_PER_SECOND)
+            self.assertEqual(read_all(self.source), self.data[offset:])
+        self.assertEqual(opened, [9.5, 8.25, 6.5])
+
+
+class TestRecording(AudioTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.long = os.path.join(self.dir, 'long.wav')
+        self.data = bytes(range(256)) * (BYTES_PER_SECOND * 10 // 256)
+        write_wav(self.long, self.data)
+        self.resources = ResourceCounter()
+        self.recorded: List[CachedPCM] = []
+
+    def open(self, budget: int = RECORD_STEP) -> BufferedSource:
+        return self.open_in(PCMCache(budget))
+
+    def open_in(self, cache: PCMCache) -> BufferedSource:
+        source = load(self.long)
+        assert isinstance(source, StreamingSource)
+        buffered = BufferedSource(source, BYTES_PER_SECOND, self.resources,
+                                  self.recorded.append, cache)
+        self.addCleanup(buffered.delete)
+        return buffered
+
+    def read(self, source: BufferedSource, size: int) -> bytes:
+        chunks: List[bytes] = []
+        while size > 0:
+            data = source.get_audio_data(min(size, 1000))
+            assert data is not None
+            chunks.append(data.data)
+            size -= data.length
+        return b''.join(chunks)
+
+    def test_record(self) -> None:
+        source = self.open()
+        self.assertEqual(read_all(source, 3000), self.data)
+        self.assertEqual(len(self.recorded), 1)
+        self.assertEqual(self.recorded[0].data, self.data)
+        self.assertAlmostEqual(self.recorded[0].duration, 10)
+
+    def test_replay(self) -> None:
+        source = self.open()
+        source.wait(BYTES_PER_SECOND)
+        self.read(source, 6 * BYTES_PER_SECOND)
+        decoded = self.resources.snapshot().decoded_bytes
+        # A loop from 1 to 4 seconds, far behind what the ring keeps
+        for _ in range(3):
+            source.seek(1)
+            self.assertEqual(self.read(source, 3 * BYTES_PER_SECOND),
+                             self.data[BYTES_PER_SECOND:4 * BYTES_PER_SECOND])
+        self.assertEqual(self.resources.snapshot().decoded_bytes, decoded)
+        # Once it's caught up, the decoder goes on where it stopped
+        source.seek(5)
+        self.assertEqual(read_all(source), self.data[5 * BYTES_PER_SECOND:])
+        self.assertEqual(self.resources.snapshot().decoded_bytes, len(self.data))
+        self.assertEqual(self.recorded[0].data, self.data)
+
+    def test_limit(self) -> None:
+        source = self.open(budget=BYTES_PER_SECOND)
+        self.assertEqual(read_all(source), self.data)
+        self.assertEqual(self.recorded, [])
+
+    def test_shared_budget(self) -> None:
+        # Room for one recording, the other source plays without one
+        cache = PCMCache(RECORD_STEP)
+        first, second = self.open_in(cache), self.open_in(cache)
+        self.assertEqual(read_all(first), self.data)
+        self.assertEqual(read_all(second), self.data)
+        self.assertEqual(len(self.recorded), 1)
+        self.assertEqual(cache.stats.reserved, 0)
+
+    def test_seek_releases(self) -> None:
+        cache = PCMCache(RECORD_STEP)
+        source = self.open_in(cache)
+        source.wait(BYTES_PER_SECOND)
+        self.assertEqual(cache.stats.reserved, RECORD_STEP)
+        source.seek(8)
+        self.assertEqual(cache.stats.reserved, 0)
+
+    def wait_for(self, done: Callable[[], bool]) -> None:
+        deadline = time.monotonic() + 5
+        while not done():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_recorded_on_delete(self) -> None:
+        # Ten seconds through a ring of one, deleted after three
+        source = self.open()
+        self.read(source, 3 * BYTES_PER_SECOND)
+        source.delete()
+        self.wait_for(lambda: bool(self.recorded))
+        self.assertEqual(self.recorded[0].data, self.data)
+        self.assertEqual(self.resources.snapshot().sources, 0)
+
+    def test_flip_tracks(self) -> None:
+        # Played in part, then again from memory
+        cache = PCMCache()
+        first = open_source(self.long, buffer_size=BYTES_PER_SECOND, cache=cache)
+        assert isinstance(first, BufferedSource)
+        self.read(first, 2 * BYTES_PER_SECOND)
+        first.delete()
+        key = track_key(self.long)
+        self.wait_for(lambda: key in cache)
+        again = open_source(self.long, buffer_size=BYTES_PER_SECOND, cache=cache)
+        self.assertIsInstance(again, MemorySource)
+        self.assertEqual(read_all(again), self.data)
+        assert isinstance(again, StreamingSource)
+        again.delete()
+        self.assertEqual(cache.stats.reserved, 0)
+
+    def test_seek_ahead_drops(self) -> None:
+        source = self.open()
+        source.seek(8)
+        self.assertEqual(read_all(source), self.data[8 * BYTES_PER_SECOND:])
+        # Not the whole track
+        self.assertEqual(self.recorded, [])
+
+
+class TestPCMCache(AudioTestCase):
+    def pcm(self, size: int) -> CachedPCM:
+        return CachedPCM(AudioFormat(1, 16, RATE), b'\x00' * size)
+
+    def test_lru(self) -> None:
+        cache = PCMCache(1000)
+        a, b, c = ('a', 1, 0), ('b', 1, 0), ('c', 1, 0)
+        self.assertTrue(cache.put(a, self.pcm(400)))
+        self.assertTrue(cache.put(b, self.pcm(400)))
+        self.assertIsNotNone(cache.get(a))
+        # `b` was used the longest time ago
+        self.assertTrue(cache.put(c, self.pcm(400)))
+        self.assertIsNone(cache.get(b))
+        self.assertIn(a, cache)
+        self.assertFalse(cache.put(b, self.pcm(1001)))
+        stats = cache.stats
+        self.assertEqual((stats.hits, stats.misses, stats.evictions), (1, 1, 1))
+        self.assertEqual((stats.tracks, stats.size), (2, 800))
+        cache.put(a, self.pcm(100))
+        self.assertEqual(cache.stats.size, 500)
+
+    def test_reserve(self) -> None:
+        cache = PCMCache(1000)
+        a, b = ('a', 1, 0), ('b', 1, 0)
+        cache.put(a, self.pcm(400))
+        cache.put(b, self.pcm(400))
+        # A recording makes room for itself
+        self.assertTrue(cache.reserve(500))
+        self.assertNotIn(a, cache)
+        self.assertFalse(cache.reserve(600))
+        self.assertFalse(cache.put(a, self.pcm(600)))
+        cache.release(500)
+        self.assertEqual(cache.stats.reserved, 0)
+        self.assertTrue(cache.put(a, self.pcm(600)))
+
+    def test_track_key(self) -> None:
+        key = track_key(self.first)
+        self.assertIsNotNone(key)
+        self.assertIsNone(track_key(os.path.join(self.dir, 'missing.wav')))
+        write_wav(self.first, b'\x01' * 100)
+        self.assertNotEqual(track_key(self.first), key)
+
+    def test_memory_source(self) -> None:
+        data = bytes(range(200)) * 40
+        resources = ResourceCounter()
+        source = MemorySource(CachedPCM(AudioFormat(1, 16, RATE), data), resources)
+        self.assertEqual(read_all(source, 333), data)
+        source.seek(0.25)
+        chunk = source.get_audio_data(100)
+        assert chunk is not None
+        self.assertEqual((chunk.timestamp, chunk.data), (0.25, data[4000:4100]))
+        source.delete()
+        source.delete()
+        self.assertEqual(resources.snapshot().sources, 0)
+
+    def test_open_source(self) -> None:
+        cache = PCMCache()
+        first = open_source(self.second, cache=cache)
+        self.assertIsInstance(first, BufferedSource)
+        read_all(first)
+        # Decoded whole, the next time it's played from memory
+        again = open_source(self.second, cache=cache)
+        self.assertIsInstance(again, MemorySource)
+        self.assertEqual(read_all(again), b'\x02' * BYTES_PER_SECOND)
+        self.assertEqual(cache.stats[:2], (1, 1))
+        for source in (first, again):
+            assert isinstance(source, StreamingSource)
+            source.delete()
+
+
+class TestPrefetcher(AudioTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.prefetcher = Prefetcher(executor=ThreadPoolExecutor(1))
+
+    def tearDown(self) -> None:
+        self.prefetcher.shutdown()
+        return super().tearDown()
+
+    def test_open_source(self) -> None:
+        source = open_source(self.second, head_seconds=0.5)
+        assert isinstance(source, BufferedSource)
+        self.assertGreaterEqual(source.buffered, BYTES_PER_SECOND // 2)
+        self.assertEqual(read_all(source, 700), b'\x02' * BYTES_PER_SECOND)
+        source.seek(0.5)
+        self.assertEqual(read_all(source), b'\x02' * (BYTES_PER_SECOND // 2))
+        source.delete()
+
+    def test_take(self) -> None:
+        self.prefetcher.prefetch(self.first)
+        self.assertEqual(self.prefetcher.path, self.first)
+        self.assertIsNone(self.prefetcher.take(self.second))
+        source = self.prefetcher.take(self.first, timeout=None)
+        assert source is not None
+        self.assertEqual(read_all(source), b'\x01' * (BYTES_PER_SECOND // 2))
+        self.assertIsNone(self.prefetcher.path)
+        self.assertIsNone(self.prefetcher.take(self.first))
+        self.assertEqual((self.prefetcher.hits, self.prefetcher.misses), (1, 2))
+
+    def test_replace(self) -> None:
+        self.prefetcher.prefetch(self.first)
+        self.prefetcher.prefetch(self.second)
+        self.assertIsNone(self.prefetcher.take(self.first, timeout=None))
+        self.assertIsNotNone(self.prefetcher.take(self.second, timeout=None))
+
+    def test_failed(self) -> None:
+        self.prefetcher.prefetch(os.path.join(self.dir, 'missing.wav'))
+        self.prefetcher.take(os.path.join(self.dir, 'missing.wav'), timeout=None)
+        self.assertEqual((self.prefetcher.hits, self.prefetcher.misses), (0, 1))
+
+
+class TestPlaybackEngine(AudioTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.engine = PlaybackEngine(prefetcher=Prefetcher(executor=ThreadPoolExecutor(1)))
+
+    def tearDown(self) -> None:
+        self.engine.close()
+        return super().tearDown()
+
+    def prepare(self, path: str) -> None:
+        self.engine.prepare(path)
+        # The prefetch runs in the background, it's queued once it's ready
+        while not self.engine.prefetcher.ready:
+            time.sleep(0.001)
+        self.engine.prepare(path)
+
+    def test_swap_releases(self) -> None:
+        player = self.engine.player
+        for _ in range(20):
+            self.assertEqual(self.engine.open(self.first), 'loaded')
+            self.assertEqual(self.engine.open(self.second), 'loaded')
+        # Still the same player, only the source that plays is held
+        self.assertIs(self.engine.player, player)
+        self.assertEqual(self.engine.current, self.second)
+        self.assertEqual(self.engine.stats[:2], (1, 1))
+        self.engine.close()
+        self.assertEqual(self.engine.stats[:2], (0, 0))
+        self.assertEqual(self.engine.stats.buffered_bytes, 0)
+
+    def test_prepare(self) -> None:
+        self.assertEqual(self.engine.length, 0)
+        self.engine.open(self.first)
+        self.assertAlmostEqual(self.engine.length, 0.5, places=2)
+        self.prepare(self.second)
+        self.assertEqual(self.engine.upcoming, (self.second,))
+        self.assertEqual(self.engine.stats.sources, 2)
+        self.assertEqual(self.engine.open(self.second), 'queued')
+        # The length of the song that plays now, by its source
+        self.assertAlmostEqual(self.engine.length, 1.0, places=2)
+        self.assertEqual(self.engine.upcoming, ())
+        self.assertEqual(self.engine.stats.sources, 1)
+        self.assertAlmostEqual(self.engine.time, 0, places=1)
+
+    def test_cache(self) -> None:
+        cache = PCMCache()
+        self.engine.close()
+        self.engine = PlaybackEngine(prefetcher=Prefetcher(executor=ThreadPoolExecutor(1),
+                                                           cache=cache))
+        for path in (self.first, self.second):
+            self.engine.open(path)
+            key = track_key(path)
+            assert key is not None
+            # Short tracks are decoded whole right away
+            deadline = time.monotonic() + 5
+            while key not in cache and time.monotonic() < deadline:
+                time.sleep(0.001)
+        decoded = self.engine.stats.decoded_bytes
+        # Flipping between them doesn't decode anything again
+        for _ in range(5):
+            self.engine.open(self.first)
+            self.engine.open(self.second)
+        self.assertEqual(self.engine.stats.decoded_bytes, decoded)
+        self.assertEqual(cache.stats.hits, 10)
+        self.assertEqual(self.engine.stats.sources, 1)
+
+    def test_prepare_other_format(self) -> None:
+        stereo = os.path.join(self.dir, 'stereo.wav')
+        write_wav(stereo, b'\x00' * 4000, channels=2)
+        self.engine.open(self.first)
+        self.prepare(stereo)
+        # Not gapless, it's kept prefetched for a switch of source instead
+        self.assertEqual(self.engine.upcoming, ())
+        self.assertEqual(self.engine.prefetcher.path, stereo)
+        self.assertEqual(self.engine.open(stereo), 'prefetched')
+        self.assertEqual(self.engine.current, stereo)
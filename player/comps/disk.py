@@ -2,28 +2,52 @@ from __future__ import annotations
 import os
 from actions import BASE_DIR
 from typing import (
+    Iterable,
     Tuple,
+    Dict,
     Any,
 )
 
 
 __all__ = (
     'Disk',
+    'songs_identity',
 )
 
 
+def songs_identity(songs: Iterable[str]) -> Tuple[int, int]:
+    """An order independent identity of a collection of (unique) songs
+
+    :param songs: The songs
+    :type songs: Iterable[str]
+    :return: The number of songs and the XOR of their hashes
+    :rtype: Tuple[int, int]
+    """
+    count, fingerprint = 0, 0
+    for song in songs:
+        count += 1
+        fingerprint ^= hash(song)
+    return count, fingerprint
+
+
 class Disk:
     """A `Disk` object stores and handles a sequenes of songs
+
+    Next to the ordered songs, a `Disk` keeps the position of every song
+    in a dict, so finding a song is O(1), and an order independent
+    `Disk.identity` that is updated along with the songs
     """
     def __init__(self, songs_list: Tuple[str, ...], last_song: Any = None) -> None:
         """ The `self._playing_index` MUST always be aware of changes.
             This MUST EXPLICITLY return anything from self._songs ALWAYS
         """
         self._songs = songs_list
+        self._positions: Dict[str, int] = {song: i for i, song in enumerate(songs_list)}
+        self._fingerprint = songs_identity(songs_list)[1]
         self._playing_index = 0
 
         if last_song:
-            self._playing_index = self._songs.index(last_song)
+            self._playing_index = self.index_of(last_song)
 
     def __str__(self) -> str:
         return f"<Song('{self._songs[self._playing_index]}')>"
@@ -34,8 +58,8 @@ class Disk:
     def __getitem__(self, i: int) -> str:
         return self._songs[i]
 
-    def __contains__(self, __o: str) -> bool:
-        return __o in self._songs
+    def __contains__(self, __o: object) -> bool:
+        return __o in self._positions
 
     def __len__(self) -> int:
         return len(self._songs)
@@ -52,6 +76,28 @@ class Disk:
         else:
             raise StopIteration
 
+    @property
+    def identity(self) -> Tuple[int, int]:
+        """
+        :return: The same value for every disk with the same songs, in any order.
+        See `songs_identity`
+        :rtype: Tuple[int, int]
+        """
+        return len(self._songs), self._fingerprint
+
+    def index_of(self, song: str) -> int:
+        """
+        :param song: A song as `.mp3`
+        :type song: str
+        :raises ValueError: If `song` is not in the disk
+        :return: The index of `song`
+        :rtype: int
+        """
+        try:
+            return self._positions[song]
+        except KeyError:
+            raise ValueError(f"{song!r} is not in the disk") from None
+
     @property
     def song_index(self) -> int:
         """
@@ -77,6 +123,14 @@ class Disk:
         """
         return os.path.join(BASE_DIR, 'player', 'songs', self.song_mp3)
 
+    @property
+    def next_song_path(self) -> str:
+        """
+        :return str: The full path of the song `Disk.next` goes to, without going there
+        """
+        song = self._songs[(self._playing_index + 1) % len(self._songs)]
+        return os.path.join(BASE_DIR, 'player', 'songs', song)
+
     @property
     def full_song_list(self) -> Tuple[str, ...]:
         """
@@ -150,3 +204,87 @@ class Disk:
             raise IndexError("Disk index cannot be negative")
         self._playing_index = index
         return self._songs[self._playing_index]
+
+    def add(self, songs: Iterable[str]) -> Tuple[int, ...]:
+        """Append the songs that are not in the disk yet.
+        The song that is playing doesn't change
+
+        :param songs: The new songs as `.mp3`
+        :type songs: Iterable[str]
+        :return: The indexes of the added songs
+        :rtype: Tuple[int, ...]
+        """
+        new = tuple(dict.fromkeys(song for song in songs if song not in self._positions))
+        start = len(self._songs)
+        self._songs = self._songs + new
+        for i, song in enumerate(new, start):
+            self._positions[song] = i
+            self._fingerprint ^= hash(song)
+        return tuple(range(start, len(self._songs)))
+
+    def remove(self, songs: Iterable[str]) -> Tuple[int, ...]:
+        """Remove songs from the disk. If the song that is playing is removed,
+        the disk points to the song before it, so `Disk.next` gives
+        the song that took its place
+
+        :param songs: The songs to remove as `.mp3`
+        :type songs: Iterable[str]
+        :return: The indexes the removed songs had, in descending order
+        so they can be removed one by one from any other sequence
+        :rtype: Tuple[int, ...]
+        """
+        indexes = tuple(sorted({self._positions[song] for song in songs
+                                if song in self._positions}, reverse=True))
+        if not indexes:
+            return indexes
+
+        playing = self._playing_index
+        before = sum(1 for i in indexes if i < playing)
+        if playing in indexes:
+            self._playing_index = playing - before - 1
+        else:
+            self._playing_index = playing - before
+
+        for i in indexes:
+            song = self._songs[i]
+            del self._positions[song]
+            self._fingerprint ^= hash(song)
+        self._songs = tuple(song for song in self._songs if song in self._positions)
+        # Only the songs after the first removed one moved
+        for i in range(indexes[-1], len(self._songs)):
+            self._positions[self._songs[i]] = i
+        return indexes
+
+    def rename(self, old: str, new: str) -> int:
+        """Rename a song in place
+
+        :param old: The current name as `.mp3`
+        :type old: str
+        :param new: The new name as `.mp3`
+        :type new: str
+        :raises ValueError: If `old` is not in the disk
+        :return: The index of the song
+        :rtype: int
+        """
+        index = self.index_of(old)
+        self._songs = self._songs[:index] + (new,) + self._songs[index + 1:]
+        del self._positions[old]
+        self._positions[new] = index
+        self._fingerprint ^= hash(old) ^ hash(new)
+        return index
+
+    def reorder(self, songs: Tuple[str, ...]) -> None:
+        """Put the same songs in another order. The song that is playing
+        doesn't change, only its index
+
+        :param songs: All the songs of the disk, in the new order
+        :type songs: Tuple[str, ...]
+        :raises ValueError: If `songs` are not the songs of the disk
+        """
+        if songs_identity(songs) != self.identity:
+            raise ValueError("A disk can only be reordered with the same songs")
+        playing = self._songs[self._playing_index] if self._songs else None
+        self._songs = songs
+        self._positions = {song: i for i, song in enumerate(songs)}
+        if playing is not None:
+            self._playing_index = self._positions[playing]
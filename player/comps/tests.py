@@ -1,6 +1,9 @@
 import unittest
 import os
-from .disk import Disk
+from .disk import (
+    Disk,
+    songs_identity,
+)
 from .musicplayer import (
     MusicPlayer,
     PlayerError,
@@ -52,6 +55,16 @@ class TestDisk(unittest.TestCase):
         song_path = os.path.join('songs', SONGS[disk.song_index])
         self.assertEqual(path, song_path)
 
+    def test_next_song_path(self) -> None:
+        disk = Disk(SONGS, SONGS[-2])
+        self.assertEqual(os.path.basename(disk.next_song_path), SONGS[-1])
+        self.assertEqual(disk.song_mp3, SONGS[-2])
+        disk.next()
+        self.assertEqual(os.path.basename(disk.next_song_path), SONGS[0])
+        disk.next()
+        self.assertEqual(disk.song_path, os.path.join(os.path.dirname(disk.next_song_path),
+                                                      SONGS[0]))
+
     def move_song_index(self) -> None:
         index = 0
         disk = Disk(SONGS)
@@ -83,6 +96,84 @@ class TestDisk(unittest.TestCase):
             pick = len(SONGS)
             disk.user_pick(pick)
 
+    def test_add(self) -> None:
+        disk = Disk(SONGS[:3], SONGS[1])
+        indexes = disk.add((SONGS[2], SONGS[3], SONGS[4], SONGS[3]))
+        self.assertEqual(indexes, (3, 4))
+        self.assertEqual(disk.full_song_list, SONGS[:5])
+        self.assertEqual(disk.song_mp3, SONGS[1])
+
+    def test_remove(self) -> None:
+        disk = Disk(SONGS, SONGS[5])
+        indexes = disk.remove((SONGS[1], SONGS[8], SONGS[3], 'missing.mp3'))
+        self.assertEqual(indexes, (8, 3, 1))
+        self.assertEqual(len(disk), len(SONGS) - 3)
+        self.assertEqual(disk.song_mp3, SONGS[5])
+        self.assertEqual(disk.remove(()), ())
+
+    def test_remove_playing(self) -> None:
+        disk = Disk(SONGS, SONGS[5])
+        disk.remove((SONGS[2], SONGS[5]))
+        self.assertEqual(disk.next(), SONGS[6])
+
+    def test_rename(self) -> None:
+        disk = Disk(SONGS, SONGS[2])
+        self.assertEqual(disk.rename(SONGS[2], 'renamed.mp3'), 2)
+        self.assertEqual(disk.song_mp3, 'renamed.mp3')
+        self.assertEqual(len(disk), len(SONGS))
+        self.assertRaises(ValueError, disk.rename, SONGS[2], 'other.mp3')
+
+    def _assert_positions(self, disk: Disk) -> None:
+        for i, song in enumerate(disk.full_song_list):
+            self.assertEqual(disk.index_of(song), i)
+        self.assertEqual(disk.identity, songs_identity(disk.full_song_list))
+
+    def test_index_of(self) -> None:
+        disk = Disk(SONGS)
+        self._assert_positions(disk)
+        self.assertIn(SONGS[4], disk)
+        self.assertNotIn('missing.mp3', disk)
+        self.assertRaises(ValueError, disk.index_of, 'missing.mp3')
+        self.assertRaises(ValueError, Disk, SONGS, 'missing.mp3')
+
+    def test_positions_follow_changes(self) -> None:
+        disk = Disk(SONGS, SONGS[7])
+        disk.remove((SONGS[0], SONGS[9]))
+        self._assert_positions(disk)
+        disk.add(('new.mp3',))
+        self._assert_positions(disk)
+        disk.rename(SONGS[3], 'renamed.mp3')
+        self._assert_positions(disk)
+        self.assertNotIn(SONGS[3], disk)
+        self.assertEqual(disk.song_mp3, SONGS[7])
+
+    def test_identity(self) -> None:
+        disk = Disk(SONGS)
+        self.assertEqual(disk.identity, Disk(tuple(reversed(SONGS))).identity)
+        self.assertNotEqual(disk.identity, Disk(SONGS[1:]).identity)
+        disk.rename(SONGS[0], 'renamed.mp3')
+        self.assertNotEqual(disk.identity, Disk(SONGS).identity)
+        disk.rename('renamed.mp3', SONGS[0])
+        self.assertEqual(disk.identity, Disk(SONGS).identity)
+
+    def test_reorder(self) -> None:
+        disk = Disk(SONGS, SONGS[4])
+        new_order = tuple(sorted(SONGS))
+        disk.reorder(new_order)
+        self.assertEqual(disk.full_song_list, new_order)
+        self.assertEqual(disk.song_mp3, SONGS[4])
+        self.assertEqual(disk.song_index, new_order.index(SONGS[4]))
+        self._assert_positions(disk)
+        self.assertRaises(ValueError, disk.reorder, SONGS[1:])
+
+    def test_large_disk(self) -> None:
+        songs = tuple(f"{i}.mp3" for i in range(200_000))
+        disk = Disk(songs, songs[-1])
+        self.assertEqual(disk.song_index, len(songs) - 1)
+        disk.reorder(tuple(reversed(songs)))
+        self.assertEqual(disk.song_index, 0)
+        self.assertEqual(disk.index_of(songs[0]), len(songs) - 1)
+
     def test_title(self) -> None:
         disk = Disk(SONGS)
         song = 'practical'
@@ -0,0 +1,5 @@
+from .queue import *  # noqa
+from .partial import *  # noqa
+from .fetch import *  # noqa
+from .manager import *  # noqa
+from .transcode import *  # noqa
@@ -0,0 +1,240 @@
+from __future__ import annotations
+import os
+import re
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.client import HTTPResponse
+from email.message import Message
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    FIRST_EXCEPTION,
+    Future,
+    wait,
+)
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+    List,
+)
+from .partial import (
+    PartialFile,
+    move_unique,
+)
+
+
+__all__ = (
+    'split_urls',
+    'is_playlist',
+    'fetch_url',
+)
+
+
+# Bytes read from the connection at once
+CHUNK_SIZE = 2 ** 16
+# Seconds a connection may stay silent
+TIMEOUT = 30
+# A file this big is cut into segments that are downloaded by many connections
+PARALLEL_SIZE = 2 ** 23
+SEGMENT_SIZE = 2 ** 22
+# Seconds between two saves of the downloaded ranges
+SAVE_INTERVAL = 0.5
+_URL = re.compile(r'https?://\S+')
+_CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+
+
+def split_urls(text: str) -> List[str]:
+    """The URLs of a pasted text, one per line or separated by spaces or commas
+
+    :param text: The text
+    :type text: str
+    :return: The URLs in it, in order and without repeats
+    :rtype: List[str]
+    """
+    urls = (url.rstrip(',;') for url in _URL.findall(text.replace(',', ' ')))
+    return list(dict.fromkeys(urls))
+
+
+def is_playlist(url: str) -> bool:
+    """
+    :param url: A URL
+    :type url: str
+    :return: `True` if it's a YouTube playlist, not a video of one
+    :rtype: bool
+    """
+    parsed = urllib.parse.urlparse(url)
+    query = urllib.parse.parse_qs(parsed.query)
+    return parsed.path.rstrip('/').endswith('/playlist') and 'list' in query
+
+
+def _file_name(url: str, headers: Message) -> str:
+    name = headers.get_filename()
+    if not name:
+        name = urllib.parse.unquote(os.path.basename(urllib.parse.urlparse(url).path))
+    # Never outside of the directory
+    name = os.path.basename(name.replace('\\', '/')).strip()
+    return name or 'download'
+
+
+def _content_range(response: HTTPResponse) -> Optional[Tuple[int, int, int]]:
+    # The start, the end and the size of the file of a partial response
+    match = _CONTENT_RANGE.fullmatch(response.headers.get('Content-Range') or '')
+    if response.status != 206 or match is None:
+        return None
+    start, last, size = map(int, match.groups())
+    return start, last + 1, size
+
+
+def _open(url: str, start: int, end: Optional[int] = None,
+          validator: str = '') -> HTTPResponse:
+    headers = {'Range': f"bytes={start}-{'' if end is None else end - 1}"}
+    if validator:
+        # The whole file is sent instead if it's not the same one anymore
+        headers['If-Range'] = validator
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        response: HTTPResponse = urllib.request.urlopen(request, timeout=TIMEOUT)
+    except urllib.error.HTTPError as err:
+        # Only its status is wanted, the connection is let go
+        err.close()
+        raise
+    return response
+
+
+def _fetch_segment(url: str, part: PartialFile, start: int, end: int,
+                   stop: threading.Event, response: Optional[HTTPResponse] = None) -> None:
+    # Runs in a thread of its own, the bytes are written at their place in the file
+    if response is None:
+        response = _open(url, start, end, part.validator)
+        content_range = _content_range(response)
+        if content_range is None or content_range[0] != start:
+            response.close()
+            raise ConnectionError(f"{url} changed while it was downloaded")
+    position = start
+    with response, open(part.temp, mode='r+b') as f:
+        f.seek(start)
+        while position < end and not stop.is_set():
+            chunk = response.read(min(CHUNK_SIZE, end - position))
+            if not chunk:
+                raise ConnectionError(f"{url} ended at byte {position} of {part.size}")
+            f.write(chunk)
+            f.flush()
+            part.add(position, position + len(chunk))
+            position += len(chunk)
+
+
+def _fetch_whole(response: HTTPResponse, url: str, part: PartialFile,
+                 progress: Optional[Callable[[float], None]]) -> str:
+    # The server can't send a part of the file, it's downloaded from its start
+    part.remove()
+    temp = part.temp
+    size = int(response.headers.get('Content-Length') or 0)
+    done = 0
+    try:
+        with open(temp, 'wb') as f:
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                done += len(chunk)
+                if progress is not None and size:
+                    progress(done / size)
+        if size and done < size:
+            raise ConnectionError(f"{url} ended after {done} of {size} bytes")
+    except BaseException:
+        os.remove(temp)
+        raise
+    return move_unique(temp, part.path)
+
+
+def _fetch_ranges(response: HTTPResponse, url: str, part: PartialFile, workers: int,
+                  progress: Optional[Callable[[float], None]]) -> str:
+    segment = SEGMENT_SIZE if workers > 1 and part.size >= PARALLEL_SIZE else None
+    segments = part.missing(segment)
+    stop = threading.Event()
+    futures: List[Future[None]] = []
+    executor = ThreadPoolExecutor(workers if segment else 1)
+    try:
+        for start, end in segments:
+            # The first request goes on for the start of the file
+            first = response if start == 0 else None
+            futures.append(executor.submit(_fetch_segment, url, part, start, end, stop, first))
+        if not segments or segments[0][0] != 0:
+            response.close()
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, SAVE_INTERVAL, FIRST_EXCEPTION)
+            part.save()
+            if any(future.exception() for future in futures if future.done()):
+                break
+            if progress is not None:
+                progress(part.completed / part.size)
+    finally:
+        # What was downloaded stays for the next time, a cancel included
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        part.save()
+    for future in futures:
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            raise error
+    if part.missing():
+        raise ConnectionError(f"{url} ended after {part.completed} of {part.size} bytes")
+    return part.finish()
+
+
+def fetch_url(url: str, directory: str,
+              progress: Optional[Callable[[float], None]] = None,
+              name: Optional[str] = None, workers: int = 1,
+              key: Optional[str] = None) -> str:
+    """Download a file over HTTP into a directory, a chunk at a time. It's written
+    aside and moved in place once it's whole, under another name if a file has its
+    name already.
+
+    If the server can send parts of the file, what was written is kept track of
+    (see `PartialFile`): a download that failed or was stopped, even by closing the
+    player, goes on from where it was the next time, and a big file is downloaded
+    by `workers` connections at once. Otherwise a failed download leaves nothing behind
+
+    :param url: The URL of the file
+    :type url: str
+    :param directory: Where to put it
+    :type directory: str
+    :param progress: Called with how far the download is, from 0 to 1. What it raises
+    stops the download, defaults to None
+    :type progress: Optional[Callable[[float], None]], optional
+    :param name: The name of the file, defaults to the one the server gives
+    or the last part of the URL
+    :type name: Optional[str], optional
+    :param workers: The connections of a big file, defaults to 1
+    :type workers: int, optional
+    :param key: What the download is resumed by, for a URL that changes from one
+    time to the next, defaults to the URL
+    :type key: Optional[str], optional
+    :raises urllib.error.URLError: If the file can't be downloaded
+    :return: The path of the file
+    :rtype: str
+    """
+    response = _open(url, 0)
+    try:
+        path = os.path.join(directory, name or _file_name(url, response.headers))
+        # Downloads of the same name have a partial state each
+        part = PartialFile(path, key or url)
+        content_range = _content_range(response)
+        if content_range is None:
+            with response:
+                path = _fetch_whole(response, url, part, progress)
+        else:
+            validator = response.headers.get('ETag') or \
+                response.headers.get('Last-Modified') or ''
+            if not part.matches(content_range[2], validator):
+                part.reset(content_range[2], validator)
+            path = _fetch_ranges(response, url, part, workers, progress)
+    finally:
+        response.close()
+    if progress is not None:
+        progress(1.0)
+    return path
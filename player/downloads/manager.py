@@ -0,0 +1,192 @@
+from __future__ import annotations
+import http.client
+import itertools
+import urllib.error
+from jobs import (
+    JobCancelled,
+    Job,
+)
+from .queue import DownloadQueue
+from .fetch import is_playlist
+from typing import (
+    NamedTuple,
+    Callable,
+    Iterable,
+    Optional,
+    Tuple,
+    List,
+    Dict,
+)
+
+
+__all__ = (
+    'Batch',
+    'Expansion',
+    'DownloadManager',
+    'retryable',
+    'RETRIES',
+    'BACKOFF',
+)
+
+
+# Attempts after the first one
+RETRIES = 3
+# Seconds before the first retry, doubled before every next one
+BACKOFF = 2.0
+# HTTP statuses that may go away by themselves
+_TRANSIENT = (408, 425, 429)
+
+
+class Batch(NamedTuple):
+    # The paths of the files that were downloaded
+    done: List[str]
+    # The URLs that failed and why
+    failed: List[Tuple[str, BaseException]]
+
+
+class Expansion(NamedTuple):
+    # The videos of a playlist, what its job finds
+    urls: Tuple[str, ...]
+
+
+def retryable(error: BaseException) -> bool:
+    """
+    :param error: What a download raised
+    :type error: BaseException
+    :return: `True` if trying again may work: the connection failed or the server
+    was busy. A missing file or a refused request is not tried again
+    :rtype: bool
+    """
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code in _TRANSIENT
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
+class DownloadManager:
+    """A `DownloadManager` downloads the URLs of its `DownloadQueue`, every URL is a job.
+    The jobs are run by a `JobRunner` (or the window's `JobQueue`), which limits
+    how many run at once. A download that fails on the connection is tried again
+    after a wait that doubles every time. A playlist is a job of its own that
+    queues its videos.
+
+    The downloads that are added while others run make a batch. `finished` is told
+    about every job that ends and gives the batch back once none is left, so a batch
+    of any size is a single update of the library.
+
+    The manager itself is used from one thread, the jobs only run `fetch`
+    """
+    def __init__(self, submit: Callable[..., Job],
+                 fetch: Callable[[str, Callable[[float], None]], str],
+                 queue: DownloadQueue,
+                 expand: Optional[Callable[[str], List[str]]] = None,
+                 retries: int = RETRIES, backoff: float = BACKOFF) -> None:
+        """
+        :param submit: What runs the jobs, called as `submit(url, func, url)`
+        like `JobRunner.submit`
+        :type submit: Callable[..., Job]
+        :param fetch: What downloads a URL, given it and a progress callback.
+        It returns the path of the file
+        :type fetch: Callable[[str, Callable[[float], None]], str]
+        :param queue: Where the URLs wait, what's in it is resumed by `resume`
+        :type queue: DownloadQueue
+        :param expand: What finds the videos of a playlist, defaults to None
+        (playlists are downloaded like any URL)
+        :type expand: Optional[Callable[[str], List[str]]], optional
+        :param retries: Attempts after the first one, defaults to `RETRIES`
+        :type retries: int, optional
+        :param backoff: Seconds before the first retry, defaults to `BACKOFF`
+        :type backoff: float, optional
+        """
+        self._submit = submit
+        self._fetch = fetch
+        self.queue = queue
+        self._expand = expand
+        self.retries = retries
+        self.backoff = backoff
+        # The URL of every job that is not finished
+        self._running: Dict[int, str] = {}
+        self._batch = Batch([], [])
+        self._closing = False
+
+    @property
+    def running(self) -> Tuple[str, ...]:
+        """
+        :return: The URLs that are downloading or waiting for a worker
+        :rtype: Tuple[str, ...]
+        """
+        return tuple(self._running.values())
+
+    def add(self, urls: Iterable[str]) -> List[Job]:
+        """Queue URLs and start their jobs. A URL that is already downloading is skipped
+
+        :param urls: The URLs
+        :type urls: Iterable[str]
+        :return: The new jobs
+        :rtype: List[Job]
+        """
+        jobs: List[Job] = []
+        for url in urls:
+            if url in self._running.values():
+                continue
+            self.queue.add(url)
+            jobs.append(self._start(url))
+        return jobs
+
+    def resume(self) -> List[Job]:
+        """Start the jobs of what the queue kept from the last time
+
+        :return: The new jobs
+        :rtype: List[Job]
+        """
+        return self.add(self.queue)
+
+    def _start(self, url: str) -> Job:
+        job = self._submit(url, self._download, url)
+        self._running[job.id] = url
+        return job
+
+    def _download(self, job: Job, url: str) -> object:
+        if self._expand is not None and is_playlist(url):
+            return Expansion(tuple(self._expand(url)))
+        for attempt in itertools.count():
+            try:
+                return self._fetch(url, job.report)
+            except JobCancelled:
+                raise
+            except Exception as err:
+                if attempt >= self.retries or not retryable(err):
+                    raise
+            job.sleep(self.backoff * 2 ** attempt)
+        return None
+
+    def finished(self, job: Job) -> Optional[Batch]:
+        """Take in a job that ended, whatever the way it ended
+
+        :param job: The job
+        :type job: Job
+        :return: The batch once it was the last job of it, `None` before that
+        :rtype: Optional[Batch]
+        """
+        url = self._running.pop(job.id, None)
+        if url is None:
+            return None
+        if job.state != 'cancelled' or not self._closing:
+            # What was stopped by the player closing is resumed the next time
+            self.queue.discard(url)
+        if job.state == 'done' and isinstance(job.result, Expansion):
+            self.add(job.result.urls)
+        elif job.state == 'done':
+            self._batch.done.append(job.result)
+        elif job.state == 'failed':
+            assert job.error is not None
+            self._batch.failed.append((url, job.error))
+        if self._running:
+            return None
+        batch, self._batch = self._batch, Batch([], [])
+        return batch
+
+    def close(self) -> None:
+        """Keep what's not downloaded for the next launch, the jobs
+        are cancelled by whatever runs them
+        """
+        self._closing = True
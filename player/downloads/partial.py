@@ -0,0 +1,224 @@
+from __future__ import annotations
+import os
+import json
+import hashlib
+import threading
+from typing import (
+    Optional,
+    Tuple,
+    List,
+    Any,
+)
+
+
+__all__ = (
+    'PartialFile',
+    'remove_partials',
+    'move_unique',
+)
+
+
+# Byte ranges, the start is in the range and the end is not
+Range = Tuple[int, int]
+# The files of a download that's not whole
+_SUFFIXES = ('.part', '.part.json')
+
+
+def _merge(ranges: List[Range]) -> List[Range]:
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = merged[-1][0], max(merged[-1][1], end)
+        elif start < end:
+            merged.append((start, end))
+    return merged
+
+
+def move_unique(src: str, dst: str) -> str:
+    """Move a file without replacing another one. A name that is taken gets a number,
+    `song (2).mp3`. It holds across threads and processes, the new name is taken
+    with a hard link that fails if it exists
+
+    :param src: The file
+    :type src: str
+    :param dst: Where to move it
+    :type dst: str
+    :return: Where it was moved
+    :rtype: str
+    """
+    stem, extension = os.path.splitext(dst)
+    number = 1
+    while True:
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            pass
+        except OSError:
+            # A file system without hard links
+            if not os.path.exists(dst):
+                os.replace(src, dst)
+                return dst
+        else:
+            os.remove(src)
+            return dst
+        number += 1
+        dst = f"{stem} ({number}){extension}"
+
+
+class PartialFile:
+    """A `PartialFile` is a download that's not whole yet. Its bytes are written in
+    place in `<path>.<key>.part`, which has the size of the whole file from the start,
+    and the ranges that were written are kept in `<path>.<key>.part.json`. The key
+    tells apart downloads that would have the same name (usually it's the URL). A
+    download that was stopped goes on from what's missing, as long as the file on the
+    server is the same one, by its size and its `ETag` or `Last-Modified`.
+
+    Ranges are added from many threads at once. A range must be added only once its
+    bytes are flushed, the sidecar never claims bytes the file doesn't have
+    """
+    def __init__(self, path: str, key: Optional[str] = None) -> None:
+        """
+        :param path: The path of the file once it's whole
+        :type path: str
+        :param key: What the download is, defaults to None (the path alone)
+        :type key: Optional[str], optional
+        """
+        self.path = path
+        tag = '' if key is None else f".{hashlib.sha1(key.encode()).hexdigest()[:12]}"
+        self._stem = f"{path}{tag}"
+        self.size = 0
+        self.validator = ''
+        self._ranges: List[Range] = []
+        self._lock = threading.Lock()
+        self.load()
+
+    @property
+    def temp(self) -> str:
+        return f"{self._stem}.part"
+
+    @property
+    def sidecar(self) -> str:
+        return f"{self._stem}.part.json"
+
+    @property
+    def ranges(self) -> Tuple[Range, ...]:
+        with self._lock:
+            return tuple(self._ranges)
+
+    @property
+    def completed(self) -> int:
+        with self._lock:
+            return sum(end - start for start, end in self._ranges)
+
+    def load(self) -> None:
+        # A missing or broken sidecar, or one without its file, is nothing downloaded
+        try:
+            with open(self.sidecar, mode='r') as f:
+                state: Any = json.load(f)
+            size, validator = int(state['size']), str(state['validator'])
+            ranges = [(int(start), int(end)) for start, end in state['ranges']]
+        except (FileNotFoundError, ValueError, TypeError, KeyError):
+            size, validator, ranges = 0, '', []
+        if not os.path.isfile(self.temp) or os.path.getsize(self.temp) != size:
+            size, validator, ranges = 0, '', []
+        with self._lock:
+            self.size, self.validator = size, validator
+            self._ranges = _merge([(max(start, 0), min(end, size)) for start, end in ranges])
+
+    def save(self) -> None:
+        with self._lock:
+            state = {'size': self.size, 'validator': self.validator, 'ranges': self._ranges}
+            # Written aside and moved over, a crash never leaves half a file
+            temp = f"{self.sidecar}.tmp"
+            with open(temp, mode='w') as f:
+                json.dump(state, f)
+            os.replace(temp, self.sidecar)
+
+    def matches(self, size: int, validator: str) -> bool:
+        """
+        :param size: The size of the file on the server
+        :type size: int
+        :param validator: Its `ETag` or `Last-Modified`, empty if there's none
+        :type validator: str
+        :return: `True` if what was downloaded is of the same file and can be kept
+        :rtype: bool
+        """
+        return bool(self.size) and self.size == size and bool(validator) and \
+            self.validator == validator
+
+    def reset(self, size: int, validator: str) -> None:
+        """Start over, for a file of another size or another version
+
+        :param size: The size of the whole file
+        :type size: int
+        :param validator: Its `ETag` or `Last-Modified`
+        :type validator: str
+        """
+        with open(self.temp, mode='wb') as f:
+            f.truncate(size)
+        with self._lock:
+            self.size, self.validator = size, validator
+            self._ranges = []
+        self.save()
+
+    def add(self, start: int, end: int) -> None:
+        """Record bytes that were written, the sidecar is updated by `save`
+
+        :param start: The first byte
+        :type start: int
+        :param end: The byte after the last one
+        :type end: int
+        """
+        with self._lock:
+            self._ranges = _merge(self._ranges + [(start, end)])
+
+    def missing(self, segment: Optional[int] = None) -> List[Range]:
+        """
+        :param segment: Ranges are cut to this size at most, defaults to None
+        :type segment: Optional[int], optional
+        :return: The ranges that are still to be downloaded
+        :rtype: List[Range]
+        """
+        gaps: List[Range] = []
+        position = 0
+        for start, end in self.ranges + ((self.size, self.size),):
+            if start > position:
+                gaps.append((position, start))
+            position = max(position, end)
+        if segment is None:
+            return gaps
+        return [(start, min(start + segment, end))
+                for gap_start, end in gaps for start in range(gap_start, end, segment)]
+
+    def finish(self) -> str:
+        """Move the whole file in place and drop its state. Another file of the same
+        name is not replaced (see `move_unique`)
+
+        :return: The path of the file
+        :rtype: str
+        """
+        path = move_unique(self.temp, self.path)
+        if os.path.exists(self.sidecar):
+            os.remove(self.sidecar)
+        return path
+
+    def remove(self) -> None:
+        for path in (self.temp, self.sidecar):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def remove_partials(directory: str) -> List[str]:
+    """Remove the downloads of a directory that were left unfinished, for when
+    there's nothing left to resume them
+
+    :param directory: The directory
+    :type directory: str
+    :return: The names of the downloads that were removed, with their keys
+    :rtype: List[str]
+    """
+    removed = {name[:name.rindex('.part')] for name in os.listdir(directory)
+               if name.endswith(_SUFFIXES)}
+    for name in removed:
+        PartialFile(os.path.join(directory, name)).remove()
+    return sorted(removed)
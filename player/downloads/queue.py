@@ -0,0 +1,77 @@
+from __future__ import annotations
+import os
+import json
+from typing import (
+    Iterator,
+    List,
+    Any,
+)
+
+
+__all__ = (
+    'DownloadQueue',
+)
+
+
+class DownloadQueue:
+    """A `DownloadQueue` is the list of the URLs that are waiting to be downloaded or
+    are being downloaded, in the order they were added. It's written to its file on
+    every change, what was not downloaded when the player closed is there on the
+    next launch. A missing or broken file is an empty queue
+    """
+    def __init__(self, file: str) -> None:
+        self._file = file
+        self._urls: List[str] = []
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(tuple(self._urls))
+
+    def __contains__(self, __o: Any) -> bool:
+        return __o in self._urls
+
+    @property
+    def file(self) -> str:
+        return self._file
+
+    def load(self) -> None:
+        try:
+            with open(self.file, mode='r') as f:
+                urls = json.load(f)
+        except (FileNotFoundError, ValueError):
+            urls = []
+        self._urls = [url for url in urls if isinstance(url, str)] \
+            if isinstance(urls, list) else []
+
+    def save(self) -> None:
+        # Written aside and moved over, a crash never leaves half a file
+        temp = f"{self.file}.tmp"
+        with open(temp, mode='w') as f:
+            json.dump(self._urls, f, ensure_ascii=False)
+        os.replace(temp, self.file)
+
+    def add(self, url: str) -> bool:
+        """
+        :param url: The URL to download
+        :type url: str
+        :return: `False` if it's already in the queue
+        :rtype: bool
+        """
+        if url in self._urls:
+            return False
+        self._urls.append(url)
+        self.save()
+        return True
+
+    def discard(self, url: str) -> None:
+        """Remove a URL if it's in the queue
+
+        :param url: The URL
+        :type url: str
+        """
+        if url in self._urls:
+            self._urls.remove(url)
+            self.save()
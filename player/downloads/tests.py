@@ -0,0 +1,620 @@
+import os
+import re
+import sys
+import time
+import hashlib
+import queue
+import shutil
+import threading
+import unittest
+import urllib.error
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from actions import SONGS_DIR
+from http.server import (
+    ThreadingHTTPServer,
+    BaseHTTPRequestHandler,
+)
+from jobs import (
+    JobRunner,
+    Job,
+)
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+from .queue import DownloadQueue
+from .partial import (
+    PartialFile,
+    remove_partials,
+)
+from .fetch import (
+    split_urls,
+    is_playlist,
+    fetch_url,
+    SEGMENT_SIZE,
+)
+from .manager import (
+    DownloadManager,
+    Batch,
+    retryable,
+)
+from .transcode import (
+    TranscodeSettings,
+    TranscodeResult,
+    TranscodePool,
+    sniff_container,
+    transcode_files,
+)
+
+
+BASE_DIR = Path(__file__).parent
+PLAYLIST = 'https://www.youtube.com/playlist?list=PL0123456789'
+SONG = os.path.join(SONGS_DIR, 'Sjaak - Trompetisto (Official Music Video).mp3')
+# Stands in for ffmpeg, it copies the input to the output and fails on a broken one
+FFMPEG = f"""#!{sys.executable}
+import sys
+src, dst = sys.argv[sys.argv.index('-i') + 1], sys.argv[-1]
+with open(src, 'rb') as f:
+    data = f.read()
+if b'broken' in data:
+    sys.stderr.write('Invalid data found when processing input')
+    sys.exit(1)
+with open(dst, 'wb') as f:
+    f.write(b'ENCODED ' + ' '.join(sys.argv[1:]).encode() + b'\\n' + data)
+"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves the files of the server, a path can fail a few times first, parts of
+    a file are sent if the server takes ranges and a connection can be cut short
+    """
+    server: 'Server'
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server.lock:
+            server.requests[self.path] = server.requests.get(self.path, 0) + 1
+            server.active += 1
+            server.most = max(server.most, server.active)
+            fail = server.failures.get(self.path, 0)
+            if fail:
+                server.failures[self.path] = fail - 1
+        try:
+            time.sleep(server.delay)
+            data = server.files.get(self.path)
+            if fail or data is None:
+                self.send_error(503 if fail else 404)
+                return
+            etag = f'"{hashlib.md5(data).hexdigest()}"'
+            match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+            start, end = 0, len(data)
+            if server.ranges and match and self.headers.get('If-Range', etag) == etag:
+                start = int(match[1])
+                end = int(match[2]) + 1 if match[2] else len(data)
+                self.send_response(206)
+                self.send_header('Content-Range', f"bytes {start}-{end - 1}/{len(data)}")
+            else:
+                self.send_response(200)
+            with server.lock:
+                server.ranges_sent.append((self.path, start, end))
+            self.send_header('Content-Length', str(end - start))
+            if server.ranges:
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('ETag', etag)
+            if self.path in server.names:
+                self.send_header('Content-Disposition',
+                                 f'attachment; filename="{server.names[self.path]}"')
+            self.end_headers()
+            # The connection drops after the limit
+            body = data[start:min(end, start + server.limits.get(self.path, end))]
+            for i in range(0, len(body), 2 ** 16):
+                self.wfile.write(body[i:i + 2 ** 16])
+                time.sleep(server.pause)
+        except (ConnectionResetError, BrokenPipeError):
+            # The client took what it wanted
+            pass
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.files: Dict[str, bytes] = {}
+        self.names: Dict[str, str] = {}
+        self.failures: Dict[str, int] = {}
+        self.limits: Dict[str, int] = {}
+        self.requests: Dict[str, int] = {}
+        self.ranges = True
+        self.ranges_sent: List[Tuple[str, int, int]] = []
+        self.delay = 0.0
+        # Seconds between the chunks of a file
+        self.pause = 0.0
+        self.active = self.most = 0
+        self.lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class ServerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = str(Path(BASE_DIR, 'testdownloads'))
+        os.makedirs(self.dir, exist_ok=True)
+        self.server = Server()
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.dir)
+        return super().tearDown()
+
+
+class TestFetch(ServerTestCase):
+    def test_fetch(self) -> None:
+        data = os.urandom(300000)
+        self.server.files['/songs/a%20song.mp3'] = data
+        reports: List[float] = []
+        path = fetch_url(self.server.url('/songs/a%20song.mp3'), self.dir, reports.append)
+        self.assertEqual(path, os.path.join(self.dir, 'a song.mp3'))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(reports, sorted(reports))
+        self.assertEqual(reports[-1], 1.0)
+        self.assertEqual(os.listdir(self.dir), ['a song.mp3'])
+
+    def test_name(self) -> None:
+        self.server.files['/get?id=1'] = b'data'
+        # The server's name, but never outside of the directory
+        self.server.names['/get?id=1'] = '../other.mp3'
+        path = fetch_url(self.server.url('/get?id=1'), self.dir)
+        self.assertEqual(path, os.path.join(self.dir, 'other.mp3'))
+
+    def test_not_found(self) -> None:
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            fetch_url(self.server.url('/missing.mp3'), self.dir)
+        self.assertFalse(retryable(context.exception))
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_retryable(self) -> None:
+        self.server.failures['/busy.mp3'] = 1
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            fetch_url(self.server.url('/busy.mp3'), self.dir)
+        self.assertTrue(retryable(context.exception))
+        self.assertTrue(retryable(ConnectionResetError()))
+        self.assertFalse(retryable(ValueError()))
+
+    def test_split_urls(self) -> None:
+        text = f"https://a.com/1.mp3, https://a.com/2.mp3\n  not a url\n{PLAYLIST}\n" \
+            "https://a.com/1.mp3"
+        self.assertEqual(split_urls(text),
+                         ['https://a.com/1.mp3', 'https://a.com/2.mp3', PLAYLIST])
+        self.assertTrue(is_playlist(PLAYLIST))
+        self.assertFalse(is_playlist('https://www.youtube.com/watch?v=abc&list=PL01'))
+
+
+class Stop(Exception):
+    pass
+
+
+class TestPartialFile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = str(Path(BASE_DIR, 'testpartial'))
+        os.makedirs(self.dir, exist_ok=True)
+        self.path = os.path.join(self.dir, 'song.webm')
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+        return super().tearDown()
+
+    def test_ranges(self) -> None:
+        part = PartialFile(self.path)
+        self.assertFalse(part.matches(100, '"a"'))
+        part.reset(100, '"a"')
+        self.assertEqual(os.path.getsize(part.temp), 100)
+        for start, end in ((40, 50), (0, 10), (10, 20), (45, 60)):
+            part.add(start, end)
+        self.assertEqual(part.ranges, ((0, 20), (40, 60)))
+        self.assertEqual(part.completed, 40)
+        self.assertEqual(part.missing(), [(20, 40), (60, 100)])
+        self.assertEqual(part.missing(15), [(20, 35), (35, 40), (60, 75), (75, 90), (90, 100)])
+        # Only what was saved is there the next time
+        part.save()
+        part.add(60, 100)
+        part = PartialFile(self.path)
+        self.assertTrue(part.matches(100, '"a"'))
+        self.assertFalse(part.matches(100, '"b"'))
+        self.assertFalse(part.matches(100, ''))
+        self.assertEqual(part.ranges, ((0, 20), (40, 60)))
+
+    def test_broken(self) -> None:
+        part = PartialFile(self.path)
+        part.reset(100, '"a"')
+        part.add(0, 50)
+        part.save()
+        # The file is not the one the ranges were written to
+        with open(part.temp, 'wb') as f:
+            f.write(b'data')
+        self.assertEqual(PartialFile(self.path).ranges, ())
+        with open(part.sidecar, 'w') as f:
+            f.write('{"size": 4, "ranges": ')
+        self.assertFalse(PartialFile(self.path).matches(4, '"a"'))
+
+    def test_remove_partials(self) -> None:
+        PartialFile(self.path).reset(10, '"a"')
+        PartialFile(self.path, 'https://a.com/song.webm').reset(10, '"a"')
+        with open(os.path.join(self.dir, 'other.mp3.part.json'), 'w') as f:
+            f.write('{}')
+        with open(os.path.join(self.dir, 'song.mp3'), 'w') as f:
+            f.write('done')
+        self.assertEqual(len(remove_partials(self.dir)), 3)
+        self.assertEqual(os.listdir(self.dir), ['song.mp3'])
+
+
+class TestResume(ServerTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.data = os.urandom(2 * SEGMENT_SIZE + 1000)
+        self.server.files['/song.webm'] = self.data
+        self.url = self.server.url('/song.webm')
+        self.path = os.path.join(self.dir, 'song.webm')
+
+    def assertDownloaded(self, path: str) -> None:
+        self.assertEqual(path, self.path)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        # The state of the download is gone with it
+        self.assertEqual(os.listdir(self.dir), ['song.webm'])
+
+    def test_dropped(self) -> None:
+        self.server.limits['/song.webm'] = 300000
+        with self.assertRaises(Exception) as context:
+            fetch_url(self.url, self.dir)
+        self.assertTrue(retryable(context.exception))
+        done = PartialFile(self.path, self.url).completed
+        self.assertGreater(done, 0)
+        self.assertLessEqual(done, 300000)
+
+        # Only the rest is asked for
+        del self.server.limits['/song.webm']
+        self.server.ranges_sent.clear()
+        reports: List[float] = []
+        self.assertDownloaded(fetch_url(self.url, self.dir, reports.append))
+        self.assertEqual(self.server.ranges_sent, [('/song.webm', 0, len(self.data)),
+                                                   ('/song.webm', done, len(self.data))])
+        self.assertGreaterEqual(reports[0], done / len(self.data))
+        self.assertEqual(reports[-1], 1.0)
+
+    def test_stopped(self) -> None:
+        def progress(value: float) -> None:
+            if value > 0:
+                raise Stop()
+
+        # Like the player that's closed in the middle of a download
+        self.server.pause = 0.01
+        with self.assertRaises(Stop):
+            fetch_url(self.url, self.dir, progress)
+        part = PartialFile(self.path, self.url)
+        self.assertTrue(part.matches(len(self.data), part.validator))
+        self.assertGreater(part.completed, 0)
+        self.assertTrue(part.missing())
+        self.server.pause = 0.0
+        self.assertDownloaded(fetch_url(self.url, self.dir))
+
+    def test_changed(self) -> None:
+        self.server.limits['/song.webm'] = 300000
+        with self.assertRaises(Exception):
+            fetch_url(self.url, self.dir)
+        # Another file under the same URL, it's downloaded from its start
+        del self.server.limits['/song.webm']
+        self.data = self.server.files['/song.webm'] = os.urandom(len(self.data))
+        self.server.ranges_sent.clear()
+        self.assertDownloaded(fetch_url(self.url, self.dir))
+        self.assertEqual(self.server.ranges_sent, [('/song.webm', 0, len(self.data))])
+
+    def test_parallel(self) -> None:
+        self.server.delay = 0.05
+        self.assertDownloaded(fetch_url(self.url, self.dir, workers=4))
+        # A connection per segment, the first one is the one that asked for the file
+        self.assertEqual(sorted(self.server.ranges_sent), [
+            ('/song.webm', 0, len(self.data)),
+            ('/song.webm', SEGMENT_SIZE, 2 * SEGMENT_SIZE),
+            ('/song.webm', 2 * SEGMENT_SIZE, len(self.data)),
+        ])
+        self.assertEqual(self.server.most, 3)
+
+    def test_same_name(self) -> None:
+        # Two files of the same name, downloaded at the same time
+        other = os.urandom(len(self.data))
+        self.server.files['/other/song.webm'] = other
+        self.server.pause = 0.005
+        paths: List[str] = []
+        threads = [threading.Thread(target=lambda url: paths.append(fetch_url(url, self.dir)),
+                                    args=(url,))
+                   for url in (self.url, self.server.url('/other/song.webm'))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(paths), [os.path.join(self.dir, 'song (2).webm'), self.path])
+        contents = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                contents.append(f.read())
+        self.assertEqual(sorted(contents), sorted((self.data, other)))
+        self.assertEqual(len(os.listdir(self.dir)), 2)
+
+    def test_no_ranges(self) -> None:
+        self.server.ranges = False
+        self.server.limits['/song.webm'] = 300000
+        with self.assertRaises(Exception):
+            fetch_url(self.url, self.dir, workers=4)
+        # Nothing to resume from
+        self.assertEqual(os.listdir(self.dir), [])
+        del self.server.limits['/song.webm']
+        self.assertDownloaded(fetch_url(self.url, self.dir, workers=4))
+
+
+class TestDownloadQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        self.file = str(Path(BASE_DIR, 'testqueue.json'))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        if os.path.exists(self.file):
+            os.remove(self.file)
+        return super().tearDown()
+
+    def test_persistent(self) -> None:
+        downloads = DownloadQueue(self.file)
+        self.assertTrue(downloads.add('https://a.com/1.mp3'))
+        self.assertFalse(downloads.add('https://a.com/1.mp3'))
+        downloads.add('https://a.com/2.mp3')
+        downloads.discard('https://a.com/1.mp3')
+        self.assertEqual(list(DownloadQueue(self.file)), ['https://a.com/2.mp3'])
+
+    def test_broken(self) -> None:
+        with open(self.file, 'w') as f:
+            f.write('{"not": "a list"')
+        self.assertEqual(len(DownloadQueue(self.file)), 0)
+
+
+class TestDownloadManager(ServerTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.ended: 'queue.Queue[Job]' = queue.Queue()
+        self.runner = JobRunner(self.listen, workers=2)
+        self.queue = DownloadQueue(os.path.join(self.dir, 'queue.json'))
+
+    def tearDown(self) -> None:
+        self.runner.shutdown(wait=True)
+        return super().tearDown()
+
+    def listen(self, job: Job) -> None:
+        if job.finished:
+            self.ended.put(job)
+
+    def manager(self, fetch: Optional[Callable[[str, Callable[[float], None]], str]] = None,
+                **kwargs: Any) -> DownloadManager:
+        return DownloadManager(self.runner.submit,
+                               fetch or (lambda url, progress: fetch_url(url, self.dir, progress)),
+                               self.queue, backoff=0.01, **kwargs)
+
+    def wait_batch(self, manager: DownloadManager) -> Batch:
+        # Like the window, the ended jobs are handed to the manager in one thread
+        while True:
+            batch = manager.finished(self.ended.get(timeout=10))
+            if batch is not None:
+                return batch
+
+    def test_concurrency(self) -> None:
+        paths = [f"/{i}.mp3" for i in range(6)]
+        for path in paths:
+            self.server.files[path] = path.encode()
+        self.server.delay = 0.05
+        manager = self.manager()
+        jobs = manager.add(self.server.url(path) for path in paths)
+        self.assertEqual(len(jobs), 6)
+        self.assertEqual(len(self.queue), 6)
+        # All of them in one batch, the library is updated once
+        batch = self.wait_batch(manager)
+        self.assertEqual(sorted(batch.done), sorted(os.path.join(self.dir, path[1:])
+                                                    for path in paths))
+        self.assertEqual(batch.failed, [])
+        self.assertEqual(self.server.most, 2)
+        self.assertEqual(len(self.queue), 0)
+        self.assertTrue(self.ended.empty())
+
+    def test_retry(self) -> None:
+        self.server.files['/flaky.mp3'] = b'data'
+        self.server.failures['/flaky.mp3'] = 2
+        self.server.files['/down.mp3'] = b'data'
+        self.server.failures['/down.mp3'] = 100
+        manager = self.manager(retries=2)
+        start = time.monotonic()
+        manager.add([self.server.url('/flaky.mp3'), self.server.url('/down.mp3'),
+                     self.server.url('/missing.mp3')])
+        batch = self.wait_batch(manager)
+        self.assertEqual(batch.done, [os.path.join(self.dir, 'flaky.mp3')])
+        self.assertEqual(sorted(url for url, _ in batch.failed),
+                         [self.server.url('/down.mp3'), self.server.url('/missing.mp3')])
+        # Two retries after 0.01 and 0.02 seconds, a missing file is not tried again
+        self.assertEqual(self.server.requests,
+                         {'/flaky.mp3': 3, '/down.mp3': 3, '/missing.mp3': 1})
+        self.assertGreaterEqual(time.monotonic() - start, 0.03)
+
+    def test_playlist(self) -> None:
+        for path in ('/1.mp3', '/2.mp3'):
+            self.server.files[path] = b'data'
+        videos = [self.server.url('/1.mp3'), self.server.url('/2.mp3')]
+        manager = self.manager(expand=lambda url: videos)
+        manager.add([PLAYLIST])
+        # The videos are queued in the batch of the playlist
+        batch = self.wait_batch(manager)
+        self.assertEqual(sorted(batch.done), [os.path.join(self.dir, '1.mp3'),
+                                              os.path.join(self.dir, '2.mp3')])
+        self.assertEqual(len(self.queue), 0)
+
+    def test_resume(self) -> None:
+        release = threading.Event()
+
+        def fetch(url: str, progress: Callable[[float], None]) -> str:
+            while not release.wait(0.01):
+                progress(0)
+            return url
+
+        manager = self.manager(fetch)
+        job, = manager.add(['https://a.com/1.mp3'])
+        self.assertEqual(manager.running, ('https://a.com/1.mp3',))
+        # Closing the player stops the download, it stays in the queue
+        manager.close()
+        job.cancel()
+        self.assertEqual(self.wait_batch(manager), Batch([], []))
+        downloads = DownloadQueue(self.queue.file)
+        self.assertEqual(list(downloads), ['https://a.com/1.mp3'])
+        release.set()
+        self.queue = downloads
+        manager = self.manager(fetch)
+        self.assertEqual(len(manager.resume()), 1)
+        self.assertEqual(self.wait_batch(manager).done, ['https://a.com/1.mp3'])
+        # A cancel by the user drops it
+        release.clear()
+        job, = manager.add(['https://a.com/2.mp3'])
+        job.cancel()
+        self.wait_batch(manager)
+        self.assertEqual(len(self.queue), 0)
+
+
+class TestTranscode(unittest.TestCase):
+    def setUp(self) -> None:
+        self.src = str(Path(BASE_DIR, 'teststaging'))
+        self.dst = str(Path(BASE_DIR, 'testtranscoded'))
+        for directory in (self.src, self.dst):
+            os.makedirs(directory, exist_ok=True)
+        self.ffmpeg = str(Path(BASE_DIR, 'testffmpeg.py'))
+        with open(self.ffmpeg, 'w') as f:
+            f.write(FFMPEG)
+        os.chmod(self.ffmpeg, 0o755)
+        self.settings = TranscodeSettings(ffmpeg=self.ffmpeg)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.src)
+        shutil.rmtree(self.dst)
+        os.remove(self.ffmpeg)
+        return super().tearDown()
+
+    def write(self, name: str, data: bytes) -> None:
+        with open(os.path.join(self.src, name), 'wb') as f:
+            f.write(data)
+
+    def test_sniff(self) -> None:
+        streams = {
+            'webm': b'\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01\x42\xf7\x81',
+            'mp4': b'\x00\x00\x00\x18ftypdash\x00\x00\x00\x00',
+            'ogg': b'OggS\x00\x02\x00\x00\x00\x00\x00\x00',
+            'wav': b'RIFF\x24\x00\x00\x00WAVEfmt ',
+            'flac': b'fLaC\x00\x00\x00\x22\x10\x00\x10\x00',
+            'unknown': b'<!DOCTYPE html><html></html>',
+        }
+        for container, data in streams.items():
+            # The extension is not what tells
+            self.write('stream.mp3', data)
+            self.assertEqual(sniff_container(os.path.join(self.src, 'stream.mp3')), container)
+        self.assertEqual(sniff_container(SONG), 'mp3')
+        # A bare MPEG stream, without an ID3 tag
+        with open(SONG, 'rb') as f:
+            data = f.read()
+        start = data.index(b'\xff\xfb')
+        self.write('bare.webm', data[start:start + 2 ** 15])
+        self.assertEqual(sniff_container(os.path.join(self.src, 'bare.webm')), 'mp3')
+
+    def test_transcode(self) -> None:
+        self.write('song.mp4', b'\x1a\x45\xdf\xa3 webm audio')
+        shutil.copy(SONG, os.path.join(self.src, 'song.mp3'))
+        settings = self.settings._replace(bitrate='128k')
+        results = transcode_files(self.src, ('song.mp4', 'song.mp3', 'missing.webm'),
+                                  self.dst, settings)
+        self.assertEqual(results, [
+            TranscodeResult('song.mp4', os.path.join(self.dst, 'song.mp3'), 'webm', True, None),
+            # Already MP3, it's not encoded again. The other song keeps its name
+            TranscodeResult('song.mp3', os.path.join(self.dst, 'song (2).mp3'), 'mp3', False,
+                            None),
+        ])
+        self.assertEqual(os.listdir(self.src), [])
+        # No stream without a song, and no partial file left behind
+        self.assertEqual(sorted(os.listdir(self.dst)), ['song (2).mp3', 'song.mp3'])
+        with open(os.path.join(self.dst, 'song (2).mp3'), 'rb') as f, open(SONG, 'rb') as song:
+            self.assertEqual(f.read(), song.read())
+
+        self.write('other.webm', b'\x1a\x45\xdf\xa3 webm audio')
+        settings = settings._replace(codec='libopus')
+        result, = transcode_files(self.src, ('other.webm',), self.dst, settings)
+        self.assertEqual(result.path, os.path.join(self.dst, 'other.opus'))
+        with open(os.path.join(self.dst, 'other.opus'), 'rb') as f:
+            command = f.readline().decode()
+        self.assertIn('-c:a libopus -b:a 128k -f opus', command)
+        # Encoded out of the songs directory, it's only moved there once it's whole
+        self.assertTrue(command.rstrip().endswith(os.path.join(self.src, 'other.opus.encoding')))
+
+    def test_disabled(self) -> None:
+        # The stream is moved as it is, under the extension of what it really is
+        self.write('song.mp3', b'\x00\x00\x00\x18ftypM4A audio')
+        results = transcode_files(self.src, ('song.mp3',), self.dst,
+                                  self.settings._replace(enabled=False))
+        self.assertEqual(results, [TranscodeResult('song.mp3', os.path.join(self.dst, 'song.m4a'),
+                                                   'mp4', False, None)])
+        with open(os.path.join(self.dst, 'song.m4a'), 'rb') as f:
+            self.assertEqual(f.read(), b'\x00\x00\x00\x18ftypM4A audio')
+
+    def test_failure(self) -> None:
+        self.write('song.webm', b'\x1a\x45\xdf\xa3 broken')
+        self.write('other.webm', b'\x1a\x45\xdf\xa3 audio')
+        results = transcode_files(self.src, ('song.webm', 'other.webm'), self.dst,
+                                  self.settings._replace(ffmpeg=os.path.join(self.src, 'none')))
+        # Without an encoder the downloads are kept as they are
+        self.assertEqual([result.path for result in results],
+                         [os.path.join(self.dst, 'song.webm'),
+                          os.path.join(self.dst, 'other.webm')])
+        self.assertTrue(all(result.error for result in results))
+        self.write('broken.webm', b'\x1a\x45\xdf\xa3 broken')
+        result, = transcode_files(self.src, ('broken.webm',), self.dst, self.settings)
+        self.assertFalse(result.transcoded)
+        self.assertEqual(result.error, 'Invalid data found when processing input')
+        self.assertEqual(sorted(os.listdir(self.dst)),
+                         ['broken.webm', 'other.webm', 'song.webm'])
+
+    def test_pool(self) -> None:
+        names = [f"{i}.webm" for i in range(6)]
+        for name in names:
+            self.write(name, b'\x1a\x45\xdf\xa3 webm audio')
+        self.write('7.webm.part', b'\x1a\x45\xdf\xa3 unfinished')
+        self.write('8.mp3.encoding', b'cut short')
+        with ThreadPoolExecutor(3) as executor:
+            pool = TranscodePool(self.src, self.dst, self.settings, executor=executor)
+            self.assertEqual(pool.leftovers(), names)
+            self.assertEqual(pool.submit(names), 6)
+            results: List[TranscodeResult] = []
+            deadline = time.monotonic() + 10
+            while pool.busy and time.monotonic() < deadline:
+                results.extend(pool.drain())
+                time.sleep(0.01)
+            pool.shutdown()
+        self.assertEqual(sorted(result.name for result in results), names)
+        self.assertEqual(sorted(os.listdir(self.dst)), [f"{i}.mp3" for i in range(6)])
+        self.assertEqual(pool.leftovers(), [])
+        self.assertEqual(os.listdir(self.src), ['7.webm.part'])
@@ -0,0 +1,223 @@
+from __future__ import annotations
+import os
+import functools
+import subprocess
+from concurrent.futures import Executor
+from mp3 import (
+    audio_range,
+    iter_frames,
+)
+from library import FilePool
+from .partial import move_unique
+from typing import (
+    NamedTuple,
+    Optional,
+    Tuple,
+    List,
+    Dict,
+)
+
+
+__all__ = (
+    'TranscodeSettings',
+    'TranscodeResult',
+    'TranscodePool',
+    'sniff_container',
+    'transcode_files',
+    'CODECS',
+)
+
+
+# Encoders of ffmpeg by the extension and the muxer of what they make
+CODECS: Dict[str, Tuple[str, str]] = {
+    'libmp3lame': ('mp3', 'mp3'),
+    'aac': ('m4a', 'ipod'),
+    'libopus': ('opus', 'opus'),
+    'libvorbis': ('ogg', 'ogg'),
+    'flac': ('flac', 'flac'),
+}
+# The extension of every container that is recognized
+_EXTENSIONS: Dict[str, str] = {
+    'mp3': 'mp3',
+    'mp4': 'm4a',
+    'webm': 'webm',
+    'ogg': 'ogg',
+    'wav': 'wav',
+    'flac': 'flac',
+}
+# Containers that only hold one codec, they're not encoded again into themselves
+_SINGLE_CODEC = ('mp3', 'flac')
+# Files that are being encoded
+_ENCODING = '.encoding'
+# The files of downloads that are not whole and of songs that are not encoded yet
+_UNFINISHED = ('.part', '.part.json', '.part.json.tmp', _ENCODING)
+# Seconds an encoding may take
+TIMEOUT = 30 * 60
+
+
+class TranscodeSettings(NamedTuple):
+    # Off, the downloaded stream is kept as it is
+    enabled: bool = True
+    codec: str = 'libmp3lame'
+    bitrate: str = '192k'
+    ffmpeg: str = 'ffmpeg'
+
+    @property
+    def extension(self) -> str:
+        return CODECS[self.codec][0]
+
+
+class TranscodeResult(NamedTuple):
+    # The downloaded file
+    name: str
+    # The song it became in the songs directory, `None` if it couldn't be moved there
+    path: Optional[str]
+    # What the download really was
+    container: str
+    transcoded: bool
+    # Why it was not encoded or moved
+    error: Optional[str]
+
+
+def sniff_container(path: str) -> str:
+    """Tell the format of an audio file by its first bytes, whatever its extension
+
+    :param path: The path of the file
+    :type path: str
+    :return: `mp3`, `mp4`, `webm`, `ogg`, `wav`, `flac` or `unknown`
+    :rtype: str
+    """
+    with open(path, 'rb') as f:
+        head = f.read(12)
+        if head[:4] == b'\x1a\x45\xdf\xa3':
+            return 'webm'
+        if head[4:8] == b'ftyp':
+            return 'mp4'
+        if head[:4] == b'OggS':
+            return 'ogg'
+        if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+            return 'wav'
+        if head[:4] == b'fLaC':
+            return 'flac'
+        if head[:3] == b'ID3':
+            return 'mp3'
+        # A bare MPEG stream starts with a frame that is followed by another one
+        start, end = audio_range(f)
+        first = next(iter_frames(f, start, min(end, start + 2 ** 14)), None)
+        if first is not None and first.offset == start:
+            return 'mp3'
+    return 'unknown'
+
+
+def _target(dst_dir: str, name: str, extension: str) -> str:
+    stem, old = os.path.splitext(name)
+    return os.path.join(dst_dir, f"{stem}.{extension or old.lstrip('.')}")
+
+
+def _transcode(src: str, dst: str, settings: TranscodeSettings) -> str:
+    # The new file is written next to the download, out of sight of the songs
+    # directory and its watcher, and moved in place once it's whole
+    temp = os.path.join(os.path.dirname(src), f"{os.path.basename(dst)}{_ENCODING}")
+    command = (settings.ffmpeg, '-v', 'error', '-nostdin', '-y', '-i', src, '-vn',
+               '-c:a', settings.codec, '-b:a', settings.bitrate,
+               '-f', CODECS[settings.codec][1], temp)
+    try:
+        subprocess.run(command, check=True, capture_output=True, timeout=TIMEOUT)
+        return move_unique(temp, dst)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def transcode_files(src_dir: str, names: Tuple[str, ...], dst_dir: str,
+                    settings: TranscodeSettings) -> List[TranscodeResult]:
+    """Move downloaded files into the songs directory, encoded with the codec of the
+    settings. A file that already is in the codec's container, or any file when
+    transcoding is off or the encoder fails, is moved as it is, under the extension of
+    what it really is. A song of the same name is never replaced (see `move_unique`).
+    This is what runs in the workers of a `TranscodePool`, one ffmpeg per worker
+
+    :param src_dir: Where the downloads are
+    :type src_dir: str
+    :param names: The downloaded files
+    :type names: Tuple[str, ...]
+    :param dst_dir: The songs directory
+    :type dst_dir: str
+    :param settings: How to encode them
+    :type settings: TranscodeSettings
+    :return: The results, files that disappeared are skipped
+    :rtype: List[TranscodeResult]
+    """
+    results = []
+    for name in names:
+        src = os.path.join(src_dir, name)
+        try:
+            container = sniff_container(src)
+        except FileNotFoundError:
+            continue
+        except OSError as err:
+            results.append(TranscodeResult(name, None, 'unknown', False, str(err)))
+            continue
+        error = None
+        codec = CODECS.get(settings.codec)
+        same = container in _SINGLE_CODEC and codec is not None and codec[0] == container
+        if settings.enabled and not same:
+            try:
+                dst = _transcode(src, _target(dst_dir, name, settings.extension), settings)
+                os.remove(src)
+                results.append(TranscodeResult(name, dst, container, True, None))
+                continue
+            except (OSError, KeyError, subprocess.SubprocessError) as err:
+                if isinstance(err, subprocess.CalledProcessError) and err.stderr:
+                    error = err.stderr.decode(errors='replace').strip()
+                else:
+                    error = str(err) or repr(err)
+        # Kept as it was downloaded, also when the encoder failed so nothing is lost
+        try:
+            dst = move_unique(src, _target(dst_dir, name, _EXTENSIONS.get(container, '')))
+        except OSError as err:
+            results.append(TranscodeResult(name, None, container, False, error or str(err)))
+            continue
+        results.append(TranscodeResult(name, dst, container, False, error))
+    return results
+
+
+class TranscodePool(FilePool[TranscodeResult]):
+    """A `TranscodePool` turns downloads into songs in worker processes (see `FilePool`).
+    Every file is a job of its own, the ffmpegs of a batch run on all the cores
+    """
+    def __init__(self, src_dir: str, dst_dir: str, settings: TranscodeSettings,
+                 workers: Optional[int] = None, chunk_size: int = 1,
+                 executor: Optional[Executor] = None) -> None:
+        """
+        :param src_dir: Where the downloads are
+        :type src_dir: str
+        :param dst_dir: The songs directory
+        :type dst_dir: str
+        :param settings: How to encode them
+        :type settings: TranscodeSettings
+        :param workers: The number of processes, defaults to the number of CPUs
+        :type workers: Optional[int], optional
+        :param chunk_size: Files per job, defaults to 1
+        :type chunk_size: int, optional
+        :param executor: Run the jobs on this executor instead, defaults to None
+        :type executor: Optional[Executor], optional
+        """
+        work = functools.partial(transcode_files, dst_dir=dst_dir, settings=settings)
+        super().__init__(src_dir, work, workers, chunk_size, executor)
+        self.settings = settings
+        os.makedirs(src_dir, exist_ok=True)
+
+    def leftovers(self) -> List[str]:
+        """
+        :return: The downloads that were not transcoded when the player closed,
+        unfinished ones (see `PartialFile`) are left out. Encodings that were cut
+        short are removed, their downloads are in it
+        :rtype: List[str]
+        """
+        paths = [os.path.join(self._songs_dir, name) for name in os.listdir(self._songs_dir)]
+        for path in paths:
+            if path.endswith(_ENCODING):
+                os.remove(path)
+        return sorted(os.path.basename(path) for path in paths
+                      if os.path.isfile(path) and not path.endswith(_UNFINISHED))
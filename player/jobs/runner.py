@@ -0,0 +1,204 @@
+from __future__ import annotations
+import threading
+import itertools
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    Executor,
+    Future,
+)
+from typing import (
+    Callable,
+    Optional,
+    Literal,
+    Tuple,
+    Dict,
+    Any,
+)
+
+
+__all__ = (
+    'JobState',
+    'JobCancelled',
+    'Job',
+    'JobRunner',
+    'WORKERS',
+)
+
+
+JobState = Literal[
+    'queued',
+    'running',
+    'done',
+    'failed',
+    'cancelled',
+]
+FINISHED: Tuple[JobState, ...] = ('done', 'failed', 'cancelled')
+# Jobs that run at the same time, the others wait in the queue
+WORKERS = 2
+# The smallest change of progress that is reported, a job can report as often as it wants
+PROGRESS_STEP = 0.01
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """A `Job` is a piece of work of a `JobRunner`. The function of the job gets it as
+    its first argument, reports its progress with `Job.report` and is stopped by
+    `JobCancelled` there once the job is cancelled.
+
+    A job is cancelled from any thread with `Job.cancel`. A job that didn't start yet
+    never runs, a running one stops at its next report (or `Job.check`)
+    """
+    def __init__(self, id: int, name: str, listener: Callable[[Job], None]) -> None:
+        self.id = id
+        self.name = name
+        self.state: JobState = 'queued'
+        # From 0 to 1
+        self.progress = 0.0
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self._listener = listener
+        self._cancelled = threading.Event()
+        self._future: Optional[Future[Any]] = None
+
+    def __repr__(self) -> str:
+        return f"Job({self.id}, {self.name!r}, {self.state}, {self.progress:.0%})"
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        :return: `True` once the job is asked to stop, it may still be running
+        :rtype: bool
+        """
+        return self._cancelled.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self._future is not None and self._future.cancel():
+            # It never started
+            self._set('cancelled')
+
+    def check(self) -> None:
+        """
+        :raises JobCancelled: If the job is cancelled
+        """
+        if self.cancelled:
+            raise JobCancelled(self.name)
+
+    def sleep(self, seconds: float) -> None:
+        """Wait in the function of the job, a cancel cuts it short
+
+        :param seconds: How long to wait
+        :type seconds: float
+        :raises JobCancelled: If the job is cancelled
+        """
+        if self._cancelled.wait(seconds):
+            raise JobCancelled(self.name)
+
+    def report(self, progress: float) -> None:
+        """Called by the function of the job with how far it is
+
+        :param progress: From 0 to 1
+        :type progress: float
+        :raises JobCancelled: If the job is cancelled, the function must let it through
+        """
+        self.check()
+        progress = min(max(progress, 0.0), 1.0)
+        if progress - self.progress >= PROGRESS_STEP or progress == 1.0 > self.progress:
+            self.progress = progress
+            self._listener(self)
+
+    def _set(self, state: JobState) -> None:
+        self.state = state
+        self._listener(self)
+
+
+class JobRunner:
+    """A `JobRunner` runs the heavy work (trims, imports, exports, downloads) in a
+    bounded pool of threads, so it never blocks the caller and only a few jobs
+    run at once however many are submitted.
+
+    Every change of a job (state or progress) is given to `listener`, in the
+    thread of the job. A UI must hand it over to its own thread
+    """
+    def __init__(self, listener: Optional[Callable[[Job], None]] = None,
+                 workers: int = WORKERS, executor: Optional[Executor] = None) -> None:
+        """
+        :param listener: What is told about the changes of the jobs, defaults to None
+        :type listener: Optional[Callable[[Job], None]], optional
+        :param workers: The jobs that run at once, defaults to `WORKERS`
+        :type workers: int, optional
+        :param executor: Run the jobs on this executor instead, defaults to None
+        :type executor: Optional[Executor], optional
+        """
+        self._listener = listener or (lambda job: None)
+        self._executor = executor or ThreadPoolExecutor(workers, thread_name_prefix='job')
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, Job] = {}
+
+    @property
+    def jobs(self) -> Tuple[Job, ...]:
+        """
+        :return: The jobs that are not finished, in the order they were submitted
+        :rtype: Tuple[Job, ...]
+        """
+        with self._lock:
+            return tuple(self._jobs.values())
+
+    def submit(self, name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Job:
+        """Queue a job, it's run as `func(job, *args, **kwargs)`
+
+        :param name: What the job is shown as
+        :type name: str
+        :param func: What the job does, its return value is `Job.result`
+        :type func: Callable[..., Any]
+        :return: The job
+        :rtype: Job
+        """
+        job = Job(next(self._ids), name, self._changed)
+        with self._lock:
+            self._jobs[job.id] = job
+        job._future = self._executor.submit(self._run, job, func, *args, **kwargs)
+        return job
+
+    def _run(self, job: Job, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        if job.cancelled:
+            job._set('cancelled')
+            return
+        job._set('running')
+        try:
+            job.result = func(job, *args, **kwargs)
+        except JobCancelled:
+            job._set('cancelled')
+        except Exception as err:
+            job.error = err
+            job._set('failed')
+        else:
+            job.progress = 1.0
+            job._set('done')
+
+    def _changed(self, job: Job) -> None:
+        if job.finished:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+        self._listener(job)
+
+    def cancel_all(self) -> None:
+        for job in self.jobs:
+            job.cancel()
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Cancel every job and stop the threads
+
+        :param wait: Wait for the running jobs to stop, defaults to False
+        :type wait: bool, optional
+        """
+        self.cancel_all()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
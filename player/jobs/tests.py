@@ -0,0 +1,98 @@
+import time
+import threading
+import unittest
+from typing import List
+from .runner import (
+    JobCancelled,
+    JobRunner,
+    Job,
+)
+
+
+def wait_finished(job: Job, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestJobRunner(unittest.TestCase):
+    def setUp(self) -> None:
+        self.changes: List[Job] = []
+        self.lock = threading.Lock()
+        self.runner = JobRunner(self.listen, workers=1)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.runner.shutdown(wait=True)
+        return super().tearDown()
+
+    def listen(self, job: Job) -> None:
+        with self.lock:
+            self.changes.append(job)
+
+    def test_progress(self) -> None:
+        def work(job: Job, steps: int) -> int:
+            for i in range(1, steps + 1):
+                job.report(i / steps)
+            return steps
+
+        job = self.runner.submit('work', work, 1000)
+        wait_finished(job)
+        self.assertEqual((job.state, job.result, job.progress), ('done', 1000, 1.0))
+        # Small steps are not reported one by one
+        self.assertLessEqual(len(self.changes), 103)
+        self.assertEqual(self.runner.jobs, ())
+
+    def test_bounded(self) -> None:
+        release = threading.Event()
+        first = self.runner.submit('first', lambda job: release.wait())
+        second = self.runner.submit('second', lambda job: None)
+        time.sleep(0.05)
+        # One worker, the second job waits for the first one
+        self.assertEqual((first.state, second.state), ('running', 'queued'))
+        self.assertEqual(self.runner.jobs, (first, second))
+        release.set()
+        wait_finished(second)
+        self.assertEqual(second.state, 'done')
+
+    def test_cancel(self) -> None:
+        started = threading.Event()
+
+        def work(job: Job) -> None:
+            started.set()
+            while True:
+                job.report(0)
+                time.sleep(0.001)
+
+        running = self.runner.submit('running', work)
+        queued = self.runner.submit('queued', lambda job: None)
+        started.wait(5)
+        queued.cancel()
+        running.cancel()
+        wait_finished(running)
+        self.assertEqual((running.state, queued.state), ('cancelled', 'cancelled'))
+        with self.assertRaises(JobCancelled):
+            running.check()
+
+    def test_failed(self) -> None:
+        def work(job: Job) -> None:
+            raise OSError('disk full')
+
+        job = self.runner.submit('work', work)
+        wait_finished(job)
+        self.assertEqual(job.state, 'failed')
+        self.assertIsInstance(job.error, OSError)
+        self.assertEqual(self.changes[-1], job)
+
+    def test_sleep(self) -> None:
+        def work(job: Job) -> None:
+            job.sleep(60)
+
+        job = self.runner.submit('work', work)
+        time.sleep(0.05)
+        start = time.monotonic()
+        # A cancel wakes it up
+        job.cancel()
+        wait_finished(job)
+        self.assertEqual(job.state, 'cancelled')
+        self.assertLess(time.monotonic() - start, 1)
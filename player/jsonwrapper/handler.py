@@ -1,6 +1,9 @@
 from __future__ import annotations
 import os
+import copy
 import json
+import time
+import threading
 from typing import (
     Any,
     Dict,
@@ -21,9 +24,27 @@ class HandlerError(Exception):
 
 
 class Handler:
-    def __init__(self, file: str, config: Dict[Any, Any]) -> None:
+    """A `Handler` maps a json file to a dictionary like object.
+
+    By default every operation goes to the file. With `cached=True` the data
+    is kept in memory: reads are served from memory (reloaded only when the file's
+    mtime changes, checked at most every `refresh_interval` seconds) and writes
+    mark the data dirty and are written back `flush_delay` seconds after the
+    last change or when `Handler.flush` is called
+    """
+    def __init__(self, file: str, config: Dict[Any, Any], cached: bool = False,
+                 flush_delay: float = 1.0, refresh_interval: float = 1.0) -> None:
         self._file = file
         self._config = config
+        self._cached = cached
+        self._flush_delay = flush_delay
+        self._refresh_interval = refresh_interval
+        self._cache: Optional[Dict[Any, Any]] = None
+        self._mtime: Optional[int] = None
+        self._checked = 0.0
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
 
     def __eq__(self, __other: Handler | Dict[Any, Any]) -> bool:  # type: ignore
         if isinstance(__other, Dict):
@@ -53,19 +74,19 @@ class Handler:
         return repr(f"<{self.__class__.__name__}({self.read()})>")
 
     def __len__(self) -> int:
-        return len(self.read())
+        return len(self._read())
 
     def __bool__(self) -> bool:
-        return bool(self.read())
+        return bool(self._read())
 
     def __getitem__(self, i: Any) -> Any:
-        return self.read()[i]
+        return self._copy(self._read()[i])
 
     def __setitem__(self, i: Any, v: Any) -> None:
         self.add(i, v)
 
     def __contains__(self, __other: Any) -> bool:
-        return __other in self.read()
+        return __other in self._read()
 
     def __delitem__(self, key: Any) -> None:
         self.remove_key(key)
@@ -74,17 +95,84 @@ class Handler:
     def file(self) -> str:
         return self._file
 
-    def _write(self, data: Any) -> None:
+    @property
+    def cached(self) -> bool:
+        return self._cached
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def _set_attrs(self, data: Any) -> None:
+        for k, v in data.items():
+            setattr(self, k, v)
+
+    def _dump(self, data: Any) -> None:
         with open(self.file, mode='w') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
 
-    def _read(self) -> Any:
+    def _load(self) -> Any:
         with open(self.file, mode='r') as f:
             data = json.load(f)
-        for k, v in data.items():
-            setattr(self, k, v)
+        self._set_attrs(data)
         return data
 
+    def _copy(self, value: Any) -> Any:
+        # In cached mode the values are the in-memory data, they're changed through the
+        # `Handler` only. A value that can be changed in place is handed out as a copy
+        if self._cached and isinstance(value, (dict, list)):
+            return copy.deepcopy(value)
+        return value
+
+    def _write(self, data: Any) -> None:
+        if not self._cached:
+            self._dump(data)
+            return
+
+        with self._lock:
+            if data is not self._cache:
+                # The caller keeps its own dict
+                self._cache = dict(data)
+            self._dirty = True
+            self._set_attrs(data)
+            self._schedule_flush()
+
+    def _read(self) -> Any:
+        # In cached mode this is the in-memory data itself, it's changed with the lock
+        # only. Use `Handler.read` to hand a copy out to callers
+        if not self._cached:
+            return self._load()
+
+        with self._lock:
+            if self._dirty and self._cache is not None:
+                # Pending changes win over the file
+                return self._cache
+
+            now = time.monotonic()
+            if self._cache is None or now - self._checked >= self._refresh_interval:
+                self._checked = now
+                mtime = os.stat(self.file).st_mtime_ns
+                if self._cache is None or mtime != self._mtime:
+                    self._cache = self._load()
+                    self._mtime = mtime
+            return self._cache
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self._flush_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _invalidate(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._cache = None
+            self._mtime = None
+            self._dirty = False
+
     def _remove_entry(self) -> None:
         k: Any
         for k, _ in self.items():
@@ -104,42 +192,68 @@ class Handler:
 
     def init(self) -> None:
         if not os.path.exists(self.file):
-            self._write(self._config)
+            # The defaults are never changed by the edits that follow
+            self._write(copy.deepcopy(self._config))
         self._checkout()
+        self.flush()
 
     def sync(self) -> None:
         self._checkout()
 
+    def flush(self) -> None:
+        """Write the pending changes of a cached `Handler` to its file.
+        Does nothing if there are no pending changes
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty and self._cache is not None:
+                self._dump(self._cache)
+                self._mtime = os.stat(self.file).st_mtime_ns
+                self._checked = time.monotonic()
+                self._dirty = False
+
     def write(self, data: Any) -> None:
         self._write(data)
 
     def read(self) -> Any:
-        return self._read()
+        with self._lock:
+            data = self._read()
+            return copy.deepcopy(data) if self._cached else data
 
     def get(self, key: Any, default: Optional[Any] = None) -> Any:
         data = self._read()
-        return data.get(key, default)
+        return self._copy(data.get(key, default))
+
+    # The changes are read, made and written with the lock, a flush
+    # never sees the data half changed
 
     def remove_key(self, key: Any) -> None:
-        data = self._read()
-        del data[key]
-        self._write(data)
+        with self._lock:
+            data = self._read()
+            del data[key]
+            self._write(data)
 
     def edit(self, key: Any, value: Any) -> None:
-        data = self._read()
-        if key not in data:
-            msg = f"Key `{key}` does not exist. If you want to add a key use `Handler.add`"
-            raise HandlerError(msg)
-        data[key] = value
-        self._write(data)
+        with self._lock:
+            data = self._read()
+            if key not in data:
+                msg = f"Key `{key}` does not exist. If you want to add a key use `Handler.add`"
+                raise HandlerError(msg)
+            if data[key] == value:
+                return
+            data[key] = self._copy(value)
+            self._write(data)
 
     def add(self, key: Any, value: Any) -> None:
-        data = self.read()
-        if key in data:
-            msg = f"Key `{key}` already exists. If you want to edit it use `Handler.edit`"
-            raise HandlerError(msg)
-        data[key] = value
-        self._write(data)
+        with self._lock:
+            data = self._read()
+            if key in data:
+                msg = f"Key `{key}` already exists. If you want to edit it use `Handler.edit`"
+                raise HandlerError(msg)
+            data[key] = self._copy(value)
+            self._write(data)
 
     def restore_default(self) -> None:
         self.purge()
@@ -158,6 +272,7 @@ class Handler:
             raise HandlerError(f"`Handler.update` does not support `{type(__other)}`")
 
     def purge(self) -> None:
+        self._invalidate()
         os.remove(self.file)
 
     def clear(self) -> None:
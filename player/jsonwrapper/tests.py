@@ -1,8 +1,12 @@
 import os
+import json
+import time
 import random
 import unittest
+import unittest.mock
 from .handler import Handler, HandlerError
 from pathlib import Path
+from typing import Any
 
 BASE_DIR = f'{os.sep}'.join(__file__.split(os.sep)[:-1])
 
@@ -17,6 +21,7 @@ class TestHandler(unittest.TestCase):
     def tearDown(self) -> None:
         self.file.init()
         self.file.restore_default()
+        self.file.purge()
 
     def test_set_attr(self) -> None:
         self.assertEqual(self.file.c0, 'v0')  # type: ignore
@@ -147,3 +152,99 @@ class TestHandler(unittest.TestCase):
 
         with self.assertRaises(TypeError):
             self.file | 'this is not allowed'  # type: ignore
+
+
+class TestCachedHandler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = str(Path(f"{BASE_DIR}/testcachedconfig.json"))
+        self.data = {'c0': 'v0', 'c1': 'v1'}
+        self.file = Handler(self.path, self.data, cached=True,
+                            flush_delay=60, refresh_interval=0)
+        self.file.init()
+
+    def tearDown(self) -> None:
+        self.file.restore_default()
+        self.file.purge()
+
+    def _on_disk(self) -> Any:
+        with open(self.path, mode='r') as f:
+            return json.load(f)
+
+    def test_init_flushed(self) -> None:
+        self.assertFalse(self.file.dirty)
+        self.assertEqual(self._on_disk(), self.data)
+
+    def test_reads_from_memory(self) -> None:
+        self.file.get('c0')
+        with unittest.mock.patch('builtins.open') as mock_open:
+            self.assertEqual(self.file.get('c0'), 'v0')
+            self.assertIn('c1', self.file)
+            self.assertEqual(self.file['c1'], 'v1')
+            mock_open.assert_not_called()
+
+    def test_write_back(self) -> None:
+        self.file.edit('c0', 'o0')
+        self.assertTrue(self.file.dirty)
+        self.assertEqual(self.file.get('c0'), 'o0')
+        self.assertEqual(self._on_disk()['c0'], 'v0')
+
+        self.file.flush()
+        self.assertFalse(self.file.dirty)
+        self.assertEqual(self._on_disk()['c0'], 'o0')
+
+    def test_edit_mutable(self) -> None:
+        self.file.add('c2', {'a': 1})
+        value = self.file.get('c2')
+        value['a'] = 2
+        # A copy, the handler doesn't change with it
+        self.assertEqual(self.file['c2'], {'a': 1})
+        self.file.edit('c2', value)
+        value['a'] = 3
+        self.file.flush()
+        self.assertEqual(self._on_disk()['c2'], {'a': 2})
+        self.file.remove_key('c2')
+
+    def test_flush_while_editing(self) -> None:
+        # The flush of the timer runs while the data changes
+        file = Handler(self.path, self.data, cached=True, flush_delay=0, refresh_interval=0)
+        for i in range(2000):
+            file[f"k{i}"] = i
+        file.flush()
+        self.assertEqual(len(self._on_disk()), len(self.data) + 2000)
+
+    def test_edit_same_value(self) -> None:
+        self.file.edit('c0', 'v0')
+        self.assertFalse(self.file.dirty)
+
+    def test_debounced_flush(self) -> None:
+        file = Handler(self.path, self.data, cached=True, flush_delay=0.01)
+        file.add('new_key', 1)
+        file.edit('new_key', 2)
+        time.sleep(0.2)
+        self.assertFalse(file.dirty)
+        self.assertEqual(self._on_disk()['new_key'], 2)
+
+    def test_invalidated_by_mtime(self) -> None:
+        self.file.get('c0')
+        external = self.data | {'c0': 'external'}
+        with open(self.path, mode='w') as f:
+            json.dump(external, f)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.file.get('c0'), 'external')
+
+    def test_restore_default(self) -> None:
+        self.file.purge()
+        self.file.init()
+        self.file.edit('c0', 'o0')
+        self.file.add('new_key', [1])
+        self.assertEqual(self.data, {'c0': 'v0', 'c1': 'v1'})
+        self.file.restore_default()
+        self.assertEqual(self.file.read(), {'c0': 'v0', 'c1': 'v1'})
+        self.assertEqual(self._on_disk(), {'c0': 'v0', 'c1': 'v1'})
+
+    def test_read_is_copy(self) -> None:
+        data = self.file.read()
+        data['c0'] = 'changed'
+        self.assertEqual(self.file.get('c0'), 'v0')
+        self.assertFalse(self.file.dirty)
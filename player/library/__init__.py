@@ -0,0 +1,4 @@
+from .index import *  # noqa
+from .search import *  # noqa
+from .prober import *  # noqa
+from .analyzer import *  # noqa
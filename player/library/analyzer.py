@@ -0,0 +1,68 @@
+from __future__ import annotations
+import os
+from concurrent.futures import Executor
+from loudness import (
+    Loudness,
+    measure_file,
+)
+from typing import (
+    NamedTuple,
+    Callable,
+    Optional,
+    Tuple,
+    List,
+)
+from .prober import FilePool
+
+
+__all__ = (
+    'AnalysisResult',
+    'AnalysisPool',
+    'analyze_files',
+)
+
+
+class AnalysisResult(NamedTuple):
+    name: str
+    size: int
+    mtime: float
+    # `None` if the file could not be decoded
+    loudness: Optional[Loudness]
+
+
+def analyze_files(songs_dir: str, names: Tuple[str, ...],
+                  measure: Callable[[str], Loudness] = measure_file) -> List[AnalysisResult]:
+    """Measure the loudness of files of the songs directory. Files that disappeared
+    are skipped. This is what runs in the workers of an `AnalysisPool`
+
+    :param songs_dir: The songs directory
+    :type songs_dir: str
+    :param names: The file names to measure
+    :type names: Tuple[str, ...]
+    :param measure: What decodes and measures a file, defaults to `measure_file`
+    :type measure: Callable[[str], Loudness], optional
+    :return: The results, the stat is taken before the file is decoded
+    :rtype: List[AnalysisResult]
+    """
+    results = []
+    for name in names:
+        path = os.path.join(songs_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        try:
+            loudness: Optional[Loudness] = measure(path)
+        except Exception:
+            loudness = None
+        results.append(AnalysisResult(name, stat.st_size, stat.st_mtime, loudness))
+    return results
+
+
+class AnalysisPool(FilePool[AnalysisResult]):
+    """An `AnalysisPool` measures the loudness of files in worker processes (see `FilePool`).
+    A file is decoded whole, so the chunks are small and the progress moves often
+    """
+    def __init__(self, songs_dir: str, workers: Optional[int] = None,
+                 chunk_size: int = 2, executor: Optional[Executor] = None) -> None:
+        super().__init__(songs_dir, analyze_files, workers, chunk_size, executor)
@@ -0,0 +1,393 @@
+from __future__ import annotations
+import os
+import json
+import sqlite3
+from loudness import Loudness
+from .prober import (
+    ProbeResult,
+    TrackMeta,
+)
+from .analyzer import AnalysisResult
+from typing import (
+    NamedTuple,
+    Iterable,
+    Iterator,
+    Optional,
+    Literal,
+    Tuple,
+    Dict,
+    List,
+    Any,
+)
+
+
+__all__ = (
+    'LibraryError',
+    'LibraryTrack',
+    'LibraryDelta',
+    'LibraryIndex',
+    'is_song',
+)
+
+
+Order = Literal[
+    'name',
+    'length',
+]
+
+
+class LibraryError(Exception):
+    pass
+
+
+class LibraryTrack(NamedTuple):
+    id: int
+    name: str
+    size: int
+    mtime: float
+    duration: Optional[float]
+    tags: Dict[str, Any]
+
+
+class LibraryDelta(NamedTuple):
+    added: Tuple[str, ...]
+    removed: Tuple[str, ...]
+    changed: Tuple[str, ...]
+    renamed: Tuple[Tuple[str, str], ...]
+
+    def __bool__(self) -> bool:
+        return any((self.added, self.removed, self.changed, self.renamed))
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    duration REAL,
+    bitrate REAL,
+    samplerate INTEGER,
+    tags TEXT NOT NULL DEFAULT '{}',
+    probed INTEGER NOT NULL DEFAULT 0,
+    loudness REAL,
+    peak REAL,
+    analyzed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tracks_duration ON tracks (duration);
+CREATE INDEX IF NOT EXISTS tracks_probed ON tracks (probed);
+CREATE INDEX IF NOT EXISTS tracks_analyzed ON tracks (analyzed);
+"""
+
+
+def is_song(name: str) -> bool:
+    """
+    :param name: A file name in the songs directory
+    :type name: str
+    :return: Whether the file is listed as a song
+    :rtype: bool
+    """
+    return name != '.gitignore'
+
+
+class LibraryIndex:
+    """A `LibraryIndex` is a persistent (SQLite) index of the songs directory.
+    Every track has a stable id, its size, mtime, duration and tags.
+
+    `LibraryIndex.reconcile` brings the index up to date with a single directory
+    scan that only `stat`s the files. Known changes made by the app itself can
+    be applied without any scan with `LibraryIndex.refresh`, `LibraryIndex.remove`
+    and `LibraryIndex.rename`.
+
+    New and changed files are never opened by the index itself. They are
+    listed by `LibraryIndex.unprobed` until their metadata is read (usually
+    by a `ProbePool`) and saved with `LibraryIndex.store`. Likewise they're listed
+    by `LibraryIndex.unanalyzed` until their loudness is measured (usually by an
+    `AnalysisPool`) and saved with `LibraryIndex.store_loudness`
+    """
+    def __init__(self, db_path: str, songs_dir: str) -> None:
+        self._db_path = db_path
+        self._songs_dir = songs_dir
+        self._conn = sqlite3.connect(db_path)
+        self._migrate()
+        self._conn.executescript(SCHEMA)
+
+    def _migrate(self) -> None:
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tracks)")}
+        if columns and 'probed' not in columns:
+            # Older indexes probed every file before adding it
+            with self._conn:
+                self._conn.execute(
+                    "ALTER TABLE tracks ADD COLUMN probed INTEGER NOT NULL DEFAULT 1"
+                )
+        if columns and 'analyzed' not in columns:
+            # Every track of an older index is measured once
+            with self._conn:
+                self._conn.execute("ALTER TABLE tracks ADD COLUMN loudness REAL")
+                self._conn.execute("ALTER TABLE tracks ADD COLUMN peak REAL")
+                self._conn.execute(
+                    "ALTER TABLE tracks ADD COLUMN analyzed INTEGER NOT NULL DEFAULT 0"
+                )
+
+    def __len__(self) -> int:
+        count: int = self._conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+        return count
+
+    def __contains__(self, __o: object) -> bool:
+        row = self._conn.execute("SELECT 1 FROM tracks WHERE name = ?", (__o,)).fetchone()
+        return row is not None
+
+    @property
+    def songs_dir(self) -> str:
+        return self._songs_dir
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @staticmethod
+    def _to_track(row: Tuple[Any, ...]) -> LibraryTrack:
+        id_, name, size, mtime, duration, tags = row
+        return LibraryTrack(id_, name, size, mtime, duration, json.loads(tags))
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._songs_dir, name)
+
+    def _scan(self) -> Dict[str, Tuple[int, float]]:
+        files: Dict[str, Tuple[int, float]] = {}
+        with os.scandir(self._songs_dir) as entries:
+            for entry in entries:
+                if is_song(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_size, stat.st_mtime)
+        return files
+
+    def _upsert(self, name: str, size: int, mtime: float) -> None:
+        # The metadata of the previous version of the file is dropped
+        self._conn.execute(
+            """INSERT INTO tracks (name, size, mtime) VALUES (?, ?, ?)
+               ON CONFLICT (name) DO UPDATE SET
+                   size = excluded.size, mtime = excluded.mtime,
+                   duration = NULL, bitrate = NULL, samplerate = NULL,
+                   tags = '{}', probed = 0,
+                   loudness = NULL, peak = NULL, analyzed = 0""",
+            (name, size, mtime)
+        )
+
+    def unprobed(self) -> Tuple[str, ...]:
+        """
+        :return: The tracks whose metadata has not been read yet
+        :rtype: Tuple[str, ...]
+        """
+        rows = self._conn.execute("SELECT name FROM tracks WHERE probed = 0 ORDER BY name")
+        return tuple(name for name, in rows)
+
+    def store(self, results: Iterable[ProbeResult]) -> Tuple[str, ...]:
+        """Save the metadata of probed tracks. A result is ignored if the
+        track changed (or is gone) since it was probed
+
+        :param results: The probe results
+        :type results: Iterable[ProbeResult]
+        :return: The tracks that were updated
+        :rtype: Tuple[str, ...]
+        """
+        stored: List[str] = []
+        with self._conn:
+            for name, size, mtime, meta in results:
+                if meta is None:
+                    # Not a (readable) audio file. Keep it listed, without metadata
+                    values: Tuple[Any, ...] = (None, None, None, '{}')
+                else:
+                    values = (meta.duration, meta.bitrate, meta.samplerate, json.dumps(meta.tags))
+                cursor = self._conn.execute(
+                    """UPDATE tracks SET duration = ?, bitrate = ?, samplerate = ?,
+                           tags = ?, probed = 1
+                       WHERE name = ? AND size = ? AND mtime = ?""",
+                    (*values, name, size, mtime)
+                )
+                if cursor.rowcount:
+                    stored.append(name)
+        return tuple(stored)
+
+    def unanalyzed(self) -> Tuple[str, ...]:
+        """
+        :return: The tracks whose loudness has not been measured yet
+        :rtype: Tuple[str, ...]
+        """
+        rows = self._conn.execute("SELECT name FROM tracks WHERE analyzed = 0 ORDER BY name")
+        return tuple(name for name, in rows)
+
+    def store_loudness(self, results: Iterable[AnalysisResult]) -> Tuple[str, ...]:
+        """Save the loudness of measured tracks. A result is ignored if the
+        track changed (or is gone) since it was measured
+
+        :param results: The analysis results
+        :type results: Iterable[AnalysisResult]
+        :return: The tracks that were updated
+        :rtype: Tuple[str, ...]
+        """
+        stored: List[str] = []
+        with self._conn:
+            for name, size, mtime, loudness in results:
+                # A file that can't be decoded is not measured again until it changes
+                values = (None, None) if loudness is None else tuple(loudness)
+                cursor = self._conn.execute(
+                    """UPDATE tracks SET loudness = ?, peak = ?, analyzed = 1
+                       WHERE name = ? AND size = ? AND mtime = ?""",
+                    (*values, name, size, mtime)
+                )
+                if cursor.rowcount:
+                    stored.append(name)
+        return tuple(stored)
+
+    def loudness(self, name: str) -> Optional[Loudness]:
+        """
+        :param name: A file name in the songs directory
+        :type name: str
+        :return: The loudness of the track, None if it's not known (yet)
+        :rtype: Optional[Loudness]
+        """
+        row = self._conn.execute("SELECT loudness, peak FROM tracks WHERE name = ?",
+                                 (name,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return Loudness(*row)
+
+    def meta(self, name: str) -> Optional[TrackMeta]:
+        """
+        :param name: A file name in the songs directory
+        :type name: str
+        :return: The metadata of the track, None if it's not read yet or it's not audio
+        :rtype: Optional[TrackMeta]
+        """
+        row = self._conn.execute(
+            """SELECT duration, bitrate, samplerate, tags FROM tracks
+               WHERE name = ? AND probed = 1 AND duration IS NOT NULL""", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        duration, bitrate, samplerate, tags = row
+        return TrackMeta(duration, bitrate or 0.0, samplerate or 0, json.loads(tags))
+
+    def reconcile(self) -> LibraryDelta:
+        """Update the index with the content of the songs directory. A file that
+        disappeared while a new one with the same size and mtime appeared is
+        treated as renamed and keeps its id and metadata
+
+        :return: What changed
+        :rtype: LibraryDelta
+        """
+        files = self._scan()
+        known = {
+            name: (size, mtime)
+            for name, size, mtime in self._conn.execute("SELECT name, size, mtime FROM tracks")
+        }
+        added = [name for name in files if name not in known]
+        removed = [name for name in known if name not in files]
+        changed = [name for name in files if name in known and known[name] != files[name]]
+
+        renamed: List[Tuple[str, str]] = []
+        gone = {known[name]: name for name in removed}
+        for name in tuple(added):
+            old = gone.pop(files[name], None)
+            if old is not None:
+                renamed.append((old, name))
+                added.remove(name)
+                removed.remove(old)
+
+        with self._conn:
+            for old, new in renamed:
+                self._conn.execute("UPDATE tracks SET name = ? WHERE name = ?", (new, old))
+            self._conn.executemany("DELETE FROM tracks WHERE name = ?",
+                                   ((name,) for name in removed))
+            for name in (*added, *changed):
+                self._upsert(name, *files[name])
+        return LibraryDelta(tuple(added), tuple(removed), tuple(changed), tuple(renamed))
+
+    def refresh(self, names: Iterable[str]) -> LibraryDelta:
+        """Re-index specific files only. Files that don't exist are removed
+
+        :param names: File names in the songs directory
+        :type names: Iterable[str]
+        :return: What changed
+        :rtype: LibraryDelta
+        """
+        added: List[str] = []
+        removed: List[str] = []
+        changed: List[str] = []
+        with self._conn:
+            for name in names:
+                row = self._conn.execute("SELECT size, mtime FROM tracks WHERE name = ?",
+                                         (name,)).fetchone()
+                try:
+                    stat = os.stat(self._path(name))
+                except FileNotFoundError:
+                    if row is not None:
+                        self._conn.execute("DELETE FROM tracks WHERE name = ?", (name,))
+                        removed.append(name)
+                    continue
+                if row != (stat.st_size, stat.st_mtime):
+                    self._upsert(name, stat.st_size, stat.st_mtime)
+                    (added if row is None else changed).append(name)
+        return LibraryDelta(tuple(added), tuple(removed), tuple(changed), ())
+
+    def remove(self, name: str) -> LibraryDelta:
+        """
+        :return: What changed, nothing if `name` was not indexed
+        :rtype: LibraryDelta
+        """
+        with self._conn:
+            cursor = self._conn.execute("DELETE FROM tracks WHERE name = ?", (name,))
+        return LibraryDelta((), (name,) if cursor.rowcount else (), (), ())
+
+    def rename(self, old: str, new: str) -> LibraryDelta:
+        """Rename a track, keeping its id and metadata
+
+        :raises LibraryError: If `old` is not indexed
+        :return: What changed
+        :rtype: LibraryDelta
+        """
+        with self._conn:
+            cursor = self._conn.execute("UPDATE tracks SET name = ? WHERE name = ?", (new, old))
+        if not cursor.rowcount:
+            raise LibraryError(f"`{old}` is not in the library")
+        return LibraryDelta((), (), (), ((old, new),))
+
+    def get(self, name: str) -> LibraryTrack:
+        """
+        :raises LibraryError: If `name` is not indexed
+        """
+        row = self._conn.execute(
+            "SELECT id, name, size, mtime, duration, tags FROM tracks WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            raise LibraryError(f"`{name}` is not in the library")
+        return self._to_track(row)
+
+    def tracks(self) -> Iterator[LibraryTrack]:
+        """
+        :return: Every indexed track, by name
+        :rtype: Iterator[LibraryTrack]
+        """
+        rows = self._conn.execute(
+            "SELECT id, name, size, mtime, duration, tags FROM tracks ORDER BY name"
+        )
+        return (self._to_track(row) for row in rows.fetchall())
+
+    def songs(self, order: Order = 'name', reverse: bool = False) -> Tuple[str, ...]:
+        """
+        :param order: `name` or `length`, defaults to `name`
+        :type order: Order, optional
+        :param reverse: Descending order, defaults to False
+        :type reverse: bool, optional
+        :return: The names of all the tracks
+        :rtype: Tuple[str, ...]
+        """
+        direction = 'DESC' if reverse else 'ASC'
+        if order == 'length':
+            # Tracks of the same length stay by name, like a stable sort would keep
+            # them. Tracks without a known length (yet) are always last
+            query = ("SELECT name FROM tracks "
+                     f"ORDER BY duration IS NULL, duration {direction}, name")
+        else:
+            query = f"SELECT name FROM tracks ORDER BY name {direction}"
+        return tuple(name for name, in self._conn.execute(query))
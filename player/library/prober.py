@@ -0,0 +1,239 @@
+from __future__ import annotations
+import os
+import queue
+import functools
+import multiprocessing
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    Executor,
+    Future,
+)
+from tinytag import TinyTag
+from typing import (
+    NamedTuple,
+    Protocol,
+    Iterable,
+    Callable,
+    Optional,
+    Generic,
+    TypeVar,
+    Tuple,
+    List,
+    Dict,
+    Set,
+    Any,
+)
+
+
+__all__ = (
+    'TAG_FIELDS',
+    'TrackMeta',
+    'ProbeResult',
+    'FilePool',
+    'ProbePool',
+    'probe_files',
+    'probe_track',
+)
+
+
+class Named(Protocol):
+    @property
+    def name(self) -> str: ...
+
+
+Result = TypeVar('Result', bound=Named)
+
+
+TAG_FIELDS: Tuple[str, ...] = (
+    'title',
+    'artist',
+    'album',
+    'albumartist',
+    'genre',
+    'year',
+    'track',
+)
+
+
+class TrackMeta(NamedTuple):
+    duration: float
+    bitrate: float
+    samplerate: int
+    tags: Dict[str, Any]
+
+
+def probe_track(path: str) -> TrackMeta:
+    """Read the headers of an audio file. This is the only place
+    where the file itself is opened
+
+    :param path: Full path of the audio file
+    :type path: str
+    :return: The metadata of the track
+    :rtype: TrackMeta
+    """
+    tag = TinyTag.get(path)
+    tags = {field: getattr(tag, field, None) for field in TAG_FIELDS}
+    return TrackMeta(tag.duration or 0.0, tag.bitrate or 0.0, tag.samplerate or 0, tags)
+
+
+class ProbeResult(NamedTuple):
+    name: str
+    size: int
+    mtime: float
+    # `None` if the file could not be read as audio
+    meta: Optional[TrackMeta]
+
+
+def probe_files(songs_dir: str, names: Tuple[str, ...],
+                probe: Callable[[str], TrackMeta] = probe_track) -> List[ProbeResult]:
+    """Probe files of the songs directory. Files that disappeared are skipped.
+    This is what runs in the workers of a `ProbePool`
+
+    :param songs_dir: The songs directory
+    :type songs_dir: str
+    :param names: The file names to probe
+    :type names: Tuple[str, ...]
+    :param probe: What reads the metadata, defaults to `probe_track`
+    :type probe: Callable[[str], TrackMeta], optional
+    :return: The results, the stat is taken before the probe
+    :rtype: List[ProbeResult]
+    """
+    results = []
+    for name in names:
+        path = os.path.join(songs_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        try:
+            meta: Optional[TrackMeta] = probe(path)
+        except Exception:
+            meta = None
+        results.append(ProbeResult(name, stat.st_size, stat.st_mtime, meta))
+    return results
+
+
+class FilePool(Generic[Result]):
+    """A `FilePool` runs a function over files of the songs directory in a pool
+    of worker processes, so a slow disk (or many files) never blocks the caller.
+
+    Files are sent to the workers in chunks with `FilePool.submit`. The
+    workers' results are queued and the owner collects them in its own
+    thread, whenever it suits it, with `FilePool.drain`
+    """
+    def __init__(self, songs_dir: str,
+                 work: Callable[[str, Tuple[str, ...]], List[Result]],
+                 workers: Optional[int] = None, chunk_size: int = 32,
+                 executor: Optional[Executor] = None) -> None:
+        """
+        :param songs_dir: The songs directory
+        :type songs_dir: str
+        :param work: What runs in the workers, with the songs directory and
+        a chunk of file names. It must be picklable (a module's function)
+        :type work: Callable[[str, Tuple[str, ...]], List[Result]]
+        :param workers: The number of processes, defaults to the number of CPUs
+        :type workers: Optional[int], optional
+        :param chunk_size: Files per job, defaults to 32
+        :type chunk_size: int, optional
+        :param executor: Run the jobs on this executor instead of a
+        (lazily created) process pool, defaults to None
+        :type executor: Optional[Executor], optional
+        """
+        self._songs_dir = songs_dir
+        self._work = work
+        self._workers = workers
+        self._chunk_size = chunk_size
+        self._executor = executor
+        self._results: queue.SimpleQueue[Tuple[int, List[Result]]] = queue.SimpleQueue()
+        # Jobs of an older generation were dropped by `ProbePool.shutdown`
+        self._generation = 0
+        self._queued: Set[str] = set()
+        self._jobs = 0
+        self.total = 0
+        self.done = 0
+
+    @property
+    def busy(self) -> bool:
+        return self._jobs > 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # Forking a process that runs Qt threads is not safe. The workers
+            # are forked from a clean server process where it's supported
+            methods = multiprocessing.get_all_start_methods()
+            method = 'forkserver' if 'forkserver' in methods else 'spawn'
+            context = multiprocessing.get_context(method)
+            self._executor = ProcessPoolExecutor(self._workers, mp_context=context)
+        return self._executor
+
+    def _job_done(self, generation: int, future: Future[List[Result]]) -> None:
+        # Runs in a thread of the executor, only the queue is touched here
+        results: List[Result] = []
+        if not future.cancelled() and future.exception() is None:
+            results = future.result()
+        self._results.put((generation, results))
+
+    def submit(self, names: Iterable[str]) -> int:
+        """Queue files for the workers. Files that are already queued are skipped
+
+        :param names: File names in the songs directory
+        :type names: Iterable[str]
+        :return: The number of files that were queued
+        :rtype: int
+        """
+        new = tuple(name for name in dict.fromkeys(names) if name not in self._queued)
+        if not new:
+            return 0
+        if not self.busy:
+            self.total = self.done = 0
+        executor = self._get_executor()
+        for i in range(0, len(new), self._chunk_size):
+            chunk = new[i:i + self._chunk_size]
+            self._queued.update(chunk)
+            self._jobs += 1
+            future = executor.submit(self._work, self._songs_dir, chunk)
+            future.add_done_callback(functools.partial(self._job_done, self._generation))
+        self.total += len(new)
+        return len(new)
+
+    def drain(self) -> List[Result]:
+        """Collect the results of every job that finished since the last call
+
+        :return: The results
+        :rtype: List[Result]
+        """
+        results: List[Result] = []
+        while True:
+            try:
+                generation, batch = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._generation:
+                self._jobs -= 1
+                results.extend(batch)
+        for result in results:
+            self._queued.discard(result.name)
+        self.done += len(results)
+        if not self.busy:
+            # Files that vanished or failed are never reported, the batch is over anyway
+            self._queued.clear()
+            self.done = self.total
+        return results
+
+    def shutdown(self) -> None:
+        """Drop the queued jobs and stop the workers without waiting for them
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._queued.clear()
+        self._jobs = 0
+        self._generation += 1
+
+
+class ProbePool(FilePool[ProbeResult]):
+    """A `ProbePool` reads the metadata of files in worker processes (see `FilePool`)
+    """
+    def __init__(self, songs_dir: str, workers: Optional[int] = None,
+                 chunk_size: int = 32, executor: Optional[Executor] = None) -> None:
+        super().__init__(songs_dir, probe_files, workers, chunk_size, executor)
@@ -0,0 +1,364 @@
+from __future__ import annotations
+import os
+import re
+import heapq
+import itertools
+from bisect import (
+    bisect_left,
+    insort,
+)
+from typing import (
+    NamedTuple,
+    Iterable,
+    Optional,
+    Tuple,
+    Dict,
+    List,
+    Set,
+    Any,
+)
+
+
+__all__ = (
+    'SearchHit',
+    'SearchIndex',
+    'tokenize',
+)
+
+
+# A doc that matches every query token gets the worst tier of its tokens
+NAME_PREFIX = 0
+TOKEN_PREFIX = 1
+INFIX = 2
+FUZZY = 3
+
+# Narrowing the previous results is only cheaper than
+# the index lookup while there are few of them
+NARROW_LIMIT = 5000
+# Tokens shorter than that are never matched with typos
+FUZZY_MIN_LENGTH = 4
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """
+    :param text: Any text
+    :type text: str
+    :return: The casefolded words of `text`
+    :rtype: Tuple[str, ...]
+    """
+    return tuple(TOKEN_RE.findall(text.casefold()))
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _deletes(token: str) -> Set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class SearchHit(NamedTuple):
+    name: str
+    tier: int
+
+
+class _Doc(NamedTuple):
+    name: str
+    title: str
+    tag_text: str
+    tokens: Tuple[str, ...]
+    # ` word1 word2 ...`, ` word` in it is a word that starts with `word`
+    text: str
+
+
+class SearchIndex:
+    """A `SearchIndex` ranks songs by how well their name and tags match a query.
+    Every query word must match a word of the song, in order of preference:
+
+    - The name of the song starts with the whole query
+    - The query word is the start of a word
+    - The query word is inside a word (only for words of 3+ letters)
+    - The query word is one typo away from a word (only for words of 4+ letters)
+
+    Songs are indexed by word. The words are kept sorted (for the prefixes),
+    by trigram (for the infixes) and by their deletions (for the typos), so a
+    query never looks at all the songs. The names are kept sorted too, so when
+    enough names start with the query nothing else is looked up. A query that
+    extends the previous one only filters the previous results, as long as
+    there are few of them
+    """
+    def __init__(self) -> None:
+        self._ids = itertools.count()
+        self._docs: Dict[int, _Doc] = {}
+        self._by_name: Dict[str, int] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocab: List[str] = []
+        self._titles: List[Tuple[str, str, int]] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+        self._last_query: Optional[Tuple[str, ...]] = None
+        self._last_tiers: Dict[int, int] = {}
+        self._last_fuzzy = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, __o: object) -> bool:
+        return __o in self._by_name
+
+    def _reset_last(self) -> None:
+        self._last_query = None
+        self._last_tiers = {}
+        self._last_fuzzy = False
+
+    def _add_token(self, token: str, bulk: bool) -> None:
+        if bulk:
+            self._vocab.append(token)
+        else:
+            insort(self._vocab, token)
+        for gram in _trigrams(token):
+            self._trigrams.setdefault(gram, set()).add(token)
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for key in _deletes(token) | {token}:
+                self._deletes.setdefault(key, set()).add(token)
+
+    def _remove_token(self, token: str) -> None:
+        del self._vocab[bisect_left(self._vocab, token)]
+        for gram in _trigrams(token):
+            self._discard(self._trigrams, gram, token)
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for key in _deletes(token) | {token}:
+                self._discard(self._deletes, key, token)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[Any]], key: str, value: Any) -> None:
+        values = index[key]
+        values.discard(value)
+        if not values:
+            del index[key]
+
+    def add(self, name: str, tags: Optional[Dict[str, Any]] = None) -> None:
+        """Index a song. A song with the same name is replaced
+
+        :param name: The file name of the song
+        :type name: str
+        :param tags: The tags of the song, defaults to None
+        :type tags: Optional[Dict[str, Any]], optional
+        """
+        self._insert(name, self._tag_text(tags))
+
+    def add_many(self, songs: Iterable[Tuple[str, Optional[Dict[str, Any]]]]) -> None:
+        """Index many songs at once, much faster than `SearchIndex.add` one by one
+
+        :param songs: Pairs of file name and tags
+        :type songs: Iterable[Tuple[str, Optional[Dict[str, Any]]]]
+        """
+        for name, tags in songs:
+            self._insert(name, self._tag_text(tags), bulk=True)
+        self._vocab.sort()
+        self._titles.sort()
+
+    @staticmethod
+    def _tag_text(tags: Optional[Dict[str, Any]]) -> str:
+        return ' '.join(str(value) for value in (tags or {}).values() if value)
+
+    def _insert(self, name: str, tag_text: str, bulk: bool = False) -> None:
+        self.remove(name)
+        title = ' '.join(tokenize(os.path.splitext(name)[0]))
+        tokens = tuple(dict.fromkeys(tokenize(f"{title} {tag_text}")))
+
+        doc_id = next(self._ids)
+        self._docs[doc_id] = _Doc(name, title, tag_text, tokens, f" {' '.join(tokens)}")
+        self._by_name[name] = doc_id
+        if bulk:
+            self._titles.append((title, name, doc_id))
+        else:
+            insort(self._titles, (title, name, doc_id))
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                self._add_token(token, bulk)
+            posting.add(doc_id)
+        self._reset_last()
+
+    def remove(self, name: str) -> None:
+        """Forget a song if it's indexed
+
+        :param name: The file name of the song
+        :type name: str
+        """
+        doc_id = self._by_name.pop(name, None)
+        if doc_id is None:
+            return
+        doc = self._docs.pop(doc_id)
+        del self._titles[bisect_left(self._titles, (doc.title, name, doc_id))]
+        for token in doc.tokens:
+            posting = self._postings[token]
+            posting.discard(doc_id)
+            if not posting:
+                del self._postings[token]
+                self._remove_token(token)
+        self._reset_last()
+
+    def rename(self, old: str, new: str) -> None:
+        """Re-index a song under a new name, keeping its tags
+
+        :param old: The current file name
+        :type old: str
+        :param new: The new file name
+        :type new: str
+        """
+        doc_id = self._by_name.get(old)
+        tag_text = self._docs[doc_id].tag_text if doc_id is not None else ''
+        self.remove(old)
+        self._insert(new, tag_text)
+
+    def _prefixed(self, word: str) -> List[str]:
+        tokens = []
+        for i in range(bisect_left(self._vocab, word), len(self._vocab)):
+            token = self._vocab[i]
+            if not token.startswith(word):
+                break
+            tokens.append(token)
+        return tokens
+
+    def _containing(self, word: str) -> List[str]:
+        if len(word) < 3:
+            return []
+        grams = sorted((self._trigrams.get(gram, set()) for gram in _trigrams(word)), key=len)
+        if not grams or not grams[0]:
+            return []
+        return [token for token in grams[0].intersection(*grams[1:])
+                if word in token and not token.startswith(word)]
+
+    def _typos(self, word: str) -> Set[str]:
+        if len(word) < FUZZY_MIN_LENGTH:
+            return set()
+        tokens: Set[str] = set()
+        for key in _deletes(word) | {word}:
+            tokens |= self._deletes.get(key, set())
+        return tokens
+
+    def _word_tiers(self, word: str) -> Tuple[Dict[int, int], bool]:
+        tiers: Dict[int, int] = {}
+        for tier, tokens in ((TOKEN_PREFIX, self._prefixed(word)),
+                             (INFIX, self._containing(word))):
+            for token in tokens:
+                for doc_id in self._postings[token]:
+                    tiers.setdefault(doc_id, tier)
+        if tiers:
+            return tiers, False
+        for token in self._typos(word):
+            for doc_id in self._postings[token]:
+                tiers[doc_id] = FUZZY
+        return tiers, True
+
+    def _lookup(self, words: Tuple[str, ...]) -> Tuple[Dict[int, int], bool]:
+        result: Optional[Dict[int, int]] = None
+        fuzzy = False
+        # The longest words are usually the rarest, once they leave a few
+        # candidates the others are checked on the candidates only
+        for word in sorted(set(words), key=len, reverse=True):
+            if result is not None and len(result) <= NARROW_LIMIT:
+                filtered = self._filter(result, (word,))
+                if filtered:
+                    result = filtered
+                    continue
+            tiers, typos = self._word_tiers(word)
+            fuzzy = fuzzy or typos
+            if result is None:
+                result = tiers
+            else:
+                result = {doc_id: max(tier, tiers[doc_id])
+                          for doc_id, tier in result.items() if doc_id in tiers}
+            if not result:
+                break
+        return result or {}, fuzzy
+
+    def _filter(self, candidates: Dict[int, int], words: Tuple[str, ...]) -> Dict[int, int]:
+        """Keep the candidates that match every word exactly (no typos)
+        """
+        result: Dict[int, int] = {}
+        starts = [(word, f" {word}", len(word) >= 3) for word in words]
+        docs = self._docs
+        for doc_id, worst in candidates.items():
+            text = docs[doc_id].text
+            for word, start, infix in starts:
+                if start in text:
+                    continue
+                if not (infix and word in text):
+                    break
+                worst = INFIX
+            else:
+                result[doc_id] = worst
+        return result
+
+    def _extends_last(self, words: Tuple[str, ...]) -> bool:
+        last = self._last_query
+        if last is None or self._last_fuzzy or len(self._last_tiers) > NARROW_LIMIT:
+            return False
+        if len(words) < len(last) or not last:
+            return False
+        # A word of less than 3 letters found no infix matches, a longer one may
+        if any(len(word) < 3 for word in last):
+            return False
+        # Every previous word is still there, the last one may have grown
+        grown = len(last) - 1
+        return words[:grown] == last[:grown] and words[grown].startswith(last[grown])
+
+    def _name_prefixed(self, title: str, limit: int) -> List[SearchHit]:
+        hits: List[SearchHit] = []
+        for i in range(bisect_left(self._titles, (title,)), len(self._titles)):
+            doc_title, name, _ = self._titles[i]
+            if len(hits) == limit or not doc_title.startswith(title):
+                break
+            hits.append(SearchHit(name, NAME_PREFIX))
+        return hits
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[SearchHit]:
+        """
+        :param query: What the user typed
+        :type query: str
+        :param limit: The max number of hits, defaults to None (all of them)
+        :type limit: Optional[int], optional
+        :return: The matching songs, best first. Songs
+        of the same tier are in alphabetical order
+        :rtype: List[SearchHit]
+        """
+        words = tokenize(query)
+        if not words:
+            self._reset_last()
+            return []
+
+        title = ' '.join(words)
+        if limit is not None:
+            # The best possible hits are enough, the rest doesn't matter
+            hits = self._name_prefixed(title, limit)
+            if len(hits) == limit:
+                self._reset_last()
+                return hits
+
+        tiers: Dict[int, int] = {}
+        fuzzy = False
+        if self._extends_last(words):
+            tiers = self._filter(dict.fromkeys(self._last_tiers, TOKEN_PREFIX), words)
+        if not tiers:
+            tiers, fuzzy = self._lookup(words)
+        self._last_query, self._last_tiers, self._last_fuzzy = words, tiers, fuzzy
+
+        docs = self._docs
+
+        def rank(item: Tuple[int, int]) -> Tuple[int, str, str]:
+            doc = docs[item[0]]
+            tier = NAME_PREFIX if doc.title.startswith(title) else item[1]
+            return tier, doc.title, doc.name
+
+        items = tiers.items()
+        if limit is not None and limit < len(tiers):
+            ranked = heapq.nsmallest(limit, items, key=rank)
+        else:
+            ranked = sorted(items, key=rank)
+        return [SearchHit(docs[doc_id].name, rank((doc_id, tier))[0]) for doc_id, tier in ranked]
@@ -0,0 +1,401 @@
+import os
+import shutil
+import sqlite3
+import time
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Tuple,
+    Dict,
+    List,
+)
+from actions import SONGS_DIR
+from loudness import Loudness
+from .index import (
+    LibraryIndex,
+    LibraryError,
+    is_song,
+)
+from .search import (
+    SearchIndex,
+    tokenize,
+)
+from .prober import (
+    TAG_FIELDS,
+    TrackMeta,
+    ProbeResult,
+    ProbePool,
+    probe_files,
+    probe_track,
+)
+from .analyzer import (
+    AnalysisResult,
+    analyze_files,
+)
+
+
+BASE_DIR = Path(__file__).parent
+SONG = os.path.join(SONGS_DIR, 'Sjaak - Trompetisto (Official Music Video).mp3')
+
+
+class FakeProbe:
+    def __init__(self) -> None:
+        self.durations: Dict[str, float] = {}
+        self.calls: List[str] = []
+
+    def __call__(self, path: str) -> TrackMeta:
+        name = os.path.basename(path)
+        self.calls.append(name)
+        tags = {'title': name.upper(), 'artist': 'Sjaak'}
+        return TrackMeta(self.durations.get(name, 1.0), 128.0, 44100, tags)
+
+
+class TestLibraryIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.songs_dir = str(Path(BASE_DIR, 'testsongs'))
+        self.db = str(Path(BASE_DIR, 'testlibrary.db'))
+        os.makedirs(self.songs_dir, exist_ok=True)
+        self.probe = FakeProbe()
+        self.library = LibraryIndex(self.db, self.songs_dir)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.library.close()
+        shutil.rmtree(self.songs_dir)
+        if os.path.exists(self.db):
+            os.remove(self.db)
+        return super().tearDown()
+
+    def _write(self, name: str, data: bytes = b'\x00') -> None:
+        with open(os.path.join(self.songs_dir, name), mode='wb') as f:
+            f.write(data)
+
+    def _probe(self) -> Tuple[str, ...]:
+        # What a `ProbePool` does, in this thread
+        return self.library.store(probe_files(self.songs_dir, self.library.unprobed(),
+                                              self.probe))
+
+    def test_is_song(self) -> None:
+        self.assertTrue(is_song('a.mp3'))
+        self.assertFalse(is_song('.gitignore'))
+
+    def test_reconcile_added(self) -> None:
+        self._write('b.mp3')
+        self._write('a.mp3')
+        self._write('.gitignore')
+        delta = self.library.reconcile()
+        self.assertEqual(sorted(delta.added), ['a.mp3', 'b.mp3'])
+        self.assertEqual(self.library.songs(), ('a.mp3', 'b.mp3'))
+        self.assertEqual(len(self.library), 2)
+        self.assertIn('a.mp3', self.library)
+
+    def test_reconcile_does_not_probe(self) -> None:
+        self._write('a.mp3')
+        self.library.reconcile()
+        self.assertFalse(self.library.reconcile())
+        self.assertEqual(self.probe.calls, [])
+        self.assertEqual(self.library.unprobed(), ('a.mp3',))
+        self.assertIsNone(self.library.get('a.mp3').duration)
+
+    def test_store(self) -> None:
+        self._write('a.mp3')
+        self._write('b.mp3')
+        self.library.reconcile()
+        self.assertEqual(self._probe(), ('a.mp3', 'b.mp3'))
+        self.assertEqual(self.library.unprobed(), ())
+        self.assertEqual(self.library.get('a.mp3').duration, 1.0)
+        self.assertEqual(self._probe(), ())
+        self.assertEqual(len(self.probe.calls), 2)
+
+    def test_store_stale_result(self) -> None:
+        self._write('a.mp3')
+        self.library.reconcile()
+        result = ProbeResult('a.mp3', 1, 0.0, self.probe('a.mp3'))
+        self.assertEqual(self.library.store([result]), ())
+        self.assertEqual(self.library.unprobed(), ('a.mp3',))
+
+    def test_store_unreadable(self) -> None:
+        self._write('a.mp3')
+        self.library.reconcile()
+        track = self.library.get('a.mp3')
+        result = ProbeResult('a.mp3', track.size, track.mtime, None)
+        self.assertEqual(self.library.store([result]), ('a.mp3',))
+        self.assertEqual(self.library.unprobed(), ())
+        self.assertIsNone(self.library.get('a.mp3').duration)
+
+    def test_meta(self) -> None:
+        self._write('a.mp3')
+        self._write('b.mp3', b'\x01')
+        self.library.reconcile()
+        self.assertIsNone(self.library.meta('a.mp3'))
+        track = self.library.get('b.mp3')
+        self.library.store([ProbeResult('b.mp3', track.size, track.mtime, None)])
+        self.assertIsNone(self.library.meta('b.mp3'))
+        self._probe()
+        self.assertEqual(self.library.meta('a.mp3'), self.probe('a.mp3'))
+        self.assertIsNone(self.library.meta('c.mp3'))
+
+    def test_reconcile_persists(self) -> None:
+        self._write('a.mp3')
+        self.library.reconcile()
+        self.library.close()
+        self.library = LibraryIndex(self.db, self.songs_dir)
+        self.probe.calls.clear()
+        self.assertFalse(self.library.reconcile())
+        self.assertEqual(self.library.songs(), ('a.mp3',))
+
+    def test_reconcile_changed_and_removed(self) -> None:
+        self._write('a.mp3')
+        self._write('b.mp3')
+        self.library.reconcile()
+        self._probe()
+        self._write('a.mp3', b'\x00' * 32)
+        os.remove(os.path.join(self.songs_dir, 'b.mp3'))
+
+        delta = self.library.reconcile()
+        self.assertEqual(delta.changed, ('a.mp3',))
+        self.assertEqual(delta.removed, ('b.mp3',))
+        self.assertEqual(self.library.unprobed(), ('a.mp3',))
+        self.assertEqual(self.library.get('a.mp3').size, 32)
+
+    def test_reconcile_renamed_keeps_id(self) -> None:
+        self._write('a.mp3', b'\x00' * 8)
+        self.library.reconcile()
+        self._probe()
+        track_id = self.library.get('a.mp3').id
+        os.rename(os.path.join(self.songs_dir, 'a.mp3'), os.path.join(self.songs_dir, 'z.mp3'))
+
+        delta = self.library.reconcile()
+        self.assertEqual(delta.renamed, (('a.mp3', 'z.mp3'),))
+        self.assertEqual(self.library.get('z.mp3').id, track_id)
+        self.assertEqual(self.library.unprobed(), ())
+
+    def test_refresh_remove_rename(self) -> None:
+        self._write('a.mp3')
+        delta = self.library.refresh(['a.mp3', 'missing.mp3'])
+        self.assertEqual(delta.added, ('a.mp3',))
+        self.assertEqual(delta.removed, ())
+        self.assertEqual(self.library.songs(), ('a.mp3',))
+        self.assertFalse(self.library.refresh(['a.mp3']))
+
+        delta = self.library.rename('a.mp3', 'b.mp3')
+        self.assertEqual(delta.renamed, (('a.mp3', 'b.mp3'),))
+        self.assertEqual(self.library.songs(), ('b.mp3',))
+        self.assertRaises(LibraryError, self.library.rename, 'a.mp3', 'c.mp3')
+
+        self.assertEqual(self.library.remove('b.mp3').removed, ('b.mp3',))
+        self.assertFalse(self.library.remove('b.mp3'))
+        self.assertEqual(len(self.library), 0)
+        self.assertRaises(LibraryError, self.library.get, 'b.mp3')
+
+    def test_loudness(self) -> None:
+        self._write('a.mp3')
+        self._write('b.mp3')
+        self.library.reconcile()
+        self.assertEqual(self.library.unanalyzed(), ('a.mp3', 'b.mp3'))
+        self.assertIsNone(self.library.loudness('a.mp3'))
+        a, b = self.library.get('a.mp3'), self.library.get('b.mp3')
+        results = [AnalysisResult('a.mp3', a.size, a.mtime, Loudness(-9.5, 0.9)),
+                   AnalysisResult('b.mp3', b.size, b.mtime, None)]
+        self.assertEqual(self.library.store_loudness(results), ('a.mp3', 'b.mp3'))
+        # Undecodable files are not measured again either
+        self.assertEqual(self.library.unanalyzed(), ())
+        self.assertEqual(self.library.loudness('a.mp3'), Loudness(-9.5, 0.9))
+        self.assertIsNone(self.library.loudness('b.mp3'))
+
+        # Renamed tracks keep it, changed ones are measured again
+        self.library.rename('a.mp3', 'c.mp3')
+        self.assertEqual(self.library.loudness('c.mp3'), Loudness(-9.5, 0.9))
+        self._write('c.mp3', b'\x00' * 16)
+        self.library.refresh(['c.mp3'])
+        self.assertEqual(self.library.unanalyzed(), ('c.mp3',))
+        self.assertIsNone(self.library.loudness('c.mp3'))
+        # A result of the previous version is stale
+        self.assertEqual(self.library.store_loudness(results[:1]), ())
+
+    def test_migrate_loudness(self) -> None:
+        self.library.close()
+        os.remove(self.db)
+        conn = sqlite3.connect(self.db)
+        conn.execute("""CREATE TABLE tracks (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL UNIQUE, size INTEGER NOT NULL, mtime REAL NOT NULL,
+                        duration REAL, bitrate REAL, samplerate INTEGER,
+                        tags TEXT NOT NULL DEFAULT '{}', tag_text TEXT NOT NULL DEFAULT '',
+                        probed INTEGER NOT NULL DEFAULT 0)""")
+        conn.execute("INSERT INTO tracks (name, size, mtime, probed) VALUES ('a.mp3', 1, 0, 1)")
+        conn.commit()
+        conn.close()
+        self.library = LibraryIndex(self.db, self.songs_dir)
+        self.assertEqual(self.library.unprobed(), ())
+        self.assertEqual(self.library.unanalyzed(), ('a.mp3',))
+
+    def test_songs_by_length(self) -> None:
+        self.probe.durations = {'a.mp3': 3.0, 'b.mp3': 1.0, 'c.mp3': 3.0}
+        for name in self.probe.durations:
+            self._write(name)
+        self.library.reconcile()
+        self._probe()
+        self._write('0.mp3')
+        self.library.reconcile()
+        self.assertEqual(self.library.songs('length'), ('b.mp3', 'a.mp3', 'c.mp3', '0.mp3'))
+        self.assertEqual(self.library.songs('length', reverse=True),
+                         ('a.mp3', 'c.mp3', 'b.mp3', '0.mp3'))
+
+
+class TestProbePool(unittest.TestCase):
+    def setUp(self) -> None:
+        self.songs_dir = str(Path(BASE_DIR, 'testprobesongs'))
+        os.makedirs(self.songs_dir, exist_ok=True)
+        self.names = [f"{i}.mp3" for i in range(10)]
+        for name in self.names:
+            with open(os.path.join(self.songs_dir, name), mode='wb') as f:
+                f.write(b'\x00')
+        self.executor = ThreadPoolExecutor(2)
+        self.pool = ProbePool(self.songs_dir, chunk_size=3, executor=self.executor)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.pool.shutdown()
+        shutil.rmtree(self.songs_dir)
+        return super().tearDown()
+
+    def _drain_all(self) -> List[ProbeResult]:
+        results: List[ProbeResult] = []
+        deadline = time.monotonic() + 10
+        while self.pool.busy and time.monotonic() < deadline:
+            results.extend(self.pool.drain())
+            time.sleep(0.01)
+        return results
+
+    def test_probe_files(self) -> None:
+        results = probe_files(self.songs_dir, ('0.mp3', 'missing.mp3'), FakeProbe())
+        self.assertEqual([result.name for result in results], ['0.mp3'])
+        self.assertEqual(results[0].size, 1)
+        self.assertEqual(results[0].meta.duration if results[0].meta else None, 1.0)
+
+    def test_probe_track(self) -> None:
+        meta = probe_track(SONG)
+        self.assertIsInstance(meta, TrackMeta)
+        self.assertGreater(meta.duration, 0)
+        self.assertGreater(meta.bitrate, 0)
+        self.assertGreater(meta.samplerate, 0)
+        self.assertEqual(tuple(meta.tags.keys()), TAG_FIELDS)
+
+    def test_unreadable(self) -> None:
+        # The sample files are not audio
+        results = probe_files(self.songs_dir, ('0.mp3',))
+        self.assertIsNone(results[0].meta)
+
+    def test_analyze_files(self) -> None:
+        results = analyze_files(self.songs_dir, ('0.mp3', 'missing.mp3'),
+                                lambda path: Loudness(-12.0, 0.5))
+        self.assertEqual(results, [AnalysisResult('0.mp3', 1, results[0].mtime,
+                                                  Loudness(-12.0, 0.5))])
+        self.assertIsNone(analyze_files(self.songs_dir, ('0.mp3',))[0].loudness)
+
+    def test_submit_and_drain(self) -> None:
+        self.assertEqual(self.pool.submit(self.names), 10)
+        self.assertEqual(self.pool.submit(self.names[:2]), 0)
+        self.assertTrue(self.pool.busy)
+        results = self._drain_all()
+        self.assertFalse(self.pool.busy)
+        self.assertEqual(sorted(result.name for result in results), sorted(self.names))
+        self.assertEqual((self.pool.done, self.pool.total), (10, 10))
+        # A finished batch starts over
+        self.assertEqual(self.pool.submit(self.names[:2]), 2)
+        self.assertEqual(self.pool.total, 2)
+
+    def test_shutdown(self) -> None:
+        self.pool.submit(self.names)
+        self.pool.shutdown()
+        self.assertFalse(self.pool.busy)
+        self.executor.shutdown(wait=True)
+        # Jobs that were running are ignored
+        self.assertEqual(self.pool.drain(), [])
+        self.assertFalse(self.pool.busy)
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = SearchIndex()
+        self.index.add_many((
+            ('Sjaak - Trompetisto (Official Music Video).mp3', {'artist': 'Sjaak'}),
+            ('Gustavo Santaolalla - Babel (Trap Remix).mp3', {'album': 'Babel'}),
+            ('Trap Anthem.mp3', None),
+            ('Nothing Else Matters.mp3', {'artist': 'Metallica'}),
+        ))
+        return super().setUp()
+
+    def _names(self, query: str) -> List[str]:
+        return [hit.name for hit in self.index.search(query)]
+
+    def test_tokenize(self) -> None:
+        self.assertEqual(tokenize("Sjaak - Trompetisto (Official)"),
+                         ('sjaak', 'trompetisto', 'official'))
+        self.assertEqual(tokenize(" - "), ())
+
+    def test_ranking(self) -> None:
+        hits = self.index.search('trap')
+        self.assertEqual([hit.name for hit in hits],
+                         ['Trap Anthem.mp3', 'Gustavo Santaolalla - Babel (Trap Remix).mp3'])
+        self.assertEqual([hit.tier for hit in hits], [0, 1])
+
+    def test_words_in_any_order(self) -> None:
+        self.assertEqual(self._names('remix gus'),
+                         ['Gustavo Santaolalla - Babel (Trap Remix).mp3'])
+        self.assertEqual(self._names('remix sjaak'), [])
+
+    def test_infix_and_tags(self) -> None:
+        self.assertEqual(self._names('petist'),
+                         ['Sjaak - Trompetisto (Official Music Video).mp3'])
+        self.assertEqual(self._names('metallica'), ['Nothing Else Matters.mp3'])
+        # Too short to be matched inside of a word
+        self.assertEqual(self._names('ap'), [])
+
+    def test_typos(self) -> None:
+        self.assertEqual(self._names('trompetsto'),
+                         ['Sjaak - Trompetisto (Official Music Video).mp3'])
+        self.assertEqual(self._names('metalica'), ['Nothing Else Matters.mp3'])
+        self.assertEqual(self.index.search('metalica')[0].tier, 3)
+        self.assertEqual(self._names('tarp'), ['Gustavo Santaolalla - Babel (Trap Remix).mp3',
+                                               'Trap Anthem.mp3'])
+        self.assertEqual(self._names('tropmetistoo'), [])
+
+    def test_incremental_queries(self) -> None:
+        query = 'Gustavo Santaolalla - Babel'
+        for i in range(1, len(query) + 1):
+            names = self._names(query[:i])
+            self.assertIn('Gustavo Santaolalla - Babel (Trap Remix).mp3', names, query[:i])
+        self.assertEqual(self._names('gustavo x'), [])
+        self.assertEqual(self._names('gustavo'), ['Gustavo Santaolalla - Babel (Trap Remix).mp3'])
+
+    def test_narrowed_like_fresh(self) -> None:
+        index = SearchIndex()
+        index.add_many((('abcd song.mp3', None), ('xabc tune.mp3', None)))
+        # Typed a letter at a time, then searched at once
+        typed = [index.search(query) for query in ('a', 'ab', 'abc')][-1]
+        fresh = SearchIndex()
+        fresh.add_many((('abcd song.mp3', None), ('xabc tune.mp3', None)))
+        self.assertEqual(typed, fresh.search('abc'))
+        self.assertEqual([hit.name for hit in typed], ['abcd song.mp3', 'xabc tune.mp3'])
+        # Narrowed from a query of long words, still the same hits
+        self.assertEqual(index.search('abcd'), fresh.search('abcd'))
+
+    def test_limit(self) -> None:
+        self.assertEqual(len(self.index.search('a', limit=1)), 1)
+        self.assertEqual(self.index.search('tra', limit=1)[0].name, 'Trap Anthem.mp3')
+
+    def test_updates(self) -> None:
+        self.index.add('New Song.mp3', {'artist': 'Someone'})
+        self.assertEqual(self._names('someone'), ['New Song.mp3'])
+
+        self.index.rename('New Song.mp3', 'Renamed.mp3')
+        self.assertEqual(self._names('someone'), ['Renamed.mp3'])
+        self.assertEqual(self._names('new song'), [])
+        self.assertIn('Renamed.mp3', self.index)
+
+        self.index.remove('Renamed.mp3')
+        self.assertEqual(self._names('someone'), [])
+        self.assertNotIn('Renamed.mp3', self.index)
+        self.assertEqual(len(self.index), 4)
@@ -0,0 +1 @@
+from .meter import *  # noqa
@@ -0,0 +1,201 @@
+from __future__ import annotations
+import math
+import numpy as np
+from audio import iter_samples
+from pyglet.media import load
+from pyglet.media.codecs import (
+    StreamingSource,
+    Source,
+)
+from typing import (
+    NamedTuple,
+    Callable,
+    Optional,
+    List,
+    Any,
+)
+
+
+__all__ = (
+    'Loudness',
+    'LoudnessMeter',
+    'measure',
+    'measure_file',
+    'track_gain',
+    'REFERENCE',
+)
+
+
+# Seconds of the gating blocks and of the steps between them (75% overlap)
+BLOCK = 0.4
+HOP = 0.1
+# LUFS, quieter blocks are left out of the integrated loudness
+ABSOLUTE_GATE = -70.0
+# LU below the loudness of the blocks that passed the absolute gate
+RELATIVE_GATE = -10.0
+# The loudness the tracks are brought to, the reference of ReplayGain 2
+REFERENCE = -18.0
+
+
+class Loudness(NamedTuple):
+    # LUFS, `ABSOLUTE_GATE` for silence
+    integrated: float
+    # The highest absolute sample, from 0 to 1
+    peak: float
+
+
+def _biquad(b: Any, a: Any, w: Any) -> Any:
+    z = np.exp(-1j * w)
+    return (b[0] + b[1] * z + b[2] * z ** 2) / (a[0] + a[1] * z + a[2] * z ** 2)
+
+
+def k_weighting(sample_rate: int, size: int) -> Any:
+    """The power response of the K-weighting filter of ITU-R BS.1770 (a high shelf
+    for the head and a high pass) at the bins of a real FFT of `size` samples.
+    The filters are designed for the sample rate like libebur128 does
+
+    :param sample_rate: The sample rate
+    :type sample_rate: int
+    :param size: The samples of the FFT
+    :type size: int
+    :return: The power gain of every bin
+    :rtype: Any
+    """
+    w = 2 * np.pi * np.fft.rfftfreq(size)
+    # High shelf, +4 dB above ~1.7 kHz
+    gain, q, fc = 3.999843853973347, 0.7071752369554196, 1681.974450955533
+    k = math.tan(math.pi * fc / sample_rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    shelf = _biquad((vh + vb * k / q + k * k, 2 * (k * k - vh), vh - vb * k / q + k * k),
+                    (1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k), w)
+    # High pass at ~38 Hz
+    q, fc = 0.5003270373253953, 38.13547087613982
+    k = math.tan(math.pi * fc / sample_rate)
+    high_pass = _biquad((1, -2, 1), (1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k), w)
+    return np.abs(shelf * high_pass) ** 2
+
+
+class LoudnessMeter:
+    """A `LoudnessMeter` measures the integrated loudness (ITU-R BS.1770, EBU R 128)
+    and the peak of audio that's fed to it a chunk at a time.
+
+    The audio is cut into steps of `HOP` seconds and the K-weighted power of every
+    step is taken at once for the whole chunk, through its FFT. Only one number per
+    step and channel is kept, the gating blocks are made of them at the end
+    """
+    def __init__(self, sample_rate: int, channels: int) -> None:
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._hop = max(1, round(sample_rate * HOP))
+        # One-sided spectrum, the bins but DC and Nyquist stand for two
+        weights = k_weighting(sample_rate, self._hop)
+        weights[1:(self._hop + 1) // 2] *= 2
+        self._weights = weights / self._hop ** 2
+        self._rest = np.zeros((0, channels), np.float32)
+        self._powers: List[Any] = []
+        self._peak = 0.0
+
+    def feed(self, samples: Any) -> None:
+        """
+        :param samples: Floats of (frames, channels), from -1 to 1
+        :type samples: Any
+        """
+        if not len(samples):
+            return
+        self._peak = max(self._peak, float(np.abs(samples).max()))
+        samples = np.concatenate((self._rest, samples))
+        steps = len(samples) // self._hop
+        self._rest = samples[steps * self._hop:]
+        if not steps:
+            return
+        hops = samples[:steps * self._hop].reshape(steps, self._hop, self.channels)
+        spectrum = np.fft.rfft(hops, axis=1)
+        # Mean square of every filtered step, the channels are summed (all weigh 1)
+        power = (np.abs(spectrum) ** 2 * self._weights[:, None]).sum(axis=(1, 2))
+        self._powers.append(power)
+
+    @property
+    def result(self) -> Loudness:
+        """
+        :return: The loudness of everything fed so far
+        :rtype: Loudness
+        """
+        if not self._powers:
+            return Loudness(ABSOLUTE_GATE, self._peak)
+        powers = np.concatenate(self._powers)
+        per_block = round(BLOCK / HOP)
+        if len(powers) >= per_block:
+            blocks = np.convolve(powers, np.full(per_block, 1 / per_block), 'valid')
+        else:
+            blocks = np.array([powers.mean()])
+        with np.errstate(divide='ignore'):
+            levels = -0.691 + 10 * np.log10(blocks)
+        gated = blocks[levels > ABSOLUTE_GATE]
+        if not len(gated):
+            return Loudness(ABSOLUTE_GATE, self._peak)
+        threshold = -0.691 + 10 * math.log10(gated.mean()) + RELATIVE_GATE
+        gated = blocks[(levels > ABSOLUTE_GATE) & (levels > threshold)]
+        return Loudness(-0.691 + 10 * math.log10(gated.mean()), self._peak)
+
+
+def measure(source: Source, report: Optional[Callable[[float], None]] = None) -> Loudness:
+    """Decode a source to its end and measure it
+
+    :param source: A streaming source, it's read to its end
+    :type source: Source
+    :param report: Called with how far the decoding is, from 0 to 1, defaults to None
+    :type report: Optional[Callable[[float], None]], optional
+    :return: Its loudness, silent if it has no audio
+    :rtype: Loudness
+    """
+    fmt = source.audio_format
+    if fmt is None:
+        return Loudness(ABSOLUTE_GATE, 0.0)
+    meter = LoudnessMeter(fmt.sample_rate, fmt.channels)
+    frames = (source.duration or 0) * fmt.sample_rate
+    position = 0
+    for samples in iter_samples(source):
+        meter.feed(samples)
+        position += len(samples)
+        if report is not None and frames:
+            report(min(position / frames, 1.0))
+    return meter.result
+
+
+def measure_file(path: str, loader: Callable[..., Source] = load) -> Loudness:
+    """
+    :param path: The path of a track
+    :type path: str
+    :param loader: What opens the track, it's given `streaming=True`,
+    defaults to `pyglet.media.load`
+    :type loader: Callable[..., Source], optional
+    :return: The loudness of the track
+    :rtype: Loudness
+    """
+    source = loader(path, streaming=True)
+    try:
+        return measure(source)
+    finally:
+        if isinstance(source, StreamingSource):
+            source.delete()
+
+
+def track_gain(loudness: Loudness, reference: float = REFERENCE) -> float:
+    """The gain that brings a track to the reference loudness. A loud track is turned
+    down, a quiet one is turned up only as far as its peak doesn't clip
+
+    :param loudness: The loudness of the track
+    :type loudness: Loudness
+    :param reference: The loudness to bring it to in LUFS, defaults to `REFERENCE`
+    :type reference: float, optional
+    :return: The linear gain
+    :rtype: float
+    """
+    if loudness.integrated <= ABSOLUTE_GATE:
+        # Silence, nothing to bring up
+        return 1.0
+    gain: float = 10 ** ((reference - loudness.integrated) / 20)
+    if loudness.peak > 0:
+        gain = min(gain, 1 / loudness.peak)
+    return gain
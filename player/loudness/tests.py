@@ -0,0 +1,81 @@
+import os
+import wave
+import shutil
+import unittest
+import numpy as np
+from pathlib import Path
+from typing import Any
+from .meter import (
+    ABSOLUTE_GATE,
+    LoudnessMeter,
+    Loudness,
+    measure_file,
+    track_gain,
+)
+
+
+BASE_DIR = Path(__file__).parent
+RATE = 48000
+
+
+def sine(frequency: float, seconds: float, amplitude: float = 1.0, rate: int = RATE) -> Any:
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+class TestLoudnessMeter(unittest.TestCase):
+    def measure(self, samples: Any, rate: int = RATE, chunk: int = 10000) -> Loudness:
+        meter = LoudnessMeter(rate, samples.shape[1])
+        for i in range(0, len(samples), chunk):
+            meter.feed(samples[i:i + chunk])
+        return meter.result
+
+    def test_reference(self) -> None:
+        # BS.1770: a 1 kHz sine at full scale in one channel is -3.01 LUFS
+        x = sine(1000, 5)
+        for rate in (44100, 48000):
+            samples = np.stack((sine(1000, 5, rate=rate), np.zeros(5 * rate, np.float32)), 1)
+            loudness = self.measure(samples, rate)
+            self.assertAlmostEqual(loudness.integrated, -3.01, delta=0.1)
+            self.assertAlmostEqual(loudness.peak, 1.0, places=3)
+        # Both channels are twice the power, half the amplitude is a quarter
+        self.assertAlmostEqual(self.measure(np.stack((x, x), 1)).integrated, 0.0, delta=0.1)
+        self.assertAlmostEqual(self.measure(x[:, None] / 2).integrated, -9.03, delta=0.1)
+
+    def test_chunks(self) -> None:
+        samples = np.stack((sine(440, 3), sine(3000, 3, 0.3)), 1)
+        results = {self.measure(samples, chunk=chunk) for chunk in (1, 4799, 4800, 10 ** 6)}
+        self.assertAlmostEqual(max(results)[0], min(results)[0], places=6)
+
+    def test_gating(self) -> None:
+        # Silence and a much quieter part don't drag the loudness of the song down
+        loud = sine(1000, 5)[:, None]
+        quiet = sine(1000, 5, 0.01)[:, None]
+        silence = np.zeros((5 * RATE, 1), np.float32)
+        expected = self.measure(loud).integrated
+        mixed = self.measure(np.concatenate((loud, quiet, silence)))
+        # Only the blocks across the change to the quiet part count a little
+        self.assertAlmostEqual(mixed.integrated, expected, delta=0.25)
+        self.assertEqual(self.measure(silence), Loudness(ABSOLUTE_GATE, 0.0))
+
+    def test_track_gain(self) -> None:
+        self.assertAlmostEqual(track_gain(Loudness(-8.0, 1.0)), 10 ** (-10 / 20))
+        self.assertAlmostEqual(track_gain(Loudness(-8.0, 1.0), -14), 10 ** (-6 / 20))
+        # Turned up only as far as the peak allows
+        self.assertAlmostEqual(track_gain(Loudness(-28.0, 0.5)), 2.0)
+        self.assertAlmostEqual(track_gain(Loudness(-24.0, 0.1)), 10 ** (6 / 20))
+        self.assertEqual(track_gain(Loudness(ABSOLUTE_GATE, 0.0)), 1.0)
+
+    def test_measure_file(self) -> None:
+        directory = str(Path(BASE_DIR, 'testloudness'))
+        os.makedirs(directory, exist_ok=True)
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'song.wav')
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(RATE)
+            f.writeframes((sine(1000, 3, 0.5) * 32767).astype('<i2').tobytes())
+        loudness = measure_file(path)
+        self.assertAlmostEqual(loudness.integrated, -9.03, delta=0.1)
+        self.assertAlmostEqual(loudness.peak, 0.5, places=3)
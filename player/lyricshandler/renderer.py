@@ -1,7 +1,8 @@
 import os
 import srt
 import datetime
-from typing import Union, Optional
+from bisect import bisect_right
+from typing import Union, Optional, List
 from .constants import EXTENSION
 
 
@@ -10,13 +11,28 @@ __all__ = (
 )
 
 
+MS = datetime.timedelta(milliseconds=1)
+
+
 class Renderer:
     EXTENSION = EXTENSION
 
     def __init__(self, lyrics_file: str) -> None:
         self._lyrics_file = lyrics_file
-        self._lyrics = tuple(srt.parse(self._set_lyrics()))
-        self._index = 0
+        self._lyrics = tuple(sorted(srt.parse(self._set_lyrics()), key=lambda i: i.start))
+        # Parallel arrays (in milliseconds) ordered by start time.
+        # `_reach[i]` is the latest end of any cue up to `i` so a lookup
+        # knows when no earlier (overlapping) cue can still be active
+        self._starts: List[int] = [lyric.start // MS for lyric in self._lyrics]
+        self._ends: List[int] = [lyric.end // MS for lyric in self._lyrics]
+        self._contents: List[str] = [str(lyric.content) for lyric in self._lyrics]
+        self._reach: List[int] = []
+        for end in self._ends:
+            self._reach.append(max(end, self._reach[-1]) if self._reach else end)
+        self._index = -1
+
+    def __len__(self) -> int:
+        return len(self._lyrics)
 
     def _set_lyrics(self) -> str:
         if os.path.exists(self._lyrics_file):
@@ -25,13 +41,56 @@ class Renderer:
         else:
             return self._lyrics_file
 
-    def get_line(self, current_timestamp: datetime.timedelta,
-                 delay: Optional[float]) -> Union[str, None]:
-        # Not the most efficient way but it'll do for now
-        delay_to_td = datetime.timedelta(seconds=delay or 0)
-        lyrics_sync = current_timestamp - delay_to_td
+    def _seek(self, ms: int) -> int:
+        """Find the index of the last cue that starts at or before `ms`.
+        Moving forward by up to one cue (normal playback) is resolved from the
+        cursor, anything else (a seek) falls back to a binary search
+        """
+        i = self._index
+        starts = self._starts
+        if 0 <= i < len(starts) and starts[i] <= ms:
+            if i + 1 == len(starts) or ms < starts[i + 1]:
+                return i
+            if i + 2 == len(starts) or ms < starts[i + 2]:
+                return i + 1
+        return bisect_right(starts, ms) - 1
+
+    def line_at(self, ms: int) -> Union[str, None]:
+        """Get the line that is active at `ms` milliseconds. If more than
+        one cue is active (overlapping cues) the one that started last wins
 
-        for lyric in self._lyrics:
-            if lyric.start <= lyrics_sync < lyric.end:
-                return str(lyric.content)
+        :param ms: The timestamp in milliseconds (delay already applied)
+        :type ms: int
+        :return: The line or `None` if no cue is active
+        :rtype: Union[str, None]
+        """
+        i = self._index = self._seek(ms)
+        while i >= 0 and self._reach[i] > ms:
+            if self._ends[i] > ms:
+                return self._contents[i]
+            i -= 1
         return None
+
+    def next_boundary(self, ms: int) -> Optional[int]:
+        """Find when the displayed line changes next
+
+        :param ms: The timestamp in milliseconds (delay already applied)
+        :type ms: int
+        :return: The first cue start or end after `ms` or `None` if there is none
+        :rtype: Optional[int]
+        """
+        i = self._seek(ms)
+        boundary = self._starts[i + 1] if i + 1 < len(self._starts) else None
+        while i >= 0 and self._reach[i] > ms:
+            end = self._ends[i]
+            if end > ms and (boundary is None or end < boundary):
+                boundary = end
+            i -= 1
+        return boundary
+
+    def get_line_at(self, seconds: float, delay: Optional[float]) -> Union[str, None]:
+        return self.line_at(round((seconds - (delay or 0)) * 1000))
+
+    def get_line(self, current_timestamp: datetime.timedelta,
+                 delay: Optional[float]) -> Union[str, None]:
+        return self.get_line_at(current_timestamp.total_seconds(), delay)
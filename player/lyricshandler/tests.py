@@ -157,3 +157,67 @@ class TestSearch(unittest.TestCase):
         search = search_for('youtube', song_name)
         self.assertIsInstance(search, YoutubeSearch)
         self.assertIsInstance(search, ISearch)
+
+
+class TestRendererIndex(unittest.TestCase):
+    def test_overlapping(self) -> None:
+        overlapping = """
+0
+00:00:01,000 --> 00:00:10,000
+Long line
+
+1
+00:00:02,000 --> 00:00:03,000
+Short line
+
+2
+00:00:05,000 --> 00:00:06,000
+Another short line
+"""
+        renderer = Renderer(overlapping)
+        self.assertIsNone(renderer.line_at(500))
+        self.assertEqual(renderer.line_at(1500), 'Long line')
+        self.assertEqual(renderer.line_at(2500), 'Short line')
+        self.assertEqual(renderer.line_at(4000), 'Long line')
+        self.assertEqual(renderer.line_at(5000), 'Another short line')
+        self.assertEqual(renderer.line_at(7000), 'Long line')
+        self.assertIsNone(renderer.line_at(10000))
+
+    def test_cursor(self) -> None:
+        renderer = Renderer(lyrics)
+        expected = [
+            (renderer.line_at(ms), ms) for ms in range(0, 40000, 50)
+        ]
+        # Seek backwards and forward again, results must not depend on the cursor
+        for line, ms in reversed(expected):
+            self.assertEqual(renderer.line_at(ms), line)
+        for line, ms in expected[::7]:
+            self.assertEqual(renderer.line_at(ms), line)
+
+    def test_unordered_cues(self) -> None:
+        unordered = """
+1
+00:00:05,000 --> 00:00:06,000
+Second
+
+0
+00:00:01,000 --> 00:00:02,000
+First
+"""
+        renderer = Renderer(unordered)
+        self.assertEqual(renderer.line_at(1000), 'First')
+        self.assertEqual(renderer.line_at(5500), 'Second')
+
+    def test_get_line_at(self) -> None:
+        renderer = Renderer(lyrics)
+        self.assertEqual(renderer.get_line_at(14.5, None), 'You thought you had me')
+        self.assertEqual(renderer.get_line_at(17.5, 3), 'You thought you had me')
+        self.assertIsNone(renderer.get_line_at(0.5, 1))
+
+    def test_next_boundary(self) -> None:
+        renderer = Renderer(lyrics)
+        self.assertEqual(renderer.next_boundary(0), 1100)
+        self.assertEqual(renderer.next_boundary(1100), 6000)
+        self.assertEqual(renderer.next_boundary(6000), 6100)
+        self.assertEqual(renderer.next_boundary(30500), 34300)
+        self.assertIsNone(renderer.next_boundary(34300))
@@ -0,0 +1,4 @@
+from .frames import *  # noqa
+from .cut import *  # noqa
+from .seekindex import *  # noqa
+from .seekcache import *  # noqa
@@ -0,0 +1,248 @@
+from __future__ import annotations
+import os
+import collections
+from .frames import (
+    MP3Error,
+    FrameHeader,
+    Frame,
+    parse_header,
+    audio_range,
+    iter_frames,
+    info_tag,
+    CHUNK_SIZE,
+)
+from typing import (
+    NamedTuple,
+    Callable,
+    Optional,
+    Iterator,
+    BinaryIO,
+    Deque,
+    Tuple,
+    List,
+    Set,
+)
+
+
+__all__ = (
+    'CutResult',
+    'cut',
+)
+
+
+# Frames kept behind the start, enough to hold any bit reservoir
+_RESERVOIR_FRAMES = 8
+# Xing tag fields: frames, bytes and the table of contents
+_XING_FLAGS = 0x1 | 0x2 | 0x4
+# Frames walked between two reports of the progress
+_REPORT_FRAMES = 1024
+
+
+class CutResult(NamedTuple):
+    # Where the cut starts and stops in the source, in seconds, on frame boundaries
+    start: float
+    stop: float
+    # Audio frames copied
+    frames: int
+    # Bytes of the output file
+    size: int
+
+
+class _Span:
+    """The frames between the start and the stop of a cut, found by their headers"""
+    def __init__(self) -> None:
+        self.first: Optional[Frame] = None
+        self.end = 0
+        self.start_time = 0.0
+        self.stop_time = 0.0
+        self.frames = 0
+        self.bitrates: Set[int] = set()
+        # (seconds from the start of the cut, bytes from the start of the cut)
+        self.checkpoints: List[Tuple[float, int]] = []
+
+
+def cut(src: str, dst: str, start: float, stop: float,
+        progress: Optional[Callable[[float], None]] = None) -> CutResult:
+    """Cut a part of an MP3 file into a new file, without decoding it.
+
+    The frames between `start` and `stop` are copied as they are, the cut is accurate
+    to a frame (about 26 ms). The bit reservoir the first frame draws on is restored
+    in a silent frame in front of it, so it's decoded as it was in the source. A VBR
+    file gets a new Xing tag. The tags of the source are kept. The file is read and
+    written in chunks, memory doesn't grow with its length
+
+    :param src: The path of the MP3 file
+    :type src: str
+    :param dst: The path of the new file
+    :type dst: str
+    :param start: Seconds from the start of the source
+    :type start: float
+    :param stop: Seconds from the start of the source
+    :type stop: float
+    :param progress: Called with how far the cut is, from 0 to 1. What it raises
+    stops the cut and the new file is removed, defaults to None
+    :type progress: Optional[Callable[[float], None]], optional
+    :raises MP3Error: If `src` is not MPEG audio or nothing is between `start` and `stop`
+    :return: What was cut
+    :rtype: CutResult
+    """
+    report = progress or (lambda done: None)
+    with open(src, 'rb') as f:
+        audio_start, audio_end = audio_range(f)
+        frames = iter_frames(f, audio_start, audio_end)
+        first = next(frames, None)
+        if first is None:
+            raise MP3Error(f"No MPEG audio in {src}")
+        tag = info_tag(f, first)
+        if tag is None:
+            frames = _chain(first, frames)
+        # Walking the frames is the first half of the work, copying them the second one
+        span, behind = _find(frames, start, stop, lambda offset: report(offset / audio_end / 2))
+        if span.first is None:
+            raise MP3Error(f"No audio between {start:.3f}s and {stop:.3f}s in {src}")
+        reservoir = _reservoir(f, span.first, behind)
+        try:
+            with open(dst, 'wb') as out:
+                _copy(f, out, 0, audio_start)
+                if tag is not None or len(span.bitrates) > 1:
+                    out.write(_xing_frame(f, span, reservoir))
+                if reservoir is not None:
+                    out.write(reservoir)
+                _copy(f, out, span.first.offset, span.end,
+                      lambda done: report(0.5 + done / 2))
+                _copy(f, out, audio_end, f.seek(0, 2))
+                size = out.tell()
+        except BaseException:
+            os.remove(dst)
+            raise
+    report(1.0)
+    return CutResult(span.start_time, span.stop_time, span.frames, size)
+
+
+def _chain(first: Frame, frames: Iterator[Frame]) -> Iterator[Frame]:
+    yield first
+    yield from frames
+
+
+def _find(frames: Iterator[Frame], start: float, stop: float,
+          report: Callable[[int], None]) -> Tuple[_Span, Deque[Frame]]:
+    span = _Span()
+    # The frames right before the first one of the cut
+    behind: Deque[Frame] = collections.deque(maxlen=_RESERVOIR_FRAMES)
+    samples = 0
+    for count, frame in enumerate(frames):
+        if not count % _REPORT_FRAMES:
+            report(frame.offset)
+        header = frame.header
+        # A frame is in the cut if most of it is
+        middle = (samples + header.samples / 2) / header.sample_rate
+        samples += header.samples
+        time = samples / header.sample_rate
+        if middle < start:
+            behind.append(frame)
+            continue
+        if middle >= stop:
+            break
+        if span.first is None:
+            span.first = frame
+            span.start_time = time - header.duration
+        if not span.checkpoints or time - span.checkpoints[-1][0] - span.start_time >= 1:
+            span.checkpoints.append((time - header.duration - span.start_time,
+                                     frame.offset - span.first.offset))
+        span.end = frame.offset + header.size
+        span.stop_time = time
+        span.frames += 1
+        span.bitrates.add(header.bitrate)
+    return span, behind
+
+
+def _copy(f: BinaryIO, out: BinaryIO, start: int, end: int,
+          report: Optional[Callable[[float], None]] = None) -> None:
+    f.seek(start)
+    position = start
+    while position < end:
+        data = f.read(min(CHUNK_SIZE, end - position))
+        if not data:
+            break
+        out.write(data)
+        position += len(data)
+        if report is not None:
+            report((position - start) / (end - start))
+
+
+def _main_data_start(header: FrameHeader) -> int:
+    return 4 + 2 * header.protected + header.side_info_size
+
+
+def _reservoir(f: BinaryIO, first: Frame, behind: Deque[Frame]) -> Optional[bytes]:
+    """A silent frame holding the bytes of the previous frames the first frame
+    of the cut draws on. `None` if it draws on none
+    """
+    header = first.header
+    if header.layer != 3:
+        return None
+    f.seek(first.offset + 4 + 2 * header.protected)
+    side = f.read(2)
+    # main_data_begin, 9 bits in MPEG-1 and 8 bits in MPEG-2
+    begin = (side[0] << 1 | side[1] >> 7) if header.version == 1 else side[0]
+    if not begin:
+        return None
+    data = b''
+    for frame in reversed(behind):
+        if len(data) >= begin:
+            break
+        main = _main_data_start(frame.header)
+        f.seek(frame.offset + main)
+        data = f.read(frame.header.size - main) + data
+    if len(data) < begin:
+        # The source itself is broken there, nothing to restore
+        return None
+    silent = _empty_frame(f, first, _main_data_start(header) + begin)
+    if silent is None:
+        return None
+    return bytes(silent[:len(silent) - begin] + data[-begin:])
+
+
+def _empty_frame(f: BinaryIO, like: Frame, size: int) -> Optional[bytearray]:
+    """A silent frame of the stream of `like` without CRC and padding,
+    at the lowest bitrate that makes it at least `size` bytes
+    """
+    f.seek(like.offset)
+    value = int.from_bytes(f.read(4), 'big')
+    # Protection bit set (no CRC), padding cleared
+    value = (value | 1 << 16) & ~(1 << 9)
+    for index in range(1, 15):
+        candidate = value & ~(15 << 12) | index << 12
+        header = parse_header(candidate.to_bytes(4, 'big'))
+        if header is not None and header.size >= size:
+            frame = bytearray(header.size)
+            frame[:4] = candidate.to_bytes(4, 'big')
+            return frame
+    return None
+
+
+def _xing_frame(f: BinaryIO, span: _Span, reservoir: Optional[bytes]) -> bytes:
+    """The frame of the Xing tag of the cut, `Info` if it's not VBR"""
+    assert span.first is not None
+    xing = 4 + span.first.header.side_info_size
+    frame = _empty_frame(f, span.first, xing + 16 + 100)
+    if frame is None:
+        raise MP3Error('No bitrate is high enough for a Xing tag')
+    # Everything after the tag frame is counted, the reservoir frame too
+    lead = len(frame) + len(reservoir or b'')
+    size = lead + span.end - span.first.offset
+    duration = span.stop_time - span.start_time
+    toc = bytearray(100)
+    checkpoint = 0
+    for i in range(100):
+        # The offset of the last checkpoint before i% of the duration
+        while checkpoint + 1 < len(span.checkpoints) and \
+                span.checkpoints[checkpoint + 1][0] <= duration * i / 100:
+            checkpoint += 1
+        toc[i] = min(255, (lead + span.checkpoints[checkpoint][1]) * 256 // size)
+    frames = span.frames + (reservoir is not None)
+    frame[xing:xing + 4] = b'Xing' if len(span.bitrates) > 1 else b'Info'
+    frame[xing + 4:xing + 16] = b''.join(
+        n.to_bytes(4, 'big') for n in (_XING_FLAGS, frames, size))
+    frame[xing + 16:xing + 116] = toc
+    return bytes(frame)
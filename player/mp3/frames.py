@@ -0,0 +1,249 @@
+from __future__ import annotations
+import functools
+from typing import (
+    NamedTuple,
+    Optional,
+    Iterator,
+    BinaryIO,
+    Tuple,
+    Dict,
+)
+
+
+__all__ = (
+    'MP3Error',
+    'FrameHeader',
+    'Frame',
+    'parse_header',
+    'audio_range',
+    'iter_frames',
+    'info_tag',
+)
+
+
+# Bytes read from the file at once while walking the frames
+CHUNK_SIZE = 2 ** 16
+# More than the biggest frame there can be
+MAX_FRAME_SIZE = 4096
+
+# Bitrates in kbps by (MPEG-1, layer) and (MPEG-2/2.5, layer), index 0 is free format
+_BITRATES: Dict[Tuple[bool, int], Tuple[int, ...]] = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES: Dict[float, Tuple[int, int, int]] = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+# The 2 bits of the version and of the layer
+_VERSIONS = (2.5, None, 2, 1)
+_LAYERS = (None, 3, 2, 1)
+
+
+class MP3Error(Exception):
+    pass
+
+
+class FrameHeader(NamedTuple):
+    # 1, 2 or 2.5
+    version: float
+    # 1, 2 or 3
+    layer: int
+    # kbps
+    bitrate: int
+    sample_rate: int
+    padding: bool
+    channels: int
+    # A CRC follows the header
+    protected: bool
+
+    @property
+    def samples(self) -> int:
+        """
+        :return: The samples per channel in the frame
+        :rtype: int
+        """
+        if self.layer == 1:
+            return 384
+        if self.layer == 3 and self.version != 1:
+            return 576
+        return 1152
+
+    @property
+    def size(self) -> int:
+        """
+        :return: The bytes of the frame, its header included
+        :rtype: int
+        """
+        if self.layer == 1:
+            return (12 * self.bitrate * 1000 // self.sample_rate + self.padding) * 4
+        return self.samples // 8 * self.bitrate * 1000 // self.sample_rate + self.padding
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+    @property
+    def side_info_size(self) -> int:
+        """
+        :return: The bytes of the layer III side info, after the header and the CRC
+        :rtype: int
+        """
+        if self.version == 1:
+            return 17 if self.channels == 1 else 32
+        return 9 if self.channels == 1 else 17
+
+    def same_stream(self, other: FrameHeader) -> bool:
+        """
+        :return: `True` if both frames can be of the same stream
+        :rtype: bool
+        """
+        return (self.version, self.layer, self.sample_rate) == \
+            (other.version, other.layer, other.sample_rate)
+
+
+class Frame(NamedTuple):
+    # Where the frame starts in the file
+    offset: int
+    header: FrameHeader
+
+
+@functools.lru_cache(maxsize=1024)
+def _decode(value: int) -> Optional[FrameHeader]:
+    # A stream uses a handful of distinct headers, they're decoded once
+    if value >> 21 != 0x7FF:
+        return None
+    version = _VERSIONS[value >> 19 & 3]
+    layer = _LAYERS[value >> 17 & 3]
+    bitrate_index = value >> 12 & 15
+    rate_index = value >> 10 & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    return FrameHeader(
+        version=version,
+        layer=layer,
+        bitrate=_BITRATES[version == 1, layer][bitrate_index],
+        sample_rate=_SAMPLE_RATES[version][rate_index],
+        padding=bool(value >> 9 & 1),
+        channels=1 if value >> 6 & 3 == 3 else 2,
+        protected=not value >> 16 & 1,
+    )
+
+
+def parse_header(data: bytes, offset: int = 0) -> Optional[FrameHeader]:
+    """
+    :param data: Bytes of the file
+    :type data: bytes
+    :param offset: Where the header would be in `data`, defaults to 0
+    :type offset: int, optional
+    :return: The header, `None` if there's no valid header there
+    (free format frames are not supported)
+    :rtype: Optional[FrameHeader]
+    """
+    if offset + 4 > len(data):
+        return None
+    return _decode(int.from_bytes(data[offset:offset + 4], 'big'))
+
+
+def audio_range(f: BinaryIO) -> Tuple[int, int]:
+    """Find where the audio is in a file, between the ID3v2 tag at its start
+    and the ID3v1 tag at its end
+
+    :param f: The file, opened in binary mode
+    :type f: BinaryIO
+    :return: The offsets of the start and of the end of the audio
+    :rtype: Tuple[int, int]
+    """
+    end = f.seek(0, 2)
+    f.seek(0)
+    start = 0
+    head = f.read(10)
+    if len(head) == 10 and head[:3] == b'ID3':
+        # The size is 4 bytes of 7 bits, an extra 10 bytes if there's a footer
+        size = 0
+        for byte in head[6:10]:
+            size = size << 7 | byte & 0x7F
+        start = 10 + size + (10 if head[5] & 0x10 else 0)
+    if end - start >= 128:
+        f.seek(end - 128)
+        if f.read(3) == b'TAG':
+            end -= 128
+    return min(start, end), end
+
+
+def iter_frames(f: BinaryIO, start: int, end: int) -> Iterator[Frame]:
+    """Walk the frames of a file by their headers, without reading the audio in them.
+    Bytes that aren't frames (junk, a broken frame) are skipped up to the next frame
+    of the same stream. The file is read in chunks, the memory used doesn't depend
+    on its size
+
+    :param f: The file, opened in binary mode
+    :type f: BinaryIO
+    :param start: Where to start, usually the start of the audio (see `audio_range`)
+    :type start: int
+    :param end: Where the audio ends
+    :type end: int
+    :return: The frames, the last one is cut off if it doesn't end before `end`
+    :rtype: Iterator[Frame]
+    """
+    first: Optional[FrameHeader] = None
+    buffer = b''
+    buffer_start = position = start
+    while position + 4 <= end:
+        index = position - buffer_start
+        if index + MAX_FRAME_SIZE > len(buffer) and buffer_start + len(buffer) < end:
+            # Keep the whole frame and the header of the next one in the buffer
+            f.seek(position)
+            buffer = f.read(min(CHUNK_SIZE, end - position))
+            buffer_start, index = position, 0
+        header = parse_header(buffer, index)
+        if header is not None and not _in_stream(header, first, buffer, index):
+            header = None
+        if header is None:
+            sync = buffer.find(b'\xff', index + 1)
+            position = buffer_start + sync if sync >= 0 else buffer_start + len(buffer)
+            continue
+        if position + header.size > end:
+            return
+        first = first or header
+        yield Frame(position, header)
+        position += header.size
+
+
+def _in_stream(header: FrameHeader, first: Optional[FrameHeader],
+               buffer: bytes, index: int) -> bool:
+    if first is not None:
+        return header.same_stream(first)
+    # Junk can look like a header, the first frame must be followed by another one
+    following = index + header.size
+    if following + 4 > len(buffer):
+        return True
+    next_header = parse_header(buffer, following)
+    return next_header is not None and header.same_stream(next_header)
+
+
+def info_tag(f: BinaryIO, frame: Frame) -> Optional[bytes]:
+    """The first frame of a VBR file is usually a silent frame with the
+    `Xing` (or `Info`) or the `VBRI` tag, an index of the file
+
+    :param f: The file, opened in binary mode
+    :type f: BinaryIO
+    :param frame: The first frame of the audio
+    :type frame: Frame
+    :return: The whole frame if it carries a tag, `None` if it's an audio frame
+    :rtype: Optional[bytes]
+    """
+    header = frame.header
+    f.seek(frame.offset)
+    data = f.read(header.size)
+    if header.layer != 3:
+        return None
+    xing = 4 + 2 * header.protected + header.side_info_size
+    if data[xing:xing + 4] in (b'Xing', b'Info') or data[36:40] == b'VBRI':
+        return data
+    return None
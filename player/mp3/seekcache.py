@@ -0,0 +1,101 @@
+from __future__ import annotations
+import os
+import json
+from .seekindex import SeekIndex
+from typing import (
+    Optional,
+    Tuple,
+    Dict,
+    Any,
+)
+
+
+__all__ = (
+    'SeekIndexCache',
+)
+
+
+class SeekIndexCache:
+    """A `SeekIndexCache` keeps the seek index of the MP3 files that were played,
+    they're built once per file. An entry is valid as long as the `mtime` and `size`
+    of its file are unchanged. Entries are stored in memory and persisted with
+    `SeekIndexCache.save`
+    """
+    def __init__(self, file: str) -> None:
+        self._file = file
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, __o: Any) -> bool:
+        return __o in self._entries
+
+    @property
+    def file(self) -> str:
+        return self._file
+
+    @staticmethod
+    def _stamp(path: str) -> Tuple[float, int]:
+        stat = os.stat(path)
+        return stat.st_mtime, stat.st_size
+
+    def load(self) -> None:
+        """Load the persisted entries. A missing or broken cache file
+        is treated as an empty cache
+        """
+        try:
+            with open(self.file, mode='r') as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._entries = {}
+        self._dirty = False
+
+    def save(self) -> None:
+        """Persist the entries, only if something changed since the last save
+        """
+        if self._dirty:
+            with open(self.file, mode='w') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            self._dirty = False
+
+    def get(self, path: str) -> Optional[SeekIndex]:
+        """
+        :param path: Full path of the MP3 file
+        :type path: str
+        :return: The seek index of the file, `None` if it was never built,
+        the file changed since or it's stored in an older form
+        :rtype: Optional[SeekIndex]
+        """
+        entry = self._entries.get(path)
+        if entry is None or 'seek' not in entry:
+            return None
+        try:
+            if (entry['mtime'], entry['size']) != self._stamp(path):
+                return None
+            return SeekIndex.load(entry['seek'])
+        except (OSError, ValueError):
+            return None
+
+    def put(self, path: str, index: SeekIndex) -> None:
+        """Keep the seek index of a file, for the file as it is now
+
+        :param path: Full path of the MP3 file
+        :type path: str
+        :param index: Its seek index
+        :type index: SeekIndex
+        """
+        mtime, size = self._stamp(path)
+        self._entries[path] = {'mtime': mtime, 'size': size, 'seek': index.dump()}
+        self._dirty = True
+
+    def discard(self, path: str) -> None:
+        """Remove the entry of `path` if it exists
+
+        :param path: Full path of the MP3 file
+        :type path: str
+        """
+        if self._entries.pop(path, None) is not None:
+            self._dirty = True
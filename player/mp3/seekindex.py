@@ -0,0 +1,370 @@
+from __future__ import annotations
+import io
+import zlib
+import array
+import base64
+import bisect
+import itertools
+from pyglet.media import load
+from pyglet.media.codecs import (
+    StreamingSource,
+    Source,
+)
+from .frames import (
+    MP3Error,
+    FrameHeader,
+    Frame,
+    audio_range,
+    iter_frames,
+    info_tag,
+)
+from typing import (
+    NamedTuple,
+    Callable,
+    Optional,
+    BinaryIO,
+    Sequence,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+
+__all__ = (
+    'SeekIndex',
+    'FileRegion',
+    'build_index',
+    'read_toc',
+    'open_at',
+    'INDEX_STEP',
+)
+
+
+# Frames between two points of the frame map, about a second
+INDEX_STEP = 32
+# Frames decoded and dropped in front of the one that is sought,
+# enough to hold any bit reservoir
+PREROLL_FRAMES = 8
+# Frames walked between two reports of the progress
+_REPORT_FRAMES = 4096
+# The decoder delay of layer III, on top of the encoder delay of the LAME tag
+_DECODER_DELAY = 529
+# The encoders that write the LAME tag
+_ENCODERS = (b'LAME', b'Lavf', b'Lavc')
+# Bumped when the stored form changes, older indexes are built again
+_VERSION = 1
+
+
+class SeekIndex(NamedTuple):
+    """Where the frames of an MP3 stream are in its file. A frame holds the same
+    number of samples in the whole stream, so the frame of a time is known right
+    away and the index only has to tell where it is.
+
+    The points are (frame number, offset) pairs. An exact index is built from the
+    frames themselves, a point every `INDEX_STEP` frames. One that is read from the
+    `Xing` or the `VBRI` tag only has their 100 or so points, which are approximate
+    """
+    sample_rate: int
+    # Samples per channel in a frame
+    frame_samples: int
+    # Samples the decoder drops at the start of the stream
+    delay: int
+    # Audio frames, the frame of the tag is not one
+    frames: int
+    # Where the audio ends in the file
+    end: int
+    numbers: Tuple[int, ...]
+    offsets: Tuple[int, ...]
+    exact: bool
+
+    @property
+    def duration(self) -> float:
+        return max(0, self.frames * self.frame_samples - self.delay) / self.sample_rate
+
+    def frame_at(self, seconds: float) -> int:
+        """
+        :param seconds: A time of the stream, as it's played
+        :type seconds: float
+        :return: The number of the frame that plays at that time
+        :rtype: int
+        """
+        sample = max(0, round(seconds * self.sample_rate)) + self.delay
+        return max(0, min(sample // self.frame_samples, self.frames - 1))
+
+    def locate(self, f: BinaryIO, seconds: float,
+               preroll: int = PREROLL_FRAMES) -> Tuple[int, float]:
+        """Find where to start decoding to get to a time. The nearest point of the index
+        before it is looked up and the few frames from there are walked, the time it
+        takes doesn't depend on the time or on the length of the file
+
+        :param f: The file, opened in binary mode
+        :type f: BinaryIO
+        :param seconds: The time to go to
+        :type seconds: float
+        :param preroll: Frames to start before the one of the time, defaults to `PREROLL_FRAMES`
+        :type preroll: int, optional
+        :raises MP3Error: If the index is empty or the file doesn't match it
+        :return: The offset of the frame to start from and the seconds
+        of the decoded audio to drop before the time
+        :rtype: Tuple[int, float]
+        """
+        if not self.numbers:
+            raise MP3Error('The seek index is empty')
+        target = max(0, self.frame_at(seconds) - preroll)
+        point = max(0, bisect.bisect_right(self.numbers, target) - 1)
+        number, offset = self.numbers[point], self.offsets[point]
+        frames = iter_frames(f, offset, self.end)
+        frame = next(itertools.islice(frames, target - number, None), None)
+        if frame is None:
+            raise MP3Error(f"No frame {target} in the file")
+        sample = max(0, round(seconds * self.sample_rate)) + self.delay
+        lead = (sample - target * self.frame_samples) / self.sample_rate
+        return frame.offset, max(0.0, lead)
+
+    def dump(self) -> Dict[str, Any]:
+        """
+        :return: The index as JSON, the points are packed
+        :rtype: Dict[str, Any]
+        """
+        return {
+            'version': _VERSION,
+            'sample_rate': self.sample_rate,
+            'frame_samples': self.frame_samples,
+            'delay': self.delay,
+            'frames': self.frames,
+            'end': self.end,
+            'numbers': _pack(self.numbers),
+            'offsets': _pack(self.offsets),
+            'exact': self.exact,
+        }
+
+    @classmethod
+    def load(cls, data: Dict[str, Any]) -> SeekIndex:
+        """
+        :param data: What `SeekIndex.dump` returned
+        :type data: Dict[str, Any]
+        :raises ValueError: If it's not an index of this version
+        :return: The index
+        :rtype: SeekIndex
+        """
+        if not isinstance(data, dict) or data.get('version') != _VERSION:
+            raise ValueError('Not a seek index of this version')
+        try:
+            numbers, offsets = _unpack(data['numbers']), _unpack(data['offsets'])
+            index = cls(int(data['sample_rate']), int(data['frame_samples']),
+                        int(data['delay']), int(data['frames']), int(data['end']),
+                        numbers, offsets, bool(data['exact']))
+        except (KeyError, TypeError, zlib.error) as err:
+            raise ValueError(f"Broken seek index: {err}") from err
+        if len(numbers) != len(offsets) or index.sample_rate <= 0 or index.frame_samples <= 0:
+            raise ValueError('Broken seek index')
+        return index
+
+
+def _pack(values: Sequence[int]) -> str:
+    # Ascending values, their differences are small and repeat a lot
+    deltas = array.array('q', (b - a for a, b in zip(itertools.chain((0,), values), values)))
+    return base64.b64encode(zlib.compress(deltas.tobytes())).decode('ascii')
+
+
+def _unpack(packed: str) -> Tuple[int, ...]:
+    deltas = array.array('q')
+    try:
+        deltas.frombytes(zlib.decompress(base64.b64decode(packed)))
+    except ValueError as err:
+        raise ValueError(f"Broken seek index: {err}") from err
+    return tuple(itertools.accumulate(deltas))
+
+
+def _delay(tag: bytes, header: FrameHeader) -> int:
+    """The samples the decoder drops at the start, from the LAME tag after the Xing tag"""
+    xing = 4 + 2 * header.protected + header.side_info_size
+    if tag[xing:xing + 4] not in (b'Xing', b'Info'):
+        return 0
+    flags = int.from_bytes(tag[xing + 4:xing + 8], 'big')
+    # Frames, bytes, table of contents and quality, each there if its flag is set
+    lame = xing + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) \
+        + 4 * bool(flags & 8)
+    if tag[lame:lame + 4] not in _ENCODERS or len(tag) < lame + 24:
+        return 0
+    return (tag[lame + 21] << 4 | tag[lame + 22] >> 4) + _DECODER_DELAY
+
+
+def _first_audio_frame(f: BinaryIO, path: str) -> Tuple[int, Frame, Optional[bytes]]:
+    """The end of the audio, its first frame and the tag frame in front of it"""
+    start, end = audio_range(f)
+    frames = iter_frames(f, start, end)
+    first = next(frames, None)
+    if first is None:
+        raise MP3Error(f"No MPEG audio in {path}")
+    tag = info_tag(f, first)
+    if tag is None:
+        return end, first, None
+    audio = next(iter_frames(f, first.offset + first.header.size, end), None)
+    if audio is None:
+        raise MP3Error(f"No MPEG audio in {path}")
+    return end, audio, tag
+
+
+def build_index(path: str, step: int = INDEX_STEP,
+                report: Optional[Callable[[float], None]] = None) -> SeekIndex:
+    """Walk the frames of an MP3 file by their headers into an exact seek index.
+    Nothing is decoded, a file of a few hours takes about a second
+
+    :param path: The path of the MP3 file
+    :type path: str
+    :param step: Frames between two points, defaults to `INDEX_STEP`
+    :type step: int, optional
+    :param report: Called with how far the walk is, from 0 to 1. What it raises
+    stops it, defaults to None
+    :type report: Optional[Callable[[float], None]], optional
+    :raises MP3Error: If the file is not MPEG audio
+    :return: The index
+    :rtype: SeekIndex
+    """
+    with open(path, 'rb') as f:
+        end, first, tag = _first_audio_frame(f, path)
+        header = first.header
+        numbers: List[int] = []
+        offsets: List[int] = []
+        count = 0
+        for count, frame in enumerate(iter_frames(f, first.offset, end)):
+            if not count % step:
+                numbers.append(count)
+                offsets.append(frame.offset)
+                if report is not None and not count % _REPORT_FRAMES:
+                    report(frame.offset / end)
+        if report is not None:
+            report(1.0)
+    delay = _delay(tag, header) if tag is not None else 0
+    return SeekIndex(header.sample_rate, header.samples, delay, count + 1, end,
+                     tuple(numbers), tuple(offsets), True)
+
+
+def read_toc(path: str) -> Optional[SeekIndex]:
+    """Read the table of contents of the `Xing` or the `VBRI` tag of an MP3 file.
+    It's there right away, it stands in for the frame map until it's built
+
+    :param path: The path of the MP3 file
+    :type path: str
+    :raises MP3Error: If the file is not MPEG audio
+    :return: An approximate index, `None` if the file has no table of contents
+    :rtype: Optional[SeekIndex]
+    """
+    with open(path, 'rb') as f:
+        end, first, tag = _first_audio_frame(f, path)
+    if tag is None:
+        return None
+    header = first.header
+    start = first.offset
+    xing = 4 + 2 * header.protected + header.side_info_size
+    numbers: Tuple[int, ...] = ()
+    offsets: Tuple[int, ...] = ()
+    if tag[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = int.from_bytes(tag[xing + 4:xing + 8], 'big')
+        if flags & 7 != 7:
+            return None
+        frames, size = (int.from_bytes(tag[i:i + 4], 'big') for i in (xing + 8, xing + 12))
+        toc = tag[xing + 16:xing + 116]
+        # The tag counts its own frame
+        tag_start = start - len(tag)
+        numbers = tuple(i * frames // 100 for i in range(100))
+        offsets = tuple(max(start, tag_start + toc[i] * size // 256) for i in range(100))
+    elif tag[36:40] == b'VBRI':
+        frames = int.from_bytes(tag[50:54], 'big')
+        entries, scale, entry_size, per_entry = (
+            int.from_bytes(tag[i:i + 2], 'big') for i in (54, 56, 58, 60))
+        table = tag[62:62 + entries * entry_size]
+        sizes = [int.from_bytes(table[i:i + entry_size], 'big') * scale
+                 for i in range(0, len(table), entry_size)]
+        numbers = tuple(i * per_entry for i in range(len(sizes) + 1))
+        offsets = tuple(start + size for size in itertools.accumulate(sizes, initial=0))
+    if not numbers:
+        return None
+    return SeekIndex(header.sample_rate, header.samples, _delay(tag, header), frames, end,
+                     numbers, offsets, False)
+
+
+class FileRegion(io.RawIOBase):
+    """A read only view of a part of a file, as if it was the whole file. A decoder
+    that is given it starts at the frame the region starts at
+    """
+    def __init__(self, path: str, start: int, end: int) -> None:
+        """
+        :param path: The path of the file
+        :type path: str
+        :param start: Where the region starts in the file
+        :type start: int
+        :param end: Where it ends
+        :type end: int
+        """
+        super().__init__()
+        self._file = open(path, 'rb')
+        self._start = start
+        self._end = max(start, end)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._end - self._start
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        size = max(0, min(len(buffer), self._end - self._start - self._position))
+        self._file.seek(self._start + self._position)
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def open_at(path: str, index: SeekIndex, seconds: float,
+            loader: Callable[..., Source] = load) -> Tuple[StreamingSource, float]:
+    """Open a decoder on an MP3 file right at a time, through its seek index.
+    The decoder is given the file from a frame a little before the time on,
+    it never goes over what's in front of it
+
+    :param path: The path of the MP3 file
+    :type path: str
+    :param index: Its seek index
+    :type index: SeekIndex
+    :param seconds: The time to start at
+    :type seconds: float
+    :param loader: What opens the file, it's given the file region as `file`
+    and `streaming=True`, defaults to `pyglet.media.load`
+    :type loader: Callable[..., Source], optional
+    :raises MP3Error: If the file doesn't match the index or the loader
+    doesn't stream it
+    :return: The decoder and the seconds of its audio to drop before the time
+    :rtype: Tuple[StreamingSource, float]
+    """
+    with open(path, 'rb') as f:
+        offset, lead = index.locate(f, seconds)
+    region = FileRegion(path, offset, index.end)
+    try:
+        source = loader(path, file=region, streaming=True)
+    except BaseException:
+        region.close()
+        raise
+    if not isinstance(source, StreamingSource):
+        region.close()
+        raise MP3Error(f"{path} is not streamed")
+    return source, lead
@@ -0,0 +1,349 @@
+import os
+import time
+import shutil
+import unittest
+from pathlib import Path
+from tinytag import TinyTag
+from pyglet.media.codecs import StreamingSource
+from actions import SONGS_DIR
+from typing import (
+    Optional,
+    List,
+    Dict,
+    Any,
+)
+from .frames import (
+    MP3Error,
+    FrameHeader,
+    parse_header,
+    audio_range,
+    iter_frames,
+    info_tag,
+)
+from .cut import cut
+from .seekindex import (
+    SeekIndex,
+    FileRegion,
+    build_index,
+    read_toc,
+    open_at,
+)
+from .seekcache import SeekIndexCache
+
+
+BASE_DIR = Path(__file__).parent
+SONG = os.path.join(SONGS_DIR, 'Sjaak - Trompetisto (Official Music Video).mp3')
+# MPEG-1 layer III, 44100 Hz, stereo, no CRC, 128 and 192 kbps
+HEADER_128 = 0xFFFB9000
+HEADER_192 = 0xFFFBB000
+# MPEG-2.5 layer III, 8000 Hz, mono, 8 kbps, the smallest frames (72 bytes)
+HEADER_8 = 0xFFE318C0
+# An ID3v2 tag of 20 bytes after its header
+ID3V2 = b'ID3\x04\x00\x00\x00\x00\x00\x14' + b'\x00' * 20
+ID3V1 = b'TAG' + b'\x00' * 125
+
+
+def make_frame(header: int, fill: int, begin: int = 0) -> bytes:
+    """A frame whose main data is `fill` bytes, `begin` is its main_data_begin"""
+    parsed = parse_header(header.to_bytes(4, 'big'))
+    assert parsed is not None
+    side = (begin << 7).to_bytes(2, 'big') + b'\x00' * 30
+    return header.to_bytes(4, 'big') + side + bytes([fill]) * (parsed.size - 36)
+
+
+class TestFrames(unittest.TestCase):
+    def test_parse_header(self) -> None:
+        header = parse_header(HEADER_128.to_bytes(4, 'big'))
+        self.assertEqual(header, FrameHeader(1, 3, 128, 44100, False, 2, False))
+        assert header is not None
+        self.assertEqual((header.size, header.samples), (417, 1152))
+        padded = parse_header((HEADER_128 | 1 << 9).to_bytes(4, 'big'))
+        assert padded is not None
+        self.assertEqual(padded.size, 418)
+        # MPEG-2 has half the samples
+        mpeg2 = parse_header(0xFFF39000.to_bytes(4, 'big'))
+        assert mpeg2 is not None
+        self.assertEqual((mpeg2.version, mpeg2.samples, mpeg2.side_info_size), (2, 576, 17))
+        # No sync, free format, reserved sample rate
+        for value in (0x12345678, 0xFFFB0000, 0xFFFB9C00):
+            self.assertIsNone(parse_header(value.to_bytes(4, 'big')))
+
+    def test_iter_frames(self) -> None:
+        path = str(Path(BASE_DIR, 'testframes.mp3'))
+        frames = [make_frame(HEADER_128, i) for i in range(5)]
+        # Junk with a fake sync in it between the frames
+        junk = b'\x00\xff\xfb\x00\x00'
+        self.addCleanup(os.remove, path)
+        with open(path, 'wb') as f:
+            f.write(ID3V2 + b''.join(frames[:2]) + junk + b''.join(frames[2:]) + ID3V1)
+        with open(path, 'rb') as f:
+            start, end = audio_range(f)
+            self.assertEqual((start, end), (len(ID3V2), os.path.getsize(path) - 128))
+            offsets = [frame.offset for frame in iter_frames(f, start, end)]
+        expected = [start + 417 * i for i in range(5)]
+        expected[2:] = [offset + len(junk) for offset in expected[2:]]
+        self.assertEqual(offsets, expected)
+
+    def test_info_tag(self) -> None:
+        with open(SONG, 'rb') as f:
+            start, end = audio_range(f)
+            first = next(iter_frames(f, start, end))
+            self.assertIsNotNone(info_tag(f, first))
+
+
+class TestCut(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = str(Path(BASE_DIR, 'testcut'))
+        os.makedirs(self.dir, exist_ok=True)
+        self.src = os.path.join(self.dir, 'src.mp3')
+        self.dst = os.path.join(self.dir, 'dst.mp3')
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+        return super().tearDown()
+
+    def write(self, frames: List[bytes]) -> None:
+        with open(self.src, 'wb') as f:
+            f.write(ID3V2 + b''.join(frames) + ID3V1)
+
+    def frames_of(self, path: str) -> List[bytes]:
+        with open(path, 'rb') as f:
+            start, end = audio_range(f)
+            offsets = [(frame.offset, frame.header.size) for frame in iter_frames(f, start, end)]
+            result = []
+            for offset, size in offsets:
+                f.seek(offset)
+                result.append(f.read(size))
+        return result
+
+    def tag(self, frame: bytes) -> Optional[bytes]:
+        # Where the Xing tag is in a MPEG-1 stereo frame
+        return frame[36:40] if frame[36:40] in (b'Xing', b'Info') else None
+
+    def test_cbr(self) -> None:
+        frame_time = 1152 / 44100
+        frames = [make_frame(HEADER_128, i) for i in range(100)]
+        self.write(frames)
+        result = cut(self.src, self.dst, 10 * frame_time, 20.4 * frame_time)
+        self.assertEqual(result.frames, 10)
+        self.assertAlmostEqual(result.start, 10 * frame_time)
+        self.assertAlmostEqual(result.stop, 20 * frame_time)
+        # Copied as they are, no tag frame for a CBR file and the ID3 tags are kept
+        self.assertEqual(self.frames_of(self.dst), frames[10:20])
+        with open(self.dst, 'rb') as f:
+            data = f.read()
+        self.assertTrue(data.startswith(ID3V2) and data.endswith(ID3V1))
+        self.assertEqual(result.size, len(data))
+
+    def test_reservoir(self) -> None:
+        frames = [make_frame(HEADER_128, i, begin=100) for i in range(20)]
+        self.write(frames)
+        cut(self.src, self.dst, 0.1, 0.3)
+        output = self.frames_of(self.dst)
+        first = frames.index(output[1])
+        # A silent frame in front gives the first frame the bytes it draws on
+        reservoir = output[0]
+        self.assertEqual(reservoir[4:36], b'\x00' * 32)
+        self.assertEqual(reservoir[-100:], frames[first - 1][-100:])
+
+    def test_vbr(self) -> None:
+        frames = [make_frame(HEADER_128 if i % 2 else HEADER_192, i) for i in range(40)]
+        self.write(frames)
+        result = cut(self.src, self.dst, 0, 0.5)
+        output = self.frames_of(self.dst)
+        self.assertEqual(self.tag(output[0]), b'Xing')
+        self.assertEqual(int.from_bytes(output[0][44:48], 'big'), result.frames)
+        self.assertEqual(int.from_bytes(output[0][48:52], 'big'), sum(map(len, output)))
+        self.assertEqual(output[1:], frames[:result.frames])
+        # The new file starts with a tag frame of its own, not the source's one
+        cut(self.dst, self.src, 0.1, 0.3)
+        self.assertEqual(self.frames_of(self.src)[1:], frames[4:11])
+
+    def test_song(self) -> None:
+        result = cut(SONG, self.dst, 60, 90)
+        self.assertAlmostEqual(result.start, 60, delta=0.05)
+        self.assertAlmostEqual(result.stop, 90, delta=0.05)
+        self.assertAlmostEqual(TinyTag.get(self.dst).duration or 0, 30, delta=0.1)
+        self.assertLess(os.path.getsize(self.dst), os.path.getsize(SONG) / 4)
+
+    def test_progress(self) -> None:
+        reports: List[float] = []
+        cut(SONG, self.dst, 10, 170, reports.append)
+        self.assertEqual(reports, sorted(reports))
+        self.assertEqual(reports[-1], 1.0)
+
+        def stop(progress: float) -> None:
+            if progress > 0.5:
+                raise KeyboardInterrupt
+
+        # What stops the cut midway leaves no file behind
+        with self.assertRaises(KeyboardInterrupt):
+            cut(SONG, self.dst, 10, 170, stop)
+        self.assertFalse(os.path.exists(self.dst))
+
+    def test_not_mp3(self) -> None:
+        with open(self.src, 'wb') as f:
+            f.write(b'RIFF' + b'\x00' * 1000)
+        with self.assertRaises(MP3Error):
+            cut(self.src, self.dst, 0, 1)
+        self.write([make_frame(HEADER_128, 0)])
+        with self.assertRaises(MP3Error):
+            cut(self.src, self.dst, 10, 20)
+
+
+class TestSeekIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = str(Path(BASE_DIR, 'testseekindex'))
+        os.makedirs(self.dir, exist_ok=True)
+        self.path = os.path.join(self.dir, 'song.mp3')
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+        return super().tearDown()
+
+    def write(self, frames: List[bytes]) -> None:
+        with open(self.path, 'wb') as f:
+            f.write(ID3V2 + b''.join(frames) + ID3V1)
+
+    def test_cbr(self) -> None:
+        frame_time = 1152 / 44100
+        self.write([make_frame(HEADER_128, i) for i in range(100)])
+        index = build_index(self.path, step=8)
+        self.assertTrue(index.exact)
+        self.assertEqual((index.frames, index.delay), (100, 0))
+        self.assertEqual(index.numbers, tuple(range(0, 100, 8)))
+        self.assertAlmostEqual(index.duration, 100 * frame_time)
+        with open(self.path, 'rb') as f:
+            # Two frames before the 30th one, and the rest of it is dropped
+            offset, lead = index.locate(f, 30.25 * frame_time, preroll=2)
+            self.assertEqual(offset, len(ID3V2) + 28 * 417)
+            self.assertAlmostEqual(lead, 2.25 * frame_time, places=4)
+            # Past the end is the last frame
+            offset, _ = index.locate(f, 1000, preroll=0)
+            self.assertEqual(offset, len(ID3V2) + 99 * 417)
+
+    def test_song(self) -> None:
+        index = build_index(SONG)
+        toc = read_toc(SONG)
+        assert toc is not None
+        self.assertFalse(toc.exact)
+        self.assertEqual(toc.frames, index.frames)
+        # The LAME tag of the song has the encoder delay
+        self.assertGreater(index.delay, 529)
+        size = os.path.getsize(SONG)
+        with open(SONG, 'rb') as f:
+            for seconds in (0, 30, 95.5, 170):
+                offset, _ = index.locate(f, seconds)
+                # The table of contents is close
+                self.assertAlmostEqual(toc.locate(f, seconds)[0], offset, delta=size / 100)
+                f.seek(offset)
+                self.assertIsNotNone(parse_header(f.read(4)))
+
+    def test_dump(self) -> None:
+        index = build_index(SONG)
+        self.assertEqual(SeekIndex.load(index.dump()), index)
+        broken: List[Dict[str, Any]] = [{}, {**index.dump(), 'version': 0},
+                                        {**index.dump(), 'offsets': 'x'}]
+        for data in broken:
+            with self.assertRaises(ValueError):
+                SeekIndex.load(data)
+
+    def test_no_toc(self) -> None:
+        self.write([make_frame(HEADER_128, i) for i in range(10)])
+        self.assertIsNone(read_toc(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(b'RIFF' + b'\x00' * 1000)
+        with self.assertRaises(MP3Error):
+            build_index(self.path)
+
+    def test_flat(self) -> None:
+        # Two hours of the smallest frames
+        frames = 100000
+        self.write([make_frame(HEADER_8, 0)] * frames)
+        index = build_index(self.path)
+        self.assertGreaterEqual(index.duration, 2 * 3600)
+        latencies = []
+        with open(self.path, 'rb') as f:
+            for seconds in (1, 3600, 7190):
+                start = time.perf_counter()
+                offset, _ = index.locate(f, seconds, preroll=0)
+                latencies.append(time.perf_counter() - start)
+                self.assertEqual(offset, len(ID3V2) + 72 * index.frame_at(seconds))
+        # A few frames are walked wherever the time is
+        self.assertLess(max(latencies), 0.05)
+
+    def test_open_at(self) -> None:
+        frame_time = 1152 / 44100
+        frames = [make_frame(HEADER_128, i) for i in range(40)]
+        self.write(frames)
+        index = build_index(self.path)
+        opened: List[Any] = []
+
+        class Source(StreamingSource):
+            def __init__(self, path: str, file: FileRegion, streaming: bool) -> None:
+                opened.append(file.read())
+                file.close()
+
+        source, lead = open_at(self.path, index, 20.5 * frame_time, Source)
+        self.assertIsInstance(source, Source)
+        self.assertAlmostEqual(lead, 8.5 * frame_time, places=4)
+        # The decoder sees the frames from the 12th one on, not the tags
+        self.assertEqual(opened, [b''.join(frames[12:])])
+
+    def test_region(self) -> None:
+        with open(self.path, 'wb') as f:
+            f.write(bytes(range(100)))
+        with FileRegion(self.path, 10, 50) as region:
+            self.assertEqual(region.seek(0, os.SEEK_END), 40)
+            region.seek(35)
+            self.assertEqual(region.read(), bytes(range(45, 50)))
+            region.seek(-5, os.SEEK_CUR)
+            self.assertEqual(region.read(2), bytes(range(45, 47)))
+
+
+class TestSeekIndexCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_file = str(Path(BASE_DIR, 'testseekindex.json'))
+        self.song = str(Path(BASE_DIR, 'testseeksong.mp3'))
+        shutil.copy(SONG, self.song)
+        self.cache = SeekIndexCache(self.cache_file)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for file in (self.cache_file, self.song):
+            if os.path.exists(file):
+                os.remove(file)
+        return super().tearDown()
+
+    def test_save_clean(self) -> None:
+        self.cache.save()
+        self.assertFalse(os.path.exists(self.cache_file))
+
+    def test_broken_file(self) -> None:
+        with open(self.cache_file, mode='w') as f:
+            f.write('{')
+        cache = SeekIndexCache(self.cache_file)
+        self.assertEqual(len(cache), 0)
+
+    def test_get_put(self) -> None:
+        self.assertIsNone(self.cache.get(self.song))
+        index = build_index(self.song)
+        self.cache.put(self.song, index)
+        self.assertEqual(self.cache.get(self.song), index)
+        self.cache.save()
+        self.assertEqual(SeekIndexCache(self.cache_file).get(self.song), index)
+        # A changed file gets a new index
+        with open(self.song, mode='ab') as f:
+            f.write(b'\x00' * 16)
+        self.assertIsNone(self.cache.get(self.song))
+        self.cache.put(self.song, index)
+        self.assertEqual(self.cache.get(self.song), index)
+
+    def test_discard(self) -> None:
+        self.cache.put(self.song, build_index(self.song))
+        self.assertIn(self.song, self.cache)
+        self.cache.discard(self.song)
+        self.assertNotIn(self.song, self.cache)
+        self.cache.discard(self.song)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+import os
+import time
+from collections import deque
+from typing import (
+    Optional,
+    Deque,
+    Tuple,
+    Dict,
+    List,
+)
+
+
+__all__ = (
+    'PERCENTILES',
+    'MAX_DUMP_BYTES',
+    'PhaseStats',
+    'TickProfiler',
+)
+
+
+PERCENTILES: Tuple[int, ...] = (50, 95, 99)
+# A dump file that grew past this is moved to `<file>.1`, only the last one is kept
+MAX_DUMP_BYTES = 2 ** 20
+
+
+class PhaseStats:
+    """Rolling timings (in milliseconds) of a single phase. Only the last
+    `window` samples are kept for the percentiles, the counters are totals
+    """
+    def __init__(self, name: str, budget_ms: float, window: int = 1000) -> None:
+        self.name = name
+        self.budget_ms = budget_ms
+        self.count = 0
+        self.over_budget = 0
+        self.max_ms = 0.0
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, ms: float) -> None:
+        self._samples.append(ms)
+        self.count += 1
+        if ms > self.budget_ms:
+            self.over_budget += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p: float) -> float:
+        """
+        :param p: `0 <= p <= 100`
+        :type p: float
+        :return: The nearest-rank percentile of the rolling window, `0` if it's empty
+        :rtype: float
+        """
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def summary(self) -> Dict[str, float]:
+        data: Dict[str, float] = {f"p{p}": self.percentile(p) for p in PERCENTILES}
+        data['max'] = self.max_ms
+        data['count'] = self.count
+        data['over_budget'] = self.over_budget
+        return data
+
+
+class TickProfiler:
+    """A `TickProfiler` times the phases of a repeating task (the UI tick).
+    Call `TickProfiler.begin` at the start of the tick, `TickProfiler.lap` after
+    every phase (it records the time since the previous mark) and
+    `TickProfiler.end` at the end, which records the whole tick as `tick`
+    """
+    TICK = 'tick'
+
+    def __init__(self, budget_ms: float, window: int = 1000,
+                 phase_budgets: Optional[Dict[str, float]] = None,
+                 enabled: bool = True) -> None:
+        self.budget_ms = budget_ms
+        self.enabled = enabled
+        self._window = window
+        self._phase_budgets = phase_budgets or {}
+        self._phases: Dict[str, PhaseStats] = {}
+        self._start = 0.0
+        self._mark = 0.0
+
+    def __contains__(self, __o: object) -> bool:
+        return __o in self._phases
+
+    def __getitem__(self, name: str) -> PhaseStats:
+        return self._phases[name]
+
+    @property
+    def phases(self) -> List[str]:
+        return list(self._phases)
+
+    def _stats(self, name: str) -> PhaseStats:
+        stats = self._phases.get(name)
+        if stats is None:
+            budget = self._phase_budgets.get(name, self.budget_ms)
+            stats = self._phases[name] = PhaseStats(name, budget, self._window)
+        return stats
+
+    def record(self, name: str, ms: float) -> None:
+        if self.enabled:
+            self._stats(name).add(ms)
+
+    def begin(self) -> None:
+        self._start = self._mark = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._stats(name).add((now - self._mark) * 1000)
+        self._mark = now
+
+    def end(self) -> None:
+        if not self.enabled:
+            return
+        self._stats(self.TICK).add((time.perf_counter() - self._start) * 1000)
+
+    def reset(self) -> None:
+        self._phases.clear()
+
+    def report(self) -> str:
+        """
+        :return: A table with the stats of every phase, `tick` last
+        :rtype: str
+        """
+        header = ('phase', *(f"p{p}" for p in PERCENTILES), 'max', 'count', 'over budget')
+        lines = [f"{header[0]:<12}" + ''.join(f"{col:>12}" for col in header[1:])]
+        names = [name for name in self._phases if name != self.TICK]
+        if self.TICK in self._phases:
+            names.append(self.TICK)
+        for name in names:
+            stats = self._phases[name]
+            values = [f"{stats.percentile(p):.3f}" for p in PERCENTILES]
+            values += [f"{stats.max_ms:.3f}", str(stats.count),
+                       f"{stats.over_budget} (>{stats.budget_ms:g}ms)"]
+            lines.append(f"{name:<12}" + ''.join(f"{value:>12}" for value in values))
+        return '\n'.join(lines)
+
+    def dump(self, path: str, title: str = "", max_bytes: int = MAX_DUMP_BYTES) -> None:
+        """Append the report to `path`, if anything was profiled. A file of `max_bytes`
+        or more is rotated first
+
+        :param path: The file to write to
+        :type path: str
+        :param title: A line written above the report, defaults to ""
+        :type title: str, optional
+        :param max_bytes: The size to rotate the file at, defaults to `MAX_DUMP_BYTES`
+        :type max_bytes: int, optional
+        """
+        if not self._phases:
+            return
+        if os.path.isfile(path) and os.path.getsize(path) >= max_bytes:
+            os.replace(path, f"{path}.1")
+        with open(path, mode='a') as f:
+            if title:
+                f.write(f"{title}\n")
+            f.write(f"{self.report()}\n\n")
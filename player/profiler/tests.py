@@ -0,0 +1,109 @@
+import os
+import time
+import unittest
+from pathlib import Path
+from .profiler import (
+    PhaseStats,
+    TickProfiler,
+)
+
+
+BASE_DIR = Path(__file__).parent
+
+
+class TestPhaseStats(unittest.TestCase):
+    def test_percentile(self) -> None:
+        stats = PhaseStats('test', budget_ms=90)
+        self.assertEqual(stats.percentile(50), 0)
+        for ms in range(1, 101):
+            stats.add(ms)
+        self.assertEqual(stats.percentile(50), 50)
+        self.assertEqual(stats.percentile(95), 95)
+        self.assertEqual(stats.percentile(99), 99)
+        self.assertEqual(stats.percentile(100), 100)
+        self.assertEqual(stats.over_budget, 10)
+        self.assertEqual(stats.max_ms, 100)
+
+    def test_window(self) -> None:
+        stats = PhaseStats('test', budget_ms=1, window=10)
+        for ms in range(100):
+            stats.add(ms)
+        self.assertEqual(len(stats), 10)
+        self.assertEqual(stats.count, 100)
+        self.assertEqual(stats.percentile(50), 94)
+
+    def test_summary(self) -> None:
+        stats = PhaseStats('test', budget_ms=1)
+        stats.add(2)
+        summary = stats.summary()
+        self.assertEqual(summary['p50'], 2)
+        self.assertEqual(summary['count'], 1)
+        self.assertEqual(summary['over_budget'], 1)
+
+
+class TestTickProfiler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.profiler = TickProfiler(budget_ms=5, phase_budgets={'slow': 1})
+        self.file = str(Path(BASE_DIR, 'testprofile.txt'))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for file in (self.file, f"{self.file}.1"):
+            if os.path.exists(file):
+                os.remove(file)
+        return super().tearDown()
+
+    def test_laps(self) -> None:
+        for _ in range(3):
+            self.profiler.begin()
+            self.profiler.lap('fast')
+            time.sleep(0.002)
+            self.profiler.lap('slow')
+            self.profiler.end()
+
+        self.assertEqual(self.profiler.phases, ['fast', 'slow', TickProfiler.TICK])
+        self.assertEqual(self.profiler['fast'].count, 3)
+        self.assertEqual(self.profiler['fast'].over_budget, 0)
+        self.assertEqual(self.profiler['slow'].over_budget, 3)
+        self.assertGreaterEqual(self.profiler[TickProfiler.TICK].percentile(50), 2)
+
+    def test_disabled(self) -> None:
+        self.profiler.enabled = False
+        self.profiler.begin()
+        self.profiler.lap('phase')
+        self.profiler.record('other', 1)
+        self.profiler.end()
+        self.assertEqual(self.profiler.phases, [])
+
+    def test_report_dump(self) -> None:
+        self.profiler.record(TickProfiler.TICK, 1)
+        self.profiler.record('phase', 1)
+        lines = self.profiler.report().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('phase'))
+        self.assertTrue(lines[2].startswith(TickProfiler.TICK))
+
+        self.profiler.dump(self.file, 'title')
+        self.profiler.dump(self.file)
+        with open(self.file, mode='r') as f:
+            content = f.read()
+        self.assertTrue(content.startswith('title\n'))
+        self.assertEqual(content.count('p95'), 2)
+
+    def test_dump_nothing(self) -> None:
+        self.profiler.enabled = False
+        self.profiler.begin()
+        self.profiler.end()
+        self.profiler.dump(self.file)
+        self.assertFalse(os.path.exists(self.file))
+
+    def test_dump_rotates(self) -> None:
+        self.profiler.record('phase', 1)
+        self.profiler.dump(self.file, 'first')
+        size = os.path.getsize(self.file)
+        self.profiler.dump(self.file, 'second', max_bytes=size + 1)
+        self.profiler.dump(self.file, 'third', max_bytes=size + 1)
+        with open(f"{self.file}.1", mode='r') as f:
+            self.assertEqual(f.read().count('p95'), 2)
+        with open(self.file, mode='r') as f:
+            self.assertTrue(f.read().startswith('third\n'))
@@ -0,0 +1,227 @@
+from __future__ import annotations
+import os
+import json
+import heapq
+import datetime as dt
+from typing import (
+    NamedTuple,
+    Optional,
+    Tuple,
+    Dict,
+    List,
+)
+
+
+__all__ = (
+    'REPEATS',
+    'DATETIME_FORMAT',
+    'State',
+    'ActionScheduler',
+    'action_path',
+    'read_action',
+    'save_action',
+    'load_actions',
+)
+
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M'
+
+# How far a recurring action moves forward every time it's applied.
+# An empty string means the action runs once
+REPEATS: Dict[str, Optional[dt.timedelta]] = {
+    '': None,
+    'daily': dt.timedelta(days=1),
+    'weekly': dt.timedelta(weeks=1),
+}
+
+
+class State(NamedTuple):
+    name: str
+    datetime: str
+    playback: bool
+    mute: bool
+    volume: int
+    applied: bool
+    repeat: str = ''
+
+    @property
+    def due(self) -> dt.datetime:
+        return dt.datetime.strptime(self.datetime, DATETIME_FORMAT)
+
+
+def action_path(actions_dir: str, name: str) -> str:
+    return os.path.join(actions_dir, f"{name}.json")
+
+
+def read_action(actions_dir: str, name: str) -> State:
+    with open(action_path(actions_dir, name), mode='r') as f:
+        return State(*json.load(f))
+
+
+def save_action(actions_dir: str, state: State) -> None:
+    with open(action_path(actions_dir, state.name), mode='w') as f:
+        json.dump(list(state), f)
+
+
+def load_actions(actions_dir: str) -> List[State]:
+    """Read every saved action from `actions_dir`
+
+    :param actions_dir: The directory the actions are saved in
+    :type actions_dir: str
+    :return: All the actions
+    :rtype: List[State]
+    """
+    actions = []
+    for file in os.listdir(actions_dir):
+        path = os.path.join(actions_dir, file)
+        with open(path, mode='r') as f:
+            actions.append(State(*json.load(f)))
+    return actions
+
+
+class ActionScheduler:
+    """An `ActionScheduler` keeps the pending actions in a min-heap ordered
+    by their due time, so the caller only has to wake up when
+    `ActionScheduler.next_due` is reached and collect `ActionScheduler.pop_due`.
+
+    The actions directory is read once by `ActionScheduler.load`. After that
+    the scheduler must be told about changes with `ActionScheduler.add`
+    and `ActionScheduler.remove`
+    """
+    def __init__(self, actions_dir: str, catch_up: bool = True) -> None:
+        """
+        :param actions_dir: The directory the actions are saved in
+        :type actions_dir: str
+        :param catch_up: Whether actions that were due while the app was closed
+        are applied on `load`, or skipped. Defaults to True
+        :type catch_up: bool, optional
+        """
+        self._actions_dir = actions_dir
+        self._catch_up = catch_up
+        self._heap: List[Tuple[dt.datetime, int, str]] = []
+        self._pending: Dict[str, Tuple[dt.datetime, int]] = {}
+        self._states: Dict[str, State] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, __o: object) -> bool:
+        return __o in self._pending
+
+    def _push(self, state: State) -> None:
+        self._seq += 1
+        due = state.due
+        self._states[state.name] = state
+        self._pending[state.name] = (due, self._seq)
+        heapq.heappush(self._heap, (due, self._seq, state.name))
+
+    def _discard_stale(self) -> None:
+        # Entries of removed or rescheduled actions are left in the
+        # heap and dropped lazily when they reach the top
+        while self._heap:
+            due, seq, name = self._heap[0]
+            if self._pending.get(name) == (due, seq):
+                return
+            heapq.heappop(self._heap)
+
+    def _finish(self, state: State, now: dt.datetime) -> Optional[State]:
+        """Mark `state` as applied or move it to its next occurrence after `now`
+        and persist it
+
+        :return: The rescheduled state if the action repeats, `None` otherwise
+        """
+        step = REPEATS.get(state.repeat)
+        if step is None:
+            save_action(self._actions_dir, state._replace(applied=True))
+            return None
+
+        due = state.due + step
+        while due <= now:
+            due += step
+        new_state = state._replace(datetime=due.strftime(DATETIME_FORMAT), applied=False)
+        save_action(self._actions_dir, new_state)
+        return new_state
+
+    def load(self, now: Optional[dt.datetime] = None) -> None:
+        """(Re)build the schedule from the actions directory
+
+        :param now: The current time, defaults to `datetime.now()`
+        :type now: Optional[dt.datetime]
+        """
+        now = now or dt.datetime.now()
+        # Anything before the current minute was missed while the app was closed
+        missed = now.replace(second=0, microsecond=0)
+
+        self._heap.clear()
+        self._pending.clear()
+        self._states.clear()
+        for state in load_actions(self._actions_dir):
+            if state.applied:
+                continue
+            if not self._catch_up and state.due < missed:
+                if (rescheduled := self._finish(state, now)) is not None:
+                    self._push(rescheduled)
+                continue
+            self._push(state)
+
+    def add(self, state: State) -> None:
+        """Schedule a new or edited action. An action with the same name is replaced
+
+        :param state: The action
+        :type state: State
+        """
+        self.remove(state.name)
+        if not state.applied:
+            self._push(state)
+
+    def remove(self, name: str) -> None:
+        """Unschedule an action if it's scheduled
+
+        :param name: The name of the action
+        :type name: str
+        """
+        self._pending.pop(name, None)
+        self._states.pop(name, None)
+
+    def next_due(self) -> Optional[dt.datetime]:
+        """
+        :return: When the next action is due or `None` if nothing is scheduled
+        :rtype: Optional[dt.datetime]
+        """
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def seconds_until_next(self, now: Optional[dt.datetime] = None) -> Optional[float]:
+        """
+        :param now: The current time, defaults to `datetime.now()`
+        :type now: Optional[dt.datetime]
+        :return: Seconds until the next action (`0` if it's overdue)
+        or `None` if nothing is scheduled
+        :rtype: Optional[float]
+        """
+        due = self.next_due()
+        if due is None:
+            return None
+        now = now or dt.datetime.now()
+        return max(0.0, (due - now).total_seconds())
+
+    def pop_due(self, now: Optional[dt.datetime] = None) -> List[State]:
+        """Take every action that is due at `now`. One-off actions are marked
+        as applied and recurring ones are moved to their next occurrence
+
+        :param now: The current time, defaults to `datetime.now()`
+        :type now: Optional[dt.datetime]
+        :return: The due actions, in order
+        :rtype: List[State]
+        """
+        now = now or dt.datetime.now()
+        due_states: List[State] = []
+        while (due := self.next_due()) is not None and due <= now:
+            _, _, name = heapq.heappop(self._heap)
+            del self._pending[name]
+            state = self._states.pop(name)
+            due_states.append(state)
+            if (rescheduled := self._finish(state, now)) is not None:
+                self._push(rescheduled)
+        return due_states
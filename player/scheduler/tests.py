@@ -0,0 +1,110 @@
+import os
+import shutil
+import unittest
+import datetime as dt
+from pathlib import Path
+from .scheduler import (
+    DATETIME_FORMAT,
+    ActionScheduler,
+    State,
+    read_action,
+    save_action,
+    load_actions,
+)
+
+
+BASE_DIR = Path(__file__).parent
+NOW = dt.datetime(2023, 5, 6, 13, 40)
+
+
+def make_state(name: str, minutes: int, applied: bool = False, repeat: str = '') -> State:
+    due = NOW + dt.timedelta(minutes=minutes)
+    return State(name, due.strftime(DATETIME_FORMAT), True, False, 50, applied, repeat)
+
+
+class TestActionScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.actions_dir = str(Path(BASE_DIR, '.test_actions'))
+        os.mkdir(self.actions_dir)
+        self.scheduler = ActionScheduler(self.actions_dir)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.actions_dir)
+        return super().tearDown()
+
+    def test_old_format(self) -> None:
+        state = State('old', '2023-5-6 13:4', True, False, 50, False)
+        save_action(self.actions_dir, state)
+        self.assertEqual(read_action(self.actions_dir, 'old'), state)
+        self.assertEqual(state.repeat, '')
+        self.assertEqual(state.due, dt.datetime(2023, 5, 6, 13, 4))
+
+    def test_order(self) -> None:
+        for name, minutes in (('c', 30), ('a', 10), ('b', 20)):
+            save_action(self.actions_dir, make_state(name, minutes))
+        save_action(self.actions_dir, make_state('done', 5, applied=True))
+        self.scheduler.load(NOW)
+
+        self.assertEqual(len(self.scheduler), 3)
+        self.assertNotIn('done', self.scheduler)
+        self.assertEqual(self.scheduler.next_due(), NOW + dt.timedelta(minutes=10))
+        self.assertEqual(self.scheduler.seconds_until_next(NOW), 600)
+
+        due = self.scheduler.pop_due(NOW + dt.timedelta(minutes=25))
+        self.assertEqual([state.name for state in due], ['a', 'b'])
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertTrue(read_action(self.actions_dir, 'a').applied)
+
+    def test_add_remove(self) -> None:
+        self.scheduler.load(NOW)
+        self.assertIsNone(self.scheduler.next_due())
+
+        self.scheduler.add(make_state('a', 10))
+        self.scheduler.add(make_state('a', 20))
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertEqual(self.scheduler.next_due(), NOW + dt.timedelta(minutes=20))
+
+        self.scheduler.remove('a')
+        self.assertIsNone(self.scheduler.next_due())
+        self.assertEqual(self.scheduler.pop_due(NOW + dt.timedelta(days=1)), [])
+
+    def test_repeat(self) -> None:
+        save_action(self.actions_dir, make_state('daily', 0, repeat='daily'))
+        self.scheduler.load(NOW)
+
+        due = self.scheduler.pop_due(NOW)
+        self.assertEqual([state.name for state in due], ['daily'])
+        tomorrow = NOW + dt.timedelta(days=1)
+        self.assertEqual(self.scheduler.next_due(), tomorrow)
+        stored = read_action(self.actions_dir, 'daily')
+        self.assertFalse(stored.applied)
+        self.assertEqual(stored.due, tomorrow)
+
+    def test_catch_up(self) -> None:
+        save_action(self.actions_dir, make_state('missed', -60))
+        save_action(self.actions_dir, make_state('weekly', -60 * 24 * 10, repeat='weekly'))
+        self.scheduler.load(NOW)
+
+        due = self.scheduler.pop_due(NOW)
+        self.assertEqual(sorted(state.name for state in due), ['missed', 'weekly'])
+        self.assertGreater(read_action(self.actions_dir, 'weekly').due, NOW)
+
+    def test_no_catch_up(self) -> None:
+        save_action(self.actions_dir, make_state('missed', -60))
+        save_action(self.actions_dir, make_state('daily', -60, repeat='daily'))
+        save_action(self.actions_dir, make_state('now', 0))
+        scheduler = ActionScheduler(self.actions_dir, catch_up=False)
+        scheduler.load(NOW + dt.timedelta(seconds=30))
+
+        due = scheduler.pop_due(NOW + dt.timedelta(seconds=30))
+        self.assertEqual([state.name for state in due], ['now'])
+        self.assertTrue(read_action(self.actions_dir, 'missed').applied)
+        self.assertEqual(scheduler.next_due(), NOW + dt.timedelta(days=1, minutes=-60))
+
+    def test_load_actions(self) -> None:
+        states = [make_state('a', 1), make_state('b', 2, repeat='weekly')]
+        for state in states:
+            save_action(self.actions_dir, state)
+        loaded = sorted(load_actions(self.actions_dir))
+        self.assertEqual(loaded, states)
@@ -1,4 +1,8 @@
 from __future__ import annotations
+from typing import (
+    Optional,
+    Any,
+)
 
 
 class AudioSegment:
@@ -7,4 +11,8 @@ class AudioSegment:
         csl,
         file: str,
         format: str,
+        start_second: Optional[float] = None,
+        duration: Optional[float] = None,
     ) -> AudioSegment: ...
+
+    def export(self, out_f: str, format: str = ...) -> Any: ...
@@ -0,0 +1,3 @@
+from . import media as media
+
+version: str
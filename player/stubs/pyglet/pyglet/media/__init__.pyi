@@ -0,0 +1,45 @@
+from __future__ import annotations
+from .codecs import (
+    StreamingSource as StreamingSource,
+    StaticSource as StaticSource,
+    SourceGroup as SourceGroup,
+    Source as Source,
+)
+from typing import (
+    Iterable,
+    Optional,
+    Union,
+    Any,
+)
+
+
+class Player:
+    volume: float
+    loop: bool
+
+    def __init__(self) -> None: ...
+
+    @property
+    def source(self) -> Optional[Union[Source, SourceGroup]]: ...
+
+    @property
+    def time(self) -> float: ...
+
+    @property
+    def playing(self) -> bool: ...
+
+    def queue(self, source: Union[Source, SourceGroup, Iterable[Source]]) -> None: ...
+
+    def play(self) -> None: ...
+
+    def pause(self) -> None: ...
+
+    def seek(self, timestamp: float) -> None: ...
+
+    def next_source(self) -> None: ...
+
+    def delete(self) -> None: ...
+
+
+def load(filename: str, file: Any = None, decoder: Any = None,
+         streaming: bool = True) -> Source: ...
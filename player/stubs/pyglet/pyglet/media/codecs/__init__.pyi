@@ -0,0 +1,70 @@
+from __future__ import annotations
+from typing import (
+    Optional,
+    List,
+    Any,
+)
+
+
+class AudioFormat:
+    channels: int
+    sample_size: int
+    sample_rate: int
+    bytes_per_sample: int
+    bytes_per_second: int
+
+    def __init__(self, channels: int, sample_size: int, sample_rate: int) -> None: ...
+
+
+class AudioData:
+    data: bytes
+    length: int
+    timestamp: float
+    duration: float
+    events: List[Any]
+
+    def __init__(self, data: bytes, length: int, timestamp: float,
+                 duration: float, events: List[Any]) -> None: ...
+
+
+class Source:
+    audio_format: Optional[AudioFormat]
+    video_format: Any
+    is_player_source: bool
+
+    @property
+    def duration(self) -> Optional[float]: ...
+
+    def seek(self, timestamp: float) -> None: ...
+
+    def get_queue_source(self) -> Source: ...
+
+    def get_audio_data(self, num_bytes: int,
+                       compensation_time: float = 0.0) -> Optional[AudioData]: ...
+
+
+class StreamingSource(Source):
+    def delete(self) -> None: ...
+
+
+class StaticSource(Source):
+    def __init__(self, source: Source) -> None: ...
+
+
+class SourceGroup:
+    audio_format: Optional[AudioFormat]
+    video_format: Any
+    duration: float
+
+    def __init__(self) -> None: ...
+
+    def seek(self, time: float) -> None: ...
+
+    def add(self, source: Source) -> None: ...
+
+    def has_next(self) -> bool: ...
+
+    def get_queue_source(self) -> SourceGroup: ...
+
+    def get_audio_data(self, num_bytes: int,
+                       compensation_time: float = 0.0) -> Optional[AudioData]: ...
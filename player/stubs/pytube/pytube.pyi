@@ -1,13 +1,26 @@
 from typing import (
     Optional,
     Callable,
+    Sequence,
     Dict,
     Any,
 )
 
 
 class Stream:
-    ...
+    url: str
+    default_filename: str
+    filesize: int
+
+    def download(
+        self,
+        output_path: str | None = None,
+        filename: str | None = None,
+        filename_prefix: str | None = None,
+        skip_existing: bool = True,
+        timeout: int | None = None,
+        max_retries: int | None = 0
+    ) -> str: ...
 
 
 class StreamQuery:
@@ -38,3 +51,9 @@ class YouTube:
         timeout: int | None = None,
         max_retries: int | None = 0
     ) -> str: ...
+
+
+class Playlist:
+    video_urls: Sequence[str]
+
+    def __init__(self, url: str, proxies: Optional[Dict[str, str]] = None) -> None: ...
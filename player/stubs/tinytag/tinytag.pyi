@@ -16,3 +16,9 @@ class TinyTag:
 
     @property
     def duration(self) -> float: ...
+
+    @property
+    def bitrate(self) -> float: ...
+
+    @property
+    def samplerate(self) -> int: ...
@@ -0,0 +1,2 @@
+from .peaks import *  # noqa
+from .cache import *  # noqa
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import os
+import struct
+import hashlib
+import numpy as np
+from pyglet.media import load
+from pyglet.media.codecs import (
+    StreamingSource,
+    Source,
+)
+from typing import (
+    Callable,
+    Iterable,
+    Optional,
+    List,
+)
+from .peaks import (
+    compute_peaks,
+    Peaks,
+)
+
+
+__all__ = (
+    'PeakCache',
+)
+
+
+# Magic, version, buckets, duration
+HEADER = struct.Struct('<4sHId')
+MAGIC = b'PEAK'
+VERSION = 1
+# Samples are kept as signed bytes, a pixel of the seek bar is coarser than that
+SCALE = 127
+
+
+class PeakCache:
+    """A `PeakCache` keeps the peaks of the tracks in a directory, one small binary
+    file per track. A file is named after the path, size and modification time of its
+    track, so a track that changes on disk is analyzed again. The files of tracks
+    that changed or are gone are removed by `PeakCache.prune`
+    """
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def key(self, path: str) -> str:
+        """
+        :param path: The path of the track
+        :type path: str
+        :raises OSError: If the track doesn't exist
+        :return: The name of the track's file in the cache
+        :rtype: str
+        """
+        stat = os.stat(path)
+        identity = f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        return hashlib.sha1(identity.encode()).hexdigest()
+
+    def _path(self, path: str) -> str:
+        return os.path.join(self.directory, f"{self.key(path)}.peaks")
+
+    def get(self, path: str) -> Optional[Peaks]:
+        """
+        :param path: The path of the track
+        :type path: str
+        :return: The peaks of the track, None if they're not cached
+        :rtype: Optional[Peaks]
+        """
+        try:
+            with open(self._path(path), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        magic, version, buckets, duration = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION or len(data) != HEADER.size + 2 * buckets:
+            return None
+        values = np.frombuffer(data, np.int8, offset=HEADER.size).astype(np.float32) / SCALE
+        return Peaks(values[:buckets], values[buckets:], duration)
+
+    def put(self, path: str, peaks: Peaks) -> None:
+        """Save the peaks of a track, the file is replaced at once so a reader
+        never sees half of it
+
+        :param path: The path of the track
+        :type path: str
+        :param peaks: Its peaks
+        :type peaks: Peaks
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        target = self._path(path)
+        temp = f"{target}.{os.getpid()}.tmp"
+        low = np.round(np.clip(peaks.minimum, -1, 1) * SCALE).astype(np.int8)
+        high = np.round(np.clip(peaks.maximum, -1, 1) * SCALE).astype(np.int8)
+        with open(temp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(low), peaks.duration))
+            f.write(low.tobytes() + high.tobytes())
+        os.replace(temp, target)
+
+    def prune(self, paths: Iterable[str]) -> List[str]:
+        """Remove the files of every track but `paths`, as they are now on disk
+
+        :param paths: The paths of the tracks to keep, missing ones are skipped
+        :type paths: Iterable[str]
+        :return: The names of the files that were removed
+        :rtype: List[str]
+        """
+        keep = set()
+        for path in paths:
+            try:
+                keep.add(f"{self.key(path)}.peaks")
+            except OSError:
+                continue
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        removed = sorted(name for name in names if name.endswith('.peaks') and name not in keep)
+        for name in removed:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def load(self, path: str, loader: Callable[..., Source] = load,
+             report: Optional[Callable[[float], None]] = None) -> Peaks:
+        """The peaks of a track, from the cache or else decoded and saved in it.
+        This is what runs in the background
+
+        :param path: The path of the track
+        :type path: str
+        :param loader: What opens the track, it's given `streaming=True`,
+        defaults to `pyglet.media.load`
+        :type loader: Callable[..., Source], optional
+        :param report: Called with how far the decoding is, defaults to None
+        :type report: Optional[Callable[[float], None]], optional
+        :return: The peaks
+        :rtype: Peaks
+        """
+        peaks = self.get(path)
+        if peaks is not None:
+            return peaks
+        source = loader(path, streaming=True)
+        try:
+            peaks = compute_peaks(source, report=report)
+        finally:
+            if isinstance(source, StreamingSource):
+                source.delete()
+        self.put(path, peaks)
+        return peaks
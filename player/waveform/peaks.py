@@ -0,0 +1,92 @@
+from __future__ import annotations
+import math
+import numpy as np
+from pyglet.media.codecs import Source
+from audio import iter_samples
+from typing import (
+    NamedTuple,
+    Callable,
+    Optional,
+    Tuple,
+    Any,
+)
+
+
+__all__ = (
+    'Peaks',
+    'compute_peaks',
+)
+
+
+# Buckets of a waveform, more than the pixels of the seek bar
+BUCKETS = 1024
+
+
+class Peaks(NamedTuple):
+    # The lowest and the highest sample of every bucket, from -1 to 1
+    minimum: Any
+    maximum: Any
+    # Seconds of audio, all the buckets are as long
+    duration: float
+
+    def __len__(self) -> int:
+        return len(self.minimum)
+
+    def columns(self, width: int) -> Tuple[Any, Any]:
+        """Fit the peaks to a width, every column keeps the extremes of its buckets
+
+        :param width: The columns, the pixels of the waveform
+        :type width: int
+        :return: The lowest and the highest sample of every column
+        :rtype: Tuple[Any, Any]
+        """
+        if not len(self) or width <= 0:
+            return np.zeros(0, np.float32), np.zeros(0, np.float32)
+        # A column narrower than a bucket repeats it
+        starts = np.arange(width) * len(self) // width
+        return (np.minimum.reduceat(self.minimum, starts),
+                np.maximum.reduceat(self.maximum, starts))
+
+
+def compute_peaks(source: Source, buckets: int = BUCKETS,
+                  report: Optional[Callable[[float], None]] = None) -> Peaks:
+    """Decode a source to the end and keep the lowest and the highest sample of every
+    bucket of its length. The audio is taken a chunk at a time and every chunk is
+    reduced at once, so memory doesn't depend on the length of the source
+
+    :param source: A streaming source, it's read to its end
+    :type source: Source
+    :param buckets: The buckets, defaults to `BUCKETS`
+    :type buckets: int, optional
+    :param report: Called with how far the decoding is, from 0 to 1.
+    What it raises stops it, defaults to None
+    :type report: Optional[Callable[[float], None]], optional
+    :return: The peaks, empty if the source has no audio
+    :rtype: Peaks
+    """
+    fmt = source.audio_format
+    if fmt is None or not source.duration:
+        return Peaks(np.zeros(0, np.float32), np.zeros(0, np.float32), 0.0)
+    frames = source.duration * fmt.sample_rate
+    per_bucket = max(1, math.ceil(frames / buckets))
+    low = np.full(buckets, np.inf)
+    high = np.full(buckets, -np.inf)
+    position = 0
+    for samples in iter_samples(source):
+        if not len(samples):
+            continue
+        # The channels are drawn as one
+        chunk_low, chunk_high = samples.min(axis=1), samples.max(axis=1)
+        index = np.minimum((position + np.arange(len(samples))) // per_bucket, buckets - 1)
+        # The indexes only go up, every bucket of the chunk is a slice of it
+        starts = np.flatnonzero(np.diff(index, prepend=-1))
+        touched = index[starts]
+        low[touched] = np.minimum(low[touched], np.minimum.reduceat(chunk_low, starts))
+        high[touched] = np.maximum(high[touched], np.maximum.reduceat(chunk_high, starts))
+        position += len(samples)
+        if report is not None:
+            report(min(position / frames, 1.0))
+    # Buckets past the real end (the length was an estimate) are silent
+    low[np.isinf(low)] = 0
+    high[np.isinf(high)] = 0
+    return Peaks(low.astype(np.float32), high.astype(np.float32), position / fmt.sample_rate)
@@ -0,0 +1,137 @@
+import os
+import math
+import time
+import array
+import shutil
+import unittest
+import numpy as np
+from pathlib import Path
+from pyglet.media import load
+from typing import (
+    List,
+    Any,
+)
+from audio.tests import (
+    RATE,
+    write_wav,
+)
+from .peaks import (
+    compute_peaks,
+    Peaks,
+)
+from .cache import PeakCache
+
+
+BASE_DIR = Path(__file__).parent
+
+
+def pcm(samples: List[int]) -> bytes:
+    # 16 bit samples, as `write_wav` takes them
+    return array.array('h', samples).tobytes()
+
+
+class TestPeaks(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = str(Path(BASE_DIR, 'testpeaks'))
+        os.makedirs(self.dir, exist_ok=True)
+        self.path = os.path.join(self.dir, 'song.wav')
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+        return super().tearDown()
+
+    def test_buckets(self) -> None:
+        # 4 seconds, every second louder than the one before it
+        samples = [int(8000 * (i // RATE + 1) * math.sin(i / 10)) for i in range(4 * RATE)]
+        write_wav(self.path, pcm(samples))
+        reports: List[float] = []
+        peaks = compute_peaks(load(self.path, streaming=True), 8, reports.append)
+        self.assertEqual(len(peaks), 8)
+        self.assertAlmostEqual(peaks.duration, 4)
+        expected = [8000 * (i // 2 + 1) / 32768 for i in range(8)]
+        np.testing.assert_allclose(peaks.maximum, expected, atol=0.01)
+        np.testing.assert_allclose(peaks.minimum, [-x for x in expected], atol=0.01)
+        self.assertEqual(reports, sorted(reports))
+        self.assertEqual(reports[-1], 1.0)
+
+    def test_channels(self) -> None:
+        # The left channel is silent, the right one is not
+        write_wav(self.path, pcm([0, 16384, 0, -16384] * RATE), channels=2)
+        peaks = compute_peaks(load(self.path, streaming=True), 4)
+        np.testing.assert_allclose(peaks.maximum, [0.5] * 4)
+        np.testing.assert_allclose(peaks.minimum, [-0.5] * 4)
+
+    def test_columns(self) -> None:
+        peaks = Peaks(np.array([-0.1, -0.5, -0.2, -0.3]), np.array([0.1, 0.2, 0.7, 0.3]), 1.0)
+        low, high = peaks.columns(2)
+        np.testing.assert_allclose(low, [-0.5, -0.3])
+        np.testing.assert_allclose(high, [0.2, 0.7])
+        # Wider than the peaks
+        self.assertEqual(peaks.columns(8)[1].tolist(), [0.1, 0.1, 0.2, 0.2, 0.7, 0.7, 0.3, 0.3])
+
+
+class TestPeakCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = str(Path(BASE_DIR, 'testpeakcache'))
+        os.makedirs(self.dir, exist_ok=True)
+        self.path = os.path.join(self.dir, 'song.wav')
+        write_wav(self.path, pcm([0, 16384, -8192, 0] * RATE))
+        self.cache = PeakCache(os.path.join(self.dir, 'cache'))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+        return super().tearDown()
+
+    def test_round_trip(self) -> None:
+        self.assertIsNone(self.cache.get(self.path))
+        peaks = self.cache.load(self.path)
+        cached = self.cache.get(self.path)
+        assert cached is not None
+        self.assertEqual(cached.duration, peaks.duration)
+        np.testing.assert_allclose(cached.maximum, peaks.maximum, atol=1 / 127)
+        np.testing.assert_allclose(cached.minimum, peaks.minimum, atol=1 / 127)
+        # Two bytes per bucket and a small header
+        name = f"{self.cache.key(self.path)}.peaks"
+        size = os.path.getsize(os.path.join(self.cache.directory, name))
+        self.assertLess(size, 2 * len(peaks) + 32)
+
+    def test_cached(self) -> None:
+        self.cache.load(self.path)
+
+        def loader(*args: Any, **kwargs: Any) -> Any:
+            raise AssertionError('decoded again')
+
+        self.cache.load(self.path, loader)
+
+    def test_changed(self) -> None:
+        self.cache.load(self.path)
+        key = self.cache.key(self.path)
+        time.sleep(0.01)
+        write_wav(self.path, pcm([0] * RATE))
+        # Another track as far as the cache knows
+        self.assertNotEqual(self.cache.key(self.path), key)
+        self.assertIsNone(self.cache.get(self.path))
+
+    def test_prune(self) -> None:
+        self.cache.load(self.path)
+        other = os.path.join(self.dir, 'other.wav')
+        write_wav(other, pcm([0] * RATE))
+        self.cache.load(other)
+        kept = f"{self.cache.key(self.path)}.peaks"
+        # The other track is changed, its file is stale
+        time.sleep(0.01)
+        write_wav(other, pcm([1] * RATE))
+        missing = os.path.join(self.dir, 'missing.wav')
+        self.assertEqual(len(self.cache.prune([self.path, other, missing])), 1)
+        self.assertEqual(os.listdir(self.cache.directory), [kept])
+        self.assertIsNotNone(self.cache.get(self.path))
+        self.assertEqual(PeakCache(os.path.join(self.dir, 'none')).prune([]), [])
+
+    def test_corrupt(self) -> None:
+        self.cache.load(self.path)
+        with open(os.path.join(self.cache.directory, f"{self.cache.key(self.path)}.peaks"),
+                  'r+b') as f:
+            f.truncate(20)
+        self.assertIsNone(self.cache.get(self.path))
@@ -1,10 +1,16 @@
 import os
 import srt
-import json
 import datetime as dt
 from .languages import get_message
 from actions import get_active_language
 from PyQt5 import QtGui
+from scheduler import (
+    REPEATS,
+    State,
+    read_action,
+    save_action,
+    load_actions,
+)
 from actions import (
     PLATFORM,
     PLAY_BTN,
@@ -20,7 +26,6 @@ from PyQt5.QtCore import (
     pyqtSignal,
 )
 from typing import (
-    NamedTuple,
     Generator,
     Iterable,
     Optional,
@@ -330,17 +335,11 @@ class WorkerThread(QThread):
         self.finished.emit()  # type: ignore
 
 
-class State(NamedTuple):
-    name: str
-    datetime: str
-    playback: bool
-    mute: bool
-    volume: int
-    applied: bool
-
-
 class ActionsWindow(QDialog):
     # TODO: Docstrings
+    # Emitted with the action and whether it was deleted, whenever an action is saved or deleted
+    actions_changed = pyqtSignal(object, bool)
+
     def __init__(self, parent: QWidget, actions_dir: str) -> None:
         super().__init__(parent)
         self._current_actions: Dict[str, State] = {}
@@ -382,6 +381,9 @@ class ActionsWindow(QDialog):
         self.delete_action_btn.setText('Delete')
 
         self.actions_box = QComboBox(self)
+        self.repeat_box = QComboBox(self)
+        for repeat in REPEATS:
+            self.repeat_box.addItem(repeat.title() or 'Once', repeat)
 
         self.save_btn = QPushButton(self)
         self.save_btn.setText('Save action')
@@ -408,10 +410,11 @@ class ActionsWindow(QDialog):
         self.my_layout.addWidget(self.mute_btn, 3, 0, 1, 2)
         self.my_layout.addWidget(self.vol_slider, 4, 0, 1, 2)
         self.my_layout.addWidget(self.vol_lbl, 5, 0, 1, 2)
-        self.my_layout.addWidget(self.load_action_btn, 6, 0)
-        self.my_layout.addWidget(self.delete_action_btn, 6, 1)
-        self.my_layout.addWidget(self.actions_box, 7, 0, 1, 2)
-        self.my_layout.addWidget(self.save_btn, 8, 0, 1, 2)
+        self.my_layout.addWidget(self.repeat_box, 6, 0, 1, 2)
+        self.my_layout.addWidget(self.load_action_btn, 7, 0)
+        self.my_layout.addWidget(self.delete_action_btn, 7, 1)
+        self.my_layout.addWidget(self.actions_box, 8, 0, 1, 2)
+        self.my_layout.addWidget(self.save_btn, 9, 0, 1, 2)
 
         self.display()
         self.edit()
@@ -466,30 +469,18 @@ class ActionsWindow(QDialog):
         return f"{date.year()}-{date.month()}-{date.day()} {time.hour()}:{time.minute()}"
 
     def _save(self, state: State) -> None:
-        name = self.action_name.text()
-        file = f"{name}.json"
-        path = os.path.join(self._actions_dir, file)
-        with open(path, mode='w') as f:
-            json.dump(state, f)
+        save_action(self._actions_dir, state)
         self._actions_buffer = self.buf_actions()
-
-    def mark_applied(self, state: State) -> None:
-        name = state.name
-        file = f"{name}.json"
-        path = os.path.join(self._actions_dir, file)
-        with open(path, mode='r') as f:
-            state = State(*json.load(f))
-        new_state = State(state.name, state.datetime, state.playback,
-                          state.mute, state.volume, applied=True)
-        with open(path, mode='w') as f:
-            json.dump(list(new_state), f)
+        self.actions_changed.emit(state, False)
 
     def delete(self) -> None:
         name = self.action_name.text()
+        state = read_action(self._actions_dir, name)
         file = f"{name}.json"
         path = os.path.join(self._actions_dir, file)
         os.remove(path)
         self._actions_buffer = self.buf_actions()
+        self.actions_changed.emit(state, True)
         self.display()
         self.edit()
 
@@ -500,8 +491,9 @@ class ActionsWindow(QDialog):
         pb = self._playback_state
         mute = self._mute_state
         vol = self.vol_slider.value()
+        repeat = self.repeat_box.currentData()
 
-        state = State(name, datetime, pb, mute, vol, applied=False)
+        state = State(name, datetime, pb, mute, vol, applied=False, repeat=repeat)
         self._save(state)
         return state
 
@@ -512,13 +504,7 @@ class ActionsWindow(QDialog):
         :return:
         :rtype: List[State]
         """
-        actions = []
-        for file in os.listdir(self._actions_dir):
-            path = os.path.join(self._actions_dir, file)
-            with open(path, mode='r') as f:
-                state = State(*json.load(f))
-            actions.append(state)
-        return actions
+        return load_actions(self._actions_dir)
 
     def display(self) -> None:
         self.actions_box.clear()
@@ -529,16 +515,14 @@ class ActionsWindow(QDialog):
     def edit(self) -> None:
         name = self.actions_box.currentText()
         if name:
-            file = f"{name}.json"
-            path = os.path.join(self._actions_dir, file)
-            with open(path, mode='r') as f:
-                state = State(*json.load(f))
+            state = read_action(self._actions_dir, name)
 
             self.action_name.setText(state.name)
             self.dtedit.setDateTime(ActionsWindow.string_to_dt(state.datetime))
             self.set_playback_state(state.playback)
             self.set_mute_state(state.mute)
             self.vol_slider.setValue(state.volume)
+            self.repeat_box.setCurrentIndex(max(0, self.repeat_box.findData(state.repeat)))
 
     def get(self) -> Generator[State, Any, None]:
         yield from self._actions_buffer
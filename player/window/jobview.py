@@ -0,0 +1,116 @@
+from PyQt5.QtCore import (
+    pyqtSignal,
+    QObject,
+)
+from PyQt5.QtWidgets import (
+    QWidget,
+    QAction,
+    QMenu,
+)
+from jobs import (
+    JobRunner,
+    Job,
+    WORKERS,
+)
+from actions import get_active_language
+from .languages import get_message
+from .customwidgets import StatusBarButton
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+    Dict,
+    Any,
+)
+
+
+__all__ = (
+    'JobQueue',
+    'JobsButton',
+)
+
+
+class JobQueue(QObject):
+    """A `JobQueue` is the `JobRunner` of the window. The changes of the jobs come from
+    their threads, they're handed over to the window's thread as `JobQueue.changed`.
+
+    A job can be given a `done` callback, it's called in the window's thread
+    once the job is finished, whatever the way it finished
+    """
+    changed = pyqtSignal(object)
+
+    def __init__(self, parent: QObject, workers: int = WORKERS) -> None:
+        super().__init__(parent)
+        self.runner = JobRunner(self.changed.emit, workers)
+        self._done: Dict[int, Callable[[Job], None]] = {}
+        self.changed.connect(self._finish)
+
+    @property
+    def jobs(self) -> Tuple[Job, ...]:
+        return self.runner.jobs
+
+    def submit(self, name: str, func: Callable[..., Any], *args: Any,
+               done: Optional[Callable[[Job], None]] = None, **kwargs: Any) -> Job:
+        """Queue a job, it's run as `func(job, *args, **kwargs)`
+
+        :param name: What the job is shown as
+        :type name: str
+        :param func: What the job does
+        :type func: Callable[..., Any]
+        :param done: Called with the job once it's finished, defaults to None
+        :type done: Optional[Callable[[Job], None]], optional
+        :return: The job
+        :rtype: Job
+        """
+        job = self.runner.submit(name, func, *args, **kwargs)
+        if done is not None:
+            # The change that finishes the job is queued behind this
+            self._done[job.id] = done
+        return job
+
+    def _finish(self, job: Job) -> None:
+        if job.finished:
+            done = self._done.pop(job.id, None)
+            if done is not None:
+                done(job)
+
+    def shutdown(self) -> None:
+        self.runner.shutdown()
+
+
+class JobsButton(StatusBarButton):
+    """The jobs that are not finished, in the status bar. It's hidden when there's none,
+    its menu lists them with their progress and a click on one cancels it.
+    It follows the jobs of one or more queues
+    """
+    def __init__(self, parent: QWidget, *queues: JobQueue) -> None:
+        super().__init__(parent)
+        self._queues = queues
+        # By the job itself, every queue numbers its jobs from 1
+        self._actions: Dict[Job, QAction] = {}
+        self._menu = QMenu(self)
+        self._menu.triggered.connect(lambda action: action.data().cancel())  # type: ignore
+        self.setMenu(self._menu)
+        self.setToolTip(get_message(get_active_language(), 'cancel_job'))
+        for queue in queues:
+            queue.changed.connect(lambda job: self.refresh())
+        self.refresh()
+
+    def refresh(self) -> None:
+        jobs = tuple(job for queue in self._queues for job in queue.jobs)
+        # The menu may be open, its entries are updated instead of rebuilt
+        for job in tuple(self._actions):
+            if job not in jobs:
+                self._menu.removeAction(self._actions.pop(job))
+        for job in jobs:
+            action = self._actions.get(job)
+            if action is None:
+                action = self._actions[job] = self._menu.addAction(job.name)
+                action.setData(job)
+            action.setText(f"{job.name}  {job.state} {job.progress:.0%}")
+        self.setVisible(bool(jobs))
+        if not jobs:
+            self._menu.hide()
+            return
+        progress = sum(job.progress for job in jobs) / len(jobs)
+        self.setText(f"{get_message(get_active_language(), 'jobs', len(jobs))} ({progress:.0%})")
@@ -71,8 +71,21 @@ LANGUAGE = MappingProxyType({
         'donwload_prompt': 'Donwload a song',
         'download_done': 'Download completed',
         'invalid_url': 'Invalid url',
+        'download_urls_prompt': 'One or more links (videos, playlists or audio files)',
+        'downloads_failed': 'Downloads failed:',  # count
         'action_loaded': 'Action has been loaded ',  # action name
         'action_saved': 'An action has been saved: ',  # action name
+        'tick_stats': 'Tick stats (ms)',
+        'reading_songs': 'Reading songs',  # done/total
+        'measuring_songs': 'Measuring loudness',  # done/total
+        'transcoding_songs': 'Transcoding downloads',  # done/total
+        'transcode_failed': 'A download was kept as it is, it could not be transcoded: ',  # name
+        'jobs': 'Jobs',  # count
+        'cancel_job': 'Click a job to cancel it',
+        'job_failed': 'A job has failed: ',  # job name
+        'job_cancelled': 'A job has been cancelled: ',  # job name
+        'export_song': 'Export',  # song name
+        'import_songs': 'Import songs',  # count
     }),
 
     # GREEK
@@ -133,8 +146,21 @@ LANGUAGE = MappingProxyType({
         'donwload_prompt': 'Λήψη τραγουδιού',
         'download_done': 'Η λήψη ολοκληρώθηκε',
         'invalid_url': 'Μη έγκυρο url',
+        'download_urls_prompt': 'Ένας ή περισσότεροι σύνδεσμοι (βίντεο, λίστες ή αρχεία ήχου)',
+        'downloads_failed': 'Λήψεις απέτυχαν:',
         'action_loaded': 'Η ενέργεια έχει φορτωθεί: ',
         'action_saved': 'Η ενέργεια έχει ρυθμιστει: ',
+        'tick_stats': 'Στατιστικά ανανέωσης (ms)',
+        'reading_songs': 'Ανάγνωση τραγουδιών',
+        'measuring_songs': 'Μέτρηση έντασης',
+        'transcoding_songs': 'Μετατροπή λήψεων',
+        'transcode_failed': 'Μια λήψη κρατήθηκε ως έχει, δεν ήταν δυνατή η μετατροπή της: ',
+        'jobs': 'Εργασίες',
+        'cancel_job': 'Πατήστε μια εργασία για να την ακυρώσετε',
+        'job_failed': 'Μια εργασία απέτυχε: ',
+        'job_cancelled': 'Μια εργασία ακυρώθηκε: ',
+        'export_song': 'Εξαγωγή',
+        'import_songs': 'Εισαγωγή τραγουδιών',
     }),
 })
 
@@ -224,8 +250,21 @@ Field = Literal[
     'donwload_prompt',
     'download_done',
     'invalid_url',
+    'download_urls_prompt',
+    'downloads_failed',
     'action_loaded',
     'action_saved',
+    'tick_stats',
+    'reading_songs',
+    'measuring_songs',
+    'transcoding_songs',
+    'transcode_failed',
+    'jobs',
+    'cancel_job',
+    'job_failed',
+    'job_cancelled',
+    'export_song',
+    'import_songs',
 ]
 
 
@@ -0,0 +1,170 @@
+from comps import Disk
+from PyQt5.QtCore import (
+    QAbstractListModel,
+    QSortFilterProxyModel,
+    QModelIndex,
+    QObject,
+    Qt,
+)
+from typing import (
+    Iterable,
+    Optional,
+    Tuple,
+    Dict,
+    List,
+    Any,
+)
+
+
+__all__ = (
+    'SongListModel',
+    'SongFilterModel',
+    'contiguous_ranges',
+)
+
+
+# Removing that many separate ranges one by one costs more than a reset
+RESET_RANGES = 64
+
+
+def contiguous_ranges(indexes: Iterable[int]) -> List[Tuple[int, int]]:
+    """Group indexes in ranges of consecutive numbers
+
+    :param indexes: Any indexes
+    :type indexes: Iterable[int]
+    :return: `(first, last)` pairs, the last range first so they
+    can be removed one by one without moving the others
+    :rtype: List[Tuple[int, int]]
+    """
+    ranges: List[Tuple[int, int]] = []
+    for index in sorted(set(indexes), reverse=True):
+        if ranges and ranges[-1][0] == index + 1:
+            ranges[-1] = (index, ranges[-1][1])
+        else:
+            ranges.append((index, index))
+    return ranges
+
+
+class SongListModel(QAbstractListModel):
+    """A `SongListModel` shows the songs of a `Disk` in a view. Nothing is
+    copied, the view asks for the rows it displays only.
+
+    The disk must be changed through the model (`SongListModel.add`,
+    `SongListModel.remove`, `SongListModel.rename` and `SongListModel.reorder`)
+    so the view gets the exact rows that changed, or be replaced
+    with `SongListModel.set_disk`
+    """
+    def __init__(self, disk: Disk, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._disk = disk
+
+    @property
+    def disk(self) -> Disk:
+        return self._disk
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._disk)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:  # type: ignore
+        if not index.isValid() or not 0 <= index.row() < len(self._disk):
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):  # type: ignore
+            return self._disk[index.row()]
+        return None
+
+    def set_disk(self, disk: Disk) -> None:
+        self.beginResetModel()
+        self._disk = disk
+        self.endResetModel()
+
+    def add(self, songs: Iterable[str]) -> Tuple[int, ...]:
+        """Append songs to the disk, see `Disk.add`
+        """
+        new = tuple(song for song in dict.fromkeys(songs) if song not in self._disk)
+        if not new:
+            return ()
+        first = len(self._disk)
+        self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+        indexes = self._disk.add(new)
+        self.endInsertRows()
+        return indexes
+
+    def remove(self, songs: Iterable[str]) -> Tuple[int, ...]:
+        """Remove songs from the disk, see `Disk.remove`. Every run
+        of consecutive rows is removed at once, too many runs reset the model
+        """
+        songs = {song for song in songs if song in self._disk}
+        ranges = contiguous_ranges(self._disk.index_of(song) for song in songs)
+        if len(ranges) > RESET_RANGES:
+            self.beginResetModel()
+            indexes = self._disk.remove(songs)
+            self.endResetModel()
+            return indexes
+        for first, last in ranges:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self._disk.remove(self._disk[i] for i in range(first, last + 1))
+            self.endRemoveRows()
+        return tuple(i for first, last in ranges for i in range(last, first - 1, -1))
+
+    def rename(self, old: str, new: str) -> int:
+        """Rename a song of the disk, see `Disk.rename`
+        """
+        row = self._disk.rename(old, new)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)  # type: ignore
+        return row
+
+    def reorder(self, songs: Tuple[str, ...]) -> None:
+        """Put the songs of the disk in another order with a single layout
+        change, see `Disk.reorder`. Selections and the current row follow their songs
+        """
+        self.layoutAboutToBeChanged.emit()  # type: ignore
+        try:
+            persistent = self.persistentIndexList()
+            tracked = [self._disk[index.row()] for index in persistent]
+            self._disk.reorder(songs)
+            self.changePersistentIndexList(
+                persistent, [self.index(self._disk.index_of(song)) for song in tracked]
+            )
+        finally:
+            # Also when the songs are not the same, nothing moved then
+            self.layoutChanged.emit()  # type: ignore
+
+
+class SongFilterModel(QSortFilterProxyModel):
+    """A `SongFilterModel` shows the songs of a `SongListModel` that match a search,
+    in the order of the hits. Without a search it shows every song, in the order
+    of the disk. Rows of the view are mapped to rows of the disk
+    with `mapToSource` and `mapFromSource`
+    """
+    def __init__(self, model: SongListModel, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._model = model
+        self._ranks: Optional[Dict[str, int]] = None
+        self.setSourceModel(model)
+
+    @property
+    def filtering(self) -> bool:
+        return self._ranks is not None
+
+    def set_hits(self, songs: Optional[Iterable[str]]) -> None:
+        """
+        :param songs: The songs to show, best first. `None` shows every song
+        :type songs: Optional[Iterable[str]]
+        """
+        self._ranks = None if songs is None else {song: i for i, song in enumerate(songs)}
+        self.sort(-1 if self._ranks is None else 0)
+        self.invalidate()
+
+    def _song(self, row: int) -> str:
+        return self._model.disk[row]
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        return self._ranks is None or self._song(source_row) in self._ranks
+
+    def lessThan(self, left: QModelIndex, right: QModelIndex) -> bool:
+        if self._ranks is None:
+            return left.row() < right.row()
+        last = len(self._ranks)
+        return self._ranks.get(self._song(left.row()), last) < \
+            self._ranks.get(self._song(right.row()), last)
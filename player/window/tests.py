@@ -1,17 +1,38 @@
 import unittest
 import os
+import time
+import threading
 import shutil
+from unittest import mock
+from PyQt5.QtCore import QCoreApplication, QPersistentModelIndex, Qt
+from PyQt5.QtWidgets import QApplication, QWidget
+from PyQt5.QtTest import QAbstractItemModelTester
 from comps import (
     MusicPlayer,
     Disk,
 )
+from typing import Any, List
 from jsonwrapper import Handler
+from scheduler import State
 from actions import (
     BASE_DIR,
     CONFIG,
     SONGS_DIR,
     get_song_list,
 )
+from .ticker import TickScheduler
+from .customwidgets import ActionsWindow
+from .viewstate import ViewState
+from .watcher import DirectoryWatcher
+from .jobview import (
+    JobQueue,
+    JobsButton,
+)
+from .songmodel import (
+    SongListModel,
+    SongFilterModel,
+    contiguous_ranges,
+)
 from .uiactions import (
     filter_song_name,
     get_delay_key,
@@ -28,9 +49,19 @@ from .uiactions import (
     export_song,
     rename,
     search_song,
+    trim_audio,
 )
 
 BASE_TEST_DIR = os.path.join(BASE_DIR, 'player', 'window' '.ui_test_dir')
+# Widgets are tested without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def get_app() -> QCoreApplication:
+    # Widgets need a `QApplication`, the other tests run in it too
+    return QApplication.instance() or QApplication([])
+
+
 if os.path.exists(BASE_TEST_DIR):
     shutil.rmtree(BASE_TEST_DIR)
 os.mkdir(BASE_TEST_DIR)
@@ -209,6 +240,21 @@ class TestUiActions(unittest.TestCase):
         _ = '.mp3'
         # TODO: Test this without moving outside test_dir
 
+    def test_trim_audio_encoded(self) -> None:
+        # Not an MP3 file, the part is decoded and encoded by its own format
+        src = os.path.join(test_songs_dir, 'song.m4a')
+        with open(src, mode='wb') as f:
+            f.write(b'\x00\x00\x00\x20ftypM4A ' + b'\x00' * 64)
+        for dst, muxer in (('song-trimmed.m4a', 'ipod'), ('song-trimmed.webm', 'webm')):
+            with mock.patch('window.uiactions.AudioSegment') as segment:
+                times = trim_audio(src, os.path.join(test_songs_dir, dst), 1.0, 2.5)
+            self.assertEqual(times, (1.0, 2.5))
+            segment.from_file.assert_called_once_with(src, format='mp4', start_second=1.0,
+                                                      duration=1.5)
+            export = segment.from_file.return_value.export
+            export.assert_called_once_with(os.path.join(test_songs_dir, dst), format=muxer)
+        os.remove(src)
+
     def test_search_songs(self) -> None:
         songs = (
             'a',
@@ -237,3 +283,371 @@ class TestUiActions(unittest.TestCase):
         with self.assertRaises(IndexError):
             default = len(songs)
             result = search_song(songs, '...', default)
+
+
+class TestTickScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = get_app()
+        self.ticks = 0
+        self.ticker = TickScheduler(self.app, self._tick, 20, 1000)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.ticker.stop()
+        return super().tearDown()
+
+    def _tick(self) -> None:
+        self.ticks += 1
+
+    def test_mode_for(self) -> None:
+        self.assertEqual(TickScheduler.mode_for(True, True), 'playing')
+        self.assertEqual(TickScheduler.mode_for(True, False), 'hidden')
+        self.assertEqual(TickScheduler.mode_for(False, True), 'paused')
+        self.assertEqual(TickScheduler.mode_for(False, False), 'paused')
+
+    def test_set_state(self) -> None:
+        self.assertEqual(self.ticker.set_state(True, True), 'playing')
+        self.assertEqual(self.ticker.interval, 20)
+
+        self.assertEqual(self.ticker.set_state(True, False), 'hidden')
+        self.assertEqual(self.ticker.interval, 1000)
+
+        self.assertEqual(self.ticker.set_state(False, True), 'paused')
+        self.assertIsNone(self.ticker.interval)
+
+    def test_paused_refresh(self) -> None:
+        self.ticker.set_state(False, True)
+        self.app.processEvents()
+        self.assertEqual(self.ticks, 1)
+
+        # Same state, no extra refresh
+        self.ticker.set_state(False, False)
+        self.app.processEvents()
+        self.assertEqual(self.ticks, 1)
+
+    def test_wake_in(self) -> None:
+        self.ticker.set_state(True, False)
+        self.ticker.wake_in(100)
+        self.assertTrue(self.ticker.wake_pending)
+
+        # Later than the next periodic tick, not needed
+        self.ticker.wake_in(5000)
+        self.assertFalse(self.ticker.wake_pending)
+
+        self.ticker.wake_in(100)
+        self.ticker.wake_in(None)
+        self.assertFalse(self.ticker.wake_pending)
+
+        # Already due (the end of a song that's still being followed), no shot per tick
+        self.ticker.wake_in(100)
+        self.ticker.wake_in(0)
+        self.assertFalse(self.ticker.wake_pending)
+        self.ticker.wake_in(-20)
+        self.assertFalse(self.ticker.wake_pending)
+
+        self.ticker.set_state(False, False)
+        self.ticker.wake_in(100)
+        self.assertFalse(self.ticker.wake_pending)
+
+    def test_stop(self) -> None:
+        self.ticker.set_state(True, True)
+        self.ticker.wake_in(10)
+        self.ticker.stop()
+        self.assertIsNone(self.ticker.interval)
+        self.assertFalse(self.ticker.wake_pending)
+        # The window hides after it closed, it stays stopped
+        self.ticker.set_state(True, False)
+        self.ticker.wake_in(10)
+        self.assertIsNone(self.ticker.interval)
+        self.assertFalse(self.ticker.wake_pending)
+        self.ticker.refresh()
+        self.app.processEvents()
+        self.assertEqual(self.ticks, 0)
+
+
+class FakeWidget:
+    def __init__(self) -> None:
+        self.calls: List[Any] = []
+
+    def setText(self, text: str) -> None:
+        self.calls.append(text)
+
+    def setValue(self, value: int) -> None:
+        self.calls.append(value)
+
+    def setRange(self, minimum: int, maximum: int) -> None:
+        self.calls.append((minimum, maximum))
+
+
+class TestViewState(unittest.TestCase):
+    def setUp(self) -> None:
+        self.view = ViewState()
+        self.widget = FakeWidget()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        return super().tearDown()
+
+    def test_set_text(self) -> None:
+        self.view.begin_tick()
+        self.assertTrue(self.view.set_text(self.widget, 'a'))
+        self.assertFalse(self.view.set_text(self.widget, 'a'))
+        self.assertTrue(self.view.set_text(self.widget, 'b'))
+        self.assertEqual(self.widget.calls, ['a', 'b'])
+        self.assertEqual(self.view.pushed, 2)
+        self.assertEqual(self.view.avoided, 1)
+
+    def test_properties_apart(self) -> None:
+        self.view.set_value(self.widget, 1)
+        self.view.set_range(self.widget, 0, 1)
+        self.view.set_range(self.widget, 0, 1)
+        self.view.set_value(self.widget, 1)
+        self.assertEqual(self.widget.calls, [1, (0, 1)])
+
+        other = FakeWidget()
+        self.view.set_value(other, 1)
+        self.assertEqual(other.calls, [1])
+
+    def test_forget(self) -> None:
+        self.view.set_text(self.widget, 'a')
+        self.view.forget(self.widget)
+        self.view.set_text(self.widget, 'a')
+        self.assertEqual(self.widget.calls, ['a', 'a'])
+
+    def test_stats(self) -> None:
+        for _ in range(3):
+            self.view.begin_tick()
+            self.view.set_text(self.widget, 'a')
+        self.assertEqual(self.view.pushed, 0)
+        self.assertEqual(self.view.avoided, 1)
+        self.assertEqual(self.view.stats, {'ticks': 3, 'pushed': 1, 'avoided': 2})
+
+
+class TestDirectoryWatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = get_app()
+        self.dir = os.path.join(BASE_DIR, 'player', 'window', 'watcher_test_dir')
+        os.makedirs(self.dir, exist_ok=True)
+        self.batches: List[Any] = []
+        self.watcher = DirectoryWatcher(self.app, (self.dir,), delay_ms=50, max_delay_ms=200)
+        self.watcher.changed.connect(self.batches.append)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.watcher.stop()
+        shutil.rmtree(self.dir)
+        return super().tearDown()
+
+    def test_coalesce(self) -> None:
+        for _ in range(100):
+            self.watcher.notify(self.dir)
+        self.assertEqual(self.watcher.pending, (self.dir,))
+        self.assertEqual(self.batches, [])
+
+        self.assertEqual(self.watcher.flush(), (self.dir,))
+        self.assertEqual(self.batches, [(self.dir,)])
+        self.assertEqual(self.watcher.pending, ())
+        self.assertEqual(self.watcher.flush(), ())
+        self.assertEqual(len(self.batches), 1)
+
+    def test_filesystem_events(self) -> None:
+        for i in range(20):
+            with open(os.path.join(self.dir, f"{i}.mp3"), mode='w') as f:
+                f.write('')
+        deadline = time.monotonic() + 5
+        while not self.batches and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertEqual(self.batches, [(self.dir,)])
+
+
+class TestSongListModel(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = get_app()
+        self.disk = Disk(tuple(f"{i}.mp3" for i in range(10)))
+        self.model = SongListModel(self.disk)
+        # Fails the test on any inconsistent signal or answer of the model
+        self.tester = QAbstractItemModelTester(
+            self.model, QAbstractItemModelTester.FailureReportingMode.Fatal
+        )
+        self.signals: List[Any] = []
+        self.model.rowsInserted.connect(  # type: ignore
+            lambda _, first, last: self.signals.append(('+', first, last))
+        )
+        self.model.rowsRemoved.connect(  # type: ignore
+            lambda _, first, last: self.signals.append(('-', first, last))
+        )
+        self.model.layoutChanged.connect(lambda: self.signals.append('layout'))  # type: ignore
+        self.model.modelReset.connect(lambda: self.signals.append('reset'))  # type: ignore
+        return super().setUp()
+
+    def rows(self) -> List[str]:
+        return [self.model.data(self.model.index(i)) for i in range(self.model.rowCount())]
+
+    def test_contiguous_ranges(self) -> None:
+        self.assertEqual(contiguous_ranges([]), [])
+        self.assertEqual(contiguous_ranges([1, 9, 2, 3, 7, 2]), [(9, 9), (7, 7), (1, 3)])
+
+    def test_data(self) -> None:
+        self.assertEqual(self.model.rowCount(), 10)
+        self.assertEqual(self.model.data(self.model.index(3)), '3.mp3')
+        index = self.model.index(3)
+        self.assertEqual(self.model.data(index, Qt.ToolTipRole), '3.mp3')  # type: ignore
+        self.assertIsNone(self.model.data(index, Qt.DecorationRole))  # type: ignore
+
+    def test_add_remove(self) -> None:
+        self.assertEqual(self.model.add(['10.mp3', '3.mp3', '11.mp3']), (10, 11))
+        self.assertEqual(self.model.add(['10.mp3']), ())
+        self.assertEqual(self.model.remove(['1.mp3', '2.mp3', '5.mp3', 'x.mp3']), (5, 2, 1))
+        self.assertEqual(self.signals, [('+', 10, 11), ('-', 5, 5), ('-', 1, 2)])
+        self.assertEqual(self.rows(), [f"{i}.mp3" for i in (0, 3, 4, 6, 7, 8, 9, 10, 11)])
+        self.assertEqual(self.rows(), list(self.disk.full_song_list))
+
+    def test_remove_scattered(self) -> None:
+        disk = Disk(tuple(f"{i}.mp3" for i in range(1000)))
+        self.model.set_disk(disk)
+        self.signals.clear()
+        self.assertEqual(len(self.model.remove(f"{i}.mp3" for i in range(0, 1000, 2))), 500)
+        self.assertEqual(self.signals, ['reset'])
+        self.assertEqual(self.model.rowCount(), 500)
+
+    def test_rename(self) -> None:
+        changed: List[Any] = []
+        self.model.dataChanged.connect(  # type: ignore
+            lambda first, last: changed.append((first.row(), last.row()))
+        )
+        self.assertEqual(self.model.rename('4.mp3', 'four.mp3'), 4)
+        self.assertEqual(changed, [(4, 4)])
+        self.assertEqual(self.model.data(self.model.index(4)), 'four.mp3')
+
+    def test_reorder(self) -> None:
+        current = QPersistentModelIndex(self.model.index(2))
+        self.model.reorder(tuple(reversed(self.disk.full_song_list)))
+        self.assertEqual(self.signals, ['layout'])
+        self.assertEqual(self.rows()[0], '9.mp3')
+        # The persistent index follows its song
+        self.assertEqual(current.row(), 7)
+        self.assertEqual(self.model.data(self.model.index(current.row())), '2.mp3')
+        with self.assertRaises(ValueError):
+            self.model.reorder(('0.mp3',))
+
+
+class TestSongFilterModel(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = get_app()
+        self.disk = Disk(tuple(f"{i}.mp3" for i in range(10)))
+        self.model = SongListModel(self.disk)
+        self.filter = SongFilterModel(self.model)
+        self.tester = QAbstractItemModelTester(
+            self.filter, QAbstractItemModelTester.FailureReportingMode.Fatal
+        )
+        return super().setUp()
+
+    def rows(self) -> List[str]:
+        return [self.filter.data(self.filter.index(i, 0)) for i in range(self.filter.rowCount())]
+
+    def test_hits(self) -> None:
+        self.assertEqual(self.rows(), list(self.disk))
+        self.filter.set_hits(['7.mp3', '2.mp3', '5.mp3'])
+        self.assertTrue(self.filter.filtering)
+        self.assertEqual(self.rows(), ['7.mp3', '2.mp3', '5.mp3'])
+        # Rows of the view are rows of the disk
+        self.assertEqual(self.filter.mapToSource(self.filter.index(0, 0)).row(), 7)
+        self.assertFalse(self.filter.mapFromSource(self.model.index(3)).isValid())
+        self.filter.set_hits([])
+        self.assertEqual(self.rows(), [])
+        self.filter.set_hits(None)
+        self.assertFalse(self.filter.filtering)
+        self.assertEqual(self.rows(), list(self.disk))
+
+    def test_disk_changes(self) -> None:
+        self.filter.set_hits(['3.mp3', '1.mp3'])
+        self.model.remove(['3.mp3'])
+        self.model.add(['10.mp3'])
+        self.assertEqual(self.rows(), ['1.mp3'])
+        self.model.reorder(tuple(reversed(self.disk)))
+        self.assertEqual(self.rows(), ['1.mp3'])
+        self.filter.set_hits(None)
+        self.assertEqual(self.rows(), list(self.disk))
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = get_app()
+        self.queue = JobQueue(self.app, workers=2)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.queue.shutdown()
+        return super().tearDown()
+
+    def test_done_in_main_thread(self) -> None:
+        done: List[Any] = []
+
+        def work(job: Any) -> str:
+            job.report(0.5)
+            return threading.current_thread().name
+
+        job = self.queue.submit('work', work, done=lambda job: done.append(
+            (job.result, threading.current_thread() is threading.main_thread())))
+        deadline = time.monotonic() + 5
+        while not done and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.assertEqual(job.state, 'done')
+        self.assertTrue(job.result.startswith('job'))
+        self.assertEqual(done, [(job.result, True)])
+        self.assertEqual(self.queue.jobs, ())
+
+
+class TestJobsButton(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = get_app()
+        self.release = threading.Event()
+        self.queues = (JobQueue(self.app), JobQueue(self.app))
+        self.button = JobsButton(None, *self.queues)  # type: ignore
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.release.set()
+        for queue in self.queues:
+            queue.shutdown()
+        return super().tearDown()
+
+    def wait(self, job: Any) -> None:
+        while not self.release.wait(0.001):
+            job.check()
+
+    def test_queues(self) -> None:
+        # Both queues number their jobs from 1
+        trim = self.queues[0].submit('trim x', self.wait)
+        download = self.queues[1].submit('download y', self.wait)
+        self.assertEqual(trim.id, download.id)
+        self.app.processEvents()
+        self.button.refresh()
+        actions = self.button.menu().actions()
+        self.assertEqual([action.data() for action in actions], [trim, download])
+        self.assertTrue(actions[1].text().startswith('download y'))
+        actions[1].trigger()
+        self.assertTrue(download.cancelled)
+        self.assertFalse(trim.cancelled)
+
+
+class TestActionsWindow(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = get_app()
+        self.actions_dir = os.path.join(BASE_TEST_DIR, 'actions')
+        os.makedirs(self.actions_dir, exist_ok=True)
+        self.parent = QWidget()
+        self.window = ActionsWindow(self.parent, self.actions_dir)
+        self.changes: List[Any] = []
+        self.window.actions_changed.connect(lambda *args: self.changes.append(args))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.actions_dir)
+
+    def test_save_emits_state(self) -> None:
+        state = State('a', '2023-5-6 13:4', True, False, 50, False)
+        self.window._save(state)
+        self.assertEqual(self.changes, [(state, False)])
+        self.assertEqual(list(self.window.get()), [state])
@@ -0,0 +1,132 @@
+from PyQt5.QtCore import (
+    Qt,
+    QTimer,
+    QObject,
+)
+from typing import (
+    Callable,
+    Optional,
+    Literal,
+)
+
+
+__all__ = (
+    'TickMode',
+    'TickScheduler',
+)
+
+
+TickMode = Literal[
+    'playing',
+    'hidden',
+    'paused',
+]
+
+
+class TickScheduler(QObject):
+    """A `TickScheduler` drives the UI tick depending on what the player is doing:
+
+    - `playing`: The window is visible and the song plays. Tick every `frame_ms`
+    - `hidden`: The song plays but nothing is visible. Tick every `hidden_ms`
+    - `paused`: Nothing moves. No ticks at all, only single refreshes on request
+
+    On top of that, a precise single shot can be armed with `TickScheduler.wake_in`
+    for the next known event (a lyric line or the end of the song) so it's not
+    missed or delayed by the reduced rates
+    """
+    def __init__(self, parent: QObject, callback: Callable[[], None],
+                 frame_ms: int, hidden_ms: int = 1000) -> None:
+        super().__init__(parent)
+        self._callback = callback
+        self._frame_ms = frame_ms
+        self._hidden_ms = hidden_ms
+        self._mode: Optional[TickMode] = None
+        # Once stopped for good, nothing starts it again
+        self._stopped = False
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._tick)  # type: ignore
+        self._wake = QTimer(self)
+        self._wake.setSingleShot(True)
+        self._wake.setTimerType(Qt.PreciseTimer)  # type: ignore
+        self._wake.timeout.connect(self._tick)  # type: ignore
+
+    @property
+    def mode(self) -> Optional[TickMode]:
+        return self._mode
+
+    @property
+    def interval(self) -> Optional[int]:
+        """
+        :return: The interval of the periodic tick or `None` if it's stopped
+        :rtype: Optional[int]
+        """
+        return self._timer.interval() if self._timer.isActive() else None
+
+    @property
+    def wake_pending(self) -> bool:
+        return self._wake.isActive()
+
+    @staticmethod
+    def mode_for(playing: bool, visible: bool) -> TickMode:
+        if not playing:
+            return 'paused'
+        return 'playing' if visible else 'hidden'
+
+    def _tick(self) -> None:
+        if not self._stopped:
+            self._callback()
+
+    def set_state(self, playing: bool, visible: bool) -> TickMode:
+        """Switch to the mode that matches the player's state. Switching to
+        `paused` triggers one last refresh so the UI shows the final state
+
+        :param playing: Whether the song plays
+        :type playing: bool
+        :param visible: Whether the window is visible
+        :type visible: bool
+        :return: The active mode
+        :rtype: TickMode
+        """
+        mode = self.mode_for(playing, visible)
+        if mode == self._mode or self._stopped:
+            return mode
+
+        self._mode = mode
+        if mode == 'playing':
+            self._timer.start(self._frame_ms)
+        elif mode == 'hidden':
+            self._timer.start(self._hidden_ms)
+        else:
+            self._timer.stop()
+            self._wake.stop()
+            self.refresh()
+        return mode
+
+    def wake_in(self, ms: Optional[float]) -> None:
+        """Arm (or re-arm) the precise single shot. It is only armed
+        if it would fire before the next periodic tick. A moment that is already
+        due disarms it, the tick that asks is the one for it
+
+        :param ms: Milliseconds from now or `None` to disarm
+        :type ms: Optional[float]
+        """
+        if ms is None or ms <= 0 or not self._timer.isActive() or \
+                ms >= self._timer.remainingTime():
+            self._wake.stop()
+            return
+        self._wake.start(int(ms))
+
+    def refresh(self) -> None:
+        """Run a single tick as soon as the event loop is free
+        """
+        QTimer.singleShot(0, self._tick)
+
+    def stop(self) -> None:
+        """Stop ticking for good, when the window closes. State changes and
+        refreshes that come after are ignored
+        """
+        self._stopped = True
+        self._timer.stop()
+        self._wake.stop()
+        self._mode = None
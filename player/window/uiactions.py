@@ -2,15 +2,32 @@ import os
 import shutil
 import traceback
 import datetime
-from pytube import YouTube
+import urllib.parse
+from pytube import (
+    YouTube,
+    Playlist,
+)
+from pydub import AudioSegment
+from mp3 import (
+    MP3Error,
+    cut,
+)
+from downloads import (
+    sniff_container,
+    fetch_url,
+    move_unique,
+    CODECS,
+)
 from jsonwrapper import Handler
 from lyricshandler import Creator
 from .languages import get_message
 from typing import (
-    List,
-    Tuple,
-    Union,
+    Callable,
+    Optional,
     Iterable,
+    Union,
+    Tuple,
+    List,
 )
 from comps import (
     Disk,
@@ -206,18 +223,25 @@ def edit_volume(config: Handler, player: MusicPlayer, volume: int) -> None:
         player.set_volume(config.get('volume'))
 
 
-def import_songs(songs: List[str], target_dir: str) -> None:
+def import_songs(songs: List[str], target_dir: str,
+                 progress: Optional[Callable[[float], None]] = None) -> None:
     """Move a list of songs to app's main song directory
 
     :param songs: A list of full paths of songs to be imported
     :type songs: List[str]
     :param target_dir: The main app's songs directory
     :type target_dir: str
+    :param progress: Called with the part of the songs that is imported, from 0 to 1,
+    defaults to None
+    :type progress: Optional[Callable[[float], None]], optional
     """
-    for song in songs:
-        if song != os.path.join(target_dir, song):
+    for i, song in enumerate(songs, 1):
+        # A full path is never joined to `target_dir`, it's compared to it
+        if os.path.dirname(os.path.abspath(song)) != os.path.abspath(target_dir):
             shutil.copy(song, target_dir)
             logger.debug(f"{song} -> {target_dir}")
+        if progress is not None:
+            progress(i / len(songs))
 
 
 def delete_song(path: str, song_name: str) -> None:
@@ -324,13 +348,94 @@ def time_to_total_seconds(time: str) -> float:
     return total_seconds
 
 
-def download_audio(yt_link: str, dst_path: str, forbidden_chars: Iterable[str]) -> None:
-    video = YouTube(yt_link)
-    video = video.streams.get_audio_only()  # type: ignore
+def download_audio(yt_link: str, dst_path: str, forbidden_chars: Iterable[str],
+                   progress: Optional[Callable[[float], None]] = None,
+                   workers: int = 1) -> str:
+    stream = YouTube(yt_link).streams.get_audio_only()
+    if stream is None:
+        raise ValueError(f"{yt_link} has no audio stream")
 
-    path = video.download(dst_path)
+    # The stream keeps its extension, what it really is is found out when it's
+    # transcoded (see `downloads.TranscodePool`)
+    stem, extension = os.path.splitext(stream.default_filename)
+    name = filter_song_name(stem, forbidden_chars) + extension
 
-    audio_name = path.split(os.sep)[-1]
-    audio_name = path.split(os.sep)[-1][:audio_name.rfind('.')] + '.mp3'
+    # Fetched like a link to a file, so a stopped download goes on where it was.
+    # The URL of the stream changes every time, the download is known by the video's
+    return fetch_url(stream.url, dst_path, progress, name, workers, key=yt_link)
 
-    os.rename(path, os.path.join(dst_path, filter_song_name(audio_name, forbidden_chars)))
+
+def is_youtube(url: str) -> bool:
+    host = urllib.parse.urlparse(url).hostname or ''
+    return host == 'youtu.be' or host == 'youtube.com' or host.endswith('.youtube.com')
+
+
+def playlist_videos(url: str) -> List[str]:
+    """
+    :param url: The URL of a YouTube playlist
+    :type url: str
+    :return: The URLs of its videos
+    :rtype: List[str]
+    """
+    return list(Playlist(url).video_urls)
+
+
+def fetch_song(url: str, dst_path: str, forbidden_chars: Iterable[str],
+               progress: Optional[Callable[[float], None]] = None, workers: int = 1) -> str:
+    """Download a song from a YouTube video or from a link to an audio file
+
+    :param url: The URL
+    :type url: str
+    :param dst_path: Where the download is put, it becomes a song once it is transcoded
+    :type dst_path: str
+    :param forbidden_chars: Characters that are left out of the name of the song
+    :type forbidden_chars: Iterable[str]
+    :param progress: Called with how far the download is, from 0 to 1, defaults to None
+    :type progress: Optional[Callable[[float], None]], optional
+    :param workers: The connections of a big file (see `downloads.fetch_url`),
+    defaults to 1
+    :type workers: int, optional
+    :return: The path of the song
+    :rtype: str
+    """
+    if is_youtube(url):
+        return download_audio(url, dst_path, forbidden_chars, progress, workers)
+    path = fetch_url(url, dst_path, progress, workers=workers)
+    target = os.path.join(dst_path, filter_song_name(os.path.basename(path), forbidden_chars))
+    return path if target == path else move_unique(path, target)
+
+
+def trim_audio(src: str, dst: str, start: float, stop: float,
+               progress: Optional[Callable[[float], None]] = None) -> Tuple[float, float]:
+    """Cut the part of a song between two timestamps into a new file. The frames of an
+    MP3 file are copied as they are (see `mp3.cut`), a file that can't be cut that way
+    is decoded and encoded again, only the part that is kept. It's decoded by what its
+    bytes are and encoded by the extension of `dst`
+
+    :param src: The path of the song
+    :type src: str
+    :param dst: The path of the new file
+    :type dst: str
+    :param start: Seconds from the start of the song
+    :type start: float
+    :param stop: Seconds from the start of the song
+    :type stop: float
+    :param progress: Called with how far the trim is, from 0 to 1, defaults to None
+    :type progress: Optional[Callable[[float], None]], optional
+    :return: Where the new file really starts and stops in the song
+    :rtype: Tuple[float, float]
+    """
+    try:
+        result = cut(src, dst, start, stop, progress)
+    except MP3Error as err:
+        logger.debug(f"{get_datetime()} {err}, trimming with a new encoding")
+        container = sniff_container(src)
+        if container == 'unknown':
+            container = os.path.splitext(src)[1][1:].lower() or 'mp3'
+        extract = AudioSegment.from_file(src, format=container, start_second=start,
+                                         duration=stop - start)
+        extension = os.path.splitext(dst)[1][1:].lower() or 'mp3'
+        muxers = dict(CODECS.values())
+        extract.export(dst, format=muxers.get(extension, extension))
+        return start, stop
+    return result.start, result.stop
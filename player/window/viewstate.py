@@ -0,0 +1,92 @@
+from typing import (
+    Callable,
+    Tuple,
+    Dict,
+    Any,
+)
+
+
+__all__ = (
+    'ViewState',
+)
+
+
+class ViewState:
+    """A `ViewState` remembers the last value that was rendered on every
+    widget (or any other object) it handles and only pushes a value
+    when it's different. Qt schedules a (coalesced) repaint by itself
+    when a value really changes, so nothing is repainted for unchanged values.
+
+    `ViewState.pushed` and `ViewState.avoided` count the updates since
+    `ViewState.begin_tick`, the totals are kept in `ViewState.stats`
+    """
+    def __init__(self) -> None:
+        self._last: Dict[Tuple[int, str], Any] = {}
+        self.pushed = 0
+        self.avoided = 0
+        self._total_pushed = 0
+        self._total_avoided = 0
+        self._ticks = 0
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'ticks': self._ticks,
+            'pushed': self._total_pushed + self.pushed,
+            'avoided': self._total_avoided + self.avoided,
+        }
+
+    def begin_tick(self) -> None:
+        self._total_pushed += self.pushed
+        self._total_avoided += self.avoided
+        self.pushed = 0
+        self.avoided = 0
+        self._ticks += 1
+
+    def set(self, target: object, prop: str, value: Any,
+            apply: Callable[[Any], Any]) -> bool:
+        """Call `apply(value)` if `value` is not what was last set as `prop` of `target`
+
+        :param target: The object that is updated
+        :type target: object
+        :param prop: A name for the updated property
+        :type prop: str
+        :param value: The new value
+        :type value: Any
+        :param apply: What actually sets the value
+        :type apply: Callable[[Any], Any]
+        :return: Whether the value was pushed
+        :rtype: bool
+        """
+        key = (id(target), prop)
+        if key in self._last and self._last[key] == value:
+            self.avoided += 1
+            return False
+        self._last[key] = value
+        apply(value)
+        self.pushed += 1
+        return True
+
+    def set_text(self, widget: Any, text: str) -> bool:
+        return self.set(widget, 'text', text, widget.setText)
+
+    def set_value(self, widget: Any, value: int) -> bool:
+        return self.set(widget, 'value', value, widget.setValue)
+
+    def set_range(self, widget: Any, minimum: int, maximum: int) -> bool:
+        return self.set(widget, 'range', (minimum, maximum),
+                        lambda r: widget.setRange(*r))
+
+    def forget(self, target: object) -> None:
+        """Forget everything about `target`, so the next value is always pushed.
+        Use it when the object changed outside of the `ViewState`
+
+        :param target: The object to forget
+        :type target: object
+        """
+        for key in tuple(self._last):
+            if key[0] == id(target):
+                del self._last[key]
@@ -0,0 +1,93 @@
+import os
+import time
+from PyQt5.QtCore import (
+    QFileSystemWatcher,
+    pyqtSignal,
+    QObject,
+    QTimer,
+)
+from typing import (
+    Iterable,
+    Optional,
+    Tuple,
+    Set,
+)
+
+
+__all__ = (
+    'DirectoryWatcher',
+)
+
+
+class DirectoryWatcher(QObject):
+    """A `DirectoryWatcher` watches directories (inotify backed on linux) and
+    coalesces bursts of changes into a single `DirectoryWatcher.changed`
+    signal with every directory that changed.
+
+    The signal is emitted once nothing changed for `delay_ms`, but never
+    later than `max_delay_ms` after the first change of a burst, so a long
+    bulk copy still shows up in batches while it's running
+    """
+    changed = pyqtSignal(tuple)
+
+    def __init__(self, parent: QObject, paths: Iterable[str],
+                 delay_ms: int = 250, max_delay_ms: int = 2000) -> None:
+        super().__init__(parent)
+        self._paths = tuple(paths)
+        self._delay_ms = delay_ms
+        self._max_delay_ms = max_delay_ms
+        self._pending: Set[str] = set()
+        self._first: Optional[float] = None
+
+        self._watcher = QFileSystemWatcher(list(self._paths), self)
+        self._watcher.directoryChanged.connect(self.notify)  # type: ignore
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)  # type: ignore
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        return self._paths
+
+    @property
+    def pending(self) -> Tuple[str, ...]:
+        return tuple(sorted(self._pending))
+
+    def notify(self, path: str) -> None:
+        """Record a change of `path` and (re)start the countdown to the flush
+
+        :param path: The directory that changed
+        :type path: str
+        """
+        self._pending.add(path)
+        now = time.monotonic()
+        if self._first is None:
+            self._first = now
+        waited = (now - self._first) * 1000
+        self._timer.start(int(max(0, min(self._delay_ms, self._max_delay_ms - waited))))
+
+    def flush(self) -> Tuple[str, ...]:
+        """Emit the pending changes now
+
+        :return: The directories that changed
+        :rtype: Tuple[str, ...]
+        """
+        self._timer.stop()
+        paths = self.pending
+        self._pending.clear()
+        self._first = None
+        # A directory that is removed and created again is not watched anymore
+        watched = self._watcher.directories()
+        for path in self._paths:
+            if path not in watched and os.path.isdir(path):
+                self._watcher.addPath(path)
+        if paths:
+            self.changed.emit(paths)
+        return paths
+
+    def stop(self) -> None:
+        self._timer.stop()
+        self._pending.clear()
+        self._first = None
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
@@ -0,0 +1,141 @@
+import numpy as np
+from waveform import Peaks
+from PyQt5.QtCore import (
+    QRect,
+    Qt,
+)
+from PyQt5.QtGui import (
+    QPaintEvent,
+    QPainter,
+    QPixmap,
+    QColor,
+)
+from PyQt5.QtWidgets import (
+    QSlider,
+    QWidget,
+    QStyle,
+)
+from typing import (
+    Optional,
+    Tuple,
+)
+
+
+__all__ = (
+    'WaveformSlider',
+)
+
+
+PLAYED = QColor(140, 190, 255, 200)
+UNPLAYED = QColor(255, 255, 255, 90)
+MARK = QColor(255, 80, 80)
+SELECTION = QColor(255, 80, 80, 50)
+
+
+class WaveformSlider(QSlider):
+    """The seek bar of the song, with the song's waveform behind it. What's played
+    is drawn in another color and the start and the stop of a trim are marked on it.
+
+    The waveform is drawn once per size into two pixmaps, a repaint only
+    copies them, so the tick can move the slider as often as before
+    """
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(Qt.Orientation.Horizontal, parent)
+        self._peaks: Optional[Peaks] = None
+        # Slider values, like the position
+        self._marks: Tuple[Optional[int], Optional[int]] = (None, None)
+        self._pixmaps: Optional[Tuple[QPixmap, QPixmap]] = None
+
+    @classmethod
+    def replace(cls, slider: QSlider) -> 'WaveformSlider':
+        """Take the place of a slider of a loaded .ui file, with its name and geometry
+
+        :param slider: The slider, it's deleted
+        :type slider: QSlider
+        :return: The new slider
+        :rtype: WaveformSlider
+        """
+        new = cls(slider.parentWidget())
+        new.setObjectName(slider.objectName())
+        new.setGeometry(slider.geometry())
+        new.setCursor(slider.cursor())
+        new.setRange(slider.minimum(), slider.maximum())
+        new.setValue(slider.value())
+        new.stackUnder(slider)
+        slider.hide()
+        slider.deleteLater()
+        new.show()
+        return new
+
+    @property
+    def peaks(self) -> Optional[Peaks]:
+        return self._peaks
+
+    def set_peaks(self, peaks: Optional[Peaks]) -> None:
+        """
+        :param peaks: The waveform of the song, None for a plain slider
+        :type peaks: Optional[Peaks]
+        """
+        self._peaks = peaks if peaks is not None and len(peaks) else None
+        self._pixmaps = None
+        self.update()
+
+    @property
+    def marks(self) -> Tuple[Optional[int], Optional[int]]:
+        return self._marks
+
+    def set_marks(self, start: Optional[int] = None, stop: Optional[int] = None) -> None:
+        """Mark the start and the stop of a trim, in slider values
+
+        :param start: Where it starts, defaults to None
+        :type start: Optional[int], optional
+        :param stop: Where it stops, defaults to None
+        :type stop: Optional[int], optional
+        """
+        if (start, stop) != self._marks:
+            self._marks = (start, stop)
+            self.update()
+
+    def resizeEvent(self, a0: object) -> None:
+        self._pixmaps = None
+        super().resizeEvent(a0)  # type: ignore
+
+    def _x(self, value: int) -> int:
+        return QStyle.sliderPositionFromValue(self.minimum(), self.maximum(),
+                                              value, self.width())
+
+    def _draw(self, color: QColor) -> QPixmap:
+        assert self._peaks is not None
+        pixmap = QPixmap(self.size())
+        pixmap.fill(Qt.GlobalColor.transparent)
+        low, high = self._peaks.columns(self.width())
+        middle = self.height() / 2
+        tops = np.round(middle - high * middle).astype(int)
+        bottoms = np.round(middle - low * middle).astype(int)
+        painter = QPainter(pixmap)
+        painter.setPen(color)
+        for x, (top, bottom) in enumerate(zip(tops.tolist(), bottoms.tolist())):
+            painter.drawLine(x, top, x, bottom)
+        painter.end()
+        return pixmap
+
+    def paintEvent(self, ev: QPaintEvent) -> None:
+        painter = QPainter(self)
+        if self._peaks is not None:
+            if self._pixmaps is None:
+                self._pixmaps = (self._draw(PLAYED), self._draw(UNPLAYED))
+            played, unplayed = self._pixmaps
+            position = self._x(self.value())
+            painter.drawPixmap(0, 0, unplayed)
+            painter.drawPixmap(QRect(0, 0, position, self.height()),
+                               played, QRect(0, 0, position, self.height()))
+        start, stop = self._marks
+        if start is not None and stop is not None and start < stop:
+            painter.fillRect(QRect(self._x(start), 0, self._x(stop) - self._x(start),
+                                   self.height()), SELECTION)
+        painter.setPen(MARK)
+        for mark in self._marks:
+            if mark is not None:
+                painter.drawLine(self._x(mark), 0, self._x(mark), self.height())
+        painter.end()
+        super().paintEvent(ev)
@@ -1,21 +1,55 @@
 # mypy: ignore-errors
 import os
+import time
 import pyglet
 import random
 import datetime
 import webbrowser
-from pytube.helpers import regex_search
-from pytube.exceptions import RegexMatchError
-from pydub import AudioSegment
-from comps import MusicPlayer
-from tinytag import TinyTag
+from comps import MusicPlayer, songs_identity
+from mp3 import MP3Error, SeekIndexCache, build_index, read_toc, open_at
+from library import (
+    LibraryIndex,
+    LibraryDelta,
+    SearchIndex,
+    ProbePool,
+    AnalysisPool,
+    TrackMeta,
+    tokenize,
+)
+from loudness import track_gain
+from audio import PlaybackEngine, PCMCache
+from jobs import Job
+from downloads import (
+    DownloadManager,
+    DownloadQueue,
+    TranscodePool,
+    TranscodeSettings,
+    remove_partials,
+    split_urls,
+    RETRIES,
+)
+from waveform import PeakCache
+from profiler import TickProfiler
+from scheduler import (
+    ActionScheduler,
+    State,
+)
 from PyQt5.QtGui import QKeySequence
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QTimer, QEvent, Qt
 from PyQt5 import uic, QtGui
 from .languages import (
     get_message,
     get_available_languages,
 )
+from .ticker import TickScheduler
+from .viewstate import ViewState
+from .watcher import DirectoryWatcher
+from .songmodel import SongListModel, SongFilterModel
+from .jobview import (
+    JobQueue,
+    JobsButton,
+)
+from .waveview import WaveformSlider
 from .qstyles import (
     lineedit_style,
     popup_lbl,
@@ -25,6 +59,7 @@ from typing import (
     Iterable,
     Callable,
     Literal,
+    Optional,
     Tuple,
     Union,
     Dict,
@@ -45,9 +80,11 @@ from .uiactions import (
     delete_song,
     export_song,
     rename,
-    search_song,
+    filter_song_name,
     time_to_total_seconds,
-    download_audio,
+    playlist_videos,
+    fetch_song,
+    trim_audio,
 )
 from lyricshandler import (
     Renderer,
@@ -79,7 +116,12 @@ from actions import (
     FORBIDDEN_CHARS,
     SUPPORTED_SONG_FORMATS,
     SUPPORTED_LYRICS_FORMATS,
-    get_song_list,
+    SEEK_INDEX_FILE,
+    PROFILE_FILE,
+    LIBRARY_FILE,
+    WAVEFORM_DIR,
+    DOWNLOAD_QUEUE_FILE,
+    DOWNLOAD_STAGING_DIR,
     get_active_language,
     logger,
     config,
@@ -90,11 +132,9 @@ from .customwidgets import (
     StatusBarButton,
     ComboboxDialog,
     ActionsWindow,
-    WorkerThread,
     RenamePrompt,
     LogsWindow,
     TextEditor,
-    State,
 )
 from PyQt5.QtWidgets import (
     QLabel,
@@ -103,7 +143,7 @@ from PyQt5.QtWidgets import (
     QShortcut,
     QStatusBar,
     QMainWindow,
-    QListWidget,
+    QListView,
     QPushButton,
     QFileDialog,
     QMessageBox,
@@ -121,7 +161,11 @@ class MainWindow(QMainWindow):
         self.setFixedSize(self.width(), self.height())
         lang = get_active_language()
         logger.info(f"{get_datetime()} {get_message(lang, 'init_app_msg')}")
-        self.player = MusicPlayer(get_disk(config, get_song_list(SONGS_DIR)),
+        self.library = LibraryIndex(LIBRARY_FILE, SONGS_DIR)
+        self.library.reconcile()
+        self.search_index = SearchIndex()
+        self.search_index.add_many((track.name, track.tags) for track in self.library.tracks())
+        self.player = MusicPlayer(get_disk(config, self.library.songs()),
                                   config.get('is_muted'), config.get('volume'))
 
         self.trim_mode = False
@@ -133,12 +177,60 @@ class MainWindow(QMainWindow):
 
         self.set_title()
 
-        self.sound = pyglet.media.Player()
-        self.current_song = pyglet.media.load(self.player.disk.song_path)
+        self.seek_indexes = SeekIndexCache(SEEK_INDEX_FILE)
+        self.track = self._track_meta()
+        self.track_gain = self._track_gain()
+        # One player for the whole session. The next song is opened in the background
+        # while the current one plays and queued behind it (see `follow_tracks`)
+        buffer_size = int(config.get('stream_buffer_mb', 4) * 2 ** 20)
+        # Songs played last stay decoded in memory, replaying them doesn't decode them again
+        cache_size = int(config.get('pcm_cache_mb', 128) * 2 ** 20)
+        self.pcm_cache = PCMCache(cache_size) if cache_size > 0 else None
+        self.engine = PlaybackEngine(pyglet.media.load, buffer_size=buffer_size,
+                                     cache=self.pcm_cache, reopen=self._reopen)
         self.lyrics = Renderer(get_lyrics_file(LYRICS_DIR, self.player, Renderer.EXTENSION))
-        self.sound.queue(self.current_song)
+        self.engine.open(self.player.disk.song_path)
+        self.engine.prepare(self.player.disk.next_song_path)
         logger.info(f"{get_datetime()} {get_message(lang, 'init_media_msg')}")
 
+        # Dynamic updating. The tick rate follows the player's state (see `sync_ticker`)
+        self.ticker = TickScheduler(self, self.update, config.get('max_frame_rate'))
+        # Last values rendered by the tick, so unchanged values are not pushed to Qt
+        self.view = ViewState()
+        self.profiler = TickProfiler(config.get('max_frame_rate'))
+        # Trims, imports, exports and downloads run in the background (see `JobQueue`)
+        self.jobs = JobQueue(self)
+        # The waveform and the seek index of a song are worked out one at a time and
+        # only the current song's ones are wanted, they're not listed with the jobs
+        self.song_jobs = JobQueue(self, workers=1)
+        self.peak_cache = PeakCache(WAVEFORM_DIR)
+        self._prune_waveforms()
+        self.waveform_job: Optional[Job] = None
+        self.seek_index_job: Optional[Job] = None
+        # Downloads have workers of their own, they're listed with the jobs.
+        # What was not downloaded when the player closed goes on at the next launch
+        self.download_jobs = JobQueue(self, workers=config.get('download_workers', 3))
+        forbidden_chars = self.forbidden_chars
+        connections = config.get('download_connections', 4)
+        self.downloads = DownloadManager(
+            self._submit_download,
+            lambda url, progress: fetch_song(url, DOWNLOAD_STAGING_DIR, forbidden_chars,
+                                             progress, connections),
+            DownloadQueue(DOWNLOAD_QUEUE_FILE), playlist_videos,
+            config.get('download_retries', RETRIES),
+        )
+        # Downloads land in a directory of their own and become songs in worker
+        # processes, encoded by ffmpeg. The library is updated once a batch is done
+        self.transcoder = TranscodePool(DOWNLOAD_STAGING_DIR, SONGS_DIR, TranscodeSettings(
+            config.get('transcode', True),
+            config.get('transcode_codec', 'libmp3lame'),
+            config.get('transcode_bitrate', '192k'),
+        ))
+        self.transcoded = 0
+        self.transcode_timer = QTimer(self)
+        self.transcode_timer.setInterval(500)
+        self.transcode_timer.timeout.connect(self.collect_transcodes)
+
         # Load components
         self._load_sliders()
         self._load_labels()
@@ -146,11 +238,15 @@ class MainWindow(QMainWindow):
         self._load_btns()
         self._load_status_bar()
         self._load_line_edits()
+        self._load_seek_index()
+        self._load_waveform()
+        # Taken before the downloads go on, so a stream that's being written is not in it
+        leftovers = self.transcoder.leftovers()
+        self.downloads.resume()
 
         # Set UI
         self.play_btn.setIcon(QtGui.QIcon(self.play_btn_switcher()))
         self.current_playing_lbl.setText(self.player.disk.song_name)
-        self.music_container.setCurrentRow(self.player.disk.song_index)
         self.volume_lbl.setText(f"Vol: {self.player.volume}")
         self.volume_bar.setValue(self.player.volume)
         self.volume_bar.setTickPosition(10)
@@ -159,7 +255,7 @@ class MainWindow(QMainWindow):
 
         # Set commands
         self.play_btn.clicked.connect(lambda: self.play_btn_switcher())
-        self.music_container.itemDoubleClicked.connect(
+        self.music_container.doubleClicked.connect(
             lambda: self.manual_pick(self.music_container)
         )
         self.volume_bar.valueChanged.connect(lambda: self.volume_control(self.volume_bar.value()))
@@ -176,7 +272,12 @@ class MainWindow(QMainWindow):
         self.lyrics_btn.clicked.connect(lambda: self.make_lyrics())
         self.forward_btn.clicked.connect(lambda: self.small_step(1))  # seconds
         self.backward_btn.clicked.connect(lambda: self.small_step(- 1))  # seconds
-        self.search_ln.textChanged.connect(lambda: self.search_song())
+        # Searching waits for a short pause in typing
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.search_song)
+        self.search_ln.textChanged.connect(lambda: self.search_timer.start())
 
         last_song = config.get('last_song')
         if last_song:
@@ -217,6 +318,7 @@ class MainWindow(QMainWindow):
         self.actionReset.triggered.connect(lambda: self.restore_settings())
         self.actionDelete.triggered.connect(lambda: self.delete_lyrics())
         self.actionSee_logs.triggered.connect(lambda: self.check_logs())
+        self.actionTick_stats.triggered.connect(lambda: self.tick_stats())
         self.actionSource_code.triggered.connect(lambda: webbrowser.open(SOURCE_CODE))
         self.actionExport_song.triggered.connect(lambda: self.export_song())
         self.actionRename_song.triggered.connect(lambda: self.rename_song())
@@ -234,10 +336,39 @@ class MainWindow(QMainWindow):
         self.actionSearch_online.triggered.connect(lambda: self.search_in('lyrics'))
         self.actionSearch_online_2.triggered.connect(lambda: self.search_in('youtube'))
 
-        # Dynamic updating
-        self.timer = QTimer(self.total_time_lbl)
-        self.timer.timeout.connect(self.update)
-        self.timer.start(config.get('max_frame_rate'))
+        # Scheduled actions. Nothing is polled, a single shot timer
+        # fires when the next action is due
+        self.scheduler = ActionScheduler(ACTIONS_DIR, config.get('catch_up_actions', True))
+        self.scheduler.load()
+        self.actions_timer = QTimer(self)
+        self.actions_timer.setSingleShot(True)
+        self.actions_timer.timeout.connect(self.run_actions)
+        self.arm_actions()
+
+        # Songs and lyrics that are added, removed or renamed outside
+        # of the app are picked up in batches
+        self.lyrics_stamp = self._lyrics_stamp()
+        self.watcher = DirectoryWatcher(self, (SONGS_DIR, LYRICS_DIR))
+        self.watcher.changed.connect(self.directories_changed)
+
+        # The metadata of new files is read by worker processes
+        # and collected here, a batch at a time
+        self.length_order: Optional[bool] = None
+        self.prober = ProbePool(SONGS_DIR)
+        self.probe_timer = QTimer(self)
+        self.probe_timer.setInterval(250)
+        self.probe_timer.timeout.connect(self.collect_probes)
+        self.probe_library()
+        # So is the loudness of every song, once. Each song is then played
+        # at the same loudness on top of the user's volume
+        self.analyzer = AnalysisPool(SONGS_DIR)
+        self.analysis_timer = QTimer(self)
+        self.analysis_timer.setInterval(1000)
+        self.analysis_timer.timeout.connect(self.collect_analysis)
+        self.analyze_library()
+        self.transcode(leftovers)
+
+        self.sync_ticker()
         logger.info(f"{get_datetime()} {get_message(lang, 'init_complete_msg')}")
 
     def closeEvent(self, event: Any) -> None:
@@ -245,11 +376,61 @@ class MainWindow(QMainWindow):
         # the song (- set_behind seconds) is saved
         lang = get_active_language()
         set_behind = 2
-        timestamp = float(f"{self.sound.time:.2f}")
+        timestamp = float(f"{self.engine.time:.2f}")
         timestamp -= set_behind
         config.edit('last_song', {'song': self.player.disk.song_mp3, 'timestamp': timestamp})
+        # No tick may run into what is closed below
+        self.ticker.stop()
+        self.watcher.stop()
+        self.probe_timer.stop()
+        self.prober.shutdown()
+        self.analysis_timer.stop()
+        self.analyzer.shutdown()
+        self.transcode_timer.stop()
+        self.transcoder.shutdown()
+        self.jobs.shutdown()
+        self.downloads.close()
+        self.download_jobs.shutdown()
+        self.song_jobs.shutdown()
+        prefetcher = self.engine.prefetcher
+        logger.debug(f"{get_datetime()} Prefetch: {prefetcher.hits} hits, "
+                     f"{prefetcher.misses} misses")
+        self.engine.close()
+        logger.debug(f"{get_datetime()} Playback resources left: {self.engine.stats}")
+        if self.pcm_cache is not None:
+            logger.debug(f"{get_datetime()} Decoded audio cache: {self.pcm_cache.stats}")
+        self.seek_indexes.save()
+        self.library.close()
+        config.flush()
+        logger.debug(f"{get_datetime()} Tick widget updates: {self.view.stats}")
+        self.profiler.dump(PROFILE_FILE, f"{get_datetime()} {self.window_title}")
         logger.info(f"{get_datetime()} {get_message(lang, 'app_terminated_msg')}")
 
+    def showEvent(self, event: Any) -> None:
+        super().showEvent(event)
+        self.sync_ticker()
+
+    def hideEvent(self, event: Any) -> None:
+        super().hideEvent(event)
+        self.sync_ticker()
+
+    def changeEvent(self, event: Any) -> None:
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self.sync_ticker()
+
+    def sync_ticker(self) -> None:
+        """Let the ticker know if the song plays and if the window can be seen
+        """
+        visible = self.isVisible() and not self.isMinimized()
+        self.ticker.set_state(bool(self.player), visible)
+
+    def refresh(self) -> None:
+        """Refresh the UI once if there are no ticks running (paused player)
+        """
+        if self.ticker.mode == 'paused':
+            self.ticker.refresh()
+
     def _load_btns(self) -> None:
         self.prev_btn = self.findChild(QPushButton, 'prev_btn')
         self.next_btn = self.findChild(QPushButton, 'next_btn')
@@ -284,7 +465,10 @@ class MainWindow(QMainWindow):
         self.search_ln.setStyleSheet(lineedit_style)
 
     def _load_sliders(self) -> None:
-        self.song_slider = self.findChild(QSlider, 'music_prog_bar')
+        slider = self.findChild(QSlider, 'music_prog_bar')
+        # The waveform slider may get the id of the deleted one
+        self.view.forget(slider)
+        self.song_slider = WaveformSlider.replace(slider)
         self.volume_bar = self.findChild(QSlider, 'volume_bar')
 
     def _load_labels(self) -> None:
@@ -336,17 +520,35 @@ class MainWindow(QMainWindow):
         :type seconds: int
         """
         self.is_pressed = False
-        self.sound.seek(seconds)
+        # The user moved the slider, the next tick pushes its position again
+        self.view.forget(self.song_slider)
+        self.seek(seconds)
+        self.refresh()
 
     def _load_lists(self) -> None:
-        self.music_container = self.findChild(QListWidget, 'music_container')
+        self.music_container = self.findChild(QListView, 'music_container')
+        # The view asks the model for the rows it shows only, with uniform
+        # rows it never measures the others. Long names are elided, the tooltip has them.
+        # The rows are laid out in batches between events, a big disk never freezes the window
+        self.song_model = SongListModel(self.player.disk, self)
+        # A search shows its hits only, best first (see `search_song`)
+        self.song_filter = SongFilterModel(self.song_model, self)
+        self.music_container.setModel(self.song_filter)
+        self.music_container.setUniformItemSizes(True)
+        self.music_container.setLayoutMode(QListView.Batched)
+        self.music_container.setBatchSize(1000)
+        self.music_container.setTextElideMode(Qt.ElideRight)
 
         self.music_container.setStyleSheet(
             f"background-color: rgba(255, 255, 255, 0); color: {THEMECLR};"
         )
-        self.music_container.setWordWrap(True)
         self.music_container.setSpacing(3)
 
+    def _select_row(self, row: int) -> None:
+        # A song that is filtered out by the search is not selected
+        self.music_container.setCurrentIndex(self.song_filter.mapFromSource(
+            self.song_model.index(row)))
+
     def _load_status_bar(self) -> None:
         self.status_bar = self.findChild(QStatusBar, 'statusbar')
         self.time1_inp = StatusBarTimeEdit(self, str(self.timestamp_start))
@@ -369,6 +571,11 @@ class MainWindow(QMainWindow):
         self.status_bar.addWidget(self.go_end_timestamp)
         self.status_bar.addWidget(self.cancel_btn)
         self.status_bar.addWidget(self.action_lbl)
+        self.probe_lbl = QLabel(self)
+        self.probe_lbl.hide()
+        self.status_bar.addPermanentWidget(self.probe_lbl)
+        self.jobs_btn = JobsButton(self, self.jobs, self.download_jobs)
+        self.status_bar.addPermanentWidget(self.jobs_btn)
 
         self.action_lbl.setStyleSheet(action_lbl_style)
 
@@ -385,19 +592,17 @@ class MainWindow(QMainWindow):
         try:
             seconds = time_to_total_seconds(time) / 60 - subtract
         except ValueError:
-            seconds = self.sound.time
+            seconds = self.engine.time
             self._show_popup(get_message(lang, 'invalid_timestamp'))
         finally:
             return seconds
 
     def _fill_list_widget(self) -> None:
-        """Fill the list widget where all the songs are listed with
-        the content of `self.player.disk`
+        """Show `self.player.disk` in the list where all the songs are listed
         """
-        self.music_container.clear()
-        for song in self.player.disk:
-            self.music_container.addItem(song)
-        self.music_container.setCurrentRow(self.player.disk.song_index)
+        if self.song_model.disk is not self.player.disk:
+            self.song_model.set_disk(self.player.disk)
+        self._select_row(self.player.disk.song_index)
 
     def search_in(self, site: str) -> None:
         search = search_for(site, self.player.disk.song_name)
@@ -444,6 +649,7 @@ class MainWindow(QMainWindow):
 
     def actions(self):
         actions = ActionsWindow(self, ACTIONS_DIR)
+        actions.actions_changed.connect(self.update_actions)
         actions.set_up(self.window_title)
 
         if actions.accepted():
@@ -457,7 +663,7 @@ class MainWindow(QMainWindow):
             self._show_popup(msg)
 
     def apply_action(self, state: State):
-        name, _, playback, mute, volume, _ = state
+        name, playback, mute, volume = state.name, state.playback, state.mute, state.volume
 
         if playback and not self.player._is_playing or not playback and self.player._is_playing:
             self.play_btn_switcher()
@@ -475,18 +681,66 @@ class MainWindow(QMainWindow):
         self._show_popup(msg)
         logger.success(f"{dt} {msg}")
 
-    def check_actions(self):
-        actions = ActionsWindow(self, ACTIONS_DIR)
-        for action in actions.get():
-            dt = ActionsWindow.dt_to_action_dt(datetime.datetime.now())
-            action_dt = ActionsWindow.string_to_dt(action.datetime)
-            if dt == action_dt and not action.applied:
-                self.apply_action(action)
-                actions.mark_applied(action)
+    def update_actions(self, state: State, deleted: bool) -> None:
+        if deleted:
+            self.scheduler.remove(state.name)
+        else:
+            self.scheduler.add(state)
+        self.arm_actions()
+
+    def arm_actions(self) -> None:
+        """Start the actions timer for the next due action. Long waits are split
+        so a changed system clock or a suspend is noticed within `max_wait` seconds
+        """
+        max_wait = 600
+        seconds = self.scheduler.seconds_until_next()
+        if seconds is None:
+            self.actions_timer.stop()
+        else:
+            self.actions_timer.start(int(min(seconds, max_wait) * 1000))
+
+    def run_actions(self) -> None:
+        start = time.perf_counter()
+        for action in self.scheduler.pop_due():
+            self.apply_action(action)
+        self.arm_actions()
+        self.profiler.record('actions', (time.perf_counter() - start) * 1000)
 
     def small_step(self, step: int) -> None:
         current_seconds = self.song_slider.value() / 60
-        self.sound.seek(current_seconds + step)
+        self.seek(current_seconds + step)
+        self.refresh()
+
+    def seek(self, seconds: float) -> None:
+        start = time.perf_counter()
+        self.engine.seek(seconds)
+        logger.debug(f"{get_datetime()} Seek to {seconds:.1f} s: "
+                     f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def _reopen(self, path: str, seconds: float) -> Optional[Tuple[Any, float]]:
+        """Seek an MP3 song by opening its decoder right at the frame of the time,
+        through its seek index, or the table of contents of its tag until the index
+        is built. Other songs are left to their decoder
+
+        :param path: The path of the song
+        :type path: str
+        :param seconds: Where to go in the song
+        :type seconds: float
+        :return: The new decoder and the seconds of its audio before the time
+        :rtype: Optional[Tuple[Any, float]]
+        """
+        if not path.lower().endswith('.mp3'):
+            return None
+        index = self.seek_indexes.get(path)
+        try:
+            if index is None:
+                index = read_toc(path)
+            if index is None:
+                return None
+            return open_at(path, index, seconds, pyglet.media.load)
+        except (OSError, MP3Error) as err:
+            logger.debug(f"{get_datetime()} No indexed seek in {path}: {err}")
+            return None
 
     def valid_timestamps(self, time1: datetime.timedelta, time2: datetime.timedelta) -> bool:
         return time1 < time2
@@ -515,8 +769,23 @@ class MainWindow(QMainWindow):
         lang = get_active_language()
         message = get_message(lang, 'song_exported', SONGS_DIR, '->', config['download_dir'])
         logger.debug(message)
-        export_song(SONGS_DIR, self.player.disk.song_mp3, config['download_dir'])
-        self._show_popup(get_message(lang, 'song_exported'))
+        song_mp3, target_dir = self.player.disk.song_mp3, config['download_dir']
+        self.jobs.submit(get_message(lang, 'export_song', song_mp3),
+                         lambda job: export_song(SONGS_DIR, song_mp3, target_dir),
+                         done=lambda job: self._export_finished(job))
+
+    def _export_finished(self, job: Job) -> None:
+        if self._job_succeeded(job):
+            self._show_popup(get_message(get_active_language(), 'song_exported'))
+
+    def _job_succeeded(self, job: Job) -> bool:
+        lang = get_active_language()
+        if job.state == 'failed':
+            logger.error(f"{get_datetime()} {job.name}: {job.error!r}")
+            self._show_popup(get_message(lang, 'job_failed', job.name))
+        elif job.state == 'cancelled':
+            logger.warning(f"{get_datetime()} {get_message(lang, 'job_cancelled', job.name)}")
+        return job.state == 'done'
 
     def rename_song(self) -> None:
         lang = get_active_language()
@@ -528,6 +797,8 @@ class MainWindow(QMainWindow):
         lyrics_file = f"{song_name}.srt"
         if new_name and q:
             rename(SONGS_DIR, song_name, new_name, '.mp3', self.forbidden_chars)
+            new_mp3 = f"{filter_song_name(new_name, self.forbidden_chars)}.mp3"
+            delta = self.library.rename(f"{song_name}.mp3", new_mp3)
             rename_info = get_message(lang, 'rename_song', song_name, '->', new_name)
             logger.info(rename_info)
             if os.path.exists(os.path.join(LYRICS_DIR, lyrics_file)):
@@ -538,9 +809,8 @@ class MainWindow(QMainWindow):
                     config.remove_key(key)
                     config.add(key, value)
 
-            self.update_song_list(get_song_list(SONGS_DIR), deletion=True)
+            self.apply_library_delta(delta)
             self._show_popup(get_message(lang, 'renamed_popup'))
-            self.prev_song()
 
     def change_download_dir(self) -> None:
         prev_dir = config['download_dir']
@@ -558,15 +828,16 @@ class MainWindow(QMainWindow):
     def make_lyrics(self):
         lang = get_active_language()
         self.trim_mode = False
+        self.song_slider.set_marks()
         slider_position = self.song_slider.value()
         if not self.lyrics_mode:
-            self.timestamp_start = datetime.timedelta(seconds=slider_position)
+            self.timestamp_start = datetime.timedelta(seconds=slider_position / 60)
             self.time1_inp.setText(str(self.timestamp_start))
             self.lyrics_mode = True
             self.action_lbl.show()
             self.action_lbl.setText('Lyrics mode')
         elif self.lyrics_mode:
-            self.timestamp_stop = datetime.timedelta(seconds=slider_position)
+            self.timestamp_stop = datetime.timedelta(seconds=slider_position / 60)
             self.time2_inp.setText(str(self.timestamp_stop))
             self.lyrics_mode = False
             self.action_lbl.setText('')
@@ -586,14 +857,16 @@ class MainWindow(QMainWindow):
         self.lyrics_mode = False
         slider_position = self.song_slider.value()
         if not self.trim_mode:
-            self.timestamp_start = datetime.timedelta(seconds=slider_position)
+            self.timestamp_start = datetime.timedelta(seconds=slider_position / 60)
             self.time1_inp.setText(str(self.timestamp_start))
+            self.song_slider.set_marks(slider_position)
             self.trim_mode = True
             self.action_lbl.show()
             self.action_lbl.setText(get_message(lang, 'trim_mode'))
         elif self.trim_mode:
-            self.timestamp_stop = datetime.timedelta(seconds=slider_position)
+            self.timestamp_stop = datetime.timedelta(seconds=slider_position / 60)
             self.time2_inp.setText(str(self.timestamp_stop))
+            self.song_slider.set_marks(self.song_slider.marks[0], slider_position)
             self.trim_mode = False
             self.action_lbl.setText('')
             self.action_lbl.hide()
@@ -601,23 +874,34 @@ class MainWindow(QMainWindow):
                 title, prompt = get_message(lang, 'trim_song'), get_message(lang, 'trim_confirm')
                 q = self.askyesno(title, prompt)
                 if q:
-                    start = (self.timestamp_start.seconds / 60) * 1000  # To milliseconds
-                    stop = (self.timestamp_stop.seconds / 60) * 1000  # To milliseconds
-                    audio = AudioSegment.from_file(self.player.disk.song_path, format='mp3')
-                    extract = audio[start:stop]
-                    trimmed_name = f'{self.player.disk.song_name}-trimmed.mp3'
+                    start = self.timestamp_start.total_seconds()
+                    stop = self.timestamp_stop.total_seconds()
+                    # Songs are not all MP3 files, the trimmed one is of the same format
+                    extension = os.path.splitext(self.player.disk.song_path)[1] or '.mp3'
+                    trimmed_name = f'{self.player.disk.song_name}-trimmed{extension}'
                     export_dir = os.path.join(config['download_dir'], trimmed_name)
-                    extract.export(export_dir)
-                    import_songs([export_dir], SONGS_DIR)
-                    self.update_song_list(get_song_list(SONGS_DIR))
-                    # FIXME: This crashes if a song can't be trimmed. Show popup (self._show_popup)
-                    time_start, time_stop = f"{start / 1000:.3f}", f"{stop / 1000:.3f}"
-                    msg = get_message(lang, 'trim_success', time_start, '-', time_stop)
-                    logger.success(msg)
+                    self._start_trim(self.player.disk.song_path, export_dir, start, stop)
         else:
             msg = get_message(lang, 'trim_abort')
             logger.warning(msg)
 
+    def _start_trim(self, src: str, dst: str, start: float, stop: float) -> None:
+        def trim(job: Job) -> Tuple[float, float]:
+            times = trim_audio(src, dst, start, stop, job.report)
+            import_songs([dst], SONGS_DIR)
+            return times
+
+        name = get_message(get_active_language(), 'trim_song', os.path.basename(dst))
+        self.jobs.submit(name, trim, done=lambda job: self._trim_finished(dst, job))
+
+    def _trim_finished(self, path: str, job: Job) -> None:
+        if not self._job_succeeded(job):
+            return
+        self.apply_library_delta(self.library.refresh([os.path.basename(path)]))
+        time_start, time_stop = (f"{seconds:.3f}" for seconds in job.result)
+        msg = get_message(get_active_language(), 'trim_success', time_start, '-', time_stop)
+        logger.success(msg)
+
     def delete_lyrics(self) -> None:
         song = self.player.disk.song_name
         lang = get_active_language()
@@ -702,39 +986,83 @@ class MainWindow(QMainWindow):
         paths, _ = QFileDialog.getOpenFileNames(self, "Choose files", "", types)
         return paths
 
-    def _download_finished(self) -> None:
+    def _submit_download(self, url: str, func: Callable[..., Any], *args: Any) -> Job:
+        lang = get_active_language()
+        return self.download_jobs.submit(f"{get_message(lang, 'donwload')} {url}", func, *args,
+                                         done=self._download_finished)
+
+    def _download_finished(self, job: Job) -> None:
         lang = get_active_language()
         dt = get_datetime()
+        if job.state == 'failed':
+            logger.error(f"{dt} {job.name}: {job.error!r}")
+        elif job.state == 'cancelled':
+            logger.warning(f"{dt} {get_message(lang, 'job_cancelled', job.name)}")
+        batch = self.downloads.finished(job)
+        if batch is None:
+            # More of the batch to come, the library is updated once for all of it
+            return
+
+        self.transcode(os.path.basename(path) for path in batch.done)
+        if not len(self.downloads.queue):
+            # Parts of downloads that were cancelled or failed, nothing will resume them
+            remove_partials(DOWNLOAD_STAGING_DIR)
+        if batch.failed:
+            self._show_popup(get_message(lang, 'downloads_failed', len(batch.failed)))
+
+    def transcode(self, names: Iterable[str]) -> None:
+        """Turn downloads into songs, off the UI thread
+
+        :param names: Downloaded files in the staging directory
+        :type names: Iterable[str]
+        """
+        if self.transcoder.submit(names):
+            self.transcode_timer.start()
+            self._show_library_progress()
 
-        self.update_song_list(get_song_list(SONGS_DIR))
-        msg = get_message(lang, 'download_done')
-        logger.success(f"{dt} {msg}")
-        self._show_popup(msg)
+    def collect_transcodes(self) -> None:
+        lang = get_active_language()
+        dt = get_datetime()
+        results = self.transcoder.drain()
+        for result in results:
+            if result.error is not None:
+                logger.error(f"{dt} {get_message(lang, 'transcode_failed', result.name)}: "
+                             f"{result.error}")
+        self.transcoded += sum(result.path is not None for result in results)
+        self._show_library_progress()
+        if self.transcoder.busy:
+            return
+
+        self.transcode_timer.stop()
+        if self.transcoded:
+            self.apply_library_delta(self.library.reconcile())
+            msg = get_message(lang, 'download_done', f"({self.transcoded})")
+            logger.success(f"{dt} {msg}")
+            self._show_popup(msg)
+        self.transcoded = 0
 
     def download_audio(self) -> None:
         lang = get_active_language()
-        title, prompt = get_message(lang, 'donwload'), get_message(lang, 'donwload_prompt')
-        text, accepted = QInputDialog.getText(self, title, prompt)
+        title, prompt = get_message(lang, 'donwload'), get_message(lang, 'download_urls_prompt')
+        text, accepted = QInputDialog.getMultiLineText(self, title, prompt)
         if accepted:
-            try:
-                regex_search('(?:v=|\/)([0-9A-Za-z_-]{11}).*', text, 0)  # noqa
-            except RegexMatchError:
-                msg = get_message(lang, 'invalid_url')
-                self._show_popup(msg)
+            urls = split_urls(text)
+            if urls:
+                self.downloads.add(urls)
             else:
-                download_thread = WorkerThread(self, download_audio, text,
-                                               SONGS_DIR, self.forbidden_chars)
-                download_thread.finished.connect(lambda: self._download_finished())
-                download_thread.start()
+                self._show_popup(get_message(lang, 'invalid_url'))
 
     def search_song(self) -> None:
         text = self.search_ln.text()
-        if text:
-            songs = self.player.disk.full_song_list
-            current_index = self.player.disk.song_index
-            found_index = search_song(songs, text, current_index)
-
-            self.music_container.setCurrentRow(found_index)
+        disk = self.player.disk
+        if not tokenize(text):
+            # Nothing to search, every song is shown again
+            self.song_filter.set_hits(None)
+            self._select_row(disk.song_index)
+            return
+        songs = [hit.name for hit in self.search_index.search(text) if hit.name in disk]
+        self.song_filter.set_hits(songs)
+        self._select_row(disk.index_of(songs[0]) if songs else disk.song_index)
 
     def askyesno(self, title: str, msg: str) -> bool:
         replies = {
@@ -758,6 +1086,17 @@ class MainWindow(QMainWindow):
         else:
             raise FileNotFoundError("There is no file assigned for logging or is deleted")
 
+    def tick_stats(self) -> None:
+        w_width, w_height = 700, 400
+        lang = get_active_language()
+        report = f"{self.profiler.report()}\n\n{self.engine.stats.report()}"
+        if self.pcm_cache is not None:
+            report = f"{report}\n\n{self.pcm_cache.stats.report()}"
+        res = LogsWindow(get_message(lang, 'tick_stats'), report,
+                         w_width, w_height, QtGui.QIcon(LOGO))
+        res.setStyleSheet(res.styleSheet() + "QLabel{font-family: monospace;}")
+        res.exec_()
+
     def shortcuts_help(self) -> None:
         w_width, w_height = 280, 300
         msg = []
@@ -769,35 +1108,155 @@ class MainWindow(QMainWindow):
         res.exec_()
 
     def update_song_list(self, song_list: Tuple[str, ...], deletion: bool = False) -> None:
-        config.edit('last_song', {})
-        self.player.change_disk(get_disk(config, song_list), deletion)
+        if not deletion and songs_identity(song_list) == self.player.disk.identity:
+            # Same songs in another order, the song that plays stays the same
+            self.song_model.reorder(song_list)
+        else:
+            config.edit('last_song', {})
+            self.player.change_disk(get_disk(config, song_list), deletion)
+            # Set 'last_song' to `{}` after importing new and changing the `disk` for safety
         self._fill_list_widget()
-        # Set 'last_song' to `{}` after importing new and changing the `disk` for safety
+
+    def apply_library_delta(self, delta: LibraryDelta) -> None:
+        """Apply the changes of the library to the `Disk` and the list widget
+        in place, without rebuilding either of them
+
+        :param delta: What changed in the library
+        :type delta: LibraryDelta
+        """
+        if not delta:
+            return
+        disk = self.player.disk
+        playing = disk.song_mp3
+
+        for old, new in delta.renamed:
+            self.search_index.rename(old, new)
+            if old in disk:
+                self.song_model.rename(old, new)
+        for song in delta.removed:
+            self.search_index.remove(song)
+        for song in (*delta.added, *delta.changed):
+            self.search_index.add(song, self.library.get(song).tags)
+        self.song_model.remove(delta.removed)
+        self.song_model.add(delta.added)
+
+        if playing in delta.removed and len(disk):
+            self.next_song()
+        else:
+            self._select_row(disk.song_index)
+            if playing != disk.song_mp3:
+                self.current_playing_lbl.setText(disk.song_name)
+        counts = {field: len(value) for field, value in delta._asdict().items()}
+        logger.debug(f"{get_datetime()} Library changed: {counts}")
+        if delta.added or delta.changed:
+            self.probe_library()
+            self.analyze_library()
+        if delta.removed or delta.changed or delta.renamed:
+            self._prune_waveforms()
+
+    def _prune_waveforms(self) -> None:
+        # The peaks of songs that changed or are gone are never read again
+        paths = [os.path.join(self.library.songs_dir, song) for song in self.library.songs()]
+        self.song_jobs.submit('waveforms', lambda job: self.peak_cache.prune(paths))
+
+    def probe_library(self) -> None:
+        """Read the metadata of the songs that have not been read yet, off the UI thread
+        """
+        if self.prober.submit(self.library.unprobed()):
+            self.probe_timer.start()
+            self.collect_probes()
+
+    def collect_probes(self) -> None:
+        results = self.prober.drain()
+        stored = set(self.library.store(results))
+        for name, _, _, meta in results:
+            if name in stored:
+                self.search_index.add(name, meta.tags if meta else None)
+        if self.player.disk.song_mp3 in stored:
+            self.track = self._track_meta()
+        if stored and self.length_order is not None:
+            self._order_length(self.length_order)
+
+        if not self.prober.busy:
+            self.probe_timer.stop()
+        self._show_library_progress()
+
+    def analyze_library(self) -> None:
+        """Measure the loudness of the songs that have not been measured yet, off the UI thread
+        """
+        if self.analyzer.submit(self.library.unanalyzed()):
+            self.analysis_timer.start()
+            self._show_library_progress()
+
+    def collect_analysis(self) -> None:
+        stored = self.library.store_loudness(self.analyzer.drain())
+        if self.player.disk.song_mp3 in stored:
+            self.track_gain = self._track_gain()
+        if not self.analyzer.busy:
+            self.analysis_timer.stop()
+        self._show_library_progress()
+
+    def _show_library_progress(self) -> None:
+        lang = get_active_language()
+        if self.prober.busy:
+            progress = f"{self.prober.done}/{self.prober.total}"
+            self.probe_lbl.setText(get_message(lang, 'reading_songs', progress))
+        elif self.analyzer.busy:
+            progress = f"{self.analyzer.done}/{self.analyzer.total}"
+            self.probe_lbl.setText(get_message(lang, 'measuring_songs', progress))
+        elif self.transcoder.busy:
+            progress = f"{self.transcoder.done}/{self.transcoder.total}"
+            self.probe_lbl.setText(get_message(lang, 'transcoding_songs', progress))
+        busy = self.prober.busy or self.analyzer.busy or self.transcoder.busy
+        self.probe_lbl.setVisible(busy)
+
+    def _track_gain(self) -> float:
+        # The gain of the current song, on top of the user's volume
+        loudness = self.library.loudness(self.player.disk.song_mp3)
+        if loudness is None or not config.get('normalize_loudness', True):
+            return 1.0
+        return track_gain(loudness, config.get('reference_loudness', -18))
+
+    def _lyrics_stamp(self) -> Tuple[str, Optional[float]]:
+        path = os.path.join(LYRICS_DIR, f"{self.player.disk.song_name}{Renderer.EXTENSION}")
+        return path, os.path.getmtime(path) if os.path.exists(path) else None
+
+    def directories_changed(self, paths: Tuple[str, ...]) -> None:
+        if SONGS_DIR in paths:
+            self.apply_library_delta(self.library.reconcile())
+        # Only the lyrics of the current song matter. Anything else (like
+        # the placeholder file for songs without lyrics) is ignored
+        if LYRICS_DIR in paths and (stamp := self._lyrics_stamp()) != self.lyrics_stamp:
+            self.lyrics_stamp = stamp
+            self.lyrics = Renderer(get_lyrics_file(LYRICS_DIR, self.player, Renderer.EXTENSION))
+            self.refresh()
 
     def import_songs(self) -> None:
         paths = self._file_explorer_many_files(SUPPORTED_SONG_FORMATS)
-        import_songs(paths, SONGS_DIR)
-        self.update_song_list(get_song_list(SONGS_DIR))
+        if not paths:
+            return
+        self.jobs.submit(get_message(get_active_language(), 'import_songs', len(paths)),
+                         lambda job: import_songs(paths, SONGS_DIR, job.report),
+                         done=lambda job: self._import_finished(paths, job))
+
+    def _import_finished(self, paths: List[str], job: Job) -> None:
+        # What was copied before a failure or a cancel is in the library too
+        self._job_succeeded(job)
+        delta = self.library.refresh(os.path.basename(path) for path in paths)
+        self.apply_library_delta(delta)
 
     def _order_shuffle_playlist(self) -> None:
-        songs = list(get_song_list(SONGS_DIR))
+        songs = list(self.library.songs())
         random.shuffle(songs)
         self.update_song_list(tuple(songs))
 
     def _order_alphabetical(self) -> None:
-        songs = tuple(sorted(get_song_list(SONGS_DIR), key=lambda i: i[0]))
-        self.update_song_list(songs)
+        self.update_song_list(self.library.songs())
 
     def _order_length(self, reverse: bool) -> None:
-        songs = get_song_list(SONGS_DIR)
-
-        song_objs: List[Tuple[TinyTag, str]] = []
-        for song in songs:
-            path = os.path.join(SONGS_DIR, song)
-            song_objs.append((TinyTag.get(path), song))
-
-        sorted_songs = sorted(song_objs, key=lambda i: i[0].duration, reverse=reverse)
-        self.update_song_list(tuple(map(lambda i: i[1], sorted_songs)))
+        # Songs are sorted again as their lengths are read
+        self.length_order = reverse
+        self.update_song_list(self.library.songs('length', reverse))
 
     def order_by(self, option: Literal['shuffle', 'alphabetical', 'length', 'original'],
                  *args: Any, **kwargs: Any) -> None:
@@ -805,8 +1264,9 @@ class MainWindow(QMainWindow):
             'shuffle': self._order_shuffle_playlist,
             'alphabetical': self._order_alphabetical,
             'length': self._order_length,
-            'original': lambda: self.update_song_list(get_song_list(SONGS_DIR))
+            'original': lambda: self.update_song_list(self.library.songs())
         }
+        self.length_order = None
         options[option](*args, **kwargs)
 
     def delete_song(self) -> None:
@@ -821,15 +1281,15 @@ class MainWindow(QMainWindow):
                          get_message(lang, 'delete_song_prompt', song))
 
         reply = self.askyesno(title, prompt)
-        if reply and len(os.listdir(SONGS_DIR)) > 2:
+        if reply and len(self.library) > 1:
             to_delete = self.player.disk.song_mp3
+            key = get_delay_key(self.player.disk)
             delete_song(SONGS_DIR, to_delete)
-            self.update_song_list(get_song_list(SONGS_DIR), deletion=True)
-            self.next_song()
+            # Removing the song that plays moves the player to the next one
+            self.apply_library_delta(self.library.remove(to_delete))
             log = get_message(lang, 'song_deleted', f"`{song}`")
             logger.success(log)
             self._show_popup(log)
-            key = get_delay_key(self.player.disk)
             if key in config:
                 config.remove_key(key)
                 log = f"{dt} {get_message('language', 'delay_unset', song)}"
@@ -839,22 +1299,96 @@ class MainWindow(QMainWindow):
 
     def display_lyric(self, line: Union[str, None]) -> None:
         if line is not None:
-            self.lyrics_lbl.setText(line)
+            self.view.set_text(self.lyrics_lbl, line)
         else:
-            self.lyrics_lbl.setText("")
+            self.view.set_text(self.lyrics_lbl, "")
 
     def update_song(self) -> None:
+        start = time.perf_counter()
+        path = self.player.disk.song_path
+        self._song_changed()
+
+        # The source of the song that played is released here
+        how = self.engine.open(path)
+        self.engine.play() if self.player else self.engine.pause()
+        self.engine.prepare(self.player.disk.next_song_path)
+        logger.debug(f"{get_datetime()} Track change ({how}): "
+                     f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        self.sync_ticker()
+        self.refresh()
+
+    def _track_meta(self) -> TrackMeta:
+        # Read off the UI thread by `self.prober`, empty until then (see `collect_probes`)
+        meta = self.library.meta(self.player.disk.song_mp3)
+        return TrackMeta(0.0, 0.0, 0, {}) if meta is None else meta
+
+    def _song_changed(self) -> None:
+        # Everything that follows the song of the disk, but the audio
         self.current_playing_lbl.setText(self.player.disk.song_name)
-        self.music_container.setCurrentRow(self.player.disk.song_index)
-
-        self.sound = pyglet.media.Player()
-        self.current_song = pyglet.media.load(self.player.disk.song_path)
+        self._select_row(self.player.disk.song_index)
 
+        self.track = self._track_meta()
+        self.track_gain = self._track_gain()
         self.lyrics = Renderer(get_lyrics_file(LYRICS_DIR, self.player, Renderer.EXTENSION))
+        self.lyrics_stamp = self._lyrics_stamp()
+        self._load_seek_index()
+        self._load_waveform()
+
+    def _load_waveform(self) -> None:
+        # The waveform of the previous song is not needed any more
+        if self.waveform_job is not None:
+            self.waveform_job.cancel()
+        path = self.player.disk.song_path
+        self.song_slider.set_peaks(self.peak_cache.get(path))
+        if self.song_slider.peaks is not None:
+            self.waveform_job = None
+            return
+        self.waveform_job = self.song_jobs.submit(
+            path, lambda job: self.peak_cache.load(path, pyglet.media.load, job.report),
+            done=lambda job: self._waveform_loaded(path, job)
+        )
 
-        self.sound.queue(self.current_song)
+    def _load_seek_index(self) -> None:
+        # Built once per file by walking its frames, then kept in `self.seek_indexes`
+        if self.seek_index_job is not None:
+            self.seek_index_job.cancel()
+            self.seek_index_job = None
+        path = self.player.disk.song_path
+        if not path.lower().endswith('.mp3') or self.seek_indexes.get(path) is not None:
+            return
+        self.seek_index_job = self.song_jobs.submit(
+            path, lambda job: build_index(path, report=job.report),
+            done=lambda job: self._seek_index_built(path, job)
+        )
 
-        self.sound.play() if self.player else self.sound.pause()
+    def _seek_index_built(self, path: str, job: Job) -> None:
+        if job.state == 'failed':
+            # Its seeks are left to the decoder
+            logger.debug(f"{get_datetime()} No seek index for {path}: {job.error}")
+        elif job.state == 'done' and os.path.exists(path):
+            self.seek_indexes.put(path, job.result)
+
+    def _waveform_loaded(self, path: str, job: Job) -> None:
+        if job.state == 'failed':
+            # The slider stays plain, the song may still play
+            logger.debug(f"{get_datetime()} No waveform for {path}: {job.error}")
+        elif job.state == 'done' and path == self.player.disk.song_path:
+            self.song_slider.set_peaks(job.result)
+
+    def follow_tracks(self) -> None:
+        """Move the disk to the next song once the player went on to it, the audio
+        did so already without a gap. Then queue the song after it behind it
+        """
+        ended = self.engine.follow()
+        if ended:
+            self.edit_modes_off()
+            for _ in ended:
+                self.player.disk.next()
+            self._song_changed()
+            # The audio changed track on time, this is how late the window followed
+            late = self.engine.time * 1000
+            logger.debug(f"{get_datetime()} Track change (gapless): {late:.1f} ms late")
+        self.engine.prepare(self.player.disk.next_song_path)
 
     def set_lyrics_delay(self) -> None:
         lang = get_active_language()
@@ -866,6 +1400,7 @@ class MainWindow(QMainWindow):
     def edit_modes_off(self) -> None:
         self.trim_mode = False
         self.lyrics_mode = False
+        self.song_slider.set_marks()
         self.time1_inp.setText('0:00:00')
         self.time2_inp.setText('0:00:00')
         self.action_lbl.setText('')
@@ -881,17 +1416,21 @@ class MainWindow(QMainWindow):
         self.player.disk.prev()
         self.update_song()
 
-    def manual_pick(self, music_container: QListWidget) -> None:
+    def manual_pick(self, music_container: QListView) -> None:
         self.edit_modes_off()
-        self.player.disk.user_pick(music_container.currentRow())
+        row = self.song_filter.mapToSource(music_container.currentIndex()).row()
+        if row < 0:
+            return
+        self.player.disk.user_pick(row)
         self.update_song()
 
     def play_btn_switcher(self) -> str:
         self.player.playing()
         img = PAUSE_BTN if self.player else PLAY_BTN
 
-        self.sound.play() if self.player else self.sound.pause()
+        self.engine.play() if self.player else self.engine.pause()
         self.play_btn.setIcon(QtGui.QIcon(img))
+        self.sync_ticker()
         return img
 
     def volume_control(self, volume: int) -> None:
@@ -899,54 +1438,78 @@ class MainWindow(QMainWindow):
 
         self.volume_lbl.setText(f"Vol: {volume}")
         if not self.player.is_muted:
-            self.sound.volume = self.player.volume / 100
+            self.view.set(self.engine, 'volume', self.player.volume / 100 * self.track_gain,
+                          lambda v: setattr(self.engine, 'volume', v))
         #                                          ^^^^^
-        # This is because self.sound.volume accepts
+        # This is because self.engine.volume accepts
         # values from 0.0 - 1.0 but I want to display 0 - 100
         # Example: displayed = 50; 50 / 100 = 0.5
 
     def helper_update_slider(self, slider: QSlider, x: int) -> None:
-        # # Update slider's position every ms that ellapses
-        slider.tracking = True
-        slider.setValue(x)
-        slider.sliderPosition = x
-        slider.update()
-        slider.repaint()
+        # Update slider's position every ms that ellapses. `setValue` only
+        # schedules a repaint if the position really changed
+        self.view.set_value(slider, x)
 
     def update(self) -> None:
-        tag = TinyTag.get(self.player.disk.song_path)
-        total_time = tag.duration
-        total_seconds = total_time * 60
-        self.song_slider.setRange(0, total_seconds)  # Set the total steps of the slider
+        # Every phase is timed by `self.profiler` (Logs -> Tick stats)
+        self.profiler.begin()
+        self.view.begin_tick()
+        # May move to the next song, before anything of the song is read
+        self.follow_tracks()
+        self.profiler.lap('tracks')
+        # The length of the song by its decoder, the metadata's estimate until it's open
+        total_time = self.engine.length or self.track.duration
+        total_seconds = int(total_time * 60)
         # Current time. Use this for the slider update
-        current_time = self.sound.time
+        current_time = self.engine.time
         current_seconds = current_time * 60
+        self.profiler.lap('metadata')
 
-        self.check_actions()
+        self.view.set_range(self.song_slider, 0, total_seconds)  # Set the total steps of the slider
         if not self.is_pressed:
             # When the slider is pressed, stop updating the progres bar automaticaly so we can
             # set it where it will be released
-            self.helper_update_slider(self.song_slider, current_seconds)
+            self.helper_update_slider(self.song_slider, int(current_seconds))
+        self.profiler.lap('slider')
 
-        if current_time >= total_time:
+        if current_time >= total_time and not self.engine.upcoming:
+            # Nothing to play gaplessly (not opened yet or another audio format)
             self.next_song()
+        self.profiler.lap('next_song')
 
-        seconds_to_minute_format = datetime.timedelta(seconds=current_time)
-        # total_time_to_minute is used for the slider steps
-        total_time_to_minute = str(datetime.timedelta(seconds=total_time))
-
-        if not self.player.is_muted:
-            self.volume_control(self.volume_bar.value())
-        elif self.player.is_muted:
-            self.sound.volume = 0
+        # The volume itself is set by `volume_control` when the user changes it,
+        # the tick only keeps the player in sync
+        volume = 0 if self.player.is_muted else self.player.volume / 100 * self.track_gain
+        self.view.set(self.engine, 'volume', volume, lambda v: setattr(self.engine, 'volume', v))
+        self.profiler.lap('volume')
 
         delay_key = get_delay_key(self.player.disk)
-        lyric_line = self.lyrics.get_line(seconds_to_minute_format, config.get(delay_key))
+        delay = config.get(delay_key) or 0
+        self.profiler.lap('delay')
+
+        lyric_line = self.lyrics.get_line_at(current_time, delay)
         self.display_lyric(lyric_line)
 
-        self.total_time_lbl.setText(total_time_to_minute)
+        # Wake up exactly when the lyrics line changes or the song ends
+        # in case the regular tick would be late for it. Past the end the next
+        # song is followed by the regular tick, there's nothing left to wake up for
+        current_ms = current_time * 1000
+        wakes = [(total_time * 1000) - current_ms]
+        boundary = self.lyrics.next_boundary(round(current_ms - delay * 1000))
+        if boundary is not None:
+            wakes.append(boundary + delay * 1000 - current_ms)
+        wakes = [wake for wake in wakes if wake > 0]
+        self.ticker.wake_in(min(wakes) if wakes else None)
+        self.profiler.lap('lyrics')
+
+        seconds_to_minute_format = datetime.timedelta(seconds=current_time)
+        # total_time_to_minute is used for the slider steps
+        total_time_to_minute = str(datetime.timedelta(seconds=total_time))
+        self.view.set_text(self.total_time_lbl, total_time_to_minute)
 
         current_time_text = str(seconds_to_minute_format)
         if '.' in current_time_text:
             current_time_text = current_time_text[:current_time_text.index('.') + 3]
-            self.current_time_lbl.setText(current_time_text)
+            self.view.set_text(self.current_time_lbl, current_time_text)
+        self.profiler.lap('labels')
+        self.profiler.end()